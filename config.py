@@ -10,12 +10,24 @@ BASE_DIR = Path(__file__).parent
 
 # 数据库配置
 DATABASE_CONFIG = {
+    'backend': os.environ.get('UNDERWATER_DB_BACKEND', 'mysql'),  # mysql / sqlite（离线或CI环境可用sqlite）
+    'sqlite_path': os.environ.get('UNDERWATER_SQLITE_PATH', str(BASE_DIR / 'data' / 'underwater_detection.db')),
     'host': 'localhost',
     'port': 3306,
     'user': 'root',
     'password': '051128',  # 请修改为实际密码
     'database': 'underwater_detection',
-    'charset': 'utf8mb4'
+    'charset': 'utf8mb4',
+    'auto_migrate': True  # 启动时自动执行待执行的结构迁移；False 时需手动运行 python -m services.migrations upgrade
+}
+
+# 数据库连接池配置
+DATABASE_POOL_CONFIG = {
+    'min_size': 1,  # 启动时预先建立的连接数
+    'max_size': 10,  # 最大连接数
+    'timeout': 10,  # 连接池耗尽时的最长等待时间（秒）
+    'recycle': 3600,  # 连接最长存活时间（秒），超过后重建，避免被服务器 wait_timeout 断开
+    'health_check_interval': 30  # 空闲超过该时间（秒）的连接在取出时先 ping 检查，0 表示每次都检查
 }
 
 # 路径配置
@@ -39,6 +51,37 @@ YOLO_CONFIG = {
     'classes': ['fish', 'coral', 'turtle', 'shark', 'jellyfish', 'dolphin', 'submarine', 'diver']
 }
 
+# 后台批量写入配置（推理日志等）
+BATCH_WRITER_CONFIG = {
+    'batch_size': 200,  # 累计多少条记录写入一次
+    'flush_interval': 2.0,  # 最长缓冲时间（秒）
+    'max_queue': 10000  # 队列容量，满后丢弃新记录并计数
+}
+
+# 系统日志入库配置（system/auth/inference/training 日志写入 system_logs 表）
+DB_LOG_CONFIG = {
+    'enabled': True,
+    'level': 'INFO',  # 入库的最低日志级别
+    'loggers': ['system', 'auth', 'inference', 'training'],
+    'rate_limit': 20,  # 每秒平均入库条数，超出部分丢弃并汇总为一条告警
+    'burst': 100,  # 允许的突发条数
+    'max_message_length': 4000  # 消息（含异常堆栈）最大长度
+}
+
+# 逐目标检测记录入库配置（detections 表）
+DETECTION_STORE_CONFIG = {
+    'enabled': True,
+    'batch_size': 1000,  # 每次多行插入的记录数
+    'flush_interval': 2.0,
+    'max_queue': 100000  # 视频高峰期的缓冲容量
+}
+
+# 逐帧检测结果导出配置
+DETECTION_EXPORT_CONFIG = {
+    'chunk_size': 50000,  # 每个分块最多缓存的检测记录数（决定内存上限）
+    'compress': False  # 是否压缩分块文件（节省磁盘，写入更慢）
+}
+
 # 训练配置
 TRAINING_CONFIG = {
     'epochs': 100,
@@ -49,6 +92,65 @@ TRAINING_CONFIG = {
     'patience': 50
 }
 
+# 训练图片缓存配置
+IMAGE_CACHE_CONFIG = {
+    'enabled': True,  # 训练前把数据集图片缩放到训练图像大小并缓存（CPU 训练时解码和缩放原始大图是每轮的主要耗时）
+    'cache_dir': DATA_DIR / 'image_cache',  # 缓存目录，按数据集路径和图像大小分子目录
+    'format': 'auto',  # 缓存图片格式：auto（JPEG 源图片缓存为 jpg，无损格式缓存为 png）、jpg（全部有损重新编码，体积小）或 png
+    'jpeg_quality': 95,  # jpg 缓存的编码质量（JPEG 源图片缩放后重新编码）
+    'workers': None  # 构建缓存的线程数，None 为 CPU 核心数
+}
+
+# 标注文件检查配置
+LABEL_SANITIZE_CONFIG = {
+    'dry_run': False,  # True 时只生成报告，不删除无效标注行
+    'index_dir': DATA_DIR / 'label_index',  # 已检查文件的索引（大小+修改时间），未变化的文件不再读取
+    'report_dir': LOGS_DIR / 'label_reports',  # 发现无效标注时写入的 JSON 报告
+    'workers': None,  # 并行检查的进程数，None 为 CPU 核心数
+    'parallel_threshold': 2000,  # 待检查文件数达到该值时才启用多进程
+    'chunk_size': 1000  # 每个进程任务处理的文件数
+}
+
+# 训练工作进程配置
+TRAINING_WORKER_CONFIG = {
+    'enabled': True,  # 是否在独立子进程中训练（训练崩溃不影响主窗口，不与界面/实时检测争用 GIL）
+    'reserved_cores': 2,  # 未指定 cpu_cores 时，留给主进程（界面、实时检测）的 CPU 核心数
+    'cpu_cores': None,  # 训练进程绑定的 CPU 核心编号列表，None 为除保留核心外的全部核心
+    'num_threads': None,  # 训练进程的计算线程数（torch/OpenMP/MKL），None 为绑定的核心数
+    'poll_interval': 0.5,  # 主进程等待进度消息时检查子进程存活的间隔（秒）
+    'exit_timeout': 60  # 主程序退出时等待训练进程完成本轮、保存检查点的时间（秒），超时后强制结束
+}
+
+# 超参数搜索配置（异步逐次减半 ASHA，训练轮数作为预算）
+SWEEP_CONFIG = {
+    'num_trials': 9,  # 采样的超参数组合数
+    'min_epochs': 3,  # 第一级（所有组合）的训练轮数
+    'max_epochs': 27,  # 最高一级的累计训练轮数
+    'reduction_factor': 3,  # 每级只把前 1/reduction_factor 的组合晋级，晋级后累计轮数 × reduction_factor
+    'parallel': 1,  # 同时训练的组合数（各自在独立训练进程中运行，CPU 核心平均分配）
+    'warmup_epochs': 1.0,  # 第一级的学习率预热轮数（须小于 min_epochs；之后各级从上一级权重继续，不再预热）
+    'auto_register': True,  # 搜索完成后把最优组合的权重注册到模型管理器
+    'search_space': {  # 列表为候选值，字典为 [low, high] 区间（log 为对数均匀采样）
+        'lr': {'low': 0.0005, 'high': 0.05, 'log': True},
+        'batch_size': [8, 16, 32],
+        'img_size': [320, 480, 640]
+    }
+}
+
+# 训练任务队列配置
+TRAINING_QUEUE_CONFIG = {
+    'enabled': True,  # 是否启动后台调度线程执行排队的训练任务
+    'max_concurrent': 1,  # 同时运行的训练数（槽位数，训练窗口直接启动的训练也占用一个槽位；训练进程可用的 CPU 核心平均分给各槽位）
+    'poll_interval': 5.0,  # 调度轮询间隔（秒），同时刷新运行中任务的心跳
+    'heartbeat_timeout': 120,  # 运行中任务超过该时间（秒）无心跳视为进程已退出，重新排队
+    'eta_history': 50  # 估算排队任务耗时时参考的最近训练轮数
+}
+
+# 训练过程遥测配置
+TRAINING_TELEMETRY_CONFIG = {
+    'batch_interval': 0.5  # 批次进度最短推送间隔（秒），逐轮指标每轮推送并写入 training_metrics
+}
+
 # 系统配置
 SYSTEM_CONFIG = {
     'device': 'cpu',  # cuda / cpu
@@ -57,6 +159,86 @@ SYSTEM_CONFIG = {
     'log_level': 'INFO'
 }
 
+# 会话配置
+SESSION_CONFIG = {
+    'secret_key': os.environ.get('UNDERWATER_SESSION_SECRET'),  # 令牌签名密钥，未设置时自动生成并保存到 secret_key_file
+    'secret_key_file': DATA_DIR / 'session.key',
+    'token_ttl': 8 * 3600,  # 令牌有效期（秒）
+    'user_cache_ttl': 60  # 用户/角色缓存有效期（秒），即其他进程修改用户后的最大可见延迟
+}
+
+# 模型目录缓存配置
+MODEL_CACHE_CONFIG = {
+    'enabled': True,  # 是否缓存模型目录
+    'version_check_interval': 5,  # 检查数据库版本号的间隔（秒），即其他进程修改后的最大可见延迟
+    'ttl': 300  # 缓存最长有效期（秒），版本号不可用时的兜底
+}
+
+# 汇总表配置
+ROLLUP_CONFIG = {
+    'enabled': True,  # 是否在后台定期汇总推理/训练日志
+    'interval': 60,  # 汇总间隔（秒）
+    'batch_size': 5000,  # 每批读取的原始日志行数
+    'lag': 5  # 只汇总早于当前时间若干秒的记录，避免遗漏尚未提交的并发写入
+}
+
+# 日志保留与归档配置
+RETENTION_CONFIG = {
+    'enabled': True,  # 是否在后台定期清理过期日志
+    'interval': 6 * 3600,  # 清理间隔（秒）
+    'archive_dir': str(DATA_DIR / 'archive'),  # 归档目录（gzip 压缩的 CSV）
+    'batch_size': 1000,  # 每批删除的行数（单批事务小，不长时间锁表）
+    'batch_pause': 0.2,  # 批次之间的间隔（秒），降低对在线业务的影响
+    'mysql_partitioning': False,  # MySQL 已按月分区的表直接 DROP PARTITION（分区需先运行 python -m services.retention_service partition <表名>）
+    'partition_months_ahead': 2,  # 预先创建的未来月份分区数
+    # 表名 -> 保留策略（days: 保留天数，archive: 删除前是否归档）
+    'policies': {
+        'login_logs': {'time_column': 'login_time', 'days': 180, 'archive': True},
+        'inference_logs': {'time_column': 'created_at', 'days': 180, 'archive': True},
+        'detections': {'time_column': 'created_at', 'days': 90, 'archive': True},
+        'system_logs': {'time_column': 'created_at', 'days': 30, 'archive': True},
+        'training_logs': {'time_column': 'start_time', 'days': 365, 'archive': True},
+        'training_metrics': {'time_column': 'created_at', 'days': 365, 'archive': False}
+    }
+}
+
+# 日志查看器配置
+LOG_VIEWER_CONFIG = {
+    'page_size': 200  # 每次滚动加载的行数
+}
+
+# 全文搜索配置
+SEARCH_CONFIG = {
+    'limit': 100,  # 搜索结果最多返回的条数（按相关度排序）
+    'debounce_ms': 300  # 输入停止该时间（毫秒）后才执行搜索
+}
+
+# 反馈管理配置
+FEEDBACK_CONFIG = {
+    'page_size': 50,  # 反馈列表每次加载的条数
+    'detail_cache_size': 64  # 反馈管理界面缓存的反馈详情条数
+}
+
+# 日志导出配置
+LOG_EXPORT_CONFIG = {
+    'chunk_size': 5000,  # 每批从数据库读取并写入文件的行数（内存占用只与该值有关）
+    'csv_encoding': 'utf-8-sig'  # 带 BOM 的 UTF-8，Excel 可直接打开中文内容
+}
+
+# 查询性能统计配置
+QUERY_METRICS_CONFIG = {
+    'enabled': True,  # 记录每条查询的耗时、行数与调用方
+    'slow_query_threshold': 0.5,  # 慢查询阈值（秒），超过时写入 logs/slow_query_*.log
+    'max_fingerprints': 1000,  # 最多统计的不同查询指纹数，超出后归入 <其他>
+    'snapshot_path': LOGS_DIR / 'query_metrics.json'  # 进程退出时保存统计快照，供 python -m services.query_metrics 查看
+}
+
+# 启动配置
+STARTUP_CONFIG = {
+    'login_window_budget': 1.0,  # 登录窗口显示耗时预算（秒），超出时记录警告
+    'warm_up_services': True  # 登录窗口显示后在后台线程预先连接数据库
+}
+
 # UI配置
 UI_CONFIG = {
     'window_width': 1280,
@@ -76,5 +258,10 @@ LOG_CONFIG = {
     'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     'date_format': '%Y-%m-%d %H:%M:%S',
     'max_bytes': 10 * 1024 * 1024,  # 10MB
-    'backup_count': 5
+    'backup_count': 5,
+    'async': True,  # 文件/控制台输出在独立线程中进行，记录日志的线程只负责入队
+    'call_site_limit': 10,  # 同一代码位置每个周期最多输出的条数（0 表示不限制）
+    'call_site_loggers': ['inference'],  # 启用限流的日志记录器（逐帧推理路径），system/auth 等审计日志不限流
+    'call_site_interval': 1.0,  # 限流周期（秒）
+    'call_site_max_level': 'WARNING'  # 只限流该级别及以下的日志，更高级别（ERROR/CRITICAL）始终输出
 }
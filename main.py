@@ -2,18 +2,28 @@
 水下目标识别系统 - 主程序入口
 基于 Python + PyQt6 + YOLOv11 + MySQL
 """
+import multiprocessing
 import sys
+import threading
+from utils import startup_timer, system_logger
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from ui.login import LoginWindow
-from ui.main import MainWindow
-from utils import system_logger
+import config
+
+startup_timer.mark('导入模块')
 
 class Application:
     """应用程序类"""
     
-    def __init__(self):
-        """初始化应用程序"""
+    def __init__(self, startup_report: bool = False):
+        """
+        初始化应用程序
+        
+        Args:
+            startup_report: 是否在登录窗口显示后输出启动耗时报告并退出
+        """
+        self.startup_report = startup_report
         self.app = QApplication(sys.argv)
         self.app.setApplicationName('水下目标识别系统')
         self.app.setOrganizationName('Underwater Detection')
@@ -26,6 +36,11 @@ class Application:
         self.login_window = None
         self.main_window = None
         
+        startup_timer.mark('创建 QApplication')
+        
+        # 系统日志同时写入 system_logs 表（后台批量写入，不连接数据库）
+        from services import install_db_log_handler
+        install_db_log_handler()
         system_logger.info('应用程序启动')
     
     def start(self):
@@ -34,14 +49,55 @@ class Application:
         self.login_window = LoginWindow()
         self.login_window.login_success.connect(self.on_login_success)
         self.login_window.show()
+        startup_timer.mark('创建登录窗口')
+        
+        # 事件循环处理完首次绘制后再计时
+        QTimer.singleShot(0, self.on_login_window_shown)
         
         return self.app.exec()
     
+    def on_login_window_shown(self):
+        """登录窗口显示完成"""
+        startup_timer.mark('显示登录窗口')
+        total = startup_timer.elapsed()
+        budget = config.STARTUP_CONFIG['login_window_budget']
+        if total > budget:
+            system_logger.warning(f'登录窗口显示耗时 {total:.3f}s，超出预算 {budget:.1f}s')
+        system_logger.info(startup_timer.report())
+        
+        if self.startup_report:
+            print(startup_timer.report())
+            self.app.quit()
+            return
+        
+        if config.STARTUP_CONFIG['warm_up_services']:
+            threading.Thread(target=self.warm_up_services, name='ServiceWarmUp', daemon=True).start()
+    
+    @staticmethod
+    def warm_up_services():
+        """后台预先连接数据库并初始化认证服务，缩短首次登录等待"""
+        try:
+            from services import auth_service, rollup_service
+            auth_service.login  # 触发延迟创建
+            if config.ROLLUP_CONFIG['enabled']:
+                rollup_service.start()
+            if config.RETENTION_CONFIG['enabled']:
+                from services import retention_service
+                retention_service.start()
+            if config.TRAINING_QUEUE_CONFIG['enabled']:
+                from services import training_queue
+                training_queue.start()
+            system_logger.info(startup_timer.report())
+        except Exception as e:
+            # 登录时会再次尝试创建
+            system_logger.error(f'服务预加载失败: {str(e)}')
+    
     def on_login_success(self, user_info):
         """登录成功回调"""
         system_logger.info(f'用户登录: {user_info["username"]} ({user_info["role"]})')
         
-        # 创建主窗口
+        # 创建主窗口（主窗口依赖 cv2 等模块，登录后才导入）
+        from ui.main import MainWindow
         self.main_window = MainWindow(user_info)
         # 连接切换账号信号
         self.main_window.logout_signal.connect(self.show_login)
@@ -54,9 +110,11 @@ class Application:
         self.login_window.show()
 
 def main():
-   
+    # 打包后训练工作进程（spawn）从同一可执行文件启动
+    multiprocessing.freeze_support()
+    
     try:
-        app = Application()
+        app = Application(startup_report='--startup-report' in sys.argv)
         sys.exit(app.start())
     except Exception as e:
         system_logger.error(f'应用程序错误: {str(e)}', exc_info=True)
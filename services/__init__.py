@@ -1,24 +1,79 @@
 """
 服务层模块
+服务单例均为延迟创建：导入本模块不会连接数据库，也不会导入 ultralytics/torch/cv2
 """
 from .database import db_service, DatabaseService
 from .auth_service import auth_service, AuthService
+from .session_service import session_service, SessionService
 from .inference_service import inference_engine, InferenceEngine
 from .training_service import training_service, TrainingService
+from .training_queue import training_queue, TrainingQueue, JOB_STATUSES
+from .sweep_service import sweep_service, SweepService, SWEEP_STATUSES, TRIAL_STATUSES
 from .model_manager import model_manager, ModelManager
-from .feedback_service import feedback_service, FeedbackService
+from .feedback_service import feedback_service, FeedbackService, FEEDBACK_CATEGORIES, FEEDBACK_STATUSES
+from .log_query import log_query_service, LogQueryService, LOG_SOURCES
+from .log_export import log_export_service, LogExportService, EXPORT_FORMATS, parquet_available
+from .rollup_service import rollup_service, RollupService
+from .retention_service import retention_service, RetentionService
+from .query_metrics import query_metrics, QueryMetrics
+from .db_log_handler import DatabaseLogHandler, install_db_log_handler
+
+# 依赖 numpy 的导出接口在首次访问时才导入
+_LAZY_EXPORTS = {
+    'DetectionStreamWriter': '.detection_export',
+    'DetectionStreamReader': '.detection_export',
+    'open_detection_stream': '.detection_export'
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        import importlib
+        module = importlib.import_module(_LAZY_EXPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     'db_service',
     'DatabaseService',
     'auth_service',
     'AuthService',
+    'session_service',
+    'SessionService',
     'inference_engine',
     'InferenceEngine',
     'training_service',
     'TrainingService',
+    'training_queue',
+    'TrainingQueue',
+    'JOB_STATUSES',
+    'sweep_service',
+    'SweepService',
+    'SWEEP_STATUSES',
+    'TRIAL_STATUSES',
     'model_manager',
     'ModelManager',
     'feedback_service',
-    'FeedbackService'
+    'FeedbackService',
+    'FEEDBACK_CATEGORIES',
+    'FEEDBACK_STATUSES',
+    'log_query_service',
+    'LogQueryService',
+    'LOG_SOURCES',
+    'log_export_service',
+    'LogExportService',
+    'EXPORT_FORMATS',
+    'parquet_available',
+    'rollup_service',
+    'RollupService',
+    'retention_service',
+    'RetentionService',
+    'query_metrics',
+    'QueryMetrics',
+    'DatabaseLogHandler',
+    'install_db_log_handler',
+    'DetectionStreamWriter',
+    'DetectionStreamReader',
+    'open_detection_stream'
 ]
@@ -6,7 +6,9 @@ import hashlib
 from datetime import datetime
 from typing import Optional, Dict, List
 from .database import db_service
-from utils import auth_logger
+from .batch_writer import BatchWriter
+from .session_service import session_service
+from utils import auth_logger, LazyProxy
 import config
 
 class AuthService:
@@ -15,6 +17,14 @@ class AuthService:
     def __init__(self):
         """初始化认证服务"""
         self._init_default_users()
+        
+        # 登录日志在后台线程批量写入，不阻塞登录
+        self.login_writer = BatchWriter(
+            'login_logs',
+            """INSERT INTO login_logs 
+            (user_id, username, ip_address, status, login_time) 
+            VALUES (%s, %s, %s, %s, %s)"""
+        )
     
     @staticmethod
     def _hash_password(password: str) -> str:
@@ -93,7 +103,7 @@ class AuthService:
             ip_address: IP地址
             
         Returns:
-            Optional[Dict]: 用户信息（登录成功）或 None（登录失败）
+            Optional[Dict]: 用户信息（登录成功，token 为会话令牌）或 None（登录失败）
         """
         try:
             hashed_pwd = self._hash_password(password)
@@ -103,28 +113,59 @@ class AuthService:
             )
             
             if user:
-                user_info = user[0]
+                user_info = dict(user[0])
+                user_info.pop('password', None)
+                user_info['token'] = session_service.issue_token(user_info)
                 # 记录登录日志
-                db_service.execute_query(
-                    "INSERT INTO login_logs (user_id, username, ip_address, status) VALUES (%s, %s, %s, %s)",
-                    (user_info['id'], username, ip_address, 'success'),
-                    fetch=False
-                )
+                self.login_writer.submit((user_info['id'], username, ip_address, 'success', datetime.now()))
                 auth_logger.info(f"用户登录成功: {username}")
                 return user_info
             else:
                 # 记录失败日志
-                db_service.execute_query(
-                    "INSERT INTO login_logs (username, ip_address, status) VALUES (%s, %s, %s)",
-                    (username, ip_address, 'failed'),
-                    fetch=False
-                )
+                self.login_writer.submit((None, username, ip_address, 'failed', datetime.now()))
                 auth_logger.warning(f"用户登录失败: {username}")
                 return None
         except Exception as e:
             auth_logger.error(f"登录异常: {str(e)}")
             return None
     
+    def logout(self, token: str) -> bool:
+        """
+        退出登录（注销会话令牌）
+        
+        Args:
+            token: 会话令牌
+            
+        Returns:
+            bool: 令牌是否有效并已注销
+        """
+        return session_service.revoke_token(token)
+    
+    def validate_session(self, token: str) -> Optional[Dict]:
+        """
+        校验会话令牌（内存校验，用户信息来自缓存）
+        
+        Args:
+            token: 会话令牌
+            
+        Returns:
+            Optional[Dict]: 当前用户信息，令牌无效或用户已禁用时返回 None
+        """
+        return session_service.validate_token(token)
+    
+    def check_permission(self, token: str, role: str = 'admin') -> bool:
+        """
+        检查会话是否具有指定角色
+        
+        Args:
+            token: 会话令牌
+            role: 角色（admin/user）
+            
+        Returns:
+            bool: 是否具有该角色
+        """
+        return session_service.has_role(token, role)
+    
     def change_password(self, user_id: int, old_password: str, new_password: str) -> bool:
         """
         修改密码
@@ -154,6 +195,7 @@ class AuthService:
                 (new_hashed, user_id),
                 fetch=False
             )
+            session_service.invalidate_user(user_id)
             auth_logger.info(f"密码修改成功: user_id={user_id}")
             return True
         except Exception as e:
@@ -201,6 +243,7 @@ class AuthService:
             params.append(user_id)
             query = f"UPDATE users SET {', '.join(updates)} WHERE id = %s"
             db_service.execute_query(query, tuple(params), fetch=False)
+            session_service.invalidate_user(user_id)
             auth_logger.info(f"用户信息更新成功: user_id={user_id}")
             return True
         except Exception as e:
@@ -219,6 +262,7 @@ class AuthService:
         """
         try:
             db_service.execute_query("DELETE FROM users WHERE id = %s", (user_id,), fetch=False)
+            session_service.invalidate_user(user_id)
             auth_logger.info(f"用户删除成功: user_id={user_id}")
             return True
         except Exception as e:
@@ -236,6 +280,8 @@ class AuthService:
             List[Dict]: 登录日志列表
         """
         try:
+            # 先写入尚在缓冲中的登录日志
+            self.login_writer.flush()
             logs = db_service.execute_query(
                 "SELECT * FROM login_logs ORDER BY login_time DESC LIMIT %s",
                 (limit,)
@@ -246,4 +292,4 @@ class AuthService:
             return []
 
 # 全局认证服务实例
-auth_service = AuthService()
+auth_service = LazyProxy(AuthService, 'auth_service')
@@ -0,0 +1,227 @@
+"""
+批量写入服务
+在后台线程中缓冲并批量写入数据库，避免在调用线程上同步执行 INSERT
+"""
+import atexit
+import queue
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+from .database import db_service
+from utils import system_logger
+import config
+
+# 唤醒后台线程的占位元素
+_WAKE = object()
+
+# 已创建的写入器（关闭数据库连接池前先写入剩余记录）
+_writers = weakref.WeakSet()
+
+
+def close_all_writers():
+    """关闭所有写入器并写入剩余记录（由 DatabaseService.close 调用）"""
+    for writer in list(_writers):
+        writer.close()
+
+
+class BatchWriter:
+    """
+    后台批量写入器
+
+    调用方通过 submit() 把参数元组放入有界队列后立即返回；
+    后台线程在累计 batch_size 条或距离本批第一条超过 flush_interval 秒时，
+    通过 db_service.execute_many() 一次性写入。队列满时丢弃新记录并计数，
+    从不阻塞调用方。进程退出时自动刷新剩余记录。
+    """
+
+    def __init__(self, name: str, query: str, batch_size: int = None,
+                 flush_interval: float = None, max_queue: int = None, db=None):
+        """
+        初始化批量写入器
+
+        Args:
+            name: 写入器名称（用于日志和统计）
+            query: 带占位符的 INSERT 语句
+            batch_size: 每批最多写入的记录数
+            flush_interval: 最长缓冲时间（秒）
+            max_queue: 队列容量
+            db: 数据库服务（默认使用全局 db_service）
+        """
+        writer_config = config.BATCH_WRITER_CONFIG
+        self.name = name
+        self.query = query
+        self.batch_size = batch_size or writer_config['batch_size']
+        self.flush_interval = flush_interval or writer_config['flush_interval']
+        self.db = db or db_service
+
+        self._queue = queue.Queue(maxsize=max_queue or writer_config['max_queue'])
+        self._flush_requested = threading.Event()
+        self._stop = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'submitted': 0,
+            'written': 0,
+            'dropped': 0,
+            'failed': 0,
+            'batches': 0,
+            'last_flush_time': 0.0
+        }
+
+        self._thread = threading.Thread(target=self._run, name=f'BatchWriter-{name}', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        _writers.add(self)
+
+    @property
+    def thread(self) -> threading.Thread:
+        """后台写入线程"""
+        return self._thread
+
+    def submit(self, params: tuple) -> bool:
+        """
+        提交一条待写入记录（不阻塞）
+
+        Args:
+            params: INSERT 语句的参数
+
+        Returns:
+            bool: 是否成功入队（队列已满或写入器已关闭时返回 False）
+        """
+        if self._stop.is_set():
+            with self._stats_lock:
+                self._stats['dropped'] += 1
+            return False
+        try:
+            self._queue.put_nowait(params)
+        except queue.Full:
+            with self._stats_lock:
+                self._stats['dropped'] += 1
+            return False
+        with self._stats_lock:
+            self._stats['submitted'] += 1
+        return True
+
+    def submit_many(self, rows: list) -> int:
+        """
+        批量提交待写入记录（不阻塞）
+
+        Args:
+            rows: 参数元组列表
+
+        Returns:
+            int: 成功入队的记录数
+        """
+        accepted = 0
+        for params in rows:
+            if self.submit(params):
+                accepted += 1
+        return accepted
+
+    def _wake(self):
+        try:
+            self._queue.put_nowait(_WAKE)
+        except queue.Full:
+            # 队列已满说明后台线程正忙，无需唤醒
+            pass
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        立即写入队列中的全部记录并等待完成
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            bool: 是否在超时前完成
+        """
+        self._flush_requested.set()
+        self._wake()
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline or not self._thread.is_alive():
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """
+        停止写入器，写入剩余记录
+
+        Args:
+            timeout: 最长等待时间（秒）
+        """
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._wake()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            system_logger.warning(f"批量写入器 {self.name} 关闭超时，剩余 {self._queue.qsize()} 条记录未写入")
+
+    def _run(self):
+        """后台线程主循环"""
+        while True:
+            batch = []
+            deadline: Optional[float] = None
+            while len(batch) < self.batch_size:
+                if self._flush_requested.is_set() or self._stop.is_set():
+                    timeout = 0
+                elif deadline is None:
+                    timeout = self.flush_interval
+                else:
+                    timeout = deadline - time.monotonic()
+
+                try:
+                    if timeout > 0:
+                        item = self._queue.get(timeout=timeout)
+                    else:
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                if item is _WAKE:
+                    self._queue.task_done()
+                    continue
+
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch:
+                self._write(batch)
+            else:
+                self._flush_requested.clear()
+                if self._stop.is_set():
+                    break
+
+    def _write(self, batch: list):
+        """写入一批记录"""
+        start_time = time.time()
+        try:
+            self.db.execute_many(self.query, batch)
+            with self._stats_lock:
+                self._stats['written'] += len(batch)
+                self._stats['batches'] += 1
+                self._stats['last_flush_time'] = time.time() - start_time
+        except Exception as e:
+            with self._stats_lock:
+                self._stats['failed'] += len(batch)
+            system_logger.error(f"批量写入 {self.name} 失败（{len(batch)} 条）: {str(e)}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def get_stats(self) -> Dict:
+        """
+        获取写入器统计信息
+
+        Returns:
+            Dict: 队列深度、提交/写入/丢弃/失败计数等
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['name'] = self.name
+        stats['queue_depth'] = self._queue.qsize()
+        stats['queue_capacity'] = self._queue.maxsize
+        return stats
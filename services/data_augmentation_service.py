@@ -7,7 +7,7 @@ from PIL import Image, ImageEnhance, ImageFilter
 from pathlib import Path
 from typing import Dict, List, Callable
 import numpy as np
-from utils import system_logger
+from utils import system_logger, LazyProxy
 
 class DataAugmentationService:
     """数据增强服务类"""
@@ -244,4 +244,4 @@ class DataAugmentationService:
         return (success_count, failed_count, errors)
 
 # 全局数据增强服务实例
-data_augmentation_service = DataAugmentationService()
+data_augmentation_service = LazyProxy(DataAugmentationService, 'data_augmentation_service')
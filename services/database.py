@@ -1,12 +1,215 @@
 """
 数据库服务
-提供MySQL数据库连接和操作
+提供数据库连接和操作（MySQL / 嵌入式 SQLite）
 """
-import pymysql
-from pymysql.cursors import DictCursor
+import atexit
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterator, List
 from contextlib import contextmanager
 import config
-from utils import system_logger
+from .db_backends import create_backend
+from .migrations import SchemaMigrator
+from .query_metrics import query_metrics
+from utils import system_logger, LazyProxy
+
+class ConnectionPool:
+    """线程安全的数据库连接池"""
+    
+    def __init__(self, creator: Callable, min_size: int = 1, max_size: int = 10,
+                 timeout: float = 10, recycle: float = 3600, health_check_interval: float = 30,
+                 validator: Callable = None):
+        """
+        初始化连接池
+        
+        Args:
+            creator: 创建新连接的函数
+            validator: 连接健康检查函数 validator(conn) -> bool，默认使用 conn.ping()
+            min_size: 预先建立的连接数
+            max_size: 最大连接数
+            timeout: 连接池耗尽时的最长等待时间（秒）
+            recycle: 连接最长存活时间（秒），超过后关闭重建
+            health_check_interval: 空闲超过该时间的连接在取出时先做健康检查
+        """
+        self._creator = creator
+        self._validator = validator
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.timeout = timeout
+        self.recycle = recycle
+        self.health_check_interval = health_check_interval
+        
+        self._cond = threading.Condition(threading.Lock())
+        self._idle = deque()  # (conn, created_at, last_used)
+        self._created_at: Dict[int, float] = {}
+        self._size = 0
+        self._closed = False
+        
+        self._metrics = {
+            'created': 0,
+            'closed': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'timeouts': 0,
+            'recycled': 0,
+            'health_check_failures': 0
+        }
+        
+        for _ in range(min(self.min_size, self.max_size)):
+            with self._cond:
+                self._size += 1
+            try:
+                conn = self._create()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self._idle.append((conn, self._created_at[id(conn)], time.monotonic()))
+    
+    def _create(self):
+        """创建新连接（调用方已为其预留名额）"""
+        conn = self._creator()
+        with self._cond:
+            self._created_at[id(conn)] = time.monotonic()
+            self._metrics['created'] += 1
+        return conn
+    
+    def _discard(self, conn):
+        """关闭连接并释放名额"""
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._created_at.pop(id(conn), None)
+            self._size -= 1
+            self._metrics['closed'] += 1
+            self._cond.notify()
+    
+    def _is_healthy(self, conn) -> bool:
+        """检查连接是否可用"""
+        if self._validator:
+            return self._validator(conn)
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+    
+    def acquire(self):
+        """
+        从连接池取出一个连接
+        
+        Returns:
+            数据库连接对象
+            
+        Raises:
+            TimeoutError: 等待超时
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError('连接池已关闭')
+                
+                idle_entry = None
+                if self._idle:
+                    idle_entry = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._metrics['timeouts'] += 1
+                        raise TimeoutError(f'等待数据库连接超时（{self.timeout}s），连接池已满: {self.max_size}')
+                    wait_start = time.monotonic()
+                    self._metrics['waits'] += 1
+                    self._cond.wait(remaining)
+                    self._metrics['wait_time'] += time.monotonic() - wait_start
+                    continue
+            
+            if idle_entry is None:
+                try:
+                    conn = self._create()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            else:
+                conn, created_at, last_used = idle_entry
+                now = time.monotonic()
+                
+                # 回收存活过久的连接
+                if self.recycle and now - created_at > self.recycle:
+                    self._discard(conn)
+                    with self._cond:
+                        self._metrics['recycled'] += 1
+                    continue
+                
+                # 空闲过久的连接先做健康检查
+                if now - last_used >= self.health_check_interval and not self._is_healthy(conn):
+                    self._discard(conn)
+                    with self._cond:
+                        self._metrics['health_check_failures'] += 1
+                    continue
+            
+            with self._cond:
+                self._metrics['checkouts'] += 1
+            return conn
+    
+    def release(self, conn, discard: bool = False):
+        """
+        归还连接
+        
+        Args:
+            conn: 数据库连接对象
+            discard: 是否直接关闭该连接（例如连接已损坏）
+        """
+        if not discard:
+            try:
+                # 结束未提交的事务，避免下一个使用者读到旧快照
+                conn.rollback()
+            except Exception:
+                discard = True
+        
+        with self._cond:
+            if not discard and not self._closed:
+                created_at = self._created_at.get(id(conn), time.monotonic())
+                self._idle.append((conn, created_at, time.monotonic()))
+                self._cond.notify()
+                return
+        
+        self._discard(conn)
+    
+    def close(self):
+        """关闭连接池中所有空闲连接"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn, _, _ in idle:
+            self._discard(conn)
+    
+    def get_metrics(self) -> Dict:
+        """
+        获取连接池指标
+        
+        Returns:
+            Dict: 连接池统计信息
+        """
+        with self._cond:
+            metrics = dict(self._metrics)
+            metrics.update({
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size
+            })
+        return metrics
 
 class DatabaseService:
     """数据库服务类"""
@@ -14,28 +217,46 @@ class DatabaseService:
     def __init__(self):
         """初始化数据库服务"""
         self.config = config.DATABASE_CONFIG
-        self._ensure_database_exists()
-        self._create_tables()
-    
-    def _get_connection_without_db(self):
-        """获取不指定数据库的连接（用于创建数据库）"""
-        return pymysql.connect(
-            host=self.config['host'],
-            port=self.config['port'],
-            user=self.config['user'],
-            password=self.config['password'],
-            charset=self.config['charset']
+        self.backend = create_backend(self.config)
+        self.backend.prepare()
+        
+        try:
+            self.pool = self._create_pool()
+        except Exception as e:
+            # 仅在数据库不存在时才执行 CREATE DATABASE
+            if not self.backend.is_unknown_database_error(e):
+                system_logger.error(f"数据库连接失败: {str(e)}")
+                raise
+            self._ensure_database_exists()
+            self.pool = self._create_pool()
+        atexit.register(self.close)
+        
+        # 常规启动只做一次版本查询，有新版本时才执行迁移
+        self.migrator = SchemaMigrator(self)
+        self.migrator.check(auto_migrate=self.config.get('auto_migrate', True))
+    
+    def _create_pool(self) -> ConnectionPool:
+        """创建连接池"""
+        pool_config = config.DATABASE_POOL_CONFIG
+        return ConnectionPool(
+            self.backend.connect,
+            min_size=pool_config['min_size'],
+            max_size=pool_config['max_size'],
+            timeout=pool_config['timeout'],
+            recycle=pool_config['recycle'],
+            health_check_interval=pool_config['health_check_interval'],
+            validator=self.backend.ping
         )
     
+    @property
+    def backend_name(self) -> str:
+        """当前存储后端名称（mysql / sqlite）"""
+        return self.backend.name
+    
     def _ensure_database_exists(self):
         """确保数据库存在，不存在则创建"""
         try:
-            conn = self._get_connection_without_db()
-            cursor = conn.cursor()
-            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.config['database']} DEFAULT CHARSET utf8mb4 COLLATE utf8mb4_unicode_ci")
-            conn.commit()
-            cursor.close()
-            conn.close()
+            self.backend.ensure_database()
             system_logger.info(f"数据库 {self.config['database']} 准备完成")
         except Exception as e:
             system_logger.error(f"创建数据库失败: {str(e)}")
@@ -44,155 +265,40 @@ class DatabaseService:
     @contextmanager
     def get_connection(self):
         """
-        获取数据库连接（上下文管理器）
+        从连接池获取数据库连接（上下文管理器），退出时自动归还
         
         Yields:
-            pymysql.Connection: 数据库连接对象
+            数据库连接对象（pymysql.Connection / sqlite3.Connection）
         """
-        conn = None
         try:
-            conn = pymysql.connect(
-                host=self.config['host'],
-                port=self.config['port'],
-                user=self.config['user'],
-                password=self.config['password'],
-                database=self.config['database'],
-                charset=self.config['charset'],
-                cursorclass=DictCursor
-            )
-            yield conn
+            conn = self.pool.acquire()
         except Exception as e:
             system_logger.error(f"数据库连接失败: {str(e)}")
             raise
-        finally:
-            if conn:
-                conn.close()
+        
+        try:
+            yield conn
+        except BaseException as e:
+            # 连接级错误（断线等）的连接不再放回连接池
+            self.pool.release(conn, discard=self.backend.is_connection_error(e))
+            raise
+        else:
+            self.pool.release(conn)
     
-    def _create_tables(self):
-        """创建数据库表"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # 用户表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    username VARCHAR(50) UNIQUE NOT NULL,
-                    password VARCHAR(255) NOT NULL,
-                    email VARCHAR(100),
-                    role VARCHAR(20) NOT NULL DEFAULT 'user',
-                    status VARCHAR(20) NOT NULL DEFAULT 'active',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    INDEX idx_username (username),
-                    INDEX idx_role (role)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-            """)
-            
-            # 模型表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS models (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    name VARCHAR(100) NOT NULL,
-                    version VARCHAR(50) NOT NULL,
-                    file_path VARCHAR(255) NOT NULL,
-                    classes TEXT,
-                    description TEXT,
-                    author VARCHAR(50),
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    INDEX idx_name (name),
-                    INDEX idx_version (version)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-            """)
-            
-            # 登录日志表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS login_logs (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    user_id INT,
-                    username VARCHAR(50),
-                    login_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    ip_address VARCHAR(50),
-                    status VARCHAR(20),
-                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                    INDEX idx_username (username),
-                    INDEX idx_login_time (login_time)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-            """)
-            
-            # 推理日志表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS inference_logs (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    user_id INT,
-                    model_name VARCHAR(100),
-                    source_type VARCHAR(50),
-                    source_path VARCHAR(255),
-                    detections INT DEFAULT 0,
-                    inference_time FLOAT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                    INDEX idx_user_id (user_id),
-                    INDEX idx_created_at (created_at)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-            """)
-            
-            # 训练日志表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS training_logs (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    user_id INT,
-                    model_name VARCHAR(100),
-                    dataset_path VARCHAR(255),
-                    epochs INT,
-                    batch_size INT,
-                    status VARCHAR(20),
-                    start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    end_time TIMESTAMP NULL,
-                    final_map FLOAT,
-                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                    INDEX idx_user_id (user_id),
-                    INDEX idx_status (status)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-            """)
-            
-            # 反馈表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS feedbacks (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    user_id INT,
-                    title VARCHAR(255) NOT NULL,
-                    content TEXT NOT NULL,
-                    category VARCHAR(50),
-                    email VARCHAR(100),
-                    status VARCHAR(20) NOT NULL DEFAULT 'pending',
-                    response TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                    INDEX idx_user_id (user_id),
-                    INDEX idx_status (status),
-                    INDEX idx_created_at (created_at)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-            """)
-
-            # 系统日志表
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS system_logs (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    level VARCHAR(20),
-                    module VARCHAR(50),
-                    message TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    INDEX idx_level (level),
-                    INDEX idx_created_at (created_at)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-            """)
-            
-            conn.commit()
-            cursor.close()
-            system_logger.info("数据库表创建完成")
+    def get_pool_metrics(self) -> Dict:
+        """
+        获取连接池指标
+        
+        Returns:
+            Dict: 连接池统计信息
+        """
+        return self.pool.get_metrics()
+    
+    def close(self):
+        """关闭数据库服务（先写入批量写入器中的剩余记录，再释放连接池）"""
+        from .batch_writer import close_all_writers
+        close_all_writers()
+        self.pool.close()
     
     def execute_query(self, query: str, params: tuple = None, fetch: bool = True):
         """
@@ -206,19 +312,30 @@ class DatabaseService:
         Returns:
             查询结果（如果fetch=True）
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(query, params or ())
-            
-            if fetch:
-                result = cursor.fetchall()
-                cursor.close()
-                return result
-            else:
-                conn.commit()
-                last_id = cursor.lastrowid
-                cursor.close()
-                return last_id
+        query = self.backend.translate(query)
+        rows, failed = None, True
+        start = time.perf_counter()
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, params or ())
+
+                if fetch:
+                    result = cursor.fetchall()
+                    rows = len(result)
+                    cursor.close()
+                    failed = False
+                    return result
+                else:
+                    conn.commit()
+                    last_id = cursor.lastrowid
+                    rows = cursor.rowcount
+                    cursor.close()
+                    failed = False
+                    return last_id
+        finally:
+            # 耗时包含等待连接池的时间，连接池耗尽时同样会反映为慢查询
+            query_metrics.record(query, time.perf_counter() - start, rows, error=failed)
     
     def execute_many(self, query: str, params_list: list):
         """
@@ -228,11 +345,63 @@ class DatabaseService:
             query: SQL语句
             params_list: 参数列表
         """
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.executemany(query, params_list)
-            conn.commit()
+        query = self.backend.translate(query)
+        failed = True
+        start = time.perf_counter()
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.executemany(query, params_list)
+                conn.commit()
+                cursor.close()
+                failed = False
+        finally:
+            query_metrics.record(query, time.perf_counter() - start, len(params_list), error=failed)
+
+    def stream_query(self, query: str, params: tuple = None, chunk_size: int = 1000) -> Iterator[List[Dict]]:
+        """
+        流式查询：通过无缓冲游标逐批返回结果，内存占用与结果集大小无关
+
+        迭代期间一直占用一个连接池连接；调用方中途停止迭代（break / 异常 / 关闭生成器）时，
+        由于结果集未读完，该连接直接关闭而不归还连接池。
+
+        Args:
+            query: SQL查询语句
+            params: 查询参数
+            chunk_size: 每批行数
+
+        Yields:
+            List[Dict]: 一批记录
+        """
+        query = self.backend.translate(query)
+        try:
+            conn = self.pool.acquire()
+        except Exception as e:
+            system_logger.error(f"数据库连接失败: {str(e)}")
+            raise
+
+        # 只统计数据库耗时，不包含调用方处理每批数据的时间
+        rows, elapsed, finished, failed = 0, 0.0, False, False
+        try:
+            start = time.perf_counter()
+            cursor = self.backend.streaming_cursor(conn)
+            cursor.execute(query, params or ())
+            while True:
+                chunk = cursor.fetchmany(chunk_size)
+                elapsed += time.perf_counter() - start
+                if not chunk:
+                    break
+                rows += len(chunk)
+                yield list(chunk)
+                start = time.perf_counter()
             cursor.close()
+            finished = True
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.pool.release(conn, discard=not finished)
+            query_metrics.record(query, elapsed, rows, error=failed)
 
-# 全局数据库实例
-db_service = DatabaseService()
+# 全局数据库实例（首次使用时才连接数据库）
+db_service = LazyProxy(DatabaseService, 'db_service')
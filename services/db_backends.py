@@ -0,0 +1,616 @@
+"""
+数据库存储后端
+封装 MySQL / SQLite 的连接、建表语句和 SQL 方言差异
+"""
+import re
+import sqlite3
+from datetime import datetime, date
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Tuple
+from utils import system_logger
+
+# 全文索引列（迁移 v8 创建：MySQL FULLTEXT ngram 索引 / SQLite FTS5 trigram 外部内容表）
+FULLTEXT_COLUMNS = {
+    'models': ['name', 'description', 'author'],
+    'feedbacks': ['title', 'content']
+}
+
+
+class StorageBackend:
+    """存储后端基类"""
+
+    name = ''
+
+    def __init__(self, db_config: Dict):
+        """
+        初始化存储后端
+
+        Args:
+            db_config: 数据库配置（config.DATABASE_CONFIG）
+        """
+        self.config = db_config
+
+    def prepare(self):
+        """每次启动时的准备工作（须为轻量操作）"""
+        pass
+
+    def ensure_database(self):
+        """确保数据库存在（仅在连接报告数据库不存在时调用）"""
+        raise NotImplementedError
+
+    def is_unknown_database_error(self, exc: BaseException) -> bool:
+        """判断异常是否表示数据库不存在"""
+        return False
+
+    def connect(self):
+        """创建新的数据库连接"""
+        raise NotImplementedError
+
+    def ping(self, conn) -> bool:
+        """检查连接是否可用"""
+        raise NotImplementedError
+
+    def is_connection_error(self, exc: BaseException) -> bool:
+        """判断异常是否表示连接已损坏（需要丢弃连接）"""
+        return False
+
+    def translate(self, query: str) -> str:
+        """将服务层使用的 SQL（MySQL 方言，%s 占位符）转换为本后端方言"""
+        return query
+
+    def streaming_cursor(self, conn):
+        """创建逐批读取结果、不在客户端缓存整个结果集的游标"""
+        return conn.cursor()
+
+    def schema_statements(self) -> List[str]:
+        """初始建表语句列表（迁移 v1，之后的结构变更见 services/migrations.py）"""
+        raise NotImplementedError
+
+    def upsert_sql(self, table: str, key_columns: List[str], sum_columns: List[str],
+                   max_columns: List[str] = None) -> str:
+        """
+        生成累加式 UPSERT 语句（%s 占位符，参数顺序为 键列 + 累加列 + 取最大值列）
+
+        键冲突时累加列相加、取最大值列取较大值，要求 key_columns 上有唯一索引
+
+        Args:
+            table: 表名
+            key_columns: 唯一键列
+            sum_columns: 累加列
+            max_columns: 取最大值列
+        """
+        raise NotImplementedError
+
+    # 全文索引能匹配的最短关键词长度，更短的关键词改用 LIKE 查询
+    fulltext_min_length = 1
+
+    def fulltext_search_sql(self, table: str, terms: List[str], where: str = '',
+                            params: tuple = (), limit: int = 50) -> Tuple[str, tuple]:
+        """
+        生成全文检索语句（全文索引见迁移 v8），按相关度降序返回 id 和 score
+
+        Args:
+            table: 表名（在语句中以别名 t 引用）
+            terms: 关键词列表，须全部匹配
+            where: 附加过滤条件（%s 占位符，列名以 t. 限定）
+            params: 附加过滤条件的参数
+            limit: 返回条数
+
+        Returns:
+            Tuple[str, tuple]: (SQL, 参数)
+        """
+        raise NotImplementedError
+
+    def column_exists(self, cursor, table: str, column: str) -> bool:
+        """检查表中是否存在指定列"""
+        raise NotImplementedError
+
+    def index_exists(self, cursor, table: str, index: str) -> bool:
+        """检查表中是否存在指定索引"""
+        raise NotImplementedError
+
+    def fulltext_index_exists(self, cursor, table: str) -> bool:
+        """检查表的全文索引是否存在（不支持全文索引的环境中迁移 v8 会跳过）"""
+        raise NotImplementedError
+
+
+class MySQLBackend(StorageBackend):
+    """MySQL 存储后端（PyMySQL）"""
+
+    name = 'mysql'
+
+    def __init__(self, db_config: Dict):
+        super().__init__(db_config)
+        import pymysql
+        self._pymysql = pymysql
+
+    def _connect_without_db(self):
+        """获取不指定数据库的连接（用于创建数据库）"""
+        return self._pymysql.connect(
+            host=self.config['host'],
+            port=self.config['port'],
+            user=self.config['user'],
+            password=self.config['password'],
+            charset=self.config['charset']
+        )
+
+    def ensure_database(self):
+        """确保数据库存在，不存在则创建"""
+        conn = self._connect_without_db()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {self.config['database']} DEFAULT CHARSET utf8mb4 COLLATE utf8mb4_unicode_ci")
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+    def connect(self):
+        from pymysql.cursors import DictCursor
+        return self._pymysql.connect(
+            host=self.config['host'],
+            port=self.config['port'],
+            user=self.config['user'],
+            password=self.config['password'],
+            database=self.config['database'],
+            charset=self.config['charset'],
+            cursorclass=DictCursor
+        )
+
+    def streaming_cursor(self, conn):
+        # SSDictCursor 为无缓冲游标：结果集留在服务器端，fetchmany 时才逐批读取
+        from pymysql.cursors import SSDictCursor
+        return conn.cursor(SSDictCursor)
+
+    def ping(self, conn) -> bool:
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def is_connection_error(self, exc: BaseException) -> bool:
+        return isinstance(exc, self._pymysql.err.OperationalError)
+
+    def is_unknown_database_error(self, exc: BaseException) -> bool:
+        # 1049: Unknown database
+        return isinstance(exc, self._pymysql.err.OperationalError) and bool(exc.args) and exc.args[0] == 1049
+
+    def schema_statements(self) -> List[str]:
+        return [
+            # 用户表
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                username VARCHAR(50) UNIQUE NOT NULL,
+                password VARCHAR(255) NOT NULL,
+                email VARCHAR(100),
+                role VARCHAR(20) NOT NULL DEFAULT 'user',
+                status VARCHAR(20) NOT NULL DEFAULT 'active',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                INDEX idx_username (username),
+                INDEX idx_role (role)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """,
+            # 模型表
+            """
+            CREATE TABLE IF NOT EXISTS models (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR(100) NOT NULL,
+                version VARCHAR(50) NOT NULL,
+                file_path VARCHAR(255) NOT NULL,
+                classes TEXT,
+                description TEXT,
+                author VARCHAR(50),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                INDEX idx_name (name),
+                INDEX idx_version (version)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """,
+            # 登录日志表
+            """
+            CREATE TABLE IF NOT EXISTS login_logs (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                user_id INT,
+                username VARCHAR(50),
+                login_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                ip_address VARCHAR(50),
+                status VARCHAR(20),
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+                INDEX idx_username (username),
+                INDEX idx_login_time (login_time)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """,
+            # 推理日志表
+            """
+            CREATE TABLE IF NOT EXISTS inference_logs (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                user_id INT,
+                model_name VARCHAR(100),
+                source_type VARCHAR(50),
+                source_path VARCHAR(255),
+                detections INT DEFAULT 0,
+                inference_time FLOAT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+                INDEX idx_user_id (user_id),
+                INDEX idx_created_at (created_at)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """,
+            # 训练日志表
+            """
+            CREATE TABLE IF NOT EXISTS training_logs (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                user_id INT,
+                model_name VARCHAR(100),
+                dataset_path VARCHAR(255),
+                epochs INT,
+                batch_size INT,
+                status VARCHAR(20),
+                start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                end_time TIMESTAMP NULL,
+                final_map FLOAT,
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+                INDEX idx_user_id (user_id),
+                INDEX idx_status (status)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """,
+            # 反馈表
+            """
+            CREATE TABLE IF NOT EXISTS feedbacks (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                user_id INT,
+                title VARCHAR(255) NOT NULL,
+                content TEXT NOT NULL,
+                category VARCHAR(50),
+                email VARCHAR(100),
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                response TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+                INDEX idx_user_id (user_id),
+                INDEX idx_status (status),
+                INDEX idx_created_at (created_at)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """,
+            # 系统日志表
+            """
+            CREATE TABLE IF NOT EXISTS system_logs (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                level VARCHAR(20),
+                module VARCHAR(50),
+                message TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                INDEX idx_level (level),
+                INDEX idx_created_at (created_at)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """
+        ]
+
+    def upsert_sql(self, table: str, key_columns: List[str], sum_columns: List[str],
+                   max_columns: List[str] = None) -> str:
+        max_columns = max_columns or []
+        columns = key_columns + sum_columns + max_columns
+        updates = [f"{c} = {c} + VALUES({c})" for c in sum_columns]
+        updates += [f"{c} = GREATEST({c}, VALUES({c}))" for c in max_columns]
+        return (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+            f"ON DUPLICATE KEY UPDATE {', '.join(updates)}"
+        )
+
+    # ngram 解析器默认 ngram_token_size=2，单字无法通过全文索引匹配
+    fulltext_min_length = 2
+
+    def fulltext_search_sql(self, table: str, terms: List[str], where: str = '',
+                            params: tuple = (), limit: int = 50) -> Tuple[str, tuple]:
+        # 布尔模式下每个关键词作为短语必须出现；MATCH 的列须与 FULLTEXT 索引一致
+        match = ' '.join(f'+"{term}"' for term in terms)
+        columns = ', '.join(f"t.{c}" for c in FULLTEXT_COLUMNS[table])
+        against = f"MATCH({columns}) AGAINST (%s IN BOOLEAN MODE)"
+        extra = f" AND {where}" if where else ''
+        sql = (
+            f"SELECT t.id AS id, {against} AS score FROM {table} t "
+            f"WHERE {against}{extra} ORDER BY score DESC, t.id DESC LIMIT %s"
+        )
+        return sql, (match, match) + tuple(params) + (limit,)
+
+    def column_exists(self, cursor, table: str, column: str) -> bool:
+        cursor.execute(
+            """SELECT COUNT(*) AS count FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND COLUMN_NAME = %s""",
+            (self.config['database'], table, column)
+        )
+        return cursor.fetchone()['count'] > 0
+
+    def index_exists(self, cursor, table: str, index: str) -> bool:
+        cursor.execute(
+            """SELECT COUNT(*) AS count FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND INDEX_NAME = %s""",
+            (self.config['database'], table, index)
+        )
+        return cursor.fetchone()['count'] > 0
+
+    def fulltext_index_exists(self, cursor, table: str) -> bool:
+        return self.index_exists(cursor, table, f"ft_{table}")
+
+
+def _adapt_datetime(value: datetime) -> str:
+    return value.isoformat(' ', timespec='seconds')
+
+
+def _convert_timestamp(value: bytes):
+    text = value.decode()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_converter('TIMESTAMP', _convert_timestamp)
+
+
+def _dict_factory(cursor, row) -> Dict:
+    """以字典形式返回查询结果（与 PyMySQL DictCursor 一致）"""
+    return {col[0]: value for col, value in zip(cursor.description, row)}
+
+
+# SQLite 中使用本地时间，与 MySQL 的 NOW()/CURRENT_TIMESTAMP 行为保持一致
+_SQLITE_NOW = "(datetime('now', 'localtime'))"
+
+
+class SQLiteBackend(StorageBackend):
+    """SQLite 嵌入式存储后端（WAL 模式）"""
+
+    name = 'sqlite'
+
+    def __init__(self, db_config: Dict):
+        super().__init__(db_config)
+        self.path = Path(db_config['sqlite_path'])
+
+    def prepare(self):
+        """确保数据库文件存在并启用 WAL 模式（WAL 设置持久保存在数据库文件中）"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path))
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+        finally:
+            conn.close()
+
+    def ensure_database(self):
+        self.prepare()
+
+    def connect(self):
+        # 连接由连接池保证同一时刻只被一个线程使用
+        conn = sqlite3.connect(
+            str(self.path),
+            timeout=self.config.get('sqlite_timeout', 30),
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False
+        )
+        conn.row_factory = _dict_factory
+        conn.execute('PRAGMA foreign_keys=ON')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def ping(self, conn) -> bool:
+        try:
+            conn.execute('SELECT 1')
+            return True
+        except Exception:
+            return False
+
+    def is_connection_error(self, exc: BaseException) -> bool:
+        return isinstance(exc, sqlite3.ProgrammingError)
+
+    def translate(self, query: str) -> str:
+        return _translate_to_sqlite(query)
+
+    def schema_statements(self) -> List[str]:
+        statements = [
+            # 用户表
+            f"""
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username VARCHAR(50) UNIQUE NOT NULL,
+                password VARCHAR(255) NOT NULL,
+                email VARCHAR(100),
+                role VARCHAR(20) NOT NULL DEFAULT 'user',
+                status VARCHAR(20) NOT NULL DEFAULT 'active',
+                created_at TIMESTAMP DEFAULT {_SQLITE_NOW},
+                updated_at TIMESTAMP DEFAULT {_SQLITE_NOW}
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_users_role ON users (role)",
+            # 模型表
+            f"""
+            CREATE TABLE IF NOT EXISTS models (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name VARCHAR(100) NOT NULL,
+                version VARCHAR(50) NOT NULL,
+                file_path VARCHAR(255) NOT NULL,
+                classes TEXT,
+                description TEXT,
+                author VARCHAR(50),
+                created_at TIMESTAMP DEFAULT {_SQLITE_NOW},
+                updated_at TIMESTAMP DEFAULT {_SQLITE_NOW}
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_models_name ON models (name)",
+            "CREATE INDEX IF NOT EXISTS idx_models_version ON models (version)",
+            # 登录日志表
+            f"""
+            CREATE TABLE IF NOT EXISTS login_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+                username VARCHAR(50),
+                login_time TIMESTAMP DEFAULT {_SQLITE_NOW},
+                ip_address VARCHAR(50),
+                status VARCHAR(20)
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_login_logs_username ON login_logs (username)",
+            "CREATE INDEX IF NOT EXISTS idx_login_logs_login_time ON login_logs (login_time)",
+            # 推理日志表
+            f"""
+            CREATE TABLE IF NOT EXISTS inference_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+                model_name VARCHAR(100),
+                source_type VARCHAR(50),
+                source_path VARCHAR(255),
+                detections INTEGER DEFAULT 0,
+                inference_time FLOAT,
+                created_at TIMESTAMP DEFAULT {_SQLITE_NOW}
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_inference_logs_user_id ON inference_logs (user_id)",
+            "CREATE INDEX IF NOT EXISTS idx_inference_logs_created_at ON inference_logs (created_at)",
+            # 训练日志表
+            f"""
+            CREATE TABLE IF NOT EXISTS training_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+                model_name VARCHAR(100),
+                dataset_path VARCHAR(255),
+                epochs INTEGER,
+                batch_size INTEGER,
+                status VARCHAR(20),
+                start_time TIMESTAMP DEFAULT {_SQLITE_NOW},
+                end_time TIMESTAMP NULL,
+                final_map FLOAT
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_training_logs_user_id ON training_logs (user_id)",
+            "CREATE INDEX IF NOT EXISTS idx_training_logs_status ON training_logs (status)",
+            # 反馈表
+            f"""
+            CREATE TABLE IF NOT EXISTS feedbacks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+                title VARCHAR(255) NOT NULL,
+                content TEXT NOT NULL,
+                category VARCHAR(50),
+                email VARCHAR(100),
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                response TEXT,
+                created_at TIMESTAMP DEFAULT {_SQLITE_NOW},
+                updated_at TIMESTAMP DEFAULT {_SQLITE_NOW}
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_feedbacks_user_id ON feedbacks (user_id)",
+            "CREATE INDEX IF NOT EXISTS idx_feedbacks_status ON feedbacks (status)",
+            "CREATE INDEX IF NOT EXISTS idx_feedbacks_created_at ON feedbacks (created_at)",
+            # 系统日志表
+            f"""
+            CREATE TABLE IF NOT EXISTS system_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                level VARCHAR(20),
+                module VARCHAR(50),
+                message TEXT,
+                created_at TIMESTAMP DEFAULT {_SQLITE_NOW}
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_system_logs_level ON system_logs (level)",
+            "CREATE INDEX IF NOT EXISTS idx_system_logs_created_at ON system_logs (created_at)"
+        ]
+
+        # 模拟 MySQL 的 ON UPDATE CURRENT_TIMESTAMP
+        for table in ('users', 'models', 'feedbacks'):
+            statements.append(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_updated_at
+            AFTER UPDATE ON {table} FOR EACH ROW
+            WHEN NEW.updated_at = OLD.updated_at
+            BEGIN
+                UPDATE {table} SET updated_at = {_SQLITE_NOW} WHERE id = NEW.id;
+            END
+            """)
+        return statements
+
+    def upsert_sql(self, table: str, key_columns: List[str], sum_columns: List[str],
+                   max_columns: List[str] = None) -> str:
+        max_columns = max_columns or []
+        columns = key_columns + sum_columns + max_columns
+        updates = [f"{c} = {c} + excluded.{c}" for c in sum_columns]
+        updates += [f"{c} = MAX({c}, excluded.{c})" for c in max_columns]
+        return (
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+            f"ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {', '.join(updates)}"
+        )
+
+    # FTS5 trigram 分词器按三个字符切分，少于三个字符的关键词无法通过全文索引匹配
+    fulltext_min_length = 3
+
+    def fulltext_search_sql(self, table: str, terms: List[str], where: str = '',
+                            params: tuple = (), limit: int = 50) -> Tuple[str, tuple]:
+        # 每个关键词作为短语，空格分隔表示全部匹配；bm25 越小越相关，取负数作为 score
+        fts = f"{table}_fts"
+        match = ' '.join(f'"{term}"' for term in terms)
+        extra = f" AND {where}" if where else ''
+        sql = (
+            f"SELECT t.id AS id, -bm25({fts}) AS score FROM {fts} JOIN {table} t ON t.id = {fts}.rowid "
+            f"WHERE {fts} MATCH %s{extra} ORDER BY score DESC, t.id DESC LIMIT %s"
+        )
+        return sql, (match,) + tuple(params) + (limit,)
+
+    def column_exists(self, cursor, table: str, column: str) -> bool:
+        cursor.execute(f"PRAGMA table_info({table})")
+        return any(row['name'] == column for row in cursor.fetchall())
+
+    def index_exists(self, cursor, table: str, index: str) -> bool:
+        cursor.execute(f"PRAGMA index_list({table})")
+        return any(row['name'] == index for row in cursor.fetchall())
+
+    def fulltext_index_exists(self, cursor, table: str) -> bool:
+        cursor.execute("SELECT COUNT(*) AS count FROM sqlite_master WHERE name = ?", (f"{table}_fts",))
+        return cursor.fetchone()['count'] > 0
+
+    @staticmethod
+    def trigram_supported(cursor) -> bool:
+        """当前 SQLite 是否支持 FTS5 trigram 分词器（需要 3.34 及以上且编译了 FTS5）"""
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.fts_trigram_probe USING fts5(x, tokenize='trigram')")
+            cursor.execute("DROP TABLE temp.fts_trigram_probe")
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+
+_PLACEHOLDER_RE = re.compile(r'%s')
+_NOW_RE = re.compile(r'\bNOW\(\)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=512)
+def _translate_to_sqlite(query: str) -> str:
+    """MySQL 方言 -> SQLite 方言（占位符与常用函数）"""
+    query = _PLACEHOLDER_RE.sub('?', query)
+    query = _NOW_RE.sub(_SQLITE_NOW, query)
+    return query
+
+
+BACKENDS = {
+    MySQLBackend.name: MySQLBackend,
+    SQLiteBackend.name: SQLiteBackend
+}
+
+
+def create_backend(db_config: Dict) -> StorageBackend:
+    """
+    根据配置创建存储后端
+
+    Args:
+        db_config: 数据库配置，backend 字段取值 mysql / sqlite
+
+    Returns:
+        StorageBackend: 存储后端实例
+    """
+    name = db_config.get('backend', 'mysql')
+    if name not in BACKENDS:
+        raise ValueError(f"不支持的数据库后端: {name}，可选: {', '.join(BACKENDS)}")
+    system_logger.info(f"使用数据库后端: {name}")
+    return BACKENDS[name](db_config)
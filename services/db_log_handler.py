@@ -0,0 +1,138 @@
+"""
+数据库日志处理器
+把 system/auth/inference/training 日志批量写入 system_logs 表，供管理后台的系统日志查看
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+from .batch_writer import BatchWriter
+from utils import LogManager
+import config
+
+SYSTEM_LOG_INSERT = "INSERT INTO system_logs (level, module, message, created_at) VALUES (%s, %s, %s, %s)"
+
+
+class DatabaseLogHandler(logging.Handler):
+    """
+    数据库日志处理器
+
+    emit() 只做级别过滤、令牌桶限流和入队，写库由 BatchWriter 的后台线程批量完成，
+    不会阻塞日志输出线程。超出限流的记录被丢弃，恢复后补写一条汇总告警。
+    写入线程自身产生的日志（如写库失败）不入库，避免数据库不可用时循环写日志。
+    """
+
+    def __init__(self, level: str = None, rate_limit: float = None, burst: int = None,
+                 max_message_length: int = None, writer: BatchWriter = None):
+        """
+        初始化处理器
+
+        Args:
+            level: 入库的最低日志级别
+            rate_limit: 每秒平均入库条数
+            burst: 允许的突发条数
+            max_message_length: 消息最大长度
+            writer: 批量写入器（默认写入 system_logs）
+        """
+        log_config = config.DB_LOG_CONFIG
+        super().__init__(getattr(logging, level or log_config['level']))
+        self.setFormatter(logging.Formatter())
+        self.rate_limit = rate_limit or log_config['rate_limit']
+        self.burst = burst or log_config['burst']
+        self.max_message_length = max_message_length or log_config['max_message_length']
+        self.writer = writer or BatchWriter('system_logs', SYSTEM_LOG_INSERT)
+
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._stats = {'accepted': 0, 'rate_limited': 0}
+        self._suppressed = 0
+
+    def _take_token(self) -> bool:
+        """从令牌桶取一个令牌（调用方持有 self.lock）"""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate_limit)
+        self._last_refill = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def emit(self, record: logging.LogRecord):
+        """
+        记录入队（不阻塞）
+
+        Args:
+            record: 日志记录
+        """
+        if record.thread == self.writer.thread.ident:
+            return
+        try:
+            # Handler.handle() 已持有 self.lock
+            if not self._take_token():
+                self._suppressed += 1
+                self._stats['rate_limited'] += 1
+                return
+
+            if self._suppressed:
+                self.writer.submit((
+                    'WARNING', 'db_log_handler',
+                    f"日志入库限流，已丢弃 {self._suppressed} 条记录",
+                    datetime.fromtimestamp(record.created)
+                ))
+                self._suppressed = 0
+
+            message = self.format(record)
+            if len(message) > self.max_message_length:
+                message = message[:self.max_message_length - 3] + '...'
+            module = f"{record.name}.{record.module}"[:50]
+            if self.writer.submit((record.levelname, module, message, datetime.fromtimestamp(record.created))):
+                self._stats['accepted'] += 1
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        """写入已入队的记录"""
+        self.writer.flush()
+
+    def close(self):
+        """关闭处理器并写入剩余记录"""
+        self.writer.close()
+        super().close()
+
+    def get_stats(self) -> Dict:
+        """
+        获取统计信息
+
+        Returns:
+            Dict: 入队/限流丢弃计数及批量写入器统计
+        """
+        with self.lock:
+            stats = dict(self._stats)
+        stats['writer'] = self.writer.get_stats()
+        return stats
+
+
+# 已安装的处理器
+_handler: Optional[DatabaseLogHandler] = None
+_install_lock = threading.Lock()
+
+
+def install_db_log_handler() -> Optional[DatabaseLogHandler]:
+    """
+    为 DB_LOG_CONFIG['loggers'] 中的日志记录器安装数据库日志处理器（重复调用只安装一次）
+
+    安装本身不连接数据库，首次写入时才创建数据库连接。
+
+    Returns:
+        Optional[DatabaseLogHandler]: 处理器，未启用时返回 None
+    """
+    global _handler
+    if not config.DB_LOG_CONFIG['enabled']:
+        return None
+    with _install_lock:
+        if _handler is None:
+            _handler = DatabaseLogHandler()
+            for name in config.DB_LOG_CONFIG['loggers']:
+                LogManager.add_handler(name, _handler)
+    return _handler
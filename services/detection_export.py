@@ -0,0 +1,301 @@
+"""
+检测结果导出服务
+将视频逐帧检测结果流式追加写入分块列式文件，并提供读取接口
+"""
+import json
+from pathlib import Path
+from typing import Optional, Dict, List, Iterator, Sequence
+import numpy as np
+from utils import inference_logger
+import config
+
+# 列定义：列名 -> 数据类型
+COLUMNS = {
+    'frame_index': np.int64,
+    'timestamp': np.float64,
+    'class_id': np.int32,
+    'confidence': np.float32,
+    'x1': np.int32,
+    'y1': np.int32,
+    'x2': np.int32,
+    'y2': np.int32
+}
+
+META_FILE = 'meta.json'
+CHUNK_PATTERN = 'chunk_{:06d}.npz'
+
+
+class DetectionStreamWriter:
+    """
+    逐帧检测结果写入器
+
+    结果目录结构::
+
+        xxx.dets/
+            meta.json           # 元数据（类别、帧率、总帧数、分块列表）
+            chunk_000000.npz    # 每个分块按列保存
+            chunk_000001.npz
+
+    内存中最多缓存 chunk_size 条检测记录，满后立即落盘，
+    分块文件只追加不修改，中途异常退出时已落盘的分块仍可读取。
+    """
+
+    def __init__(self, path: str, class_names: Dict[int, str] = None, fps: float = None,
+                 source: str = None, chunk_size: int = None):
+        """
+        初始化写入器
+
+        Args:
+            path: 结果目录路径
+            class_names: 类别ID到类别名称的映射
+            fps: 视频帧率
+            source: 数据源路径
+            chunk_size: 每个分块的检测记录数
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size or config.DETECTION_EXPORT_CONFIG['chunk_size']
+        self.compress = config.DETECTION_EXPORT_CONFIG['compress']
+
+        self.meta = {
+            'version': 1,
+            'source': source,
+            'fps': fps,
+            'class_names': {str(k): v for k, v in (class_names or {}).items()},
+            'columns': list(COLUMNS.keys()),
+            'total_frames': 0,
+            'total_detections': 0,
+            'chunks': []
+        }
+
+        self._buffer: Dict[str, list] = {name: [] for name in COLUMNS}
+        self._buffered = 0
+        self._closed = False
+
+    def write_frame(self, frame_index: int, timestamp: float, detections: List[Dict]):
+        """
+        写入一帧的检测结果
+
+        Args:
+            frame_index: 帧序号（从0开始）
+            timestamp: 帧时间戳（秒）
+            detections: 检测结果列表，元素需包含 bbox/confidence/class_id
+        """
+        if self._closed:
+            raise ValueError('写入器已关闭')
+
+        for det in detections:
+            x1, y1, x2, y2 = det['bbox']
+            self._buffer['frame_index'].append(frame_index)
+            self._buffer['timestamp'].append(timestamp)
+            self._buffer['class_id'].append(det.get('class_id', -1))
+            self._buffer['confidence'].append(det['confidence'])
+            self._buffer['x1'].append(x1)
+            self._buffer['y1'].append(y1)
+            self._buffer['x2'].append(x2)
+            self._buffer['y2'].append(y2)
+
+        self._buffered += len(detections)
+        self.meta['total_frames'] = max(self.meta['total_frames'], frame_index + 1)
+
+        if self._buffered >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """将缓存的检测记录写入新的分块文件"""
+        if self._buffered == 0:
+            self._write_meta()
+            return
+
+        chunk_name = CHUNK_PATTERN.format(len(self.meta['chunks']))
+        arrays = {name: np.asarray(values, dtype=dtype)
+                  for (name, dtype), values in zip(COLUMNS.items(), self._buffer.values())}
+
+        save = np.savez_compressed if self.compress else np.savez
+        with open(self.path / chunk_name, 'wb') as f:
+            save(f, **arrays)
+
+        self.meta['chunks'].append({
+            'file': chunk_name,
+            'rows': self._buffered,
+            'first_frame': int(arrays['frame_index'][0]),
+            'last_frame': int(arrays['frame_index'][-1])
+        })
+        self.meta['total_detections'] += self._buffered
+
+        self._buffer = {name: [] for name in COLUMNS}
+        self._buffered = 0
+        self._write_meta()
+
+    def _write_meta(self):
+        """原子地更新元数据文件"""
+        tmp_path = self.path / (META_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+        tmp_path.replace(self.path / META_FILE)
+
+    def close(self):
+        """刷新剩余数据并关闭写入器"""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        inference_logger.info(
+            f"逐帧检测结果已导出: {self.path}, 帧数: {self.meta['total_frames']}, "
+            f"检测数: {self.meta['total_detections']}, 分块数: {len(self.meta['chunks'])}"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class DetectionStreamReader:
+    """逐帧检测结果读取器"""
+
+    def __init__(self, path: str):
+        """
+        初始化读取器
+
+        Args:
+            path: 结果目录路径
+        """
+        self.path = Path(path)
+        meta_path = self.path / META_FILE
+        if not meta_path.exists():
+            raise FileNotFoundError(f"检测结果元数据不存在: {meta_path}")
+
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+
+    @property
+    def class_names(self) -> Dict[int, str]:
+        """类别ID到类别名称的映射"""
+        return {int(k): v for k, v in self.meta.get('class_names', {}).items()}
+
+    @property
+    def total_frames(self) -> int:
+        return self.meta.get('total_frames', 0)
+
+    @property
+    def total_detections(self) -> int:
+        return self.meta.get('total_detections', 0)
+
+    def iter_chunks(self, frame_range: Sequence[int] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        逐块迭代检测记录（内存占用与分块大小成正比）
+
+        Args:
+            frame_range: 帧区间 (start, end)，左闭右开；根据分块元数据跳过无关分块
+
+        Yields:
+            Dict[str, np.ndarray]: 列名到数组的映射
+        """
+        for chunk in self.meta.get('chunks', []):
+            if frame_range is not None:
+                start, end = frame_range
+                if chunk['last_frame'] < start or chunk['first_frame'] >= end:
+                    continue
+
+            with np.load(self.path / chunk['file']) as data:
+                yield {name: data[name] for name in COLUMNS}
+
+    def read(self, frame_range: Sequence[int] = None, class_names: List[str] = None,
+             min_confidence: float = None) -> Dict[str, np.ndarray]:
+        """
+        读取并过滤检测记录
+
+        Args:
+            frame_range: 帧区间 (start, end)，左闭右开
+            class_names: 只保留这些类别
+            min_confidence: 最低置信度
+
+        Returns:
+            Dict[str, np.ndarray]: 列名到数组的映射
+        """
+        class_ids = None
+        if class_names:
+            name_to_id = {v: k for k, v in self.class_names.items()}
+            class_ids = [name_to_id[name] for name in class_names if name in name_to_id]
+
+        parts = []
+        for chunk in self.iter_chunks(frame_range):
+            mask = np.ones(len(chunk['frame_index']), dtype=bool)
+            if frame_range is not None:
+                mask &= (chunk['frame_index'] >= frame_range[0]) & (chunk['frame_index'] < frame_range[1])
+            if class_ids is not None:
+                mask &= np.isin(chunk['class_id'], class_ids)
+            if min_confidence is not None:
+                mask &= chunk['confidence'] >= min_confidence
+            parts.append({name: values[mask] for name, values in chunk.items()})
+
+        if not parts:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+        return {name: np.concatenate([p[name] for p in parts]) for name in COLUMNS}
+
+    def frame_counts(self) -> np.ndarray:
+        """
+        统计每一帧的检测数量
+
+        Returns:
+            np.ndarray: 长度为总帧数的数组
+        """
+        counts = np.zeros(self.total_frames, dtype=np.int64)
+        for chunk in self.iter_chunks():
+            counts += np.bincount(chunk['frame_index'], minlength=self.total_frames)[:self.total_frames]
+        return counts
+
+    def class_counts(self) -> Dict[str, int]:
+        """
+        统计各类别的检测数量
+
+        Returns:
+            Dict[str, int]: 类别名称到数量的映射
+        """
+        names = self.class_names
+        totals: Dict[int, int] = {}
+        for chunk in self.iter_chunks():
+            ids, counts = np.unique(chunk['class_id'], return_counts=True)
+            for cls, count in zip(ids.tolist(), counts.tolist()):
+                totals[cls] = totals.get(cls, 0) + count
+        return {names.get(cls, str(cls)): count for cls, count in totals.items()}
+
+    def to_records(self, **filters) -> List[Dict]:
+        """
+        以字典列表形式返回检测记录（仅适合小范围查询）
+
+        Args:
+            **filters: 传递给 read() 的过滤条件
+
+        Returns:
+            List[Dict]: 检测记录列表
+        """
+        data = self.read(**filters)
+        names = self.class_names
+        records = []
+        for i in range(len(data['frame_index'])):
+            cls = int(data['class_id'][i])
+            records.append({
+                'frame_index': int(data['frame_index'][i]),
+                'timestamp': float(data['timestamp'][i]),
+                'class_id': cls,
+                'class_name': names.get(cls, str(cls)),
+                'confidence': float(data['confidence'][i]),
+                'bbox': [int(data['x1'][i]), int(data['y1'][i]), int(data['x2'][i]), int(data['y2'][i])]
+            })
+        return records
+
+
+def open_detection_stream(path: str) -> DetectionStreamReader:
+    """
+    打开逐帧检测结果
+
+    Args:
+        path: 结果目录路径
+
+    Returns:
+        DetectionStreamReader: 读取器
+    """
+    return DetectionStreamReader(path)
@@ -4,13 +4,33 @@
 提供用户问题反馈的提交、查看和处理功能
 """
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from .database import db_service
-from utils import system_logger
+from .fulltext import search_ids
+from utils import system_logger, LazyProxy
+import config
+
+# 反馈类型
+FEEDBACK_CATEGORIES = ['功能建议', '界面问题', '功能错误', '性能问题', '其他问题']
+
+# 反馈状态 -> 显示文本
+FEEDBACK_STATUSES = {
+    'pending': '待处理',
+    'processing': '处理中',
+    'resolved': '已解决',
+    'closed': '已关闭'
+}
+
+# 反馈列表查询的列（不含内容和回复，详情通过 get_feedback_by_id 获取）
+LIST_COLUMNS = 'f.id, f.user_id, f.title, f.category, f.status, f.created_at, f.updated_at, u.username'
 
 class FeedbackService:
     """反馈服务类"""
 
+    def __init__(self):
+        """初始化反馈服务"""
+        self.page_size = config.FEEDBACK_CONFIG['page_size']
+
     def submit_feedback(self, user_id: int, title: str, content: str, 
                       category: str = None, email: str = None) -> bool:
         """
@@ -64,6 +84,136 @@ class FeedbackService:
             system_logger.error(f"获取反馈列表失败: {str(e)}")
             return []
 
+    def get_feedback_by_id(self, feedback_id: int) -> Optional[Dict]:
+        """
+        按ID获取反馈详情（主键查询）
+
+        Args:
+            feedback_id: 反馈ID
+
+        Returns:
+            Optional[Dict]: 反馈信息（含提交用户名），不存在时返回 None
+        """
+        try:
+            result = db_service.execute_query(
+                """SELECT f.*, u.username
+                FROM feedbacks f
+                LEFT JOIN users u ON f.user_id = u.id
+                WHERE f.id = %s""",
+                (feedback_id,)
+            )
+            return result[0] if result else None
+        except Exception as e:
+            system_logger.error(f"获取反馈详情失败: {str(e)}")
+            return None
+
+    def list_feedbacks(self, status: str = None, category: str = None, user_id: int = None,
+                       cursor: Tuple = None, limit: int = None) -> Dict:
+        """
+        键集分页查询反馈列表（按提交时间倒序）
+
+        下一页从上一页最后一行的 (created_at, id) 之后继续，不使用 OFFSET；
+        列表只返回摘要列，内容和回复通过 get_feedback_by_id 获取。
+
+        Args:
+            status: 状态过滤
+            category: 类型过滤
+            user_id: 用户过滤
+            cursor: 上一页返回的游标，None 表示第一页
+            limit: 每页条数
+
+        Returns:
+            Dict: {'success', 'feedbacks', 'cursor'}；cursor 为 None 表示没有更多数据
+        """
+        try:
+            limit = limit or self.page_size
+            clauses, params = [], []
+
+            if status:
+                clauses.append("f.status = %s")
+                params.append(status)
+            if category:
+                clauses.append("f.category = %s")
+                params.append(category)
+            if user_id is not None:
+                clauses.append("f.user_id = %s")
+                params.append(user_id)
+            if cursor is not None:
+                last_time, last_id = cursor
+                clauses.append("f.created_at <= %s AND (f.created_at < %s OR f.id < %s)")
+                params.extend([last_time, last_time, last_id])
+
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+            # 多取一行用于判断是否还有下一页
+            rows = db_service.execute_query(
+                f"""SELECT {LIST_COLUMNS}
+                FROM feedbacks f
+                LEFT JOIN users u ON f.user_id = u.id
+                {where}
+                ORDER BY f.created_at DESC, f.id DESC
+                LIMIT %s""",
+                tuple(params) + (limit + 1,)
+            ) or []
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = (rows[-1]['created_at'], rows[-1]['id'])
+
+            return {'success': True, 'feedbacks': list(rows), 'cursor': next_cursor}
+        except Exception as e:
+            system_logger.error(f"获取反馈列表失败: {str(e)}")
+            return {'success': False, 'error': str(e), 'feedbacks': [], 'cursor': None}
+
+    def search_feedbacks(self, keyword: str, status: str = None, category: str = None,
+                         limit: int = None) -> List[Dict]:
+        """
+        搜索反馈（标题/内容全文检索，按相关度排序）
+
+        Args:
+            keyword: 搜索关键词，多个关键词以空格分隔，须全部匹配
+            status: 状态过滤
+            category: 类型过滤
+            limit: 返回数量限制
+
+        Returns:
+            List[Dict]: 反馈摘要列表（列同 list_feedbacks），score 为相关度
+        """
+        try:
+            clauses, params = [], []
+            if status:
+                clauses.append("t.status = %s")
+                params.append(status)
+            if category:
+                clauses.append("t.category = %s")
+                params.append(category)
+
+            ranked = search_ids('feedbacks', keyword, ' AND '.join(clauses), tuple(params), limit)
+            if not ranked:
+                return []
+
+            ids = [feedback_id for feedback_id, _ in ranked]
+            rows = db_service.execute_query(
+                f"""SELECT {LIST_COLUMNS}
+                FROM feedbacks f
+                LEFT JOIN users u ON f.user_id = u.id
+                WHERE f.id IN ({', '.join(['%s'] * len(ids))})""",
+                tuple(ids)
+            ) or []
+
+            by_id = {row['id']: row for row in rows}
+            results = []
+            for feedback_id, score in ranked:
+                if feedback_id in by_id:
+                    feedback = dict(by_id[feedback_id])
+                    feedback['score'] = score
+                    results.append(feedback)
+            return results
+        except Exception as e:
+            system_logger.error(f"搜索反馈失败: {str(e)}")
+            return []
+
     def get_user_feedbacks(self, user_id: int, limit: int = 50) -> List[Dict]:
         """
         获取用户的反馈
@@ -147,4 +297,4 @@ class FeedbackService:
             return False
 
 # 全局反馈服务实例
-feedback_service = FeedbackService()
+feedback_service = LazyProxy(FeedbackService, 'feedback_service')
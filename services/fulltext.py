@@ -0,0 +1,90 @@
+"""
+全文检索
+在模型/反馈的全文索引上按相关度检索，关键词过短或没有全文索引（旧版 SQLite）时退回 LIKE 查询
+"""
+from typing import Dict, List, Tuple
+from .database import db_service
+from .db_backends import FULLTEXT_COLUMNS
+import config
+
+# 表名 -> 是否有全文索引（迁移在启动时完成，结果缓存到进程结束）
+_fulltext_tables: Dict[str, bool] = {}
+
+
+def fulltext_available(table: str) -> bool:
+    """
+    表是否有全文索引（SQLite 不支持 trigram 分词器时迁移 v8 不创建）
+
+    Args:
+        table: 表名
+
+    Returns:
+        bool: 是否可以使用全文检索
+    """
+    if table not in _fulltext_tables:
+        with db_service.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                _fulltext_tables[table] = db_service.backend.fulltext_index_exists(cursor, table)
+            finally:
+                cursor.close()
+    return _fulltext_tables[table]
+
+
+def split_terms(keyword: str) -> List[str]:
+    """
+    拆分搜索关键词（按空白分隔，去掉双引号）
+
+    Args:
+        keyword: 用户输入的关键词
+
+    Returns:
+        List[str]: 关键词列表
+    """
+    terms = []
+    for term in (keyword or '').replace('"', ' ').split():
+        if term not in terms:
+            terms.append(term)
+    return terms
+
+
+def search_ids(table: str, keyword: str, where: str = '', params: tuple = (),
+               limit: int = None) -> List[Tuple[int, float]]:
+    """
+    全文检索，返回按相关度降序的 (id, score)
+
+    所有关键词都须匹配；任一关键词短于全文索引的最短匹配长度或表没有全文索引时改用 LIKE 查询，
+    此时不计算相关度，按 id 倒序返回。
+
+    Args:
+        table: 表名（models / feedbacks）
+        keyword: 搜索关键词
+        where: 附加过滤条件（%s 占位符，列名以 t. 限定）
+        params: 附加过滤条件的参数
+        limit: 返回条数
+
+    Returns:
+        List[Tuple[int, float]]: [(id, score), ...]
+    """
+    terms = split_terms(keyword)
+    if not terms:
+        return []
+    limit = limit or config.SEARCH_CONFIG['limit']
+    backend = db_service.backend
+
+    if min(len(term) for term in terms) >= backend.fulltext_min_length and fulltext_available(table):
+        sql, sql_params = backend.fulltext_search_sql(table, terms, where, params, limit)
+    else:
+        columns = FULLTEXT_COLUMNS[table]
+        clauses, sql_params = [], []
+        for term in terms:
+            clauses.append('(' + ' OR '.join(f"t.{c} LIKE %s" for c in columns) + ')')
+            sql_params.extend([f"%{term}%"] * len(columns))
+        if where:
+            clauses.append(where)
+            sql_params.extend(params)
+        sql = f"SELECT t.id AS id, 0 AS score FROM {table} t WHERE {' AND '.join(clauses)} ORDER BY t.id DESC LIMIT %s"
+        sql_params = tuple(sql_params) + (limit,)
+
+    rows = db_service.execute_query(sql, sql_params) or []
+    return [(row['id'], float(row['score'] or 0)) for row in rows]
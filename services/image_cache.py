@@ -0,0 +1,407 @@
+"""
+训练图片缓存
+把数据集图片预先缩放到训练图像大小（长边 = img_size，与 ultralytics 加载图片时的缩放一致，
+标注的归一化坐标不变）并重新编码为小文件，之后每轮和之后的训练直接读取缓存，不再重复解码和缩放原始大图。
+默认 JPEG 源图片缓存为 jpg，PNG/BMP/TIFF 等无损源图片缓存为 png，不把无损数据集变成有损副本。
+缓存按数据集路径和图像大小分目录，清单记录每张源图片的大小和修改时间，重建时只处理新增或变化的图片。
+
+命令行：
+    python -m services.image_cache build <data.yaml> [img_size]       构建/更新缓存
+    python -m services.image_cache benchmark <data.yaml> [img_size]   估算源图片和缓存的每轮图片加载耗时
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, List, Callable, Tuple
+import yaml
+from utils import training_logger, LazyProxy, lazy_import
+import config
+
+# OpenCV 在构建缓存时才导入
+cv2 = lazy_import('cv2')
+
+# ultralytics 支持的常见图片格式
+IMAGE_SUFFIXES = {'.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp'}
+
+# 有损格式的源图片（auto 格式下缓存为 jpg，其余缓存为 png）
+LOSSY_SUFFIXES = {'.jpg', '.jpeg'}
+
+MANIFEST_NAME = 'manifest.json'
+
+# JPEG 帧起始标记（其中包含图片宽高）
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def label_path(image_path: Path) -> Path:
+    """图片对应的标注文件（与 ultralytics 相同：路径中最后一个 images 目录换成 labels）"""
+    parts = list(image_path.parts)
+    for i in range(len(parts) - 1, -1, -1):
+        if parts[i] == 'images':
+            parts[i] = 'labels'
+            break
+    return Path(*parts).with_suffix('.txt')
+
+
+def _fingerprint(path: Path) -> Optional[List[int]]:
+    """文件指纹 [大小, 修改时间(ns)]，文件不存在时返回 None"""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _atomic_copy(src: Path, dst: Path):
+    tmp = dst.with_name(f'.{dst.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+class ImageCache:
+    """
+    训练图片缓存类
+
+    缓存目录与数据集目录结构相同（images/<split>、labels/<split>），另有指向缓存的 data.yaml。
+    图片文件的写入都是先写临时文件再替换，多个训练进程同时构建同一缓存时只会重复处理，不会读到半个文件。
+    """
+
+    def __init__(self):
+        """初始化图片缓存"""
+        cache_config = config.IMAGE_CACHE_CONFIG
+        self.cache_dir = Path(cache_config['cache_dir'])
+        self.format = cache_config['format']
+        self.jpeg_quality = cache_config['jpeg_quality']
+        self.workers = cache_config['workers'] or min(32, os.cpu_count() or 1)
+
+    def get_cache_root(self, dataset_root: Path, img_size: int) -> Path:
+        """数据集在指定图像大小下的缓存目录"""
+        key = hashlib.sha1(str(Path(dataset_root).resolve()).encode('utf-8')).hexdigest()[:12]
+        return self.cache_dir / f"{Path(dataset_root).name}_{key}_{img_size}"
+
+    @staticmethod
+    def _load_dataset(data_yaml: str) -> Tuple[Dict, Path, Dict[str, str]]:
+        """读取数据集配置，返回 (配置, 数据集根目录, {划分: 相对路径})"""
+        with open(data_yaml, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f) or {}
+        root = Path(data.get('path') or Path(data_yaml).parent)
+        if not root.is_absolute():
+            root = (Path(data_yaml).parent / root).resolve()
+        splits = {}
+        for split in ('train', 'val', 'test'):
+            value = data.get(split)
+            if value is None:
+                continue
+            if not isinstance(value, str) or not (root / value).is_dir():
+                raise ValueError(f"仅支持图片目录形式的数据集划分: {split}={value}")
+            splits[split] = value
+        return data, root, splits
+
+    def _cached_name(self, rel: Path) -> Path:
+        if self.format == 'auto':
+            return rel.with_suffix('.jpg' if rel.suffix.lower() in LOSSY_SUFFIXES else '.png')
+        return rel.with_suffix('.png' if self.format == 'png' else '.jpg')
+
+    def describe(self) -> str:
+        """缓存图片与源图片的差异说明（用于日志）"""
+        if self.format == 'auto':
+            return f"JPEG 源图片以质量 {self.jpeg_quality} 重新编码，无损格式保存为 PNG"
+        if self.format == 'png':
+            return "全部保存为 PNG（无损）"
+        return f"全部以 JPEG 质量 {self.jpeg_quality} 重新编码（无损源图片也会有损）"
+
+    def _cache_image(self, src: Path, dst: Path, img_size: int) -> bool:
+        """缩放并写入一张缓存图片"""
+        same_format = src.suffix.lower().replace('.jpeg', '.jpg') == dst.suffix
+        size = self._image_size(src)
+        if size and max(size) <= img_size and same_format:
+            # 已经不大于训练尺寸且格式相同，直接复制，避免重新编码损失画质
+            _atomic_copy(src, dst)
+            return True
+
+        img = cv2.imread(str(src))
+        if img is None:
+            return False
+        h, w = img.shape[:2]
+        ratio = img_size / max(h, w)
+        if ratio < 1:
+            img = cv2.resize(img, (max(1, round(w * ratio)), max(1, round(h * ratio))),
+                             interpolation=cv2.INTER_AREA)
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality] if dst.suffix == '.jpg' else []
+        ok, buffer = cv2.imencode(dst.suffix, img, params)
+        if not ok:
+            return False
+        tmp = dst.with_name(f'.{dst.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp.write_bytes(buffer.tobytes())
+        os.replace(tmp, dst)
+        return True
+
+    @staticmethod
+    def _image_size(path: Path) -> Optional[Tuple[int, int]]:
+        """不解码像素读取 JPEG/PNG 的宽高（其他格式返回 None）"""
+        try:
+            with open(path, 'rb') as f:
+                head = f.read(26)
+                if head[:8] == b'\x89PNG\r\n\x1a\n':
+                    return int.from_bytes(head[16:20], 'big'), int.from_bytes(head[20:24], 'big')
+                if head[:2] != b'\xff\xd8':
+                    return None
+                f.seek(2)
+                while True:
+                    marker = f.read(2)
+                    if len(marker) < 2 or marker[0] != 0xFF:
+                        return None
+                    if marker[1] in _JPEG_SOF_MARKERS:
+                        f.read(3)
+                        h, w = int.from_bytes(f.read(2), 'big'), int.from_bytes(f.read(2), 'big')
+                        return w, h
+                    f.seek(int.from_bytes(f.read(2), 'big') - 2, 1)
+        except OSError:
+            return None
+
+    def build(self, data_yaml: str, img_size: int, progress_callback: Callable = None) -> Dict:
+        """
+        构建或更新数据集的缩放图片缓存
+
+        Args:
+            data_yaml: 数据集YAML配置文件路径
+            img_size: 训练图像大小
+            progress_callback: 进度回调函数，参数为 (已处理数, 待处理数)
+
+        Returns:
+            Dict: {'success', 'data_yaml'（指向缓存的配置）, 'cache_dir', 'images', 'cached', 'reused',
+                   'removed', 'failed', 'seconds', 'source_bytes', 'cache_bytes', 'format'} 或 {'success': False, 'error'}
+        """
+        start = time.perf_counter()
+        try:
+            data, root, splits = self._load_dataset(data_yaml)
+            cache_root = self.get_cache_root(root, img_size)
+            cache_root.mkdir(parents=True, exist_ok=True)
+            manifest_path = cache_root / MANIFEST_NAME
+            try:
+                manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+            except (FileNotFoundError, ValueError):
+                manifest = {}
+            if manifest.get('format') != self.format or manifest.get('img_size') != img_size:
+                # 格式变化后缓存文件名可能不同，清空旧缓存，避免残留图片被当作训练数据
+                if manifest:
+                    shutil.rmtree(cache_root, ignore_errors=True)
+                    cache_root.mkdir(parents=True, exist_ok=True)
+                manifest = {'format': self.format, 'img_size': img_size, 'images': {}, 'labels': {}}
+            old_images, old_labels = manifest['images'], manifest['labels']
+            images, labels = {}, {}
+
+            # 扫描源图片，只处理新增或大小/修改时间变化的图片
+            todo = []
+            source_bytes = 0
+            for split_dir in splits.values():
+                for src in (root / split_dir).rglob('*'):
+                    if src.suffix.lower() not in IMAGE_SUFFIXES or not src.is_file():
+                        continue
+                    rel = src.relative_to(root).as_posix()
+                    fingerprint = _fingerprint(src)
+                    source_bytes += fingerprint[0]
+                    dst = cache_root / self._cached_name(Path(rel))
+                    if old_images.get(rel) == fingerprint and dst.exists():
+                        images[rel] = fingerprint
+                    else:
+                        todo.append((rel, src, dst, fingerprint))
+
+                    # 标注文件很小，变化时直接复制；源标注不存在（背景图）时删除缓存中的标注
+                    src_label = label_path(src)
+                    rel_label = label_path(Path(rel)).as_posix()
+                    dst_label = cache_root / rel_label
+                    label_fingerprint = _fingerprint(src_label)
+                    if label_fingerprint is None:
+                        dst_label.unlink(missing_ok=True)
+                    else:
+                        if old_labels.get(rel_label) != label_fingerprint or not dst_label.exists():
+                            dst_label.parent.mkdir(parents=True, exist_ok=True)
+                            _atomic_copy(src_label, dst_label)
+                        labels[rel_label] = label_fingerprint
+
+            # 删除已不存在的源图片对应的缓存
+            removed = 0
+            for rel in set(old_images) - set(images) - {item[0] for item in todo}:
+                (cache_root / self._cached_name(Path(rel))).unlink(missing_ok=True)
+                removed += 1
+            for rel_label in set(old_labels) - set(labels):
+                (cache_root / rel_label).unlink(missing_ok=True)
+
+            for dst_dir in {item[2].parent for item in todo}:
+                dst_dir.mkdir(parents=True, exist_ok=True)
+
+            failed = 0
+            reused = len(images)
+            if todo:
+                training_logger.info(f"构建图片缓存: {len(todo)} 张待处理, {reused} 张复用, 线程数 {self.workers}")
+
+                def process(item):
+                    rel, src, dst, fingerprint = item
+                    try:
+                        return rel, fingerprint, self._cache_image(src, dst, img_size)
+                    except Exception as e:
+                        training_logger.warning(f"缓存图片失败 {src}: {str(e)}")
+                        return rel, fingerprint, False
+
+                with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ImageCache') as executor:
+                    for done, (rel, fingerprint, ok) in enumerate(executor.map(process, todo), 1):
+                        if ok:
+                            images[rel] = fingerprint
+                        else:
+                            failed += 1
+                        if progress_callback is not None and (done % 200 == 0 or done == len(todo)):
+                            progress_callback(done, len(todo))
+
+            manifest.update({'images': images, 'labels': labels})
+            tmp = manifest_path.with_name(f'.{MANIFEST_NAME}.{os.getpid()}.tmp')
+            tmp.write_text(json.dumps(manifest), encoding='utf-8')
+            os.replace(tmp, manifest_path)
+
+            # 指向缓存的数据集配置，其余字段（nc、names 等）保持不变
+            cache_data = dict(data, path=str(cache_root))
+            cache_yaml = cache_root / 'data.yaml'
+            with open(cache_yaml, 'w', encoding='utf-8') as f:
+                yaml.dump(cache_data, f, allow_unicode=True, default_flow_style=False)
+
+            cache_bytes = sum(
+                (cache_root / self._cached_name(Path(rel))).stat().st_size for rel in images
+            )
+            result = {
+                'success': True,
+                'data_yaml': str(cache_yaml),
+                'cache_dir': str(cache_root),
+                'images': len(images) + failed,
+                'cached': len(todo) - failed,
+                'reused': reused,
+                'removed': removed,
+                'failed': failed,
+                'seconds': round(time.perf_counter() - start, 2),
+                'source_bytes': source_bytes,
+                'cache_bytes': cache_bytes,
+                'format': self.format
+            }
+            training_logger.info(
+                f"图片缓存就绪: {cache_root}, 新缓存 {result['cached']} 张, 复用 {reused} 张, 失败 {failed} 张, "
+                f"{source_bytes / 1048576:.1f} MB -> {cache_bytes / 1048576:.1f} MB, 耗时 {result['seconds']} 秒"
+            )
+            if failed:
+                training_logger.warning(f"{failed} 张图片缓存失败，训练和验证中将缺少这些图片")
+            return result
+        except Exception as e:
+            training_logger.error(f"构建图片缓存失败: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    def benchmark(self, data_yaml: str, img_size: int, limit: int = 200) -> Dict:
+        """
+        估算从源图片和从缓存加载训练集图片的每轮耗时（与 ultralytics 加载图片相同：解码 + 缩放到 img_size）
+
+        只测量单线程的图片解码和缩放并按训练集图片数折算，不是实际训练每轮耗时
+        （不含数据增强、前向/反向计算，也不考虑数据加载器的多进程并行）。
+
+        Args:
+            data_yaml: 数据集YAML配置文件路径（源数据集）
+            img_size: 训练图像大小
+            limit: 抽样图片数
+
+        Returns:
+            Dict: {'success', 'images', 'sampled', 'source_seconds_per_epoch', 'cache_seconds_per_epoch', 'speedup'}
+                  （单线程估算，按训练集图片总数折算每轮耗时）
+        """
+        try:
+            _, root, splits = self._load_dataset(data_yaml)
+            cache_root = self.get_cache_root(root, img_size)
+            if not (cache_root / MANIFEST_NAME).exists():
+                return {'success': False, 'error': '缓存不存在，请先构建缓存'}
+
+            train = [p for p in sorted((root / splits['train']).rglob('*')) if p.suffix.lower() in IMAGE_SUFFIXES]
+            step = max(1, len(train) // limit)
+            sample = train[::step][:limit]
+
+            def load(path: Path):
+                img = cv2.imread(str(path))
+                h, w = img.shape[:2]
+                ratio = img_size / max(h, w)
+                if ratio != 1:
+                    img = cv2.resize(img, (round(w * ratio), round(h * ratio)), interpolation=cv2.INTER_LINEAR)
+                return img
+
+            timings = []
+            for paths in (sample, [cache_root / self._cached_name(p.relative_to(root)) for p in sample]):
+                start = time.perf_counter()
+                for path in paths:
+                    load(path)
+                timings.append((time.perf_counter() - start) / max(len(paths), 1) * len(train))
+
+            return {
+                'success': True,
+                'images': len(train),
+                'sampled': len(sample),
+                'source_seconds_per_epoch': round(timings[0], 2),
+                'cache_seconds_per_epoch': round(timings[1], 2),
+                'speedup': round(timings[0] / timings[1], 2) if timings[1] else None
+            }
+        except Exception as e:
+            training_logger.error(f"图片缓存测速失败: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    def clear(self, data_yaml: str = None, img_size: int = None) -> int:
+        """
+        删除缓存
+
+        Args:
+            data_yaml: 只删除该数据集的缓存（为空时删除全部）
+            img_size: 只删除该图像大小的缓存
+
+        Returns:
+            int: 删除的缓存目录数
+        """
+        if not self.cache_dir.exists():
+            return 0
+        if data_yaml:
+            _, root, _ = self._load_dataset(data_yaml)
+            pattern = self.get_cache_root(root, img_size).name if img_size else \
+                self.get_cache_root(root, 0).name.rsplit('_', 1)[0] + '_*'
+        else:
+            pattern = '*'
+        count = 0
+        for path in self.cache_dir.glob(pattern):
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+                count += 1
+        return count
+
+
+# 全局图片缓存实例
+image_cache = LazyProxy(ImageCache, 'image_cache')
+
+
+def main(argv: List[str] = None):
+    """命令行入口"""
+    import sys
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 2 or argv[0] not in ('build', 'benchmark', 'clear'):
+        print(__doc__)
+        return 1
+
+    command, data_yaml = argv[0], argv[1]
+    img_size = int(argv[2]) if len(argv) > 2 else config.TRAINING_CONFIG['img_size']
+    if command == 'build':
+        result = image_cache.build(data_yaml, img_size,
+                                   progress_callback=lambda done, total: print(f"\r{done}/{total}", end=''))
+        print()
+    elif command == 'benchmark':
+        result = image_cache.benchmark(data_yaml, img_size)
+    else:
+        result = {'success': True, 'removed_dirs': image_cache.clear(data_yaml, img_size if len(argv) > 2 else None)}
+    for key, value in result.items():
+        print(f"{key:<26} {value}")
+    return 0 if result['success'] else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
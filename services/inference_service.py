@@ -2,26 +2,51 @@
 推理服务
 提供YOLOv11模型推理功能
 """
-import cv2
-import numpy as np
 from pathlib import Path
 from typing import Optional, Dict, List, Union
 import time
-from ultralytics import YOLO
+import uuid
+from datetime import datetime
 from .database import db_service
-from utils import inference_logger
+from .batch_writer import BatchWriter
+from utils import inference_logger, LazyProxy, lazy_import
 import config
 
+# OpenCV 在首次推理时才导入
+cv2 = lazy_import('cv2')
+
 class InferenceEngine:
     """推理引擎类"""
     
     def __init__(self):
         """初始化推理引擎"""
-        self.model: Optional[YOLO] = None
+        self.model = None  # ultralytics.YOLO，首次加载模型时才导入 ultralytics
         self.current_model_path: Optional[str] = None
         self.conf_threshold = config.YOLO_CONFIG['conf_threshold']
         self.iou_threshold = config.YOLO_CONFIG['iou_threshold']
         self.device = config.SYSTEM_CONFIG['device']
+        
+        # 推理日志在后台线程批量写入，不阻塞推理
+        self.log_writer = BatchWriter(
+            'inference_logs',
+            """INSERT INTO inference_logs 
+            (user_id, model_name, source_type, source_path, detections, inference_time, run_uid) 
+            VALUES (%s, %s, %s, %s, %s, %s, %s)"""
+        )
+        
+        # 逐目标检测记录，多行批量插入 detections 表
+        self.detection_writer = None
+        store_config = config.DETECTION_STORE_CONFIG
+        if store_config['enabled']:
+            self.detection_writer = BatchWriter(
+                'detections',
+                """INSERT INTO detections 
+                (run_uid, frame_index, user_id, model_name, source_type, class_name, confidence, x1, y1, x2, y2) 
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+                batch_size=store_config['batch_size'],
+                flush_interval=store_config['flush_interval'],
+                max_queue=store_config['max_queue']
+            )
     
     def load_model(self, model_path: str) -> bool:
         """
@@ -71,6 +96,7 @@ class InferenceEngine:
             inference_logger.info(f"使用设备: {self.device}")
             
             # 加载模型
+            from ultralytics import YOLO
             self.model = YOLO(model_path)
             self.current_model_path = model_path
             
@@ -104,13 +130,54 @@ class InferenceEngine:
         if iou_threshold is not None:
             self.iou_threshold = iou_threshold
     
-    def predict_image(self, image_path: str, save_path: str = None) -> Dict:
+    def new_run(self, user_id: int = None, model_name: str = None, source_type: str = None) -> Dict:
+        """
+        创建一次推理运行的上下文，用于关联 inference_logs 与 detections
+        
+        Args:
+            user_id: 用户ID
+            model_name: 模型名称
+            source_type: 数据源类型
+            
+        Returns:
+            Dict: 运行上下文（包含 run_uid）
+        """
+        return {
+            'run_uid': uuid.uuid4().hex,
+            'user_id': user_id,
+            'model_name': model_name,
+            'source_type': source_type
+        }
+    
+    def _record_detections(self, run: Optional[Dict], frame_index: int, detections: List[Dict]):
+        """
+        将一帧的检测结果放入批量写入队列（不阻塞推理）
+        
+        Args:
+            run: 运行上下文
+            frame_index: 帧序号（图片为0）
+            detections: 检测结果列表
+        """
+        if not run or not detections or not self.detection_writer:
+            return
+        
+        rows = [
+            (run['run_uid'], frame_index, run['user_id'], run['model_name'], run['source_type'],
+             det['class_name'], det['confidence'], *det['bbox'])
+            for det in detections
+        ]
+        accepted = self.detection_writer.submit_many(rows)
+        if accepted < len(rows):
+            inference_logger.debug(f"检测记录队列已满，丢弃 {len(rows) - accepted} 条")
+    
+    def predict_image(self, image_path: str, save_path: str = None, run: Dict = None) -> Dict:
         """
         对单张图片进行推理
         
         Args:
             image_path: 图片路径
             save_path: 结果保存路径
+            run: 运行上下文（由 new_run 创建），提供时记录逐目标检测结果
             
         Returns:
             Dict: 推理结果
@@ -163,19 +230,23 @@ class InferenceEngine:
             if save_path and img is not None:
                 cv2.imwrite(save_path, img)
             
+            self._record_detections(run, 0, detections)
+            
             inference_logger.info(f"图片推理完成: {image_path}, 检测数: {len(detections)}, 耗时: {inference_time:.3f}s")
             
             return {
                 'success': True,
                 'detections': detections,
                 'inference_time': inference_time,
-                'image': img
+                'image': img,
+                'run_uid': run['run_uid'] if run else None
             }
         except Exception as e:
             inference_logger.error(f"图片推理失败: {str(e)}")
             return {'success': False, 'error': str(e)}
     
-    def predict_video(self, video_path: str, save_path: str = None, callback=None) -> Dict:
+    def predict_video(self, video_path: str, save_path: str = None, callback=None,
+                      export_path: str = None, run: Dict = None) -> Dict:
         """
         对视频进行推理
         
@@ -183,6 +254,8 @@ class InferenceEngine:
             video_path: 视频路径
             save_path: 结果保存路径
             callback: 进度回调函数 callback(frame, detections, fps)
+            export_path: 逐帧检测结果导出目录（为None时不导出）
+            run: 运行上下文（由 new_run 创建），提供时记录逐目标检测结果
             
         Returns:
             Dict: 推理结果统计
@@ -191,6 +264,7 @@ class InferenceEngine:
             inference_logger.error("模型未加载")
             return {'success': False, 'error': '模型未加载'}
         
+        exporter = None
         try:
             cap = cv2.VideoCapture(video_path)
             if not cap.isOpened():
@@ -208,6 +282,16 @@ class InferenceEngine:
                 fourcc = cv2.VideoWriter_fourcc(*'mp4v')
                 writer = cv2.VideoWriter(save_path, fourcc, fps, (width, height))
             
+            # 逐帧检测结果导出
+            if export_path:
+                from .detection_export import DetectionStreamWriter
+                exporter = DetectionStreamWriter(
+                    export_path,
+                    class_names=getattr(self.model, 'names', None),
+                    fps=fps,
+                    source=video_path
+                )
+            
             frame_count = 0
             total_detections = 0
             
@@ -238,6 +322,7 @@ class InferenceEngine:
                         detections.append({
                             'bbox': [int(x1), int(y1), int(x2), int(y2)],
                             'confidence': conf,
+                            'class_id': cls,
                             'class_name': result.names[cls]
                         })
                         
@@ -249,6 +334,15 @@ class InferenceEngine:
                 
                 current_fps = 1.0 / (time.time() - start_time)
                 total_detections += len(detections)
+                
+                # 导出检测结果（优先使用解码器时间戳，兼容可变帧率视频）
+                if exporter:
+                    timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                    if timestamp <= 0 and fps > 0:
+                        timestamp = frame_count / fps
+                    exporter.write_frame(frame_count, timestamp, detections)
+                
+                self._record_detections(run, frame_count, detections)
                 frame_count += 1
                 
                 # 写入视频
@@ -257,11 +351,14 @@ class InferenceEngine:
                 
                 # 回调
                 if callback:
-                    callback(frame, detections, current_fps)
+                    if callback(frame, detections, current_fps) is False:
+                        break
             
             cap.release()
             if writer:
                 writer.release()
+            if exporter:
+                exporter.close()
             
             inference_logger.info(f"视频推理完成: {video_path}, 总帧数: {frame_count}, 总检测数: {total_detections}")
             
@@ -269,19 +366,24 @@ class InferenceEngine:
                 'success': True,
                 'total_frames': frame_count,
                 'total_detections': total_detections,
-                'fps': fps
+                'fps': fps,
+                'export_path': export_path
             }
         except Exception as e:
             inference_logger.error(f"视频推理失败: {str(e)}")
+            # 保留已处理帧的导出结果
+            if exporter:
+                exporter.close()
             return {'success': False, 'error': str(e)}
     
-    def predict_camera(self, camera_id: int = 0, callback=None):
+    def predict_camera(self, camera_id: int = 0, callback=None, run: Dict = None):
         """
         实时摄像头推理
         
         Args:
             camera_id: 摄像头ID
             callback: 帧回调函数 callback(frame, detections, fps)
+            run: 运行上下文（由 new_run 创建），提供时记录逐目标检测结果
         """
         if not self.model:
             inference_logger.error("模型未加载")
@@ -289,6 +391,7 @@ class InferenceEngine:
         
         try:
             cap = cv2.VideoCapture(camera_id)
+            frame_index = 0
             
             while cap.isOpened():
                 ret, frame = cap.read()
@@ -317,6 +420,7 @@ class InferenceEngine:
                         detections.append({
                             'bbox': [int(x1), int(y1), int(x2), int(y2)],
                             'confidence': conf,
+                            'class_id': cls,
                             'class_name': result.names[cls]
                         })
                         
@@ -327,6 +431,9 @@ class InferenceEngine:
                 
                 fps = 1.0 / (time.time() - start_time)
                 
+                self._record_detections(run, frame_index, detections)
+                frame_index += 1
+                
                 if callback:
                     if not callback(frame, detections, fps):
                         break
@@ -336,9 +443,10 @@ class InferenceEngine:
             inference_logger.error(f"摄像头推理失败: {str(e)}")
     
     def log_inference(self, user_id: int, model_name: str, source_type: str, 
-                     source_path: str, detections: int, inference_time: float):
+                     source_path: str, detections: int, inference_time: float,
+                     run_uid: str = None):
         """
-        记录推理日志到数据库
+        记录推理日志到数据库（异步批量写入）
         
         Args:
             user_id: 用户ID
@@ -347,17 +455,72 @@ class InferenceEngine:
             source_path: 数据源路径
             detections: 检测数量
             inference_time: 推理时间
+            run_uid: 运行ID（关联 detections 表）
+        """
+        if not self.log_writer.submit(
+            (user_id, model_name, source_type, source_path, detections, inference_time, run_uid)
+        ):
+            inference_logger.warning(f"推理日志队列已满，丢弃记录: {source_path}")
+    
+    def get_detection_summary(self, start_time: datetime = None, end_time: datetime = None,
+                              model_name: str = None, class_name: str = None,
+                              user_id: int = None, source_path: str = None) -> List[Dict]:
+        """
+        按模型和类别统计检测数量（例如：某模型上周在某数据源中检测到多少只海龟）
+        
+        Args:
+            start_time: 开始时间
+            end_time: 结束时间
+            model_name: 模型名称
+            class_name: 类别名称
+            user_id: 用户ID
+            source_path: 数据源路径前缀（通过 run_uid 关联 inference_logs）
+            
+        Returns:
+            List[Dict]: [{model_name, class_name, count, avg_confidence}, ...]
         """
+        conditions = []
+        params = []
+        if start_time:
+            conditions.append("d.created_at >= %s")
+            params.append(start_time)
+        if end_time:
+            conditions.append("d.created_at < %s")
+            params.append(end_time)
+        if model_name:
+            conditions.append("d.model_name = %s")
+            params.append(model_name)
+        if class_name:
+            conditions.append("d.class_name = %s")
+            params.append(class_name)
+        if user_id:
+            conditions.append("d.user_id = %s")
+            params.append(user_id)
+        if source_path:
+            conditions.append("d.run_uid IN (SELECT run_uid FROM inference_logs WHERE source_path LIKE %s)")
+            params.append(f'{source_path}%')
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
         try:
-            db_service.execute_query(
-                """INSERT INTO inference_logs 
-                (user_id, model_name, source_type, source_path, detections, inference_time) 
-                VALUES (%s, %s, %s, %s, %s, %s)""",
-                (user_id, model_name, source_type, source_path, detections, inference_time),
-                fetch=False
-            )
+            return db_service.execute_query(
+                f"""SELECT d.model_name, d.class_name, COUNT(*) AS count, AVG(d.confidence) AS avg_confidence
+                FROM detections d {where}
+                GROUP BY d.model_name, d.class_name
+                ORDER BY count DESC""",
+                tuple(params)
+            ) or []
         except Exception as e:
-            inference_logger.error(f"记录推理日志失败: {str(e)}")
+            inference_logger.error(f"统计检测结果失败: {str(e)}")
+            return []
+    
+    def get_log_writer_stats(self) -> Dict:
+        """
+        获取推理日志写入器统计信息
+        
+        Returns:
+            Dict: 队列深度、丢弃数等
+        """
+        return self.log_writer.get_stats()
 
 # 全局推理引擎实例
-inference_engine = InferenceEngine()
+inference_engine = LazyProxy(InferenceEngine, 'inference_engine')
@@ -0,0 +1,262 @@
+"""
+标注文件清理
+检查 labels 目录下 YOLO 标注中超出类别范围或格式错误的行，可只生成报告（dry run）或删除这些行。
+按文件大小和修改时间维护索引，只重新检查新增或变化的文件；待检查文件较多时分块交给多个进程并行检查
+
+命令行：
+    python -m services.label_sanitizer <数据集路径> <类别数>          只检查并生成报告
+    python -m services.label_sanitizer <数据集路径> <类别数> --fix    删除无效标注行
+"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+from utils import training_logger, LazyProxy
+import config
+
+
+def _scan_labels(labels_dir: str) -> Dict[str, List[int]]:
+    """
+    递归列出标注文件及其指纹 [大小, 修改时间(ns)]
+
+    使用 os.scandir，Windows 上目录项自带文件属性，不需要对每个文件单独 stat。
+    """
+    files = {}
+    stack = [labels_dir]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith('.txt') and entry.is_file():
+                    stat = entry.stat()
+                    files[entry.path] = [stat.st_size, stat.st_mtime_ns]
+    return files
+
+
+def _check_files(paths: List[str], max_class_id: int, fix: bool) -> List[Tuple]:
+    """
+    检查一批标注文件（在工作进程中执行）
+
+    只保留至少 5 列且类别索引在 [0, max_class_id] 内的行。
+
+    Args:
+        paths: 标注文件路径
+        max_class_id: 最大允许的类别索引
+        fix: 是否把无效行删除后写回
+
+    Returns:
+        List[Tuple]: (路径, 检查后的指纹, 超出类别范围行数, 格式错误行数, 出错类别索引, 错误信息)
+    """
+    results = []
+    for path in paths:
+        try:
+            with open(path, 'r') as f:
+                lines = f.readlines()
+
+            kept = []
+            out_of_range = malformed = 0
+            bad_classes = set()
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                parts = line.split()
+                if len(parts) < 5:
+                    malformed += 1
+                    continue
+                try:
+                    class_id = int(parts[0])
+                except ValueError:
+                    malformed += 1
+                    continue
+                if 0 <= class_id <= max_class_id:
+                    kept.append(line)
+                else:
+                    out_of_range += 1
+                    bad_classes.add(class_id)
+
+            if fix and (out_of_range or malformed):
+                with open(path, 'w') as f:
+                    f.write('\n'.join(kept))
+                    if kept:
+                        f.write('\n')
+            stat = os.stat(path)
+            results.append((path, [stat.st_size, stat.st_mtime_ns], out_of_range, malformed,
+                            sorted(bad_classes), None))
+        except Exception as e:
+            results.append((path, None, 0, 0, [], str(e)))
+    return results
+
+
+class LabelSanitizer:
+    """
+    标注文件清理类
+
+    索引保存在 LABEL_SANITIZE_CONFIG['index_dir'] 下，每个标注目录一个文件，记录已确认合法
+    （或已清理）的文件指纹和检查时使用的最大类别索引；类别数变化时全部重新检查。
+    dry run 时有问题的文件不写回也不记入索引，下次仍会检查。
+    """
+
+    def __init__(self):
+        """初始化标注清理"""
+        sanitize_config = config.LABEL_SANITIZE_CONFIG
+        self.index_dir = Path(sanitize_config['index_dir'])
+        self.report_dir = Path(sanitize_config['report_dir'])
+        self.workers = sanitize_config['workers'] or os.cpu_count() or 1
+        self.chunk_size = sanitize_config['chunk_size']
+        self.parallel_threshold = sanitize_config['parallel_threshold']
+
+    def _index_path(self, labels_dir: Path) -> Path:
+        key = hashlib.sha1(str(labels_dir.resolve()).encode('utf-8')).hexdigest()[:12]
+        return self.index_dir / f"{labels_dir.parent.name}_{key}.json"
+
+    def _load_index(self, path: Path, max_class_id: int) -> Dict[str, List[int]]:
+        try:
+            index = json.loads(path.read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            return {}
+        if index.get('max_class_id') != max_class_id:
+            return {}
+        return index.get('files', {})
+
+    def _check(self, paths: List[str], max_class_id: int, fix: bool) -> List[Tuple]:
+        """检查文件，数量较多时分块并行"""
+        if len(paths) < self.parallel_threshold or self.workers <= 1:
+            return _check_files(paths, max_class_id, fix)
+
+        chunks = [paths[i:i + self.chunk_size] for i in range(0, len(paths), self.chunk_size)]
+        results = []
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks))) as executor:
+            for chunk_results in executor.map(_check_files, chunks,
+                                              [max_class_id] * len(chunks), [fix] * len(chunks)):
+                results.extend(chunk_results)
+        return results
+
+    def sanitize(self, dataset_path: str, max_class_id: int, dry_run: bool = None) -> Dict:
+        """
+        检查（并清理）数据集的标注文件
+
+        Args:
+            dataset_path: 数据集路径（包含 labels 目录）
+            max_class_id: 最大允许的类别索引
+            dry_run: 只检查并生成报告，不修改文件（默认见 LABEL_SANITIZE_CONFIG）
+
+        Returns:
+            Dict: {'success', 'dry_run', 'files', 'checked', 'skipped', 'invalid_files', 'modified',
+                   'out_of_range', 'malformed', 'errors', 'seconds', 'report_path'}
+        """
+        dry_run = config.LABEL_SANITIZE_CONFIG['dry_run'] if dry_run is None else dry_run
+        labels_dir = Path(dataset_path) / 'labels'
+        if not labels_dir.exists():
+            training_logger.warning(f"标注目录不存在: {labels_dir}")
+            return {'success': False, 'error': f'标注目录不存在: {labels_dir}'}
+
+        start = time.perf_counter()
+        try:
+            index_path = self._index_path(labels_dir)
+            index = self._load_index(index_path, max_class_id)
+            files = _scan_labels(str(labels_dir))
+            todo = [path for path, fingerprint in files.items()
+                    if index.get(os.path.relpath(path, labels_dir)) != fingerprint]
+            if todo:
+                training_logger.info(f"检查标注文件: {len(todo)} 个新增或变化（共 {len(files)} 个）")
+
+            new_index = {}
+            for path, fingerprint in files.items():
+                rel = os.path.relpath(path, labels_dir)
+                if index.get(rel) == fingerprint:
+                    new_index[rel] = fingerprint
+
+            invalid, errors = [], []
+            out_of_range = malformed = 0
+            for path, fingerprint, bad_range, bad_format, bad_classes, error in self._check(
+                    todo, max_class_id, fix=not dry_run):
+                rel = os.path.relpath(path, labels_dir)
+                if error:
+                    errors.append({'file': rel, 'error': error})
+                    training_logger.warning(f"处理标注文件失败 {path}: {error}")
+                    continue
+                if bad_range or bad_format:
+                    out_of_range += bad_range
+                    malformed += bad_format
+                    invalid.append({'file': rel, 'out_of_range': bad_range, 'malformed': bad_format,
+                                    'classes': bad_classes})
+                    if dry_run:
+                        continue
+                new_index[rel] = fingerprint
+
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            tmp = index_path.with_name(f'.{index_path.name}.{os.getpid()}.tmp')
+            tmp.write_text(json.dumps({'max_class_id': max_class_id, 'files': new_index}), encoding='utf-8')
+            os.replace(tmp, index_path)
+
+            result = {
+                'success': True,
+                'dry_run': dry_run,
+                'files': len(files),
+                'checked': len(todo),
+                'skipped': len(files) - len(todo),
+                'invalid_files': len(invalid),
+                'modified': 0 if dry_run else len(invalid),
+                'out_of_range': out_of_range,
+                'malformed': malformed,
+                'errors': len(errors),
+                'seconds': round(time.perf_counter() - start, 2),
+                'report_path': None
+            }
+            if invalid or errors:
+                result['report_path'] = str(self._write_report(labels_dir, max_class_id, result, invalid, errors))
+
+            if dry_run and invalid:
+                training_logger.warning(
+                    f"标注检查（未修改）: {len(invalid)} 个文件含无效标注（超出类别范围 {out_of_range} 行，"
+                    f"格式错误 {malformed} 行），报告: {result['report_path']}")
+            elif invalid:
+                training_logger.info(f"清理了 {len(invalid)} 个标注文件，移除了 {out_of_range + malformed} 个无效标注")
+            else:
+                training_logger.info(f"所有标注文件均合法（检查 {len(todo)} 个，跳过未变化的 {result['skipped']} 个，"
+                                     f"耗时 {result['seconds']} 秒）")
+            return result
+        except Exception as e:
+            training_logger.error(f"检查标注文件失败: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    def _write_report(self, labels_dir: Path, max_class_id: int, summary: Dict,
+                      invalid: List[Dict], errors: List[Dict]) -> Path:
+        """写入检查报告（JSON）"""
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        path = self.report_dir / f"labels_{labels_dir.parent.name}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"
+        report = dict(summary, labels_dir=str(labels_dir), max_class_id=max_class_id,
+                      invalid=invalid, errors=errors)
+        report.pop('report_path', None)
+        path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+        return path
+
+
+# 全局标注清理实例
+label_sanitizer = LazyProxy(LabelSanitizer, 'label_sanitizer')
+
+
+def main(argv: List[str] = None):
+    """命令行入口"""
+    import sys
+    argv = sys.argv[1:] if argv is None else argv
+    args = [arg for arg in argv if not arg.startswith('--')]
+    if len(args) < 2:
+        print(__doc__)
+        return 1
+
+    result = label_sanitizer.sanitize(args[0], int(args[1]) - 1, dry_run='--fix' not in argv)
+    for key, value in result.items():
+        print(f"{key:<16} {value}")
+    return 0 if result['success'] else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,219 @@
+"""
+日志导出服务
+通过无缓冲游标把日志表逐批流式写入 CSV / Parquet 文件，内存占用与导出行数无关
+"""
+import csv
+import threading
+from pathlib import Path
+from typing import Optional, Callable, Dict, List
+from .database import db_service
+from .log_query import LogQueryService, LOG_SOURCES
+from utils import system_logger, LazyProxy
+import config
+
+# 导出格式：格式 -> (显示名称, 文件后缀)
+EXPORT_FORMATS = {
+    'csv': ('CSV 文件', '.csv'),
+    'parquet': ('Parquet 文件', '.parquet')
+}
+
+
+def parquet_available() -> bool:
+    """是否已安装 Parquet 导出所需的 pyarrow"""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class CsvExportWriter:
+    """CSV 导出写入器"""
+
+    def __init__(self, path: Path):
+        self._file = open(path, 'w', encoding=config.LOG_EXPORT_CONFIG['csv_encoding'], newline='')
+        self._writer = None
+
+    def write(self, rows: List[Dict]):
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._file, fieldnames=list(rows[0].keys()))
+            self._writer.writeheader()
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetExportWriter:
+    """
+    Parquet 导出写入器
+
+    每批记录写为一个行组；表结构由第一批数据推断，第一批中全为空的列按字符串类型保存。
+    """
+
+    def __init__(self, path: Path):
+        import pyarrow
+        import pyarrow.parquet
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self._path = path
+        self._writer = None
+        self._schema = None
+        self._string_columns = set()
+
+    def write(self, rows: List[Dict]):
+        if self._writer is None:
+            schema = self._pa.Table.from_pylist(rows).schema
+            fields = []
+            for field in schema:
+                if self._pa.types.is_null(field.type):
+                    self._string_columns.add(field.name)
+                    field = field.with_type(self._pa.string())
+                fields.append(field)
+            self._schema = self._pa.schema(fields)
+            self._writer = self._pq.ParquetWriter(str(self._path), self._schema, compression='snappy')
+
+        if self._string_columns:
+            rows = [
+                {key: (str(value) if key in self._string_columns and value is not None else value)
+                 for key, value in row.items()}
+                for row in rows
+            ]
+        self._writer.write_table(self._pa.Table.from_pylist(rows, schema=self._schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        elif not self._path.exists():
+            # 没有数据时也生成一个只有表结构的空文件
+            self._pq.write_table(self._pa.table({}), str(self._path))
+
+
+class LogExportService:
+    """日志导出服务类"""
+
+    def __init__(self):
+        """初始化日志导出服务"""
+        self.chunk_size = config.LOG_EXPORT_CONFIG['chunk_size']
+
+    @staticmethod
+    def detect_format(path: str) -> str:
+        """
+        根据文件后缀判断导出格式
+
+        Args:
+            path: 文件路径
+
+        Returns:
+            str: csv / parquet
+        """
+        suffix = Path(path).suffix.lower()
+        for fmt, (_, fmt_suffix) in EXPORT_FORMATS.items():
+            if suffix == fmt_suffix:
+                return fmt
+        return 'csv'
+
+    def count_rows(self, source: str, filters: Dict = None) -> int:
+        """
+        统计满足过滤条件的记录数（用于显示进度）
+
+        Args:
+            source: 日志类型
+            filters: 过滤条件 {keyword, status, user_id, start_time, end_time}
+
+        Returns:
+            int: 记录数
+        """
+        spec = LogQueryService.get_source(source)
+        clauses, params = LogQueryService._build_filters(spec, filters)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        result = db_service.execute_query(
+            f"SELECT COUNT(*) AS total FROM {spec['table']} {where}", tuple(params)
+        )
+        return result[0]['total'] if result else 0
+
+    def export(self, source: str, path: str, fmt: str = None, filters: Dict = None,
+               progress_callback: Optional[Callable[[int, int], None]] = None,
+               cancel_event: threading.Event = None) -> Dict:
+        """
+        流式导出日志
+
+        数据先写入 <文件名>.part，完成后再改名；取消或失败时删除未完成的文件。
+
+        Args:
+            source: 日志类型（login / inference / training / system）
+            path: 导出文件路径
+            fmt: 导出格式 csv / parquet（默认按文件后缀判断）
+            filters: 过滤条件 {keyword, status, user_id, start_time, end_time}
+            progress_callback: 进度回调 progress_callback(已导出行数, 总行数)
+            cancel_event: 设置后在当前批次写完时停止导出
+
+        Returns:
+            Dict: {'success', 'rows', 'path', 'cancelled', 'error'}
+        """
+        path = Path(path)
+        part_path = path.with_name(path.name + '.part')
+        fmt = fmt or self.detect_format(str(path))
+        exported = 0
+        writer = None
+        try:
+            if fmt not in EXPORT_FORMATS:
+                raise ValueError(f"不支持的导出格式: {fmt}")
+            if fmt == 'parquet' and not parquet_available():
+                raise RuntimeError("导出 Parquet 需要安装 pyarrow（pip install pyarrow）")
+
+            spec = LogQueryService.get_source(source)
+            total = self.count_rows(source, filters)
+            if progress_callback:
+                progress_callback(0, total)
+
+            clauses, params = LogQueryService._build_filters(spec, filters)
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+            time_column = spec['time_column']
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            writer = ParquetExportWriter(part_path) if fmt == 'parquet' else CsvExportWriter(part_path)
+
+            cancelled = False
+            chunks = db_service.stream_query(
+                f"SELECT * FROM {spec['table']} {where} ORDER BY {time_column}, id",
+                tuple(params),
+                chunk_size=self.chunk_size
+            )
+            try:
+                for rows in chunks:
+                    writer.write(rows)
+                    exported += len(rows)
+                    if progress_callback:
+                        progress_callback(exported, max(total, exported))
+                    if cancel_event is not None and cancel_event.is_set():
+                        cancelled = True
+                        break
+            finally:
+                chunks.close()
+
+            writer.close()
+            writer = None
+
+            if cancelled:
+                part_path.unlink(missing_ok=True)
+                system_logger.info(f"已取消导出{spec['title']}（已写入 {exported} 条）")
+                return {'success': False, 'cancelled': True, 'rows': exported, 'path': None, 'error': '导出已取消'}
+
+            part_path.replace(path)
+            system_logger.info(f"已导出{spec['title']} {exported} 条记录: {path}")
+            return {'success': True, 'cancelled': False, 'rows': exported, 'path': str(path)}
+
+        except Exception as e:
+            if writer is not None:
+                try:
+                    writer.close()
+                except Exception:
+                    pass
+            part_path.unlink(missing_ok=True)
+            system_logger.error(f"导出日志失败: {str(e)}")
+            return {'success': False, 'cancelled': False, 'rows': exported, 'path': None, 'error': str(e)}
+
+
+# 全局日志导出服务实例
+log_export_service = LazyProxy(LogExportService, 'log_export_service')
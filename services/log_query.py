@@ -0,0 +1,220 @@
+"""
+日志查询服务
+为管理员日志查看器提供按 (时间, id) 键集分页的查询，过滤与排序均在 SQL 中完成
+"""
+from datetime import datetime
+from typing import Optional, Dict, List, Tuple
+from .database import db_service
+from utils import system_logger, LazyProxy
+import config
+
+# 日志类型定义
+#   columns: (列名, 表头)
+#   time_column: 时间列（与 id 组成分页键，需有索引）
+#   sort_columns: 允许排序的列（均为索引列，保证分页查询走索引）
+#   search_columns: 关键字模糊匹配的列
+#   status_column / status_options: 状态过滤列及可选值
+#   formats: 列显示格式
+LOG_SOURCES = {
+    'login': {
+        'title': '登录日志',
+        'table': 'login_logs',
+        'columns': [('id', 'ID'), ('username', '用户名'), ('login_time', '登录时间'),
+                    ('ip_address', 'IP地址'), ('status', '状态')],
+        'time_column': 'login_time',
+        'sort_columns': ['login_time', 'id'],
+        'search_columns': ['username', 'ip_address'],
+        'status_column': 'status',
+        'status_options': ['success', 'failed'],
+        'formats': {}
+    },
+    'inference': {
+        'title': '推理日志',
+        'table': 'inference_logs',
+        'columns': [('id', 'ID'), ('user_id', '用户ID'), ('model_name', '模型'), ('source_type', '数据源'),
+                    ('detections', '检测数'), ('inference_time', '推理时间'), ('created_at', '记录时间')],
+        'time_column': 'created_at',
+        'sort_columns': ['created_at', 'id'],
+        'search_columns': ['model_name', 'source_path'],
+        'status_column': 'source_type',
+        'status_options': ['image', 'video', 'camera'],
+        'formats': {'inference_time': '{:.3f}s'}
+    },
+    'training': {
+        'title': '训练日志',
+        'table': 'training_logs',
+        'columns': [('id', 'ID'), ('user_id', '用户ID'), ('model_name', '模型'), ('dataset_path', '数据集'),
+                    ('status', '状态'), ('start_time', '开始时间'), ('final_map', '最终mAP')],
+        'time_column': 'start_time',
+        'sort_columns': ['start_time', 'id'],
+        'search_columns': ['model_name', 'dataset_path'],
+        'status_column': 'status',
+        'status_options': ['running', 'completed', 'stopped', 'failed'],
+        'formats': {'final_map': '{:.4f}'}
+    },
+    'system': {
+        'title': '系统日志',
+        'table': 'system_logs',
+        'columns': [('id', 'ID'), ('level', '级别'), ('module', '模块'), ('message', '消息'),
+                    ('created_at', '时间')],
+        'time_column': 'created_at',
+        'sort_columns': ['created_at', 'id'],
+        'search_columns': ['module', 'message'],
+        'status_column': 'level',
+        'status_options': ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+        'formats': {}
+    }
+}
+
+
+class LogQueryService:
+    """日志查询服务类"""
+
+    def __init__(self):
+        """初始化日志查询服务"""
+        self.page_size = config.LOG_VIEWER_CONFIG['page_size']
+
+    @staticmethod
+    def get_source(source: str) -> Dict:
+        """
+        获取日志类型定义
+
+        Args:
+            source: 日志类型（login / inference / training / system）
+
+        Returns:
+            Dict: 日志类型定义
+        """
+        if source not in LOG_SOURCES:
+            raise ValueError(f"未知的日志类型: {source}")
+        return LOG_SOURCES[source]
+
+    @staticmethod
+    def _build_filters(spec: Dict, filters: Optional[Dict]) -> Tuple[List[str], List]:
+        """
+        生成过滤条件
+
+        Args:
+            spec: 日志类型定义
+            filters: 过滤条件 {keyword, status, user_id, start_time, end_time}
+
+        Returns:
+            Tuple[List[str], List]: (WHERE 子句列表, 参数列表)
+        """
+        clauses, params = [], []
+        filters = filters or {}
+        time_column = spec['time_column']
+
+        keyword = (filters.get('keyword') or '').strip()
+        if keyword:
+            like = f"%{keyword}%"
+            clauses.append('(' + ' OR '.join(f"{col} LIKE %s" for col in spec['search_columns']) + ')')
+            params.extend([like] * len(spec['search_columns']))
+
+        if filters.get('status'):
+            clauses.append(f"{spec['status_column']} = %s")
+            params.append(filters['status'])
+
+        if filters.get('user_id') is not None and spec['table'] != 'system_logs':
+            clauses.append("user_id = %s")
+            params.append(filters['user_id'])
+
+        if filters.get('start_time'):
+            clauses.append(f"{time_column} >= %s")
+            params.append(filters['start_time'])
+
+        if filters.get('end_time'):
+            clauses.append(f"{time_column} < %s")
+            params.append(filters['end_time'])
+
+        return clauses, params
+
+    def fetch_page(self, source: str, filters: Dict = None, sort_column: str = None,
+                   descending: bool = True, cursor: Tuple = None, limit: int = None) -> Dict:
+        """
+        键集分页查询一页日志
+
+        按 (sort_column, id) 排序，下一页从上一页最后一行的键值之后继续，
+        不使用 OFFSET，因此翻到多深都只扫描一页的索引范围。
+
+        Args:
+            source: 日志类型
+            filters: 过滤条件 {keyword, status, user_id, start_time, end_time}
+            sort_column: 排序列（默认时间列，须在 sort_columns 中）
+            descending: 是否降序
+            cursor: 上一页返回的游标，None 表示第一页
+            limit: 每页行数
+
+        Returns:
+            Dict: {'success', 'rows', 'cursor'}；cursor 为 None 表示没有更多数据
+        """
+        try:
+            spec = self.get_source(source)
+            sort_column = sort_column or spec['time_column']
+            if sort_column not in spec['sort_columns']:
+                raise ValueError(f"{spec['title']}不支持按 {sort_column} 排序")
+            limit = limit or self.page_size
+
+            clauses, params = self._build_filters(spec, filters)
+
+            op = '<' if descending else '>'
+            if cursor is not None:
+                last_value, last_id = cursor
+                if sort_column == 'id':
+                    clauses.append(f"id {op} %s")
+                    params.append(last_id)
+                else:
+                    # 等价于 (col, id) < (v, id)，写成范围条件以便使用索引
+                    clauses.append(f"{sort_column} {op}= %s AND ({sort_column} {op} %s OR id {op} %s)")
+                    params.extend([last_value, last_value, last_id])
+
+            direction = 'DESC' if descending else 'ASC'
+            order_by = f"id {direction}" if sort_column == 'id' else f"{sort_column} {direction}, id {direction}"
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+            # 多取一行用于判断是否还有下一页
+            rows = db_service.execute_query(
+                f"SELECT * FROM {spec['table']} {where} ORDER BY {order_by} LIMIT %s",
+                tuple(params) + (limit + 1,)
+            ) or []
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                last = rows[-1]
+                next_cursor = (last[sort_column], last['id'])
+
+            return {'success': True, 'rows': list(rows), 'cursor': next_cursor}
+
+        except Exception as e:
+            system_logger.error(f"查询日志失败: {str(e)}")
+            return {'success': False, 'error': str(e), 'rows': [], 'cursor': None}
+
+    @staticmethod
+    def format_value(source: str, column: str, value) -> str:
+        """
+        格式化单元格显示文本
+
+        Args:
+            source: 日志类型
+            column: 列名
+            value: 原始值
+
+        Returns:
+            str: 显示文本
+        """
+        if value is None:
+            return ''
+        fmt = LOG_SOURCES[source]['formats'].get(column)
+        if fmt:
+            try:
+                return fmt.format(value)
+            except (TypeError, ValueError):
+                return str(value)
+        if isinstance(value, datetime):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        return str(value)
+
+
+# 全局日志查询服务实例
+log_query_service = LazyProxy(LogQueryService, 'log_query_service')
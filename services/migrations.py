@@ -0,0 +1,712 @@
+"""
+数据库结构迁移
+按版本号顺序执行迁移，启动时通常只需一次版本查询
+
+用法:
+    python -m services.migrations status    # 查看当前版本与待执行迁移
+    python -m services.migrations upgrade   # 执行待执行迁移（索引/列在线添加）
+"""
+import time
+from typing import Callable, Dict, List, Union
+from utils import system_logger
+
+# 迁移记录表
+MIGRATIONS_TABLE = 'schema_migrations'
+
+
+class Migration:
+    """单个迁移"""
+
+    def __init__(self, version: int, description: str, apply: Callable):
+        self.version = version
+        self.description = description
+        self.apply = apply
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str):
+    """
+    注册迁移（版本号必须递增且唯一）
+
+    Args:
+        version: 版本号
+        description: 迁移说明
+    """
+    def decorator(func):
+        if any(m.version == version for m in MIGRATIONS):
+            raise ValueError(f"迁移版本号重复: {version}")
+        MIGRATIONS.append(Migration(version, description, func))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return func
+    return decorator
+
+
+class MigrationContext:
+    """迁移执行上下文，封装不同后端的 DDL 差异"""
+
+    def __init__(self, backend, cursor):
+        self.backend = backend
+        self.cursor = cursor
+
+    @property
+    def is_mysql(self) -> bool:
+        return self.backend.name == 'mysql'
+
+    def execute(self, statements: Union[str, List[str], Dict[str, Union[str, List[str]]]]):
+        """
+        执行 SQL 语句
+
+        Args:
+            statements: 单条语句、语句列表，或 {后端名: 语句/语句列表}
+        """
+        if isinstance(statements, dict):
+            statements = statements[self.backend.name]
+        if isinstance(statements, str):
+            statements = [statements]
+        for statement in statements:
+            self.cursor.execute(statement)
+
+    def add_column(self, table: str, column: str, definition: str):
+        """
+        添加列（已存在则跳过）；MySQL 使用 INPLACE 算法，不锁表
+
+        Args:
+            table: 表名
+            column: 列名
+            definition: 列定义，例如 'CHAR(32)'
+        """
+        if self.backend.column_exists(self.cursor, table, column):
+            return
+        if self.is_mysql:
+            self.cursor.execute(
+                f"ALTER TABLE {table} ADD COLUMN {column} {definition}, ALGORITHM=INPLACE, LOCK=NONE"
+            )
+        else:
+            self.cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        system_logger.info(f"{table} 表已添加列: {column}")
+
+    def add_index(self, table: str, name: str, columns: List[str], unique: bool = False):
+        """
+        添加索引（已存在则跳过）；MySQL 使用在线 DDL，不阻塞读写
+
+        Args:
+            table: 表名
+            name: 索引名（全库唯一，建议 idx_<表名>_<列名>）
+            columns: 索引列
+            unique: 是否唯一索引
+        """
+        if self.backend.index_exists(self.cursor, table, name):
+            return
+        kind = 'UNIQUE INDEX' if unique else 'INDEX'
+        cols = ', '.join(columns)
+        if self.is_mysql:
+            self.cursor.execute(
+                f"ALTER TABLE {table} ADD {kind} {name} ({cols}), ALGORITHM=INPLACE, LOCK=NONE"
+            )
+        else:
+            self.cursor.execute(f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({cols})")
+        system_logger.info(f"{table} 表已添加索引: {name}")
+
+    def add_fulltext_index(self, table: str, columns: List[str]):
+        """
+        添加全文索引（已存在则跳过）
+
+        MySQL 添加 ngram 解析器的 FULLTEXT 索引 ft_<表名>（支持中文）；SQLite 创建 FTS5 外部内容表
+        <表名>_fts（trigram 分词），由触发器与原表保持同步，并导入已有数据。
+        SQLite 不支持 trigram 分词器（低于 3.34 或未编译 FTS5）时跳过，检索改用 LIKE 查询。
+
+        Args:
+            table: 表名
+            columns: 索引列
+        """
+        cols = ', '.join(columns)
+        if self.is_mysql:
+            name = f"ft_{table}"
+            if self.backend.index_exists(self.cursor, table, name):
+                return
+            self.cursor.execute(f"ALTER TABLE {table} ADD FULLTEXT INDEX {name} ({cols}) WITH PARSER ngram")
+        else:
+            name = f"{table}_fts"
+            if not self.backend.trigram_supported(self.cursor):
+                import sqlite3
+                system_logger.warning(
+                    f"SQLite {sqlite3.sqlite_version} 不支持 FTS5 trigram 分词器（需要 3.34 及以上），"
+                    f"{table} 表不创建全文索引，检索使用 LIKE 查询"
+                )
+                return
+            new_values = ', '.join(f"new.{c}" for c in columns)
+            old_values = ', '.join(f"old.{c}" for c in columns)
+            self.execute([
+                f"""CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5(
+                    {cols}, content='{table}', content_rowid='id', tokenize='trigram'
+                )""",
+                f"""CREATE TRIGGER IF NOT EXISTS trg_{name}_insert AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {name} (rowid, {cols}) VALUES (new.id, {new_values});
+                END""",
+                f"""CREATE TRIGGER IF NOT EXISTS trg_{name}_delete AFTER DELETE ON {table} BEGIN
+                    INSERT INTO {name} ({name}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+                END""",
+                f"""CREATE TRIGGER IF NOT EXISTS trg_{name}_update AFTER UPDATE ON {table} BEGIN
+                    INSERT INTO {name} ({name}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+                    INSERT INTO {name} (rowid, {cols}) VALUES (new.id, {new_values});
+                END""",
+                f"INSERT INTO {name} ({name}) VALUES ('rebuild')"
+            ])
+        system_logger.info(f"{table} 表已添加全文索引: {name}")
+
+
+class SchemaMigrator:
+    """数据库结构迁移器"""
+
+    def __init__(self, db):
+        """
+        初始化迁移器
+
+        Args:
+            db: DatabaseService 实例
+        """
+        self.db = db
+        self.backend = db.backend
+
+    @property
+    def latest_version(self) -> int:
+        return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+    def current_version(self) -> int:
+        """
+        查询当前数据库版本
+
+        Returns:
+            int: 版本号，迁移表不存在时返回 0
+        """
+        try:
+            rows = self.db.execute_query(f"SELECT MAX(version) AS version FROM {MIGRATIONS_TABLE}")
+        except Exception:
+            return 0
+        if not rows or rows[0]['version'] is None:
+            return 0
+        return int(rows[0]['version'])
+
+    def pending(self, current: int = None) -> List[Migration]:
+        """待执行的迁移列表"""
+        if current is None:
+            current = self.current_version()
+        return [m for m in MIGRATIONS if m.version > current]
+
+    def _ensure_migrations_table(self, cursor):
+        if self.backend.name == 'mysql':
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+                    version INT PRIMARY KEY,
+                    description VARCHAR(255),
+                    duration FLOAT,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """)
+        else:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+                    version INTEGER PRIMARY KEY,
+                    description VARCHAR(255),
+                    duration FLOAT,
+                    applied_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+                )
+            """)
+
+    def upgrade(self, target: int = None) -> int:
+        """
+        执行待执行的迁移
+
+        Args:
+            target: 目标版本（默认最新）
+
+        Returns:
+            int: 执行的迁移数量
+        """
+        current = self.current_version()
+        todo = [m for m in self.pending(current) if target is None or m.version <= target]
+        if not todo:
+            return 0
+
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            self._ensure_migrations_table(cursor)
+            conn.commit()
+
+            for m in todo:
+                system_logger.info(f"执行数据库迁移 v{m.version}: {m.description}")
+                start_time = time.time()
+                try:
+                    m.apply(MigrationContext(self.backend, cursor))
+                    cursor.execute(
+                        self.backend.translate(
+                            f"INSERT INTO {MIGRATIONS_TABLE} (version, description, duration) VALUES (%s, %s, %s)"
+                        ),
+                        (m.version, m.description, time.time() - start_time)
+                    )
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    system_logger.error(f"数据库迁移 v{m.version} 失败: {str(e)}")
+                    raise
+            cursor.close()
+
+        system_logger.info(f"数据库结构已升级: v{current} -> v{todo[-1].version}")
+        return len(todo)
+
+    def check(self, auto_migrate: bool = True):
+        """
+        启动时检查数据库版本（常规情况下只执行一次查询）
+
+        Args:
+            auto_migrate: 是否自动执行待执行迁移
+        """
+        current = self.current_version()
+        if current >= self.latest_version:
+            return
+        if auto_migrate:
+            self.upgrade()
+        else:
+            pending = ', '.join(f"v{m.version}" for m in self.pending(current))
+            system_logger.warning(
+                f"数据库结构版本 v{current} 落后于 v{self.latest_version}（待执行: {pending}），"
+                f"请运行 python -m services.migrations upgrade"
+            )
+
+    def status(self) -> List[Dict]:
+        """
+        迁移状态列表
+
+        Returns:
+            List[Dict]: [{version, description, applied}, ...]
+        """
+        current = self.current_version()
+        return [
+            {'version': m.version, 'description': m.description, 'applied': m.version <= current}
+            for m in MIGRATIONS
+        ]
+
+
+# ---------------------------------------------------------------------------
+# 迁移定义（只追加，不修改已发布的迁移）
+# ---------------------------------------------------------------------------
+
+@migration(1, '初始表结构')
+def _initial_schema(ctx: MigrationContext):
+    # 对已有数据库使用 IF NOT EXISTS，不影响现有数据
+    ctx.execute(ctx.backend.schema_statements())
+
+
+@migration(2, '新增 detections 检测明细表，inference_logs 增加 run_uid')
+def _add_detections(ctx: MigrationContext):
+    ctx.execute({
+        'mysql': """
+            CREATE TABLE IF NOT EXISTS detections (
+                id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                run_uid CHAR(32) NOT NULL,
+                frame_index INT NOT NULL DEFAULT 0,
+                user_id INT,
+                model_name VARCHAR(100),
+                source_type VARCHAR(50),
+                class_name VARCHAR(100) NOT NULL,
+                confidence FLOAT NOT NULL,
+                x1 INT,
+                y1 INT,
+                x2 INT,
+                y2 INT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """,
+        'sqlite': """
+            CREATE TABLE IF NOT EXISTS detections (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_uid CHAR(32) NOT NULL,
+                frame_index INTEGER NOT NULL DEFAULT 0,
+                user_id INTEGER,
+                model_name VARCHAR(100),
+                source_type VARCHAR(50),
+                class_name VARCHAR(100) NOT NULL,
+                confidence FLOAT NOT NULL,
+                x1 INTEGER,
+                y1 INTEGER,
+                x2 INTEGER,
+                y2 INTEGER,
+                created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+            )
+        """
+    })
+    ctx.add_index('detections', 'idx_detections_run_frame', ['run_uid', 'frame_index'])
+    ctx.add_index('detections', 'idx_detections_class_time', ['class_name', 'created_at'])
+    ctx.add_index('detections', 'idx_detections_model_class_time', ['model_name', 'class_name', 'created_at'])
+    ctx.add_index('detections', 'idx_detections_user_time', ['user_id', 'created_at'])
+
+    ctx.add_column('inference_logs', 'run_uid', 'CHAR(32)')
+    ctx.add_index('inference_logs', 'idx_inference_logs_run_uid', ['run_uid'])
+
+
+@migration(3, 'inference_logs 增加按模型/数据源类型的时间索引')
+def _inference_logs_analytics_indexes(ctx: MigrationContext):
+    ctx.add_index('inference_logs', 'idx_inference_logs_model_time', ['model_name', 'created_at'])
+    ctx.add_index('inference_logs', 'idx_inference_logs_source_time', ['source_type', 'created_at'])
+
+
+@migration(4, '日志表增加分页/过滤查询索引')
+def _log_viewer_indexes(ctx: MigrationContext):
+    # 二级索引隐含主键 id，(时间列) 索引即可支撑 (时间, id) 键集分页
+    ctx.add_index('training_logs', 'idx_training_logs_start_time', ['start_time'])
+    ctx.add_index('inference_logs', 'idx_inference_logs_user_time', ['user_id', 'created_at'])
+    ctx.add_index('login_logs', 'idx_login_logs_status_time', ['status', 'login_time'])
+    ctx.add_index('system_logs', 'idx_system_logs_level_time', ['level', 'created_at'])
+
+
+
+# 推理耗时直方图分桶数（桶边界见 services/rollup_service.py LATENCY_BUCKETS）
+ROLLUP_LATENCY_BUCKETS = 8
+
+
+@migration(5, '新增推理/训练汇总表（按小时/天）及汇总进度表')
+def _add_rollup_tables(ctx: MigrationContext):
+    hist_mysql = ''.join(f"latency_b{i} BIGINT NOT NULL DEFAULT 0,\n" for i in range(ROLLUP_LATENCY_BUCKETS))
+    hist_sqlite = ''.join(f"latency_b{i} INTEGER NOT NULL DEFAULT 0,\n" for i in range(ROLLUP_LATENCY_BUCKETS))
+    ctx.execute({
+        'mysql': [
+            f"""
+            CREATE TABLE IF NOT EXISTS inference_rollup (
+                id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                period VARCHAR(8) NOT NULL,
+                bucket_start DATETIME NOT NULL,
+                model_name VARCHAR(100) NOT NULL DEFAULT '',
+                user_id INT NOT NULL DEFAULT 0,
+                source_type VARCHAR(50) NOT NULL DEFAULT '',
+                runs BIGINT NOT NULL DEFAULT 0,
+                detections BIGINT NOT NULL DEFAULT 0,
+                latency_sum DOUBLE NOT NULL DEFAULT 0,
+                latency_max DOUBLE NOT NULL DEFAULT 0,
+                {hist_mysql}
+                UNIQUE KEY uk_inference_rollup (period, bucket_start, model_name, user_id, source_type)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS training_rollup (
+                id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                period VARCHAR(8) NOT NULL,
+                bucket_start DATETIME NOT NULL,
+                model_name VARCHAR(100) NOT NULL DEFAULT '',
+                user_id INT NOT NULL DEFAULT 0,
+                runs BIGINT NOT NULL DEFAULT 0,
+                completed BIGINT NOT NULL DEFAULT 0,
+                failed BIGINT NOT NULL DEFAULT 0,
+                epochs_total BIGINT NOT NULL DEFAULT 0,
+                duration_sum DOUBLE NOT NULL DEFAULT 0,
+                map_sum DOUBLE NOT NULL DEFAULT 0,
+                map_count BIGINT NOT NULL DEFAULT 0,
+                map_max DOUBLE NOT NULL DEFAULT 0,
+                UNIQUE KEY uk_training_rollup (period, bucket_start, model_name, user_id)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS rollup_state (
+                name VARCHAR(50) PRIMARY KEY,
+                last_id BIGINT NOT NULL DEFAULT 0,
+                last_time DATETIME NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """
+        ],
+        'sqlite': [
+            f"""
+            CREATE TABLE IF NOT EXISTS inference_rollup (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                period VARCHAR(8) NOT NULL,
+                bucket_start TIMESTAMP NOT NULL,
+                model_name VARCHAR(100) NOT NULL DEFAULT '',
+                user_id INTEGER NOT NULL DEFAULT 0,
+                source_type VARCHAR(50) NOT NULL DEFAULT '',
+                runs INTEGER NOT NULL DEFAULT 0,
+                detections INTEGER NOT NULL DEFAULT 0,
+                latency_sum FLOAT NOT NULL DEFAULT 0,
+                latency_max FLOAT NOT NULL DEFAULT 0,
+                {hist_sqlite}
+                UNIQUE (period, bucket_start, model_name, user_id, source_type)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS training_rollup (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                period VARCHAR(8) NOT NULL,
+                bucket_start TIMESTAMP NOT NULL,
+                model_name VARCHAR(100) NOT NULL DEFAULT '',
+                user_id INTEGER NOT NULL DEFAULT 0,
+                runs INTEGER NOT NULL DEFAULT 0,
+                completed INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0,
+                epochs_total INTEGER NOT NULL DEFAULT 0,
+                duration_sum FLOAT NOT NULL DEFAULT 0,
+                map_sum FLOAT NOT NULL DEFAULT 0,
+                map_count INTEGER NOT NULL DEFAULT 0,
+                map_max FLOAT NOT NULL DEFAULT 0,
+                UNIQUE (period, bucket_start, model_name, user_id)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS rollup_state (
+                name VARCHAR(50) PRIMARY KEY,
+                last_id INTEGER NOT NULL DEFAULT 0,
+                last_time TIMESTAMP NULL,
+                updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+            )
+            """
+        ]
+    })
+    ctx.execute("INSERT INTO rollup_state (name, last_id) VALUES ('inference_logs', 0), ('training_logs', 0)")
+    # 训练日志按结束时间增量汇总
+    ctx.add_index('training_logs', 'idx_training_logs_end_time', ['end_time'])
+
+
+@migration(6, '新增数据版本计数表（跨进程缓存失效）')
+def _add_catalog_versions(ctx: MigrationContext):
+    ctx.execute({
+        'mysql': """
+            CREATE TABLE IF NOT EXISTS catalog_versions (
+                name VARCHAR(50) PRIMARY KEY,
+                version BIGINT NOT NULL DEFAULT 0
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """,
+        'sqlite': """
+            CREATE TABLE IF NOT EXISTS catalog_versions (
+                name VARCHAR(50) PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """
+    })
+    ctx.execute("INSERT INTO catalog_versions (name, version) VALUES ('models', 0)")
+
+
+@migration(7, '反馈表增加按状态/类型/用户的时间索引')
+def _feedback_indexes(ctx: MigrationContext):
+    # 支撑反馈列表按 (created_at, id) 键集分页时的状态/类型/用户过滤
+    ctx.add_index('feedbacks', 'idx_feedbacks_status_time', ['status', 'created_at'])
+    ctx.add_index('feedbacks', 'idx_feedbacks_category_time', ['category', 'created_at'])
+    ctx.add_index('feedbacks', 'idx_feedbacks_user_time', ['user_id', 'created_at'])
+
+
+@migration(8, '模型/反馈增加全文索引（MySQL ngram FULLTEXT / SQLite FTS5）')
+def _fulltext_indexes(ctx: MigrationContext):
+    ctx.add_fulltext_index('models', ['name', 'description', 'author'])
+    ctx.add_fulltext_index('feedbacks', ['title', 'content'])
+
+
+@migration(9, '新增训练逐轮指标表 training_metrics')
+def _add_training_metrics(ctx: MigrationContext):
+    ctx.execute({
+        'mysql': """
+            CREATE TABLE IF NOT EXISTS training_metrics (
+                id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                training_log_id INT NOT NULL,
+                epoch INT NOT NULL,
+                box_loss FLOAT,
+                cls_loss FLOAT,
+                dfl_loss FLOAT,
+                val_box_loss FLOAT,
+                val_cls_loss FLOAT,
+                val_dfl_loss FLOAT,
+                box_precision FLOAT,
+                box_recall FLOAT,
+                map50 FLOAT,
+                map50_95 FLOAT,
+                lr FLOAT,
+                epoch_time FLOAT,
+                images_per_sec FLOAT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """,
+        'sqlite': """
+            CREATE TABLE IF NOT EXISTS training_metrics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                training_log_id INTEGER NOT NULL,
+                epoch INTEGER NOT NULL,
+                box_loss FLOAT,
+                cls_loss FLOAT,
+                dfl_loss FLOAT,
+                val_box_loss FLOAT,
+                val_cls_loss FLOAT,
+                val_dfl_loss FLOAT,
+                box_precision FLOAT,
+                box_recall FLOAT,
+                map50 FLOAT,
+                map50_95 FLOAT,
+                lr FLOAT,
+                epoch_time FLOAT,
+                images_per_sec FLOAT,
+                created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+            )
+        """
+    })
+    ctx.add_index('training_metrics', 'idx_training_metrics_log_epoch', ['training_log_id', 'epoch'])
+    ctx.add_index('training_metrics', 'idx_training_metrics_created_at', ['created_at'])
+
+
+@migration(10, 'training_logs 增加训练输出目录 save_dir（继续训练时定位 last.pt）')
+def _training_save_dir(ctx: MigrationContext):
+    ctx.add_column('training_logs', 'save_dir', 'VARCHAR(255)')
+
+
+@migration(11, '新增训练任务队列表 training_jobs')
+def _add_training_jobs(ctx: MigrationContext):
+    ctx.execute({
+        'mysql': """
+            CREATE TABLE IF NOT EXISTS training_jobs (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                user_id INT,
+                name VARCHAR(100) NOT NULL,
+                config TEXT NOT NULL,
+                priority INT NOT NULL DEFAULT 0,
+                status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                training_log_id INT NULL,
+                progress FLOAT NOT NULL DEFAULT 0,
+                eta_seconds FLOAT NULL,
+                result TEXT NULL,
+                error TEXT NULL,
+                worker VARCHAR(100) NULL,
+                heartbeat_at DATETIME NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                started_at DATETIME NULL,
+                finished_at DATETIME NULL
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """,
+        'sqlite': """
+            CREATE TABLE IF NOT EXISTS training_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                name VARCHAR(100) NOT NULL,
+                config TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                training_log_id INTEGER NULL,
+                progress FLOAT NOT NULL DEFAULT 0,
+                eta_seconds FLOAT NULL,
+                result TEXT NULL,
+                error TEXT NULL,
+                worker VARCHAR(100) NULL,
+                heartbeat_at TIMESTAMP NULL,
+                created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+                started_at TIMESTAMP NULL,
+                finished_at TIMESTAMP NULL
+            )
+        """
+    })
+    # 调度按 (status, priority, id) 取下一个排队任务
+    ctx.add_index('training_jobs', 'idx_training_jobs_status_priority', ['status', 'priority', 'id'])
+    ctx.add_index('training_jobs', 'idx_training_jobs_user_time', ['user_id', 'created_at'])
+
+
+@migration(12, '新增超参数搜索表 training_sweeps / sweep_trials')
+def _add_training_sweeps(ctx: MigrationContext):
+    ctx.execute({
+        'mysql': """
+            CREATE TABLE IF NOT EXISTS training_sweeps (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                user_id INT,
+                name VARCHAR(100) NOT NULL,
+                base_model VARCHAR(500) NOT NULL,
+                data_yaml VARCHAR(500) NOT NULL,
+                search_space TEXT NOT NULL,
+                settings TEXT NOT NULL,
+                status VARCHAR(20) NOT NULL DEFAULT 'created',
+                best_trial_id INT NULL,
+                best_map FLOAT NULL,
+                registered_model VARCHAR(200) NULL,
+                error TEXT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                finished_at DATETIME NULL
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """,
+        'sqlite': """
+            CREATE TABLE IF NOT EXISTS training_sweeps (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                name VARCHAR(100) NOT NULL,
+                base_model VARCHAR(500) NOT NULL,
+                data_yaml VARCHAR(500) NOT NULL,
+                search_space TEXT NOT NULL,
+                settings TEXT NOT NULL,
+                status VARCHAR(20) NOT NULL DEFAULT 'created',
+                best_trial_id INTEGER NULL,
+                best_map FLOAT NULL,
+                registered_model VARCHAR(200) NULL,
+                error TEXT NULL,
+                created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
+                finished_at TIMESTAMP NULL
+            )
+        """
+    })
+    ctx.execute({
+        'mysql': """
+            CREATE TABLE IF NOT EXISTS sweep_trials (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                sweep_id INT NOT NULL,
+                trial_no INT NOT NULL,
+                params TEXT NOT NULL,
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                rung INT NOT NULL DEFAULT -1,
+                epochs_done INT NOT NULL DEFAULT 0,
+                rung_maps TEXT NULL,
+                training_log_ids TEXT NULL,
+                weights_path VARCHAR(500) NULL,
+                error TEXT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """,
+        'sqlite': """
+            CREATE TABLE IF NOT EXISTS sweep_trials (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sweep_id INTEGER NOT NULL,
+                trial_no INTEGER NOT NULL,
+                params TEXT NOT NULL,
+                status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                rung INTEGER NOT NULL DEFAULT -1,
+                epochs_done INTEGER NOT NULL DEFAULT 0,
+                rung_maps TEXT NULL,
+                training_log_ids TEXT NULL,
+                weights_path VARCHAR(500) NULL,
+                error TEXT NULL,
+                updated_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+            )
+        """
+    })
+    ctx.add_index('training_sweeps', 'idx_training_sweeps_user_time', ['user_id', 'created_at'])
+    ctx.add_index('sweep_trials', 'idx_sweep_trials_sweep', ['sweep_id', 'trial_no'])
+
+
+@migration(13, 'detections 增加 created_at 索引（保留策略分批删除）')
+def _detections_time_index(ctx: MigrationContext):
+    # 保留策略按 created_at 顺序分批删除，没有以 created_at 开头的索引时每批都要全表扫描并排序
+    ctx.add_index('detections', 'idx_detections_created_at', ['created_at'])
+
+
+def main(argv: List[str] = None):
+    """命令行入口"""
+    import sys
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else 'status'
+
+    from .database import db_service
+    migrator = db_service.migrator
+
+    if command == 'upgrade':
+        count = migrator.upgrade()
+        print(f"已执行 {count} 个迁移，当前版本 v{migrator.current_version()}")
+    elif command == 'status':
+        for item in migrator.status():
+            mark = '✔' if item['applied'] else ' '
+            print(f"[{mark}] v{item['version']:<4} {item['description']}")
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
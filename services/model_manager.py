@@ -6,9 +6,12 @@ from pathlib import Path
 from typing import List, Dict, Optional
 import shutil
 import json
+import threading
+import time
 from datetime import datetime
 from .database import db_service
-from utils import system_logger
+from .fulltext import search_ids
+from utils import system_logger, LazyProxy
 import config
 
 class ModelManager:
@@ -18,6 +21,122 @@ class ModelManager:
         """初始化模型管理器"""
         self.models_dir = config.MODELS_DIR
         self.models_dir.mkdir(parents=True, exist_ok=True)
+        
+        # 模型目录缓存（读穿透，本进程写操作后立即失效，其他进程的修改通过数据库版本号感知）
+        cache_config = config.MODEL_CACHE_CONFIG
+        self.cache_enabled = cache_config['enabled']
+        self.version_check_interval = cache_config['version_check_interval']
+        self.cache_ttl = cache_config['ttl']
+        self._cache_lock = threading.RLock()
+        self._catalogue: Optional[List[Dict]] = None
+        self._by_id: Dict[int, Dict] = {}
+        self._cache_version: Optional[int] = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._cache_stats = {'hits': 0, 'misses': 0, 'version_checks': 0, 'invalidations': 0}
+    
+    @staticmethod
+    def _parse_model(model: Dict) -> Dict:
+        """解析 classes 字段"""
+        if model.get('classes'):
+            try:
+                model['classes'] = json.loads(model['classes'])
+            except:
+                model['classes'] = []
+        return model
+    
+    @staticmethod
+    def _copy_model(model: Dict) -> Dict:
+        """复制模型信息，避免调用方修改缓存"""
+        copied = dict(model)
+        if isinstance(copied.get('classes'), list):
+            copied['classes'] = list(copied['classes'])
+        return copied
+    
+    def _db_version(self) -> Optional[int]:
+        """查询数据库中的模型目录版本号（不可用时返回 None）"""
+        try:
+            rows = db_service.execute_query("SELECT version FROM catalog_versions WHERE name = 'models'")
+            return int(rows[0]['version']) if rows else None
+        except Exception:
+            return None
+    
+    def _bump_version(self):
+        """模型目录变更后递增数据库版本号，通知其他进程"""
+        try:
+            db_service.execute_query(
+                "UPDATE catalog_versions SET version = version + 1 WHERE name = 'models'",
+                fetch=False
+            )
+        except Exception as e:
+            system_logger.warning(f"更新模型目录版本号失败: {str(e)}")
+    
+    def invalidate_cache(self, notify: bool = True):
+        """
+        使模型目录缓存失效
+        
+        Args:
+            notify: 是否同时递增数据库版本号（通知其他进程）
+        """
+        if notify:
+            self._bump_version()
+        with self._cache_lock:
+            self._catalogue = None
+            self._by_id = {}
+            self._cache_stats['invalidations'] += 1
+    
+    def _get_catalogue(self) -> List[Dict]:
+        """
+        获取模型目录（读穿透缓存）
+        
+        Returns:
+            List[Dict]: 按创建时间倒序的模型列表（缓存对象，调用方不得修改）
+        """
+        if not self.cache_enabled:
+            return self._load_catalogue()
+        
+        with self._cache_lock:
+            now = time.monotonic()
+            if self._catalogue is not None:
+                if now - self._checked_at < self.version_check_interval:
+                    self._cache_stats['hits'] += 1
+                    return self._catalogue
+                
+                # 每隔 version_check_interval 秒用一次主键查询确认其他进程未修改
+                self._cache_stats['version_checks'] += 1
+                version = self._db_version()
+                fresh = now - self._loaded_at < self.cache_ttl
+                if fresh and version is not None and version == self._cache_version:
+                    self._checked_at = now
+                    self._cache_stats['hits'] += 1
+                    return self._catalogue
+            
+            self._cache_stats['misses'] += 1
+            version = self._db_version()
+            catalogue = self._load_catalogue()
+            self._catalogue = catalogue
+            self._by_id = {m['id']: m for m in catalogue}
+            self._cache_version = version
+            self._loaded_at = self._checked_at = time.monotonic()
+            return catalogue
+    
+    def _load_catalogue(self) -> List[Dict]:
+        """从数据库加载全部模型"""
+        models = db_service.execute_query("SELECT * FROM models ORDER BY created_at DESC, id DESC") or []
+        return [self._parse_model(m) for m in models]
+    
+    def get_cache_stats(self) -> Dict:
+        """
+        获取模型目录缓存统计
+        
+        Returns:
+            Dict: 命中/未命中/版本检查/失效次数及缓存模型数
+        """
+        with self._cache_lock:
+            stats = dict(self._cache_stats)
+            stats['cached_models'] = len(self._catalogue) if self._catalogue is not None else 0
+            stats['version'] = self._cache_version
+        return stats
     
     def add_model(self, 
                   name: str,
@@ -60,6 +179,7 @@ class ModelManager:
                 (name, version, str(target_path), classes_str, description, author),
                 fetch=False
             )
+            self.invalidate_cache()
             
             system_logger.info(f"模型添加成功: {name} v{version}")
             return True
@@ -76,17 +196,7 @@ class ModelManager:
             List[Dict]: 模型列表
         """
         try:
-            models = db_service.execute_query("SELECT * FROM models ORDER BY created_at DESC")
-            
-            # 解析classes字段
-            for model in models:
-                if model.get('classes'):
-                    try:
-                        model['classes'] = json.loads(model['classes'])
-                    except:
-                        model['classes'] = []
-            
-            return models or []
+            return [self._copy_model(m) for m in self._get_catalogue()]
         except Exception as e:
             system_logger.error(f"获取模型列表失败: {str(e)}")
             return []
@@ -102,16 +212,14 @@ class ModelManager:
             Optional[Dict]: 模型信息
         """
         try:
+            if self.cache_enabled:
+                self._get_catalogue()
+                with self._cache_lock:
+                    model = self._by_id.get(model_id)
+                return self._copy_model(model) if model else None
+            
             models = db_service.execute_query("SELECT * FROM models WHERE id = %s", (model_id,))
-            if models:
-                model = models[0]
-                if model.get('classes'):
-                    try:
-                        model['classes'] = json.loads(model['classes'])
-                    except:
-                        model['classes'] = []
-                return model
-            return None
+            return self._parse_model(models[0]) if models else None
         except Exception as e:
             system_logger.error(f"获取模型失败: {str(e)}")
             return None
@@ -128,6 +236,13 @@ class ModelManager:
             Optional[Dict]: 模型信息
         """
         try:
+            if self.cache_enabled:
+                # 目录已按创建时间倒序排列，第一个匹配即最新版本
+                for model in self._get_catalogue():
+                    if model['name'] == name and (not version or model['version'] == version):
+                        return self._copy_model(model)
+                return None
+            
             if version:
                 models = db_service.execute_query(
                     "SELECT * FROM models WHERE name = %s AND version = %s",
@@ -139,15 +254,7 @@ class ModelManager:
                     (name,)
                 )
             
-            if models:
-                model = models[0]
-                if model.get('classes'):
-                    try:
-                        model['classes'] = json.loads(model['classes'])
-                    except:
-                        model['classes'] = []
-                return model
-            return None
+            return self._parse_model(models[0]) if models else None
         except Exception as e:
             system_logger.error(f"获取模型失败: {str(e)}")
             return None
@@ -181,6 +288,7 @@ class ModelManager:
             params.append(model_id)
             query = f"UPDATE models SET {', '.join(updates)} WHERE id = %s"
             db_service.execute_query(query, tuple(params), fetch=False)
+            self.invalidate_cache()
             
             system_logger.info(f"模型信息更新成功: model_id={model_id}")
             return True
@@ -213,6 +321,7 @@ class ModelManager:
             
             # 从数据库删除
             db_service.execute_query("DELETE FROM models WHERE id = %s", (model_id,), fetch=False)
+            self.invalidate_cache()
             
             system_logger.info(f"模型删除成功: model_id={model_id}")
             return True
@@ -220,32 +329,42 @@ class ModelManager:
             system_logger.error(f"删除模型失败: {str(e)}")
             return False
     
-    def search_models(self, keyword: str) -> List[Dict]:
+    def search_models(self, keyword: str, limit: int = None) -> List[Dict]:
         """
-        搜索模型
+        搜索模型（名称/描述/作者全文检索，按相关度排序）
         
         Args:
-            keyword: 搜索关键词
+            keyword: 搜索关键词，多个关键词以空格分隔，须全部匹配
+            limit: 返回数量限制
             
         Returns:
-            List[Dict]: 匹配的模型列表
+            List[Dict]: 匹配的模型列表，score 为相关度
         """
         try:
-            models = db_service.execute_query(
-                """SELECT * FROM models 
-                WHERE name LIKE %s OR description LIKE %s OR author LIKE %s
-                ORDER BY created_at DESC""",
-                (f'%{keyword}%', f'%{keyword}%', f'%{keyword}%')
-            )
+            ranked = search_ids('models', keyword, limit=limit)
+            if not ranked:
+                return []
             
-            for model in models:
-                if model.get('classes'):
-                    try:
-                        model['classes'] = json.loads(model['classes'])
-                    except:
-                        model['classes'] = []
+            # 索引只返回 id，模型信息从目录缓存中取；缓存中缺少时重新加载一次
+            if self.cache_enabled:
+                catalogue = {m['id']: m for m in self._get_catalogue()}
+                if any(model_id not in catalogue for model_id, _ in ranked):
+                    self.invalidate_cache(notify=False)
+                    catalogue = {m['id']: m for m in self._get_catalogue()}
+            else:
+                ids = [model_id for model_id, _ in ranked]
+                models = db_service.execute_query(
+                    f"SELECT * FROM models WHERE id IN ({', '.join(['%s'] * len(ids))})", tuple(ids)
+                ) or []
+                catalogue = {m['id']: self._parse_model(m) for m in models}
             
-            return models or []
+            results = []
+            for model_id, score in ranked:
+                if model_id in catalogue:
+                    model = self._copy_model(catalogue[model_id])
+                    model['score'] = score
+                    results.append(model)
+            return results
         except Exception as e:
             system_logger.error(f"搜索模型失败: {str(e)}")
             return []
@@ -281,4 +400,4 @@ class ModelManager:
             return False
 
 # 全局模型管理器实例
-model_manager = ModelManager()
+model_manager = LazyProxy(ModelManager, 'model_manager')
@@ -0,0 +1,218 @@
+"""
+查询性能统计
+记录每条 SQL 的耗时、行数、调用方和归一化指纹，超过阈值的查询写入慢查询日志
+
+用法:
+    python -m services.query_metrics [快照文件]   # 按总耗时列出上次运行的查询指纹
+"""
+import atexit
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List
+from utils import LogManager
+import config
+
+# 慢查询日志（单独的日志文件 logs/slow_query_YYYYMMDD.log）
+slow_query_logger = LogManager.get_logger('slow_query')
+
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%s|\?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_LIST_RE = re.compile(r"(VALUES\s*\([^)]*\))(?:\s*,\s*\([^)]*\))+", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# 调用方识别时跳过的模块
+_SKIP_MODULES = ('services.database', 'services.query_metrics', 'contextlib')
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> str:
+    """
+    SQL 归一化指纹：字面量和占位符替换为 ?，IN 列表和多行 VALUES 折叠，空白压缩
+
+    Args:
+        sql: SQL 语句
+
+    Returns:
+        str: 指纹
+    """
+    text = _STRING_RE.sub('?', sql)
+    text = _PLACEHOLDER_RE.sub('?', text)
+    text = _NUMBER_RE.sub('?', text)
+    text = _IN_LIST_RE.sub('(?+)', text)
+    text = _VALUES_LIST_RE.sub(r'\1, ...', text)
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def find_caller() -> str:
+    """
+    查找数据库服务之外的第一个调用方
+
+    Returns:
+        str: 模块名:函数名
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        if not module.startswith(_SKIP_MODULES):
+            return f"{module}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return 'unknown'
+
+
+class QueryMetrics:
+    """进程内查询统计注册表（线程安全）"""
+
+    def __init__(self):
+        """初始化查询统计"""
+        metrics_config = config.QUERY_METRICS_CONFIG
+        self.enabled = metrics_config['enabled']
+        self.slow_threshold = metrics_config['slow_query_threshold']
+        self.max_fingerprints = metrics_config['max_fingerprints']
+        self.snapshot_path = Path(metrics_config['snapshot_path'])
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+        self._started_at = time.time()
+
+    def record(self, sql: str, duration: float, rows: int = None, caller: str = None, error: bool = False):
+        """
+        记录一次查询
+
+        Args:
+            sql: SQL 语句（不记录参数，避免日志中出现密码等敏感数据）
+            duration: 耗时（秒）
+            rows: 返回或影响的行数
+            caller: 调用方（默认自动识别）
+            error: 是否执行失败
+        """
+        if not self.enabled:
+            return
+        caller = caller or find_caller()
+        key = fingerprint(sql)
+
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    key = '<其他>'
+                    stats = self._stats.get(key)
+                if stats is None:
+                    stats = self._stats[key] = {
+                        'fingerprint': key,
+                        'count': 0,
+                        'total_time': 0.0,
+                        'max_time': 0.0,
+                        'rows': 0,
+                        'errors': 0,
+                        'slow': 0,
+                        'callers': Counter()
+                    }
+            stats['count'] += 1
+            stats['total_time'] += duration
+            stats['max_time'] = max(stats['max_time'], duration)
+            stats['rows'] += rows or 0
+            stats['errors'] += 1 if error else 0
+            stats['callers'][caller] += 1
+            if duration >= self.slow_threshold:
+                stats['slow'] += 1
+
+        if duration >= self.slow_threshold:
+            slow_query_logger.warning(
+                f"慢查询 {duration * 1000:.1f} ms, 行数: {rows}, 调用方: {caller}, SQL: {key[:1000]}"
+            )
+
+    def top(self, limit: int = 20, order_by: str = 'total_time') -> List[Dict]:
+        """
+        按指定指标列出查询指纹
+
+        Args:
+            limit: 返回数量
+            order_by: 排序指标 total_time / count / max_time / avg_time / rows
+
+        Returns:
+            List[Dict]: [{fingerprint, count, total_time, avg_time, max_time, rows, errors, slow, callers}, ...]
+        """
+        with self._lock:
+            items = []
+            for stats in self._stats.values():
+                item = dict(stats)
+                item['avg_time'] = stats['total_time'] / stats['count'] if stats['count'] else 0.0
+                item['callers'] = stats['callers'].most_common(5)
+                items.append(item)
+        items.sort(key=lambda x: x[order_by], reverse=True)
+        return items[:limit]
+
+    def reset(self):
+        """清空统计"""
+        with self._lock:
+            self._stats.clear()
+            self._started_at = time.time()
+
+    def dump(self, path: str = None) -> Path:
+        """
+        把当前统计写入 JSON 快照文件（进程退出时自动调用，供命令行查看）
+
+        Args:
+            path: 快照文件路径（默认使用配置）
+
+        Returns:
+            Path: 快照文件路径
+        """
+        path = Path(path) if path else self.snapshot_path
+        snapshot = {
+            'started_at': self._started_at,
+            'dumped_at': time.time(),
+            'queries': self.top(limit=self.max_fingerprints)
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 临时文件按进程区分，训练进程与主进程同时退出时不会互相覆盖
+        tmp_path = path.with_suffix(path.suffix + f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=2)
+        tmp_path.replace(path)
+        return path
+
+    def _dump_at_exit(self):
+        try:
+            if self._stats:
+                self.dump()
+        except Exception as e:
+            slow_query_logger.error(f"保存查询统计快照失败: {str(e)}")
+
+
+# 全局查询统计实例
+query_metrics = QueryMetrics()
+atexit.register(query_metrics._dump_at_exit)
+
+
+def main(argv: List[str] = None):
+    """命令行入口：按总耗时列出快照中的查询指纹"""
+    argv = sys.argv[1:] if argv is None else argv
+    path = Path(argv[0]) if argv else Path(config.QUERY_METRICS_CONFIG['snapshot_path'])
+    if not path.exists():
+        print(f"查询统计快照不存在: {path}")
+        return 1
+
+    with open(path, 'r', encoding='utf-8') as f:
+        snapshot = json.load(f)
+
+    print(f"{'总耗时(ms)':>12} {'次数':>8} {'平均(ms)':>10} {'最大(ms)':>10} {'行数':>10} {'慢':>5}  指纹 / 调用方")
+    for item in snapshot['queries']:
+        print(f"{item['total_time'] * 1000:12.1f} {item['count']:8d} {item['avg_time'] * 1000:10.2f} "
+              f"{item['max_time'] * 1000:10.2f} {item['rows']:10d} {item['slow']:5d}  {item['fingerprint'][:120]}")
+        callers = ', '.join(f"{caller}×{count}" for caller, count in item['callers'])
+        print(f"{'':>60}  ↳ {callers}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,485 @@
+"""
+日志保留与归档服务
+按保留策略把过期日志归档为 gzip 压缩的 CSV 文件，再分小批删除；MySQL 可选按月分区后直接删除分区
+
+用法:
+    python -m services.retention_service status            # 查看各日志表大小与最早记录
+    python -m services.retention_service run               # 立即执行一次清理
+    python -m services.retention_service partition <表名>  # 将 MySQL 日志表转换为按月分区（离线操作）
+"""
+import csv
+import gzip
+import io
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple
+from .database import db_service
+from .rollup_service import rollup_service
+from utils import system_logger, LazyProxy
+import config
+
+
+class ArchiveWriter:
+    """
+    归档文件写入器
+
+    每张表每次清理写一个 <archive_dir>/<表名>/<表名>_<时间>.csv.gz 文件；
+    每批写入后刷新并同步到磁盘，确保先归档成功再删除数据库中的记录。
+    """
+
+    def __init__(self, archive_dir: Path, table: str):
+        """
+        初始化归档写入器（首次写入时才创建文件）
+
+        Args:
+            archive_dir: 归档根目录
+            table: 表名
+        """
+        self.table = table
+        self.path = archive_dir / table / f"{table}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.csv.gz"
+        self.rows = 0
+        self._raw = None
+        self._gzip = None
+        self._text = None
+        self._writer = None
+
+    def write(self, rows: List[Dict]):
+        """
+        写入一批记录并同步到磁盘
+
+        Args:
+            rows: 记录列表
+        """
+        if not rows:
+            return
+        if self._writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._raw = open(self.path, 'wb')
+            self._gzip = gzip.GzipFile(filename=self.path.stem, mode='wb', fileobj=self._raw)
+            self._text = io.TextIOWrapper(self._gzip, encoding='utf-8', newline='')
+            self._writer = csv.DictWriter(self._text, fieldnames=list(rows[0].keys()))
+            self._writer.writeheader()
+
+        self._writer.writerows(rows)
+        self._text.flush()
+        self._gzip.flush()
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self.rows += len(rows)
+
+    def close(self):
+        """关闭归档文件"""
+        if self._text is not None:
+            self._text.close()
+            self._raw.close()
+            system_logger.info(f"已归档 {self.table} {self.rows} 条记录: {self.path}")
+            self._text = None
+
+
+class MySQLPartitionManager:
+    """MySQL 按月 RANGE 分区管理（分区名 pYYYYMM，上界为下月1日）"""
+
+    def __init__(self, db):
+        self.db = db
+        self.schema = db.config['database']
+
+    @staticmethod
+    def _month_start(value: datetime) -> datetime:
+        return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def _next_month(value: datetime) -> datetime:
+        return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+    def _partition_clause(self, month: datetime) -> str:
+        upper = self._next_month(month)
+        return (f"PARTITION p{month.strftime('%Y%m')} VALUES LESS THAN "
+                f"(UNIX_TIMESTAMP('{upper.strftime('%Y-%m-%d %H:%M:%S')}'))")
+
+    def list_partitions(self, table: str) -> List[Dict]:
+        """
+        列出表的分区
+
+        Returns:
+            List[Dict]: [{name, upper_bound(Unix 时间戳，MAXVALUE 为 None), rows}, ...]
+        """
+        rows = self.db.execute_query(
+            """SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS bound, TABLE_ROWS AS table_rows
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION""",
+            (self.schema, table)
+        ) or []
+        return [{
+            'name': r['name'],
+            'upper_bound': None if r['bound'] == 'MAXVALUE' else int(r['bound']),
+            'rows': r['table_rows']
+        } for r in rows]
+
+    def is_partitioned(self, table: str) -> bool:
+        return bool(self.list_partitions(table))
+
+    def partition_table(self, table: str, time_column: str, months_back: int = 12):
+        """
+        将表转换为按月分区（会重建整张表，须在停机维护时执行）
+
+        MySQL 分区表不支持外键，且分区列必须包含在主键中，因此会删除外键并把主键改为 (id, 时间列)。
+
+        Args:
+            table: 表名
+            time_column: 分区时间列
+            months_back: 为过去多少个月创建分区（更早的数据放入第一个分区）
+        """
+        foreign_keys = self.db.execute_query(
+            """SELECT CONSTRAINT_NAME AS name FROM information_schema.REFERENTIAL_CONSTRAINTS
+            WHERE CONSTRAINT_SCHEMA = %s AND TABLE_NAME = %s""",
+            (self.schema, table)
+        ) or []
+        for fk in foreign_keys:
+            self.db.execute_query(f"ALTER TABLE {table} DROP FOREIGN KEY {fk['name']}", fetch=False)
+
+        self.db.execute_query(
+            f"ALTER TABLE {table} MODIFY {time_column} TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+            f"DROP PRIMARY KEY, ADD PRIMARY KEY (id, {time_column})",
+            fetch=False
+        )
+
+        month = self._month_start(datetime.now())
+        for _ in range(months_back):
+            month = self._month_start(month - timedelta(days=1))
+        months = []
+        end = self._month_start(datetime.now())
+        for _ in range(months_back + 1 + config.RETENTION_CONFIG['partition_months_ahead']):
+            months.append(month)
+            month = self._next_month(month)
+
+        partitions = [self._partition_clause(m) for m in months]
+        partitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+        self.db.execute_query(
+            f"ALTER TABLE {table} PARTITION BY RANGE (UNIX_TIMESTAMP({time_column})) ({', '.join(partitions)})",
+            fetch=False
+        )
+        system_logger.info(f"{table} 已按月分区: {len(partitions)} 个分区（当前月 {end.strftime('%Y-%m')}）")
+
+    def ensure_future_partitions(self, table: str, months_ahead: int):
+        """
+        从 pmax 中拆分出未来月份的分区
+
+        Args:
+            table: 表名
+            months_ahead: 需要预先存在的未来月份数
+        """
+        partitions = self.list_partitions(table)
+        bounded = [p for p in partitions if p['upper_bound'] is not None]
+        if not bounded or partitions[-1]['upper_bound'] is not None:
+            return
+
+        last_upper = datetime.fromtimestamp(bounded[-1]['upper_bound'])
+        target = self._month_start(datetime.now())
+        for _ in range(months_ahead + 1):
+            target = self._next_month(target)
+
+        months = []
+        month = last_upper
+        while month < target:
+            months.append(month)
+            month = self._next_month(month)
+        if not months:
+            return
+
+        new_partitions = [self._partition_clause(m) for m in months]
+        new_partitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+        self.db.execute_query(
+            f"ALTER TABLE {table} REORGANIZE PARTITION pmax INTO ({', '.join(new_partitions)})",
+            fetch=False
+        )
+        system_logger.info(f"{table} 新增分区: {', '.join('p' + m.strftime('%Y%m') for m in months)}")
+
+    def expired_partitions(self, table: str, cutoff: datetime) -> List[str]:
+        """上界不晚于截止时间（即全部数据均已过期）的分区"""
+        limit = cutoff.timestamp()
+        return [p['name'] for p in self.list_partitions(table)
+                if p['upper_bound'] is not None and p['upper_bound'] <= limit]
+
+    def drop_partition(self, table: str, name: str):
+        self.db.execute_query(f"ALTER TABLE {table} DROP PARTITION {name}", fetch=False)
+        system_logger.info(f"{table} 已删除分区: {name}")
+
+
+class RetentionService:
+    """日志保留与归档服务类"""
+
+    def __init__(self):
+        """初始化日志保留服务"""
+        retention_config = config.RETENTION_CONFIG
+        self.policies = retention_config['policies']
+        self.archive_dir = Path(retention_config['archive_dir'])
+        self.batch_size = retention_config['batch_size']
+        self.batch_pause = retention_config['batch_pause']
+        self.interval = retention_config['interval']
+        self.partitioning = retention_config['mysql_partitioning'] and db_service.backend_name == 'mysql'
+        self.partitions = MySQLPartitionManager(db_service) if db_service.backend_name == 'mysql' else None
+
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- 后台清理 ----
+
+    def start(self):
+        """启动后台清理线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='RetentionWorker', daemon=True)
+        self._thread.start()
+        system_logger.info(f"日志清理后台线程已启动，间隔 {self.interval}s")
+
+    def stop(self, timeout: float = 5.0):
+        """停止后台清理线程（正在进行的清理在当前批次结束后停止）"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def run_once(self) -> Dict[str, int]:
+        """
+        按全部保留策略执行一次清理
+
+        Returns:
+            Dict[str, int]: 表名 -> 删除的行数
+        """
+        totals = {}
+        with self._run_lock:
+            # 先汇总，保证即将删除的推理/训练日志已计入汇总表
+            rollup_service.run_once()
+            for table, policy in self.policies.items():
+                if self._stop.is_set():
+                    break
+                try:
+                    totals[table] = self.apply_policy(table, policy)
+                except Exception as e:
+                    system_logger.error(f"清理 {table} 失败: {str(e)}")
+                    totals[table] = 0
+        removed = {t: n for t, n in totals.items() if n}
+        if removed:
+            system_logger.info(f"日志清理完成: {removed}")
+        return totals
+
+    def _rollup_guard(self, table: str) -> Tuple[Optional[str], tuple]:
+        """
+        汇总保护条件：只删除已计入汇总表的记录
+
+        Returns:
+            Tuple[Optional[str], tuple]: (WHERE 子句, 参数)，无需保护时子句为 None
+        """
+        if table not in ('inference_logs', 'training_logs'):
+            return None, ()
+        state = {s['name']: s for s in rollup_service.get_status()}.get(table)
+        if table == 'inference_logs':
+            return "id <= %s", ((state or {}).get('last_id') or 0,)
+        last_time = (state or {}).get('last_time')
+        if last_time is None:
+            return "1 = 0", ()
+        return "end_time IS NOT NULL AND end_time < %s", (last_time,)
+
+    def apply_policy(self, table: str, policy: Dict = None, now: datetime = None) -> int:
+        """
+        按保留策略清理一张表
+
+        Args:
+            table: 表名
+            policy: 保留策略（默认使用配置）
+            now: 当前时间（默认 datetime.now()）
+
+        Returns:
+            int: 删除的行数
+        """
+        policy = policy or self.policies[table]
+        cutoff = (now or datetime.now()) - timedelta(days=policy['days'])
+        time_column = policy['time_column']
+
+        if self.partitioning and self.partitions.is_partitioned(table):
+            return self._drop_expired_partitions(table, policy, cutoff)
+
+        clauses, params = [f"{time_column} < %s"], [cutoff]
+        guard, guard_params = self._rollup_guard(table)
+        if guard:
+            clauses.append(guard)
+            params.extend(guard_params)
+        return self.delete_where(table, ' AND '.join(clauses), tuple(params),
+                                 archive=policy.get('archive', False), order_column=time_column)
+
+    def delete_where(self, table: str, where: str, params: tuple = (), archive: bool = False,
+                     order_column: str = 'id', background: bool = True) -> int:
+        """
+        分小批删除满足条件的记录（每批独立提交，批次之间暂停，避免长时间锁表）
+
+        Args:
+            table: 表名
+            where: WHERE 子句（%s 占位符）
+            params: 参数
+            archive: 删除前是否归档
+            order_column: 按该列顺序删除（应为索引列）
+            background: 后台清理时批次之间暂停 batch_pause 秒，并在服务停止时提前结束；
+                        用户操作（如清空日志）传 False，不暂停且一定删除全部记录
+
+        Returns:
+            int: 删除的行数
+        """
+        writer = ArchiveWriter(self.archive_dir, table) if archive else None
+        columns = '*' if archive else 'id'
+        total = 0
+        try:
+            while True:
+                rows = db_service.execute_query(
+                    f"SELECT {columns} FROM {table} WHERE {where} ORDER BY {order_column} LIMIT %s",
+                    tuple(params) + (self.batch_size,)
+                ) or []
+                if not rows:
+                    break
+
+                if writer:
+                    writer.write(rows)
+
+                ids = [row['id'] for row in rows]
+                db_service.execute_query(
+                    f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(ids))})",
+                    tuple(ids),
+                    fetch=False
+                )
+                total += len(ids)
+
+                if len(rows) < self.batch_size:
+                    break
+                if background and self._stop.wait(self.batch_pause):
+                    break
+        finally:
+            if writer:
+                writer.close()
+        return total
+
+    def _drop_expired_partitions(self, table: str, policy: Dict, cutoff: datetime) -> int:
+        """归档并删除已整体过期的分区，同时补齐未来月份分区"""
+        total = 0
+        guard, guard_params = self._rollup_guard(table)
+        for name in self.partitions.expired_partitions(table, cutoff):
+            if guard:
+                pending = db_service.execute_query(
+                    f"SELECT COUNT(*) AS count FROM {table} PARTITION ({name}) WHERE NOT ({guard})",
+                    guard_params
+                )
+                if pending and pending[0]['count']:
+                    system_logger.warning(f"{table} 分区 {name} 仍有 {pending[0]['count']} 条记录未汇总，暂不删除")
+                    continue
+
+            count = 0
+            if policy.get('archive', False):
+                writer = ArchiveWriter(self.archive_dir, table)
+                last_id = 0
+                try:
+                    while True:
+                        rows = db_service.execute_query(
+                            f"SELECT * FROM {table} PARTITION ({name}) WHERE id > %s ORDER BY id LIMIT %s",
+                            (last_id, self.batch_size)
+                        ) or []
+                        if not rows:
+                            break
+                        writer.write(rows)
+                        count += len(rows)
+                        last_id = rows[-1]['id']
+                finally:
+                    writer.close()
+            else:
+                rows = db_service.execute_query(f"SELECT COUNT(*) AS count FROM {table} PARTITION ({name})")
+                count = rows[0]['count'] if rows else 0
+
+            self.partitions.drop_partition(table, name)
+            total += count
+
+        self.partitions.ensure_future_partitions(table, config.RETENTION_CONFIG['partition_months_ahead'])
+        return total
+
+    # ---- 状态 ----
+
+    def get_table_stats(self) -> List[Dict]:
+        """
+        各日志表的大小与最早记录时间
+
+        Returns:
+            List[Dict]: [{table, rows, data_size, index_size, oldest, retention_days, partitioned}, ...]
+        """
+        stats = []
+        for table, policy in self.policies.items():
+            try:
+                item = {'table': table, 'retention_days': policy['days'], 'partitioned': False,
+                        'rows': None, 'data_size': None, 'index_size': None}
+                oldest = db_service.execute_query(
+                    f"SELECT MIN({policy['time_column']}) AS oldest FROM {table}"
+                )
+                item['oldest'] = oldest[0]['oldest'] if oldest else None
+
+                if db_service.backend_name == 'mysql':
+                    info = db_service.execute_query(
+                        """SELECT TABLE_ROWS AS table_rows, DATA_LENGTH AS data_size, INDEX_LENGTH AS index_size
+                        FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s""",
+                        (db_service.config['database'], table)
+                    )
+                    if info:
+                        item.update(rows=info[0]['table_rows'], data_size=info[0]['data_size'],
+                                    index_size=info[0]['index_size'])
+                    item['partitioned'] = self.partitions.is_partitioned(table)
+                else:
+                    count = db_service.execute_query(f"SELECT COUNT(*) AS count FROM {table}")
+                    item['rows'] = count[0]['count'] if count else 0
+                stats.append(item)
+            except Exception as e:
+                system_logger.error(f"获取 {table} 统计失败: {str(e)}")
+        return stats
+
+
+# 全局日志保留服务实例
+retention_service = LazyProxy(RetentionService, 'retention_service')
+
+
+def main(argv: List[str] = None):
+    """命令行入口"""
+    import sys
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else 'status'
+
+    if command == 'run':
+        totals = retention_service.run_once()
+        for table, count in totals.items():
+            print(f"{table:<16} 删除 {count} 条")
+    elif command == 'status':
+        for item in retention_service.get_table_stats():
+            size = ''
+            if item['data_size'] is not None:
+                size = f"  数据 {item['data_size'] / 1048576:.1f} MB  索引 {item['index_size'] / 1048576:.1f} MB"
+            print(f"{item['table']:<16} 行数 {item['rows']}  最早 {item['oldest']}  "
+                  f"保留 {item['retention_days']} 天{'  已分区' if item['partitioned'] else ''}{size}")
+    elif command == 'partition' and len(argv) > 1:
+        if db_service.backend_name != 'mysql':
+            print('仅 MySQL 后端支持分区')
+            return 1
+        table = argv[1]
+        policy = config.RETENTION_CONFIG['policies'].get(table)
+        if not policy:
+            print(f"未配置保留策略的表: {table}")
+            return 1
+        retention_service.partitions.partition_table(table, policy['time_column'])
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,410 @@
+"""
+汇总统计服务
+后台从高水位线开始增量汇总推理/训练日志到按小时、按天的汇总表，统计查询只读汇总表
+"""
+import bisect
+import threading
+from datetime import datetime, timedelta
+from typing import Optional, Dict, List
+from .database import db_service
+from utils import system_logger, LazyProxy
+import config
+
+# 推理耗时直方图桶边界（秒）：第 i 个桶统计 耗时 <= LATENCY_BUCKETS[i]，最后一个桶统计更慢的记录
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0]
+HISTOGRAM_COLUMNS = [f"latency_b{i}" for i in range(len(LATENCY_BUCKETS) + 1)]
+
+PERIODS = ('hour', 'day')
+
+INFERENCE_KEYS = ['period', 'bucket_start', 'model_name', 'user_id', 'source_type']
+INFERENCE_SUMS = ['runs', 'detections', 'latency_sum'] + HISTOGRAM_COLUMNS
+INFERENCE_MAXES = ['latency_max']
+
+TRAINING_KEYS = ['period', 'bucket_start', 'model_name', 'user_id']
+TRAINING_SUMS = ['runs', 'completed', 'failed', 'epochs_total', 'duration_sum', 'map_sum', 'map_count']
+TRAINING_MAXES = ['map_max']
+
+# 允许的分组维度
+INFERENCE_GROUPS = ('model_name', 'user_id', 'source_type', 'bucket_start')
+TRAINING_GROUPS = ('model_name', 'user_id', 'bucket_start')
+
+# 汇总起点
+_EPOCH = datetime(1970, 1, 2)
+
+
+def bucket_start(value: datetime, period: str) -> datetime:
+    """
+    计算时间所在的汇总桶起点
+
+    Args:
+        value: 时间
+        period: hour / day
+
+    Returns:
+        datetime: 桶起点
+    """
+    if period == 'hour':
+        return value.replace(minute=0, second=0, microsecond=0)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def latency_bucket(seconds: float) -> int:
+    """耗时所在的直方图桶序号"""
+    return bisect.bisect_left(LATENCY_BUCKETS, seconds)
+
+
+def histogram_quantile(histogram: List[int], q: float) -> Optional[float]:
+    """
+    根据直方图估算分位数（返回所在桶的上界，最后一个桶返回 None 表示超过最大边界）
+
+    Args:
+        histogram: 各桶计数
+        q: 分位数（0~1）
+
+    Returns:
+        Optional[float]: 分位数估计值（秒）
+    """
+    total = sum(histogram)
+    if total == 0:
+        return 0.0
+    threshold = total * q
+    cumulative = 0
+    for i, count in enumerate(histogram):
+        cumulative += count
+        if cumulative >= threshold:
+            return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else None
+    return None
+
+
+class RollupService:
+    """汇总统计服务类"""
+
+    def __init__(self):
+        """初始化汇总统计服务"""
+        rollup_config = config.ROLLUP_CONFIG
+        self.interval = rollup_config['interval']
+        self.batch_size = rollup_config['batch_size']
+        self.lag = rollup_config['lag']
+
+        backend = db_service.backend
+        self._inference_upsert = backend.upsert_sql('inference_rollup', INFERENCE_KEYS, INFERENCE_SUMS, INFERENCE_MAXES)
+        self._training_upsert = backend.upsert_sql('training_rollup', TRAINING_KEYS, TRAINING_SUMS, TRAINING_MAXES)
+
+        # 同一进程内串行执行汇总
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- 后台汇总 ----
+
+    def start(self):
+        """启动后台汇总线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='RollupAggregator', daemon=True)
+        self._thread.start()
+        system_logger.info(f"汇总统计后台线程已启动，间隔 {self.interval}s")
+
+    def stop(self, timeout: float = 5.0):
+        """停止后台汇总线程"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval)
+
+    def run_once(self) -> Dict:
+        """
+        汇总高水位线之后的全部新日志
+
+        Returns:
+            Dict: {'inference': 汇总的推理日志条数, 'training': 汇总的训练日志条数}
+        """
+        totals = {'inference': 0, 'training': 0}
+        with self._run_lock:
+            try:
+                for name, step in (('inference', self._rollup_inference_batch),
+                                   ('training', self._rollup_training_batch)):
+                    while not self._stop.is_set():
+                        count = step()
+                        totals[name] += count
+                        if count < self.batch_size:
+                            break
+            except Exception as e:
+                system_logger.error(f"汇总统计失败: {str(e)}")
+        if totals['inference'] or totals['training']:
+            system_logger.info(f"汇总统计完成: 推理日志 {totals['inference']} 条，训练日志 {totals['training']} 条")
+        return totals
+
+    def _lock_state(self, cursor, name: str) -> Dict:
+        """
+        锁定并读取汇总进度（多个进程同时汇总时串行执行，避免重复累加）
+
+        Args:
+            cursor: 游标
+            name: 原始表名
+
+        Returns:
+            Dict: {'last_id', 'last_time'}
+        """
+        if db_service.backend_name == 'sqlite':
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT last_id, last_time FROM rollup_state WHERE name = ?", (name,))
+        else:
+            cursor.execute("SELECT last_id, last_time FROM rollup_state WHERE name = %s FOR UPDATE", (name,))
+        return cursor.fetchone()
+
+    def _save_state(self, cursor, name: str, last_id: int, last_time: datetime = None):
+        cursor.execute(
+            db_service.backend.translate(
+                "UPDATE rollup_state SET last_id = %s, last_time = %s, updated_at = NOW() WHERE name = %s"
+            ),
+            (last_id, last_time, name)
+        )
+
+    def _rollup_inference_batch(self) -> int:
+        """
+        汇总一批推理日志（按 id 递增，高水位线为 last_id）
+
+        Returns:
+            int: 本批汇总的条数
+        """
+        translate = db_service.backend.translate
+        cutoff = datetime.now() - timedelta(seconds=self.lag)
+
+        with db_service.get_connection() as conn:
+            cursor = conn.cursor()
+            state = self._lock_state(cursor, 'inference_logs')
+            cursor.execute(
+                translate("""SELECT id, user_id, model_name, source_type, detections, inference_time, created_at
+                FROM inference_logs WHERE id > %s ORDER BY id LIMIT %s"""),
+                (state['last_id'], self.batch_size)
+            )
+            rows = cursor.fetchall()
+
+            # 只汇总已超过延迟时间的连续前缀
+            batch = []
+            for row in rows:
+                if row['created_at'] is None or row['created_at'] >= cutoff:
+                    break
+                batch.append(row)
+            if not batch:
+                conn.rollback()
+                cursor.close()
+                return 0
+
+            groups: Dict[tuple, Dict] = {}
+            for row in batch:
+                latency = float(row['inference_time'] or 0)
+                for period in PERIODS:
+                    key = (period, bucket_start(row['created_at'], period), row['model_name'] or '',
+                           row['user_id'] or 0, row['source_type'] or '')
+                    acc = groups.get(key)
+                    if acc is None:
+                        acc = groups[key] = dict.fromkeys(INFERENCE_SUMS + INFERENCE_MAXES, 0)
+                    acc['runs'] += 1
+                    acc['detections'] += row['detections'] or 0
+                    acc['latency_sum'] += latency
+                    acc['latency_max'] = max(acc['latency_max'], latency)
+                    acc[HISTOGRAM_COLUMNS[latency_bucket(latency)]] += 1
+
+            cursor.executemany(
+                translate(self._inference_upsert),
+                [key + tuple(acc[c] for c in INFERENCE_SUMS + INFERENCE_MAXES) for key, acc in groups.items()]
+            )
+            self._save_state(cursor, 'inference_logs', batch[-1]['id'])
+            conn.commit()
+            cursor.close()
+        return len(batch)
+
+    def _rollup_training_batch(self) -> int:
+        """
+        汇总一批已结束的训练日志（按 (end_time, id) 递增，高水位线为 last_time + last_id）
+
+        Returns:
+            int: 本批汇总的条数
+        """
+        translate = db_service.backend.translate
+        cutoff = datetime.now() - timedelta(seconds=self.lag)
+
+        with db_service.get_connection() as conn:
+            cursor = conn.cursor()
+            state = self._lock_state(cursor, 'training_logs')
+            last_time = state['last_time'] or _EPOCH
+            cursor.execute(
+                translate("""SELECT id, user_id, model_name, epochs, status, start_time, end_time, final_map
+                FROM training_logs
+                WHERE end_time >= %s AND (end_time > %s OR id > %s) AND end_time < %s
+                ORDER BY end_time, id LIMIT %s"""),
+                (last_time, last_time, state['last_id'], cutoff, self.batch_size)
+            )
+            batch = cursor.fetchall()
+            if not batch:
+                conn.rollback()
+                cursor.close()
+                return 0
+
+            groups: Dict[tuple, Dict] = {}
+            for row in batch:
+                duration = 0.0
+                if row['start_time'] and row['end_time']:
+                    duration = max((row['end_time'] - row['start_time']).total_seconds(), 0.0)
+                final_map = row['final_map']
+                for period in PERIODS:
+                    key = (period, bucket_start(row['end_time'], period), row['model_name'] or '', row['user_id'] or 0)
+                    acc = groups.get(key)
+                    if acc is None:
+                        acc = groups[key] = dict.fromkeys(TRAINING_SUMS + TRAINING_MAXES, 0)
+                    acc['runs'] += 1
+                    acc['completed'] += 1 if row['status'] == 'completed' else 0
+                    acc['failed'] += 1 if row['status'] == 'failed' else 0
+                    acc['epochs_total'] += row['epochs'] or 0
+                    acc['duration_sum'] += duration
+                    if final_map is not None:
+                        acc['map_sum'] += final_map
+                        acc['map_count'] += 1
+                        acc['map_max'] = max(acc['map_max'], final_map)
+
+            cursor.executemany(
+                translate(self._training_upsert),
+                [key + tuple(acc[c] for c in TRAINING_SUMS + TRAINING_MAXES) for key, acc in groups.items()]
+            )
+            last = batch[-1]
+            self._save_state(cursor, 'training_logs', last['id'], last['end_time'])
+            conn.commit()
+            cursor.close()
+        return len(batch)
+
+    # ---- 统计查询 ----
+
+    @staticmethod
+    def _range_clause(start_time: datetime, end_time: datetime, period: str):
+        clauses, params = ["period = %s"], [period]
+        if start_time:
+            clauses.append("bucket_start >= %s")
+            params.append(bucket_start(start_time, period))
+        if end_time:
+            clauses.append("bucket_start < %s")
+            params.append(end_time)
+        return clauses, params
+
+    def get_inference_summary(self, start_time: datetime = None, end_time: datetime = None,
+                              period: str = 'hour', group_by: str = 'model_name',
+                              user_id: int = None) -> List[Dict]:
+        """
+        推理统计（读取汇总表，时间范围按汇总桶对齐）
+
+        Args:
+            start_time: 开始时间
+            end_time: 结束时间
+            period: 汇总粒度 hour / day
+            group_by: 分组维度 model_name / user_id / source_type / bucket_start
+            user_id: 只统计指定用户
+
+        Returns:
+            List[Dict]: 每组的推理次数、检测总数、平均/最大/P95 耗时等
+        """
+        try:
+            if period not in PERIODS or group_by not in INFERENCE_GROUPS:
+                raise ValueError(f"不支持的统计方式: {period}/{group_by}")
+            clauses, params = self._range_clause(start_time, end_time, period)
+            if user_id is not None:
+                clauses.append("user_id = %s")
+                params.append(user_id)
+
+            hist_select = ', '.join(f"SUM({c}) AS {c}" for c in HISTOGRAM_COLUMNS)
+            order = 'group_key' if group_by == 'bucket_start' else 'runs DESC'
+            rows = db_service.execute_query(
+                f"""SELECT {group_by} AS group_key, SUM(runs) AS runs, SUM(detections) AS detections,
+                SUM(latency_sum) AS latency_sum, MAX(latency_max) AS latency_max, {hist_select}
+                FROM inference_rollup WHERE {' AND '.join(clauses)}
+                GROUP BY {group_by} ORDER BY {order}""",
+                tuple(params)
+            ) or []
+
+            results = []
+            for row in rows:
+                runs = int(row['runs'] or 0)
+                histogram = [int(row[c] or 0) for c in HISTOGRAM_COLUMNS]
+                results.append({
+                    'group_key': row['group_key'],
+                    'runs': runs,
+                    'detections': int(row['detections'] or 0),
+                    'avg_detections': (row['detections'] or 0) / runs if runs else 0.0,
+                    'avg_latency': (row['latency_sum'] or 0) / runs if runs else 0.0,
+                    'max_latency': float(row['latency_max'] or 0),
+                    'p95_latency': histogram_quantile(histogram, 0.95),
+                    'histogram': histogram
+                })
+            return results
+        except Exception as e:
+            system_logger.error(f"获取推理统计失败: {str(e)}")
+            return []
+
+    def get_training_summary(self, start_time: datetime = None, end_time: datetime = None,
+                             period: str = 'day', group_by: str = 'model_name') -> List[Dict]:
+        """
+        训练统计（读取汇总表，按训练结束时间统计）
+
+        Args:
+            start_time: 开始时间
+            end_time: 结束时间
+            period: 汇总粒度 hour / day
+            group_by: 分组维度 model_name / user_id / bucket_start
+
+        Returns:
+            List[Dict]: 每组的训练次数、成功/失败次数、平均时长、平均/最佳 mAP
+        """
+        try:
+            if period not in PERIODS or group_by not in TRAINING_GROUPS:
+                raise ValueError(f"不支持的统计方式: {period}/{group_by}")
+            clauses, params = self._range_clause(start_time, end_time, period)
+            order = 'group_key' if group_by == 'bucket_start' else 'runs DESC'
+            rows = db_service.execute_query(
+                f"""SELECT {group_by} AS group_key, SUM(runs) AS runs, SUM(completed) AS completed,
+                SUM(failed) AS failed, SUM(epochs_total) AS epochs_total, SUM(duration_sum) AS duration_sum,
+                SUM(map_sum) AS map_sum, SUM(map_count) AS map_count, MAX(map_max) AS map_max
+                FROM training_rollup WHERE {' AND '.join(clauses)}
+                GROUP BY {group_by} ORDER BY {order}""",
+                tuple(params)
+            ) or []
+
+            results = []
+            for row in rows:
+                runs = int(row['runs'] or 0)
+                map_count = int(row['map_count'] or 0)
+                results.append({
+                    'group_key': row['group_key'],
+                    'runs': runs,
+                    'completed': int(row['completed'] or 0),
+                    'failed': int(row['failed'] or 0),
+                    'epochs_total': int(row['epochs_total'] or 0),
+                    'avg_duration': (row['duration_sum'] or 0) / runs if runs else 0.0,
+                    'avg_map': (row['map_sum'] or 0) / map_count if map_count else None,
+                    'best_map': float(row['map_max']) if map_count else None
+                })
+            return results
+        except Exception as e:
+            system_logger.error(f"获取训练统计失败: {str(e)}")
+            return []
+
+    def get_status(self) -> List[Dict]:
+        """
+        汇总进度（各原始表的高水位线与最后更新时间）
+
+        Returns:
+            List[Dict]: [{name, last_id, last_time, updated_at}, ...]
+        """
+        try:
+            return db_service.execute_query("SELECT name, last_id, last_time, updated_at FROM rollup_state") or []
+        except Exception as e:
+            system_logger.error(f"获取汇总进度失败: {str(e)}")
+            return []
+
+
+# 全局汇总统计服务实例
+rollup_service = LazyProxy(RollupService, 'rollup_service')
@@ -0,0 +1,248 @@
+"""
+会话服务
+签发和校验 HMAC 签名的会话令牌，并在内存中缓存用户/角色信息，权限检查无需查询数据库
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict
+from .database import db_service
+from utils import auth_logger, LazyProxy
+import config
+
+# 缓存的用户字段（不含密码）
+USER_COLUMNS = 'id, username, email, role, status, created_at'
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class SessionService:
+    """
+    会话服务类
+
+    令牌格式为 <载荷>.<签名>，载荷包含用户ID、会话ID和过期时间，签名为 HMAC-SHA256。
+    令牌本身无状态，共享同一密钥的进程都可以校验；注销的会话ID记录在内存中直到过期。
+    用户记录按 user_cache_ttl 缓存，本进程修改用户时立即失效。
+    """
+
+    def __init__(self):
+        """初始化会话服务"""
+        session_config = config.SESSION_CONFIG
+        self.token_ttl = session_config['token_ttl']
+        self.user_cache_ttl = session_config['user_cache_ttl']
+        self._secret = self._load_secret(session_config['secret_key'], Path(session_config['secret_key_file']))
+
+        self._lock = threading.Lock()
+        self._users: Dict[int, tuple] = {}  # user_id -> (用户记录, 过期时间)
+        self._revoked: Dict[str, float] = {}  # 会话ID -> 令牌过期时间
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    @staticmethod
+    def _load_secret(secret_key: Optional[str], key_file: Path) -> bytes:
+        """
+        获取签名密钥：优先使用配置，其次读取密钥文件，都没有时生成新密钥并保存
+
+        Args:
+            secret_key: 配置的密钥
+            key_file: 密钥文件路径
+
+        Returns:
+            bytes: 密钥
+        """
+        if secret_key:
+            return secret_key.encode('utf-8')
+        if key_file.exists():
+            return key_file.read_bytes().strip()
+
+        secret = secrets.token_hex(32).encode('ascii')
+        key_file.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            fd = os.open(str(key_file), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            # 其他进程刚刚生成了密钥
+            return key_file.read_bytes().strip()
+        with os.fdopen(fd, 'wb') as f:
+            f.write(secret)
+        auth_logger.info(f"已生成会话签名密钥: {key_file}")
+        return secret
+
+    def _sign(self, payload: str) -> str:
+        return _b64encode(hmac.new(self._secret, payload.encode('ascii'), hashlib.sha256).digest())
+
+    def issue_token(self, user: Dict) -> str:
+        """
+        签发会话令牌，并缓存用户记录
+
+        Args:
+            user: 用户信息（至少包含 id）
+
+        Returns:
+            str: 会话令牌
+        """
+        now = int(time.time())
+        claims = {'uid': user['id'], 'sid': secrets.token_urlsafe(12), 'iat': now, 'exp': now + self.token_ttl}
+        payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode('utf-8'))
+        self.cache_user(user)
+        return f"{payload}.{self._sign(payload)}"
+
+    def decode_token(self, token: str) -> Optional[Dict]:
+        """
+        校验令牌签名、有效期和注销状态（不查询数据库）
+
+        Args:
+            token: 会话令牌
+
+        Returns:
+            Optional[Dict]: 令牌载荷 {uid, sid, iat, exp}，无效时返回 None
+        """
+        try:
+            payload, signature = token.split('.', 1)
+            if not hmac.compare_digest(signature, self._sign(payload)):
+                return None
+            claims = json.loads(_b64decode(payload))
+        except (AttributeError, TypeError, ValueError):
+            return None
+
+        if not isinstance(claims, dict) or claims.get('exp', 0) <= time.time():
+            return None
+        with self._lock:
+            if claims.get('sid') in self._revoked:
+                return None
+        return claims
+
+    def validate_token(self, token: str) -> Optional[Dict]:
+        """
+        校验令牌并返回当前用户（用户记录来自缓存，已禁用或删除的用户视为无效）
+
+        Args:
+            token: 会话令牌
+
+        Returns:
+            Optional[Dict]: 用户信息（不含密码），无效时返回 None
+        """
+        claims = self.decode_token(token)
+        if claims is None:
+            return None
+        user = self.get_user(claims['uid'])
+        if user is None or user.get('status') != 'active':
+            return None
+        return user
+
+    def has_role(self, token: str, role: str) -> bool:
+        """
+        检查令牌对应的用户是否具有指定角色
+
+        Args:
+            token: 会话令牌
+            role: 角色（admin/user）
+
+        Returns:
+            bool: 是否具有该角色
+        """
+        user = self.validate_token(token)
+        return user is not None and user.get('role') == role
+
+    def revoke_token(self, token: str) -> bool:
+        """
+        注销会话令牌
+
+        Args:
+            token: 会话令牌
+
+        Returns:
+            bool: 令牌是否有效并已注销
+        """
+        claims = self.decode_token(token)
+        if claims is None:
+            return False
+        now = time.time()
+        with self._lock:
+            # 顺带清理已过期的注销记录
+            for sid in [sid for sid, exp in self._revoked.items() if exp <= now]:
+                del self._revoked[sid]
+            self._revoked[claims['sid']] = claims['exp']
+        return True
+
+    def get_user(self, user_id: int) -> Optional[Dict]:
+        """
+        获取用户记录（读穿透缓存）
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            Optional[Dict]: 用户信息（不含密码），不存在时返回 None
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._stats['hits'] += 1
+                return dict(entry[0])
+            self._stats['misses'] += 1
+
+        try:
+            rows = db_service.execute_query(f"SELECT {USER_COLUMNS} FROM users WHERE id = %s", (user_id,))
+        except Exception as e:
+            auth_logger.error(f"获取用户信息失败: {str(e)}")
+            return None
+
+        if not rows:
+            self.invalidate_user(user_id)
+            return None
+        self.cache_user(rows[0])
+        return dict(rows[0])
+
+    def cache_user(self, user: Dict):
+        """
+        缓存用户记录
+
+        Args:
+            user: 用户信息（password 字段不会被缓存）
+        """
+        record = {key: value for key, value in user.items() if key != 'password'}
+        with self._lock:
+            self._users[record['id']] = (record, time.monotonic() + self.user_cache_ttl)
+
+    def invalidate_user(self, user_id: int = None):
+        """
+        使用户缓存失效
+
+        Args:
+            user_id: 用户ID，None 表示清空全部
+        """
+        with self._lock:
+            if user_id is None:
+                self._users.clear()
+            else:
+                self._users.pop(user_id, None)
+            self._stats['invalidations'] += 1
+
+    def get_cache_stats(self) -> Dict:
+        """
+        获取缓存统计
+
+        Returns:
+            Dict: 命中/未命中/失效次数、缓存用户数和已注销会话数
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['cached_users'] = len(self._users)
+            stats['revoked_sessions'] = len(self._revoked)
+        return stats
+
+
+# 全局会话服务实例
+session_service = LazyProxy(SessionService, 'session_service')
@@ -0,0 +1,607 @@
+"""
+超参数搜索服务
+按搜索空间采样超参数组合，用异步逐次减半（ASHA）以验证 mAP 淘汰较差组合：
+所有组合先训练少量轮数，只有靠前的组合在上一级权重基础上继续训练更多轮。
+每个组合的逐级结果记录在 sweep_trials 表，最优权重通过 save_trained_model 注册
+"""
+import json
+import math
+import queue
+import random
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple, Callable
+import yaml
+from .database import db_service
+from .training_service import TrainingService
+from .training_worker import default_cpu_cores, get_available_cores, split_cores
+from utils import training_logger, LazyProxy
+import config
+
+# 搜索状态 -> 显示文本
+SWEEP_STATUSES = {
+    'created': '未开始',
+    'running': '运行中',
+    'completed': '已完成',
+    'stopped': '已停止',
+    'failed': '失败'
+}
+
+# 组合状态 -> 显示文本
+TRIAL_STATUSES = {
+    'pending': '待训练',
+    'running': '训练中',
+    'waiting': '等待晋级',
+    'completed': '已完成',
+    'pruned': '已淘汰',
+    'stopped': '已停止',
+    'failed': '失败'
+}
+
+# 可搜索的超参数（训练轮数是逐次减半的预算，不参与搜索）
+SEARCHABLE_PARAMS = ['lr', 'batch_size', 'img_size']
+
+# settings 字段及默认值来源
+SETTING_KEYS = ['num_trials', 'min_epochs', 'max_epochs', 'reduction_factor', 'parallel', 'warmup_epochs']
+
+
+def rung_budgets(min_epochs: int, max_epochs: int, reduction_factor: int) -> List[int]:
+    """
+    各级的累计训练轮数
+
+    Args:
+        min_epochs: 第一级轮数
+        max_epochs: 最高一级的累计轮数
+        reduction_factor: 每级轮数倍数
+
+    Returns:
+        List[int]: 如 (3, 27, 3) -> [3, 9, 27]
+    """
+    budgets = [min_epochs]
+    while budgets[-1] * reduction_factor < max_epochs:
+        budgets.append(budgets[-1] * reduction_factor)
+    if budgets[-1] < max_epochs:
+        budgets.append(max_epochs)
+    return budgets
+
+
+def validate_search_space(search_space: Dict) -> Optional[str]:
+    """
+    校验搜索空间
+
+    Args:
+        search_space: 参数名 -> 候选值列表，或 {'low', 'high', 'log'} 区间
+
+    Returns:
+        Optional[str]: 错误信息，合法时返回 None
+    """
+    if not search_space:
+        return '搜索空间为空'
+    for key, spec in search_space.items():
+        if key not in SEARCHABLE_PARAMS:
+            return f"不支持搜索的参数: {key}（可选 {', '.join(SEARCHABLE_PARAMS)}）"
+        if isinstance(spec, list):
+            if not spec:
+                return f"参数 {key} 的候选值为空"
+        elif isinstance(spec, dict):
+            low, high = spec.get('low'), spec.get('high')
+            if low is None or high is None or low >= high:
+                return f"参数 {key} 的区间无效"
+            if spec.get('log') and low <= 0:
+                return f"参数 {key} 使用对数采样时下限必须大于 0"
+        else:
+            return f"参数 {key} 应为候选值列表或区间"
+    return None
+
+
+def sample_params(search_space: Dict, count: int, seed: int = None) -> List[Dict]:
+    """
+    从搜索空间采样超参数组合（尽量不重复）
+
+    Args:
+        search_space: 搜索空间
+        count: 组合数
+        seed: 随机种子
+
+    Returns:
+        List[Dict]: 超参数组合列表
+    """
+    rng = random.Random(seed)
+
+    def draw(spec):
+        if isinstance(spec, list):
+            return rng.choice(spec)
+        low, high = spec['low'], spec['high']
+        if spec.get('log'):
+            value = math.exp(rng.uniform(math.log(low), math.log(high)))
+        else:
+            value = rng.uniform(low, high)
+        if isinstance(low, int) and isinstance(high, int):
+            return int(round(value))
+        return float(f'{value:.4g}')
+
+    samples, seen = [], set()
+    for _ in range(count):
+        for _ in range(100):
+            params = {key: draw(spec) for key, spec in search_space.items()}
+            key = json.dumps(params, sort_keys=True)
+            if key not in seen:
+                break
+        seen.add(key)
+        samples.append(params)
+    return samples
+
+
+def next_trial(trials: List[Dict], budgets: List[int], reduction_factor: int) -> Optional[Tuple[Dict, int]]:
+    """
+    ASHA 选择下一个训练任务
+
+    从最高级往下找：某一级已完成的组合中排名前 1/reduction_factor 且尚未晋级的组合晋级到下一级；
+    没有可晋级的组合时开始一个新组合的第一级。
+
+    Args:
+        trials: 组合列表（rung_maps 为已解析的逐级 mAP 列表）
+        budgets: 各级累计轮数
+        reduction_factor: 淘汰比例
+
+    Returns:
+        Optional[Tuple[Dict, int]]: (组合, 要训练的级别)，暂无可训练的组合时返回 None
+    """
+    for rung in reversed(range(len(budgets) - 1)):
+        finished = [trial for trial in trials if len(trial['rung_maps']) > rung]
+        top = sorted(finished, key=lambda trial: trial['rung_maps'][rung], reverse=True)
+        for trial in top[:len(finished) // reduction_factor]:
+            if trial['status'] == 'waiting' and trial['rung'] == rung:
+                return trial, rung + 1
+    for trial in trials:
+        if trial['status'] == 'pending':
+            return trial, 0
+    return None
+
+
+class SweepService:
+    """
+    超参数搜索服务类
+
+    每个运行中的搜索有一个调度线程，最多同时训练 parallel 个组合，每个组合的每一级是一次普通训练
+    （训练日志和逐轮指标照常记录）。启用 TRAINING_WORKER_CONFIG 时各组合在独立训练进程中运行，
+    CPU 核心平均分配。已停止或中断的搜索再次启动时从数据库中的状态继续。
+    """
+
+    def __init__(self):
+        """初始化超参数搜索服务"""
+        self._lock = threading.Lock()
+        self._runners: Dict[int, threading.Event] = {}  # 搜索ID -> 停止事件
+        self._services: Dict[int, Dict[int, TrainingService]] = {}  # 搜索ID -> {组合ID: 训练服务}
+        self._progress: Dict[int, Dict] = {}  # 组合ID -> 最近一次进度事件
+
+    # ---- 搜索管理 ----
+
+    def create_sweep(self, user_id: int, name: str, base_model: str, data_yaml: str,
+                     search_space: Dict = None, settings: Dict = None, seed: int = None) -> Dict:
+        """
+        创建超参数搜索并采样全部组合
+
+        Args:
+            user_id: 用户ID
+            name: 搜索名称
+            base_model: 基础模型路径
+            data_yaml: 数据集YAML配置文件路径
+            search_space: 搜索空间（默认 SWEEP_CONFIG['search_space']）
+            settings: num_trials, min_epochs, max_epochs, reduction_factor, parallel, warmup_epochs（缺省取 SWEEP_CONFIG）
+            seed: 采样随机种子
+
+        Returns:
+            Dict: {'success', 'sweep_id'} 或 {'success': False, 'error'}
+        """
+        search_space = search_space or config.SWEEP_CONFIG['search_space']
+        settings = {key: (settings or {}).get(key) if (settings or {}).get(key) is not None
+                    else config.SWEEP_CONFIG[key] for key in SETTING_KEYS}
+
+        error = validate_search_space(search_space)
+        if error is None and settings['min_epochs'] > settings['max_epochs']:
+            error = '第一级轮数不能大于最大轮数'
+        if error is None and settings['reduction_factor'] < 2:
+            error = '淘汰倍数至少为 2'
+        if error is None and not 0 <= settings['warmup_epochs'] < settings['min_epochs']:
+            # 第一级淘汰最多的组合，若整级都在预热中，采样的学习率几乎不影响排名
+            error = '第一级轮数必须大于学习率预热轮数'
+        if error:
+            return {'success': False, 'error': error}
+
+        try:
+            sweep_id = db_service.execute_query(
+                """INSERT INTO training_sweeps (user_id, name, base_model, data_yaml, search_space, settings, status)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+                (user_id, name, base_model, data_yaml, json.dumps(search_space),
+                 json.dumps(settings), 'created'),
+                fetch=False
+            )
+            trials = sample_params(search_space, settings['num_trials'], seed)
+            db_service.execute_many(
+                "INSERT INTO sweep_trials (sweep_id, trial_no, params, status) VALUES (%s, %s, %s, %s)",
+                [(sweep_id, no, json.dumps(params), 'pending') for no, params in enumerate(trials, 1)]
+            )
+            budgets = rung_budgets(settings['min_epochs'], settings['max_epochs'], settings['reduction_factor'])
+            training_logger.info(f"超参数搜索已创建: id={sweep_id}, {len(trials)} 个组合, 各级轮数 {budgets}")
+            return {'success': True, 'sweep_id': sweep_id}
+        except Exception as e:
+            training_logger.error(f"创建超参数搜索失败: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    def start_sweep(self, sweep_id: int) -> bool:
+        """
+        在后台线程中运行（或继续）超参数搜索
+
+        Args:
+            sweep_id: 搜索ID
+
+        Returns:
+            bool: 是否已启动（已在运行时返回 False）
+        """
+        with self._lock:
+            if sweep_id in self._runners:
+                return False
+            stop_event = threading.Event()
+            self._runners[sweep_id] = stop_event
+            self._services[sweep_id] = {}
+        threading.Thread(target=self._run, args=(sweep_id, stop_event),
+                         name=f'Sweep-{sweep_id}', daemon=True).start()
+        return True
+
+    def stop_sweep(self, sweep_id: int) -> bool:
+        """
+        停止超参数搜索（训练中的组合在下一批次停止，可再次启动继续）
+
+        Args:
+            sweep_id: 搜索ID
+
+        Returns:
+            bool: 是否已发送停止请求
+        """
+        with self._lock:
+            stop_event = self._runners.get(sweep_id)
+            services = list(self._services.get(sweep_id, {}).values())
+        if stop_event is None:
+            return False
+        stop_event.set()
+        for service in services:
+            service.stop_training(immediate=True)
+        training_logger.info(f"超参数搜索停止请求已发送: id={sweep_id}")
+        return True
+
+    def is_running(self, sweep_id: int) -> bool:
+        """搜索是否正在本进程中运行"""
+        with self._lock:
+            return sweep_id in self._runners
+
+    def delete_sweep(self, sweep_id: int) -> bool:
+        """
+        删除未在运行的搜索及其组合记录（训练日志保留）
+
+        Args:
+            sweep_id: 搜索ID
+
+        Returns:
+            bool: 是否删除成功
+        """
+        if self.is_running(sweep_id):
+            return False
+        try:
+            db_service.execute_query("DELETE FROM sweep_trials WHERE sweep_id = %s", (sweep_id,), fetch=False)
+            db_service.execute_query("DELETE FROM training_sweeps WHERE id = %s", (sweep_id,), fetch=False)
+            return True
+        except Exception as e:
+            training_logger.error(f"删除超参数搜索失败: {str(e)}")
+            return False
+
+    def get_sweeps(self, user_id: int = None, limit: int = 50) -> List[Dict]:
+        """
+        获取超参数搜索列表
+
+        Args:
+            user_id: 用户ID（为空时返回全部）
+            limit: 返回数量限制
+
+        Returns:
+            List[Dict]: 搜索列表（search_space/settings 已解析，active 表示正在本进程中运行）
+        """
+        try:
+            if user_id:
+                sweeps = db_service.execute_query(
+                    "SELECT * FROM training_sweeps WHERE user_id = %s ORDER BY id DESC LIMIT %s",
+                    (user_id, limit)
+                )
+            else:
+                sweeps = db_service.execute_query(
+                    "SELECT * FROM training_sweeps ORDER BY id DESC LIMIT %s", (limit,)
+                )
+            for sweep in sweeps or []:
+                sweep['search_space'] = json.loads(sweep['search_space'])
+                sweep['settings'] = json.loads(sweep['settings'])
+                sweep['active'] = self.is_running(sweep['id'])
+            return sweeps or []
+        except Exception as e:
+            training_logger.error(f"获取超参数搜索失败: {str(e)}")
+            return []
+
+    def get_trials(self, sweep_id: int) -> List[Dict]:
+        """
+        获取搜索的全部组合
+
+        Args:
+            sweep_id: 搜索ID
+
+        Returns:
+            List[Dict]: 按组合编号排序，params/rung_maps/training_log_ids 已解析；
+                训练中的组合附带 progress（最近一次进度事件）
+        """
+        try:
+            trials = db_service.execute_query(
+                "SELECT * FROM sweep_trials WHERE sweep_id = %s ORDER BY trial_no", (sweep_id,)
+            ) or []
+            for trial in trials:
+                self._parse_trial(trial)
+                trial['progress'] = self._progress.get(trial['id']) if trial['status'] == 'running' else None
+            return trials
+        except Exception as e:
+            training_logger.error(f"获取超参数搜索组合失败: {str(e)}")
+            return []
+
+    @staticmethod
+    def _parse_trial(trial: Dict) -> Dict:
+        trial['params'] = json.loads(trial['params'])
+        trial['rung_maps'] = json.loads(trial['rung_maps']) if trial['rung_maps'] else []
+        trial['training_log_ids'] = json.loads(trial['training_log_ids']) if trial['training_log_ids'] else []
+        return trial
+
+    def register_best(self, sweep_id: int, model_name: str = None, version: str = None,
+                      author: str = None) -> Dict:
+        """
+        把最优组合的权重注册到模型管理器
+
+        Args:
+            sweep_id: 搜索ID
+            model_name: 模型名称（默认为搜索名称）
+            version: 版本号（默认为 sweep<搜索ID>-t<组合编号>）
+            author: 作者
+
+        Returns:
+            Dict: {'success', 'model_name', 'version'} 或 {'success': False, 'error'}
+        """
+        try:
+            rows = db_service.execute_query("SELECT * FROM training_sweeps WHERE id = %s", (sweep_id,))
+            if not rows:
+                return {'success': False, 'error': '超参数搜索不存在'}
+            sweep = rows[0]
+            best = self._best_trial(self.get_trials(sweep_id))
+            if best is None or not best['weights_path']:
+                return {'success': False, 'error': '没有完成训练的组合'}
+
+            model_name = model_name or sweep['name']
+            version = version or f"sweep{sweep_id}-t{best['trial_no']}"
+            params = ', '.join(f'{key}={value}' for key, value in best['params'].items())
+            description = (f"超参数搜索 #{sweep_id} 最优组合 #{best['trial_no']}（{params}），"
+                           f"训练 {best['epochs_done']} 轮，mAP50-95 {best['rung_maps'][-1]:.4f}")
+
+            from .training_service import training_service
+            if not training_service.save_trained_model(
+                weights_path=best['weights_path'],
+                model_name=model_name,
+                version=version,
+                classes=self._dataset_classes(sweep['data_yaml']),
+                description=description,
+                author=author
+            ):
+                return {'success': False, 'error': '保存模型到模型管理器失败'}
+
+            db_service.execute_query(
+                "UPDATE training_sweeps SET registered_model = %s WHERE id = %s",
+                (f'{model_name} v{version}', sweep_id),
+                fetch=False
+            )
+            return {'success': True, 'model_name': model_name, 'version': version}
+        except Exception as e:
+            training_logger.error(f"注册最优模型失败: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    @staticmethod
+    def _dataset_classes(data_yaml: str) -> Optional[list]:
+        """读取数据集配置中的类别名称"""
+        try:
+            with open(data_yaml, 'r', encoding='utf-8') as f:
+                names = (yaml.safe_load(f) or {}).get('names')
+            return list(names.values()) if isinstance(names, dict) else names
+        except (OSError, yaml.YAMLError):
+            return None
+
+    @staticmethod
+    def _best_trial(trials: List[Dict]) -> Optional[Dict]:
+        """训练级别最高的组合中 mAP 最高的一个"""
+        finished = [trial for trial in trials if trial['rung_maps']]
+        if not finished:
+            return None
+        return max(finished, key=lambda trial: (len(trial['rung_maps']), trial['rung_maps'][-1]))
+
+    # ---- 调度 ----
+
+    def _run(self, sweep_id: int, stop_event: threading.Event):
+        """搜索调度线程"""
+        try:
+            sweep = db_service.execute_query("SELECT * FROM training_sweeps WHERE id = %s", (sweep_id,))[0]
+            settings = json.loads(sweep['settings'])
+            budgets = rung_budgets(settings['min_epochs'], settings['max_epochs'], settings['reduction_factor'])
+            parallel = settings['parallel'] if config.TRAINING_WORKER_CONFIG['enabled'] else 1
+
+            # 上次中断时训练中的组合：已完成过某一级的回到等待晋级，否则重新开始
+            db_service.execute_query(
+                """UPDATE sweep_trials SET status = CASE WHEN rung >= 0 THEN 'waiting' ELSE 'pending' END
+                WHERE sweep_id = %s AND status IN ('running', 'stopped')""",
+                (sweep_id,),
+                fetch=False
+            )
+            db_service.execute_query(
+                "UPDATE training_sweeps SET status = %s, error = NULL, finished_at = NULL WHERE id = %s",
+                ('running', sweep_id),
+                fetch=False
+            )
+            training_logger.info(f"超参数搜索开始: id={sweep_id}, 各级轮数 {budgets}, 并行 {parallel}")
+
+            slot_cores = split_cores(default_cpu_cores() or get_available_cores(), parallel)
+            free_slots = list(range(parallel))
+            finished = queue.Queue()
+            running = 0
+
+            while not stop_event.is_set():
+                trials = [self._parse_trial(trial) for trial in db_service.execute_query(
+                    "SELECT * FROM sweep_trials WHERE sweep_id = %s ORDER BY trial_no", (sweep_id,)
+                ) or []]
+                while free_slots and not stop_event.is_set():
+                    job = next_trial(trials, budgets, settings['reduction_factor'])
+                    if job is None:
+                        break
+                    trial, rung = job
+                    trial['status'] = 'running'
+                    slot = free_slots.pop()
+                    running += 1
+                    db_service.execute_query(
+                        "UPDATE sweep_trials SET status = %s, error = NULL WHERE id = %s",
+                        ('running', trial['id']),
+                        fetch=False
+                    )
+                    threading.Thread(
+                        target=self._run_trial,
+                        args=(sweep, trial, rung, budgets, slot_cores[slot], slot, stop_event, finished),
+                        name=f"Sweep-{sweep_id}-Trial-{trial['trial_no']}", daemon=True
+                    ).start()
+                if not running:
+                    break
+                free_slots.append(finished.get())
+                running -= 1
+
+            # 停止时等待训练中的组合结束
+            for _ in range(running):
+                finished.get()
+            self._finish(sweep_id, stop_event.is_set())
+        except Exception as e:
+            training_logger.error(f"超参数搜索失败: {str(e)}")
+            db_service.execute_query(
+                "UPDATE training_sweeps SET status = %s, error = %s, finished_at = %s WHERE id = %s",
+                ('failed', str(e), datetime.now(), sweep_id),
+                fetch=False
+            )
+        finally:
+            with self._lock:
+                self._runners.pop(sweep_id, None)
+                self._services.pop(sweep_id, None)
+
+    def _run_trial(self, sweep: Dict, trial: Dict, rung: int, budgets: List[int],
+                   cpu_cores: Optional[List[int]], slot: int, stop_event: threading.Event,
+                   finished: queue.Queue):
+        """
+        训练一个组合的一级（从上一级的权重继续训练）
+
+        继续训练的级别是以上一级 last.pt 为初始权重的新训练（不是 resume）：优化器动量重置，
+        学习率按本级轮数重新从 lr0 衰减（相当于热重启），因此不再预热；只有第一级按 warmup_epochs 预热。
+        """
+        trial_id = trial['id']
+        epochs = budgets[rung] - (budgets[rung - 1] if rung else 0)
+        warmup = json.loads(sweep['settings']).get('warmup_epochs', config.SWEEP_CONFIG['warmup_epochs'])
+        if rung:
+            last = Path(trial['weights_path']).with_name('last.pt')
+            base_model = str(last if last.exists() else trial['weights_path'])
+        else:
+            base_model = sweep['base_model']
+        params = trial['params']
+        train_args = dict(
+            data_yaml=sweep['data_yaml'],
+            epochs=epochs,
+            batch_size=params.get('batch_size'),
+            img_size=params.get('img_size'),
+            lr=params.get('lr'),
+            project_name=f"sweep{sweep['id']}_trial{trial['trial_no']}_r{rung}",
+            user_id=sweep['user_id'],
+            progress_callback=lambda event: self._progress.__setitem__(trial_id, dict(event, rung=rung)),
+            extra_args={'warmup_epochs': warmup if rung == 0 else 0}
+        )
+
+        service = TrainingService()
+        with self._lock:
+            self._services[sweep['id']][trial_id] = service
+        try:
+            training_logger.info(f"超参数搜索 #{sweep['id']} 组合 #{trial['trial_no']} 第 {rung + 1} 级: "
+                                 f"{params}, 训练 {epochs} 轮")
+            if stop_event.is_set():
+                result = {'success': False, 'stopped': True}
+            elif config.TRAINING_WORKER_CONFIG['enabled']:
+                result = service.start_training_process(base_model=base_model, cpu_cores=cpu_cores, **train_args)
+            elif not service.prepare_training(base_model):
+                result = {'success': False, 'error': '模型准备失败'}
+            else:
+                result = service.start_training(**train_args)
+
+            if result['success']:
+                log_ids = trial['training_log_ids'] + [result.get('log_id')]
+                db_service.execute_query(
+                    """UPDATE sweep_trials SET status = %s, rung = %s, epochs_done = %s, rung_maps = %s,
+                    training_log_ids = %s, weights_path = %s WHERE id = %s""",
+                    ('completed' if rung == len(budgets) - 1 else 'waiting', rung, budgets[rung],
+                     json.dumps(trial['rung_maps'] + [result['final_map']]), json.dumps(log_ids),
+                     result['weights_path'], trial_id),
+                    fetch=False
+                )
+                training_logger.info(f"组合 #{trial['trial_no']} 第 {rung + 1} 级完成, mAP50-95 {result['final_map']:.4f}")
+            else:
+                stopped = result.get('stopped') or stop_event.is_set()
+                db_service.execute_query(
+                    "UPDATE sweep_trials SET status = %s, error = %s WHERE id = %s",
+                    ('stopped' if stopped else 'failed', result.get('error'), trial_id),
+                    fetch=False
+                )
+        except Exception as e:
+            training_logger.error(f"超参数搜索组合训练失败: {str(e)}")
+            db_service.execute_query(
+                "UPDATE sweep_trials SET status = %s, error = %s WHERE id = %s",
+                ('failed', str(e), trial_id),
+                fetch=False
+            )
+        finally:
+            with self._lock:
+                self._services.get(sweep['id'], {}).pop(trial_id, None)
+            self._progress.pop(trial_id, None)
+            finished.put(slot)
+
+    def _finish(self, sweep_id: int, stopped: bool):
+        """记录搜索结果，完成时淘汰未晋级的组合并注册最优权重"""
+        if not stopped:
+            db_service.execute_query(
+                "UPDATE sweep_trials SET status = %s WHERE sweep_id = %s AND status = %s",
+                ('pruned', sweep_id, 'waiting'),
+                fetch=False
+            )
+        trials = self.get_trials(sweep_id)
+        best = self._best_trial(trials)
+        if stopped:
+            status = 'stopped'
+        else:
+            status = 'completed' if best else 'failed'
+        db_service.execute_query(
+            """UPDATE training_sweeps SET status = %s, best_trial_id = %s, best_map = %s, finished_at = %s
+            WHERE id = %s""",
+            (status, best['id'] if best else None, best['rung_maps'][-1] if best else None,
+             datetime.now(), sweep_id),
+            fetch=False
+        )
+
+        epochs = sum(trial['epochs_done'] for trial in trials)
+        training_logger.info(f"超参数搜索结束: id={sweep_id}, 状态={status}, 共训练 {epochs} 轮"
+                             + (f", 最优组合 #{best['trial_no']} mAP50-95 {best['rung_maps'][-1]:.4f}" if best else ''))
+        if status == 'completed' and config.SWEEP_CONFIG['auto_register']:
+            result = self.register_best(sweep_id)
+            if not result['success']:
+                training_logger.warning(f"自动注册最优模型失败: {result['error']}")
+
+
+# 全局超参数搜索服务实例
+sweep_service = LazyProxy(SweepService, 'sweep_service')
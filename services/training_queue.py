@@ -0,0 +1,528 @@
+"""
+训练任务队列
+训练任务连同完整配置保存在 training_jobs 表中，后台调度线程按优先级依次执行，
+可配置同时运行的任务数（每个槽位绑定互不重叠的 CPU 核心，界面直接启动的训练也占用一个槽位）；
+应用重启后未完成的任务继续排队（有检查点时从检查点继续）
+"""
+import atexit
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Dict, List
+from .database import db_service
+from .training_service import TrainingService
+from .training_worker import default_cpu_cores, get_available_cores, split_cores
+from utils import training_logger, LazyProxy
+import config
+
+# 任务状态 -> 显示文本
+JOB_STATUSES = {
+    'queued': '排队中',
+    'running': '运行中',
+    'completed': '已完成',
+    'stopped': '已停止',
+    'failed': '失败',
+    'cancelled': '已取消'
+}
+
+# 任务配置字段（submit_job 的 job_config）
+JOB_CONFIG_KEYS = ['base_model', 'data_yaml', 'epochs', 'batch_size', 'img_size', 'lr', 'project_name']
+
+
+class TrainingQueue:
+    """
+    训练任务队列类
+
+    调度线程每隔 poll_interval 秒：刷新本进程运行中任务的心跳，把心跳超时的任务
+    （所在进程已退出）重新排队，然后在空闲槽位上认领排队任务。认领使用条件 UPDATE，
+    多个进程同时调度也不会重复执行同一任务。每个运行中的任务使用独立的 TrainingService。
+    """
+
+    def __init__(self):
+        """初始化训练任务队列"""
+        queue_config = config.TRAINING_QUEUE_CONFIG
+        self.max_concurrent = queue_config['max_concurrent']
+        self.poll_interval = queue_config['poll_interval']
+        self.heartbeat_timeout = queue_config['heartbeat_timeout']
+        self.eta_history = queue_config['eta_history']
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._lock = threading.Lock()
+        self._running: Dict[int, TrainingService] = {}  # 任务ID -> 执行该任务的训练服务
+        self._slots: List[Optional[object]] = [None] * self.max_concurrent  # 槽位 -> 占用者（任务ID 或其他训练）
+        self._slot_cores: Optional[List[Optional[List[int]]]] = None  # 槽位 -> 绑定的 CPU 核心
+        self._cancel_requested = set()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---- 任务管理 ----
+
+    def submit_job(self, user_id: int, name: str, job_config: Dict, priority: int = 0) -> Dict:
+        """
+        提交训练任务
+
+        Args:
+            user_id: 用户ID
+            name: 任务名称
+            job_config: 训练配置（base_model, data_yaml, epochs, batch_size, img_size, lr, project_name）
+            priority: 优先级，数值大的先执行
+
+        Returns:
+            Dict: {'success', 'job_id'} 或 {'success': False, 'error'}
+        """
+        try:
+            missing = [key for key in ('base_model', 'data_yaml') if not job_config.get(key)]
+            if missing:
+                return {'success': False, 'error': f"缺少训练配置: {', '.join(missing)}"}
+            job_config = {key: job_config.get(key) for key in JOB_CONFIG_KEYS}
+            job_config['project_name'] = job_config['project_name'] or name
+
+            job_id = db_service.execute_query(
+                "INSERT INTO training_jobs (user_id, name, config, priority, status) VALUES (%s, %s, %s, %s, %s)",
+                (user_id, name, json.dumps(job_config, ensure_ascii=False), priority, 'queued'),
+                fetch=False
+            )
+            training_logger.info(f"训练任务已加入队列: id={job_id}, name={name}")
+            self._wake.set()
+            return {'success': True, 'job_id': job_id}
+        except Exception as e:
+            training_logger.error(f"提交训练任务失败: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    def cancel_job(self, job_id: int) -> bool:
+        """
+        取消排队中的任务，或停止本进程运行中的任务（本轮结束后停止，保留检查点）
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            bool: 是否已取消或已发送停止请求
+        """
+        try:
+            with self._lock:
+                service = self._running.get(job_id)
+                if service is not None:
+                    self._cancel_requested.add(job_id)
+            if service is not None:
+                service.stop_training()
+                training_logger.info(f"训练任务停止请求已发送: id={job_id}")
+                return True
+
+            updated = self._update_where(
+                "UPDATE training_jobs SET status = %s, finished_at = %s WHERE id = %s AND status = %s",
+                ('cancelled', datetime.now(), job_id, 'queued')
+            )
+            if updated:
+                training_logger.info(f"训练任务已取消: id={job_id}")
+            return bool(updated)
+        except Exception as e:
+            training_logger.error(f"取消训练任务失败: {str(e)}")
+            return False
+
+    def requeue_job(self, job_id: int) -> bool:
+        """
+        重新排队已停止/失败/取消的任务（已有检查点时从检查点继续）
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            bool: 是否重新排队
+        """
+        try:
+            updated = self._update_where(
+                """UPDATE training_jobs SET status = %s, error = NULL, finished_at = NULL
+                WHERE id = %s AND status IN ('stopped', 'failed', 'cancelled')""",
+                ('queued', job_id)
+            )
+            if updated:
+                self._wake.set()
+            return bool(updated)
+        except Exception as e:
+            training_logger.error(f"重新排队训练任务失败: {str(e)}")
+            return False
+
+    def delete_job(self, job_id: int) -> bool:
+        """
+        删除未在运行的任务记录（训练日志保留）
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            bool: 是否删除成功
+        """
+        try:
+            return bool(self._update_where(
+                "DELETE FROM training_jobs WHERE id = %s AND status <> %s",
+                (job_id, 'running')
+            ))
+        except Exception as e:
+            training_logger.error(f"删除训练任务失败: {str(e)}")
+            return False
+
+    def get_jobs(self, user_id: int = None, include_finished: bool = True, limit: int = 100) -> List[Dict]:
+        """
+        获取任务列表，附带排队位置和预计时间
+
+        排队任务按调度顺序模拟分配到 max_concurrent 个槽位上：运行中任务按其剩余时间占用槽位，
+        排队任务的耗时按最近训练的平均每轮耗时 × 轮数估算。
+
+        Args:
+            user_id: 用户ID（为空时返回全部用户的任务）
+            include_finished: 是否包含已结束的任务
+            limit: 返回数量限制
+
+        Returns:
+            List[Dict]: 任务列表（运行中、排队中在前），额外字段：
+                config（已解析）、position（排队位置，从1开始）、
+                eta_start / eta_finish（距现在的预计开始/完成秒数，无法估算时为 None）
+        """
+        try:
+            # 排队位置和预计时间依赖全部用户的未结束任务
+            active = db_service.execute_query(
+                """SELECT id, user_id, name, config, priority, status, training_log_id, progress,
+                eta_seconds, result, error, worker, created_at, started_at, finished_at
+                FROM training_jobs WHERE status IN ('running', 'queued')
+                ORDER BY priority DESC, id"""
+            ) or []
+            self._estimate(active)
+            jobs = [job for job in active if user_id is None or job['user_id'] == user_id]
+            jobs.sort(key=lambda job: job['status'] != 'running')
+
+            if include_finished and len(jobs) < limit:
+                where, params = "status NOT IN ('running', 'queued')", []
+                if user_id is not None:
+                    where += " AND user_id = %s"
+                    params.append(user_id)
+                finished = db_service.execute_query(
+                    f"""SELECT id, user_id, name, config, priority, status, training_log_id, progress,
+                    eta_seconds, result, error, worker, created_at, started_at, finished_at
+                    FROM training_jobs WHERE {where} ORDER BY id DESC LIMIT %s""",
+                    tuple(params) + (limit - len(jobs),)
+                ) or []
+                for job in finished:
+                    job.update({'position': None, 'eta_start': None, 'eta_finish': None})
+                jobs.extend(finished)
+
+            for job in jobs:
+                job['config'] = json.loads(job['config']) if job['config'] else {}
+                job['result'] = json.loads(job['result']) if job['result'] else None
+            return jobs[:limit]
+        except Exception as e:
+            training_logger.error(f"获取训练任务失败: {str(e)}")
+            return []
+
+    def _average_epoch_time(self) -> Optional[float]:
+        """最近训练的平均每轮耗时（秒）"""
+        rows = db_service.execute_query(
+            "SELECT epoch_time FROM training_metrics WHERE epoch_time IS NOT NULL ORDER BY id DESC LIMIT %s",
+            (self.eta_history,)
+        ) or []
+        if not rows:
+            return None
+        return sum(row['epoch_time'] for row in rows) / len(rows)
+
+    def _estimate(self, active: List[Dict]):
+        """为运行中/排队任务计算排队位置和预计开始/完成时间（原地修改）"""
+        epoch_time = None
+        if any(job['status'] == 'queued' for job in active):
+            epoch_time = self._average_epoch_time()
+
+        # 每个槽位空闲的时间点（距现在秒数），None 表示无法估算
+        slots = []
+        for job in active:
+            if job['status'] == 'running':
+                job.update({'position': None, 'eta_start': 0.0, 'eta_finish': job['eta_seconds']})
+                slots.append(job['eta_seconds'])
+        slots.extend([0.0] * max(self.max_concurrent - len(slots), 0))
+
+        position = 0
+        for job in active:
+            if job['status'] != 'queued':
+                continue
+            position += 1
+            job['position'] = position
+            known = [t for t in slots if t is not None]
+            if not known:
+                job['eta_start'] = job['eta_finish'] = None
+                continue
+            start = min(known)
+            slots.remove(start)
+            epochs = json.loads(job['config']).get('epochs') or config.TRAINING_CONFIG['epochs']
+            finish = start + epochs * epoch_time if epoch_time else None
+            job['eta_start'], job['eta_finish'] = start, finish
+            slots.append(finish)
+
+    # ---- 调度 ----
+
+    def start(self):
+        """启动后台调度线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        if self._thread is None:
+            # 在数据库连接池关闭之前停止调度（atexit 后注册先执行）
+            atexit.register(self.stop)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='TrainingScheduler', daemon=True)
+        self._thread.start()
+        training_logger.info(f"训练任务调度已启动，并发数 {self.max_concurrent}")
+
+    def stop(self, timeout: float = 5.0):
+        """停止调度线程（不影响运行中的训练）"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._heartbeat()
+                self._recover_stale()
+                self._dispatch()
+            except Exception as e:
+                training_logger.error(f"训练任务调度失败: {str(e)}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _update_where(self, query: str, params: tuple) -> int:
+        """执行 UPDATE/DELETE 并返回影响行数"""
+        with db_service.get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(db_service.backend.translate(query), params)
+                conn.commit()
+                return cursor.rowcount
+            finally:
+                cursor.close()
+
+    # ---- CPU 槽位 ----
+
+    def _acquire_slot(self, owner) -> Optional[int]:
+        """占用一个空闲槽位（调用方持有 self._lock），没有空闲槽位时返回 None"""
+        for slot, current in enumerate(self._slots):
+            if current is None:
+                self._slots[slot] = owner
+                return slot
+        return None
+
+    def get_slot_cores(self, slot: Optional[int]) -> Optional[List[int]]:
+        """
+        槽位绑定的 CPU 核心（训练进程可用的核心平均分给各槽位，互不重叠）
+
+        Args:
+            slot: 槽位编号（None 时返回默认核心）
+
+        Returns:
+            Optional[List[int]]: 核心编号列表，None 为不指定（使用 TRAINING_WORKER_CONFIG 默认）
+        """
+        if slot is None:
+            return None
+        if self._slot_cores is None:
+            self._slot_cores = split_cores(default_cpu_cores() or get_available_cores(), self.max_concurrent)
+        return self._slot_cores[slot]
+
+    def reserve_slot(self, owner: str) -> Optional[int]:
+        """
+        为队列外的训练（训练窗口直接启动、继续训练）占用一个槽位，占用期间队列少启动一个任务
+
+        Args:
+            owner: 占用者说明（用于日志）
+
+        Returns:
+            Optional[int]: 槽位编号；槽位已满时返回 None（训练仍可进行，但会与队列任务争用 CPU）
+        """
+        with self._lock:
+            slot = self._acquire_slot(owner)
+        if slot is None:
+            training_logger.warning(f"训练槽位已满（{self.max_concurrent} 个），{owner} 将与队列中的训练争用 CPU")
+        return slot
+
+    def release_slot(self, slot: Optional[int]):
+        """释放 reserve_slot 占用的槽位"""
+        if slot is None:
+            return
+        with self._lock:
+            self._slots[slot] = None
+        self._wake.set()
+
+    def _heartbeat(self):
+        with self._lock:
+            job_ids = list(self._running)
+        if job_ids:
+            db_service.execute_query(
+                f"UPDATE training_jobs SET heartbeat_at = %s WHERE id IN ({', '.join(['%s'] * len(job_ids))})",
+                (datetime.now(), *job_ids),
+                fetch=False
+            )
+
+    def _recover_stale(self):
+        """心跳超时的运行中任务（所在进程已退出）重新排队"""
+        cutoff = datetime.now() - timedelta(seconds=self.heartbeat_timeout)
+        count = self._update_where(
+            """UPDATE training_jobs SET status = %s, worker = NULL
+            WHERE status = %s AND (heartbeat_at IS NULL OR heartbeat_at < %s)""",
+            ('queued', 'running', cutoff)
+        )
+        if count:
+            training_logger.warning(f"{count} 个训练任务的执行进程已退出，已重新排队")
+
+    def _dispatch(self):
+        """在空闲槽位上认领并启动排队任务"""
+        while not self._stop.is_set():
+            # 先占用槽位再认领，避免认领后槽位被界面启动的训练占用
+            with self._lock:
+                slot = self._acquire_slot('dispatch')
+            if slot is None:
+                return
+            try:
+                rows = db_service.execute_query(
+                    "SELECT * FROM training_jobs WHERE status = %s ORDER BY priority DESC, id LIMIT 1",
+                    ('queued',)
+                )
+                job = rows[0] if rows else None
+                now = datetime.now()
+                claimed = job is not None and self._update_where(
+                    """UPDATE training_jobs SET status = %s, worker = %s, heartbeat_at = %s,
+                    started_at = COALESCE(started_at, %s)
+                    WHERE id = %s AND status = %s""",
+                    ('running', self.worker_id, now, now, job['id'], 'queued')
+                )
+            except Exception:
+                with self._lock:
+                    self._slots[slot] = None
+                raise
+            if not claimed:
+                with self._lock:
+                    self._slots[slot] = None
+                if job is None:
+                    return
+                # 被其他进程抢先认领
+                continue
+
+            service = TrainingService()
+            with self._lock:
+                self._slots[slot] = job['id']
+                self._running[job['id']] = service
+            threading.Thread(target=self._execute, args=(job, service, slot),
+                             name=f"TrainingJob-{job['id']}", daemon=True).start()
+
+    def _execute(self, job: Dict, service: TrainingService, slot: int):
+        """在工作线程中执行一个任务（训练进程绑定槽位的 CPU 核心）"""
+        job_id = job['id']
+        job_config = json.loads(job['config'])
+        last_update = [0.0]
+
+        def on_progress(event: Dict):
+            if job_id in self._cancel_requested and not service.should_stop:
+                service.stop_training()
+            now = time.monotonic()
+            if event['type'] == 'batch' and now - last_update[0] < self.poll_interval:
+                return
+            last_update[0] = now
+            done = event['epoch'] - 1 + (event['batch'] / max(event['batches'], 1) if event['type'] == 'batch' else 1)
+            try:
+                db_service.execute_query(
+                    "UPDATE training_jobs SET progress = %s, eta_seconds = %s, training_log_id = %s WHERE id = %s",
+                    (round(done / max(event['epochs'], 1), 4), event.get('eta'), service.current_log_id, job_id),
+                    fetch=False
+                )
+            except Exception as e:
+                training_logger.warning(f"更新训练任务进度失败: {str(e)}")
+
+        try:
+            training_logger.info(f"开始执行训练任务: id={job_id}, name={job['name']}")
+            checkpoint = None
+            if job['training_log_id']:
+                logs = db_service.execute_query(
+                    "SELECT save_dir FROM training_logs WHERE id = %s", (job['training_log_id'],)
+                )
+                checkpoint = TrainingService.get_checkpoint(logs[0]) if logs else None
+                if not checkpoint:
+                    # 第一轮未完成就中断，没有检查点，重新开始训练（新建训练日志）
+                    db_service.execute_query(
+                        "UPDATE training_logs SET status = %s, end_time = NOW() WHERE id = %s AND status = %s",
+                        ('failed', job['training_log_id'], 'running'),
+                        fetch=False
+                    )
+
+            isolated = config.TRAINING_WORKER_CONFIG['enabled']
+            cpu_cores = self.get_slot_cores(slot)
+            if checkpoint:
+                # 之前停止或执行进程退出的任务，从检查点继续
+                if isolated:
+                    result = service.resume_training_process(job['training_log_id'], progress_callback=on_progress,
+                                                             cpu_cores=cpu_cores)
+                else:
+                    result = service.resume_training(job['training_log_id'], progress_callback=on_progress)
+            elif isolated:
+                result = service.start_training_process(
+                    base_model=job_config['base_model'],
+                    data_yaml=job_config['data_yaml'],
+                    epochs=job_config.get('epochs'),
+                    batch_size=job_config.get('batch_size'),
+                    img_size=job_config.get('img_size'),
+                    lr=job_config.get('lr'),
+                    project_name=job_config.get('project_name') or job['name'],
+                    user_id=job['user_id'],
+                    progress_callback=on_progress,
+                    cpu_cores=cpu_cores
+                )
+            elif not service.prepare_training(job_config['base_model']):
+                result = {'success': False, 'error': '模型准备失败'}
+            else:
+                result = service.start_training(
+                    data_yaml=job_config['data_yaml'],
+                    epochs=job_config.get('epochs'),
+                    batch_size=job_config.get('batch_size'),
+                    img_size=job_config.get('img_size'),
+                    lr=job_config.get('lr'),
+                    project_name=job_config.get('project_name') or job['name'],
+                    user_id=job['user_id'],
+                    progress_callback=on_progress
+                )
+            self._finish(job_id, service, result)
+        except Exception as e:
+            training_logger.error(f"训练任务执行失败: {str(e)}")
+            self._finish(job_id, service, {'success': False, 'error': str(e)})
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+                self._slots[slot] = None
+                self._cancel_requested.discard(job_id)
+            self._wake.set()
+
+    def _finish(self, job_id: int, service: TrainingService, result: Dict):
+        """记录任务结果"""
+        error = None
+        if result['success']:
+            status = 'completed'
+            summary = {'final_map': result.get('final_map'), 'weights_path': result.get('weights_path')}
+        elif result.get('stopped'):
+            status = 'stopped'
+            summary = {'epochs_done': result.get('epochs_done'), 'checkpoint': result.get('checkpoint')}
+        else:
+            status = 'failed'
+            summary = None
+            error = result.get('error')
+
+        db_service.execute_query(
+            """UPDATE training_jobs SET status = %s, progress = CASE WHEN %s THEN 1 ELSE progress END,
+            eta_seconds = NULL, result = %s, error = %s, training_log_id = COALESCE(%s, training_log_id),
+            worker = NULL, finished_at = %s
+            WHERE id = %s""",
+            (status, status == 'completed', json.dumps(summary, ensure_ascii=False) if summary else None,
+             error, service.current_log_id, datetime.now(), job_id),
+            fetch=False
+        )
+        training_logger.info(f"训练任务结束: id={job_id}, 状态={status}")
+
+
+# 全局训练任务队列实例
+training_queue = LazyProxy(TrainingQueue, 'training_queue')
@@ -5,19 +5,32 @@
 from pathlib import Path
 from typing import Optional, Dict, Callable
 import yaml
-from ultralytics import YOLO
 from .database import db_service
-from utils import training_logger
+from .training_telemetry import TrainingTelemetry, get_training_metrics
+from utils import training_logger, LazyProxy
 import config
 
+
+class TrainingStopped(Exception):
+    """训练被用户停止（由训练回调抛出以中断 ultralytics 训练循环）"""
+
+    def __init__(self, epochs_done: int):
+        super().__init__(f"训练已停止，已完成 {epochs_done} 轮")
+        self.epochs_done = epochs_done
+
+
 class TrainingService:
     """训练服务类"""
     
     def __init__(self):
         """初始化训练服务"""
-        self.model: Optional[YOLO] = None
+        self.model = None  # ultralytics.YOLO，准备训练时才导入 ultralytics
         self.is_training = False
         self.should_stop = False
+        self.stop_immediately = False
+        self.current_log_id = None  # 当前训练的训练日志ID
+        self.worker = None  # 在子进程中训练时的 TrainingWorker
+        self.last_label_report = None  # 最近一次标注检查结果
     
     def prepare_training(self, base_model: str = None) -> bool:
         """
@@ -54,6 +67,7 @@ class TrainingService:
                     training_logger.info(f"本地不存在模型，尝试下载: {base_model}")
                     model_path = base_model
             
+            from ultralytics import YOLO
             self.model = YOLO(str(model_path))
             training_logger.info(f"训练模型准备完成: {model_path}")
             return True
@@ -62,7 +76,7 @@ class TrainingService:
             return False
     
     def create_dataset_yaml(self, dataset_path: str, class_names: list, 
-                           train_path: str, val_path: str) -> str:
+                           train_path: str, val_path: str, dry_run: bool = None) -> str:
         """
         创建数据集配置文件
         
@@ -71,6 +85,7 @@ class TrainingService:
             class_names: 类别名称列表
             train_path: 训练集路径（相对于dataset_path）
             val_path: 验证集路径（相对于dataset_path）
+            dry_run: 标注检查只生成报告，不删除无效标注（默认见 LABEL_SANITIZE_CONFIG）
             
         Returns:
             str: YAML文件路径
@@ -96,7 +111,7 @@ class TrainingService:
             raise FileNotFoundError(f"验证集图片目录不存在: {val_images_dir}")
         
         # 清理标注文件中超出范围的类别索引
-        self._clean_labels(str(dataset_path), len(class_names) - 1)
+        self._clean_labels(str(dataset_path), len(class_names) - 1, dry_run=dry_run)
         
         # 使用绝对路径创建YAML配置
         yaml_content = {
@@ -118,63 +133,21 @@ class TrainingService:
         training_logger.info(f"类别数量: {len(class_names)}, 类别: {class_names}")
         return str(yaml_path)
     
-    def _clean_labels(self, dataset_path: str, max_class_id: int):
+    def _clean_labels(self, dataset_path: str, max_class_id: int, dry_run: bool = None) -> Dict:
         """
-        清理标注文件中超出范围的类别索引
+        清理标注文件中超出范围的类别索引（只检查新增或变化的文件，见 label_sanitizer）
         
         Args:
             dataset_path: 数据集路径
             max_class_id: 最大允许的类别索引
+            dry_run: 只检查并生成报告，不修改文件（默认见 LABEL_SANITIZE_CONFIG）
+            
+        Returns:
+            Dict: 检查结果
         """
-        labels_dir = Path(dataset_path) / 'labels'
-        if not labels_dir.exists():
-            training_logger.warning(f"标注目录不存在: {labels_dir}")
-            return
-        
-        cleaned_count = 0
-        removed_count = 0
-        
-        for label_file in labels_dir.rglob('*.txt'):
-            try:
-                with open(label_file, 'r') as f:
-                    lines = f.readlines()
-                
-                cleaned_lines = []
-                for line in lines:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    parts = line.split()
-                    if len(parts) < 5:
-                        continue
-                    
-                    try:
-                        class_id = int(parts[0])
-                        # 只保留合法范围内的标注
-                        if 0 <= class_id <= max_class_id:
-                            cleaned_lines.append(line)
-                        else:
-                            removed_count += 1
-                            training_logger.debug(f"移除无效标注: {label_file.name} - class_id={class_id}")
-                    except ValueError:
-                        continue
-                
-                # 写回清理后的内容
-                if len(cleaned_lines) != len([l for l in lines if l.strip()]):
-                    with open(label_file, 'w') as f:
-                        f.write('\n'.join(cleaned_lines))
-                        if cleaned_lines:
-                            f.write('\n')
-                    cleaned_count += 1
-                    
-            except Exception as e:
-                training_logger.warning(f"处理标注文件失败 {label_file}: {str(e)}")
-        
-        if cleaned_count > 0:
-            training_logger.info(f"清理了 {cleaned_count} 个标注文件，移除了 {removed_count} 个无效标注")
-        else:
-            training_logger.info("所有标注文件均合法")
+        from .label_sanitizer import label_sanitizer
+        self.last_label_report = label_sanitizer.sanitize(dataset_path, max_class_id, dry_run=dry_run)
+        return self.last_label_report
     
     def start_training(self, 
                       data_yaml: str,
@@ -184,7 +157,9 @@ class TrainingService:
                       lr: float = None,
                       project_name: str = 'underwater_training',
                       user_id: int = None,
-                      progress_callback: Callable = None) -> Dict:
+                      progress_callback: Callable = None,
+                      use_image_cache: bool = None,
+                      extra_args: Dict = None) -> Dict:
         """
         开始训练
         
@@ -196,7 +171,9 @@ class TrainingService:
             lr: 学习率
             project_name: 项目名称
             user_id: 用户ID
-            progress_callback: 进度回调函数
+            progress_callback: 进度回调函数，参数为遥测事件字典（见 TrainingTelemetry）
+            use_image_cache: 是否使用缩放到 img_size 的图片缓存（默认见 IMAGE_CACHE_CONFIG）
+            extra_args: 其他 model.train() 参数（如 warmup_epochs），覆盖默认值
             
         Returns:
             Dict: 训练结果
@@ -215,43 +192,200 @@ class TrainingService:
         img_size = img_size or config.TRAINING_CONFIG['img_size']
         lr = lr or config.TRAINING_CONFIG['lr']
         
+        # 图片预先缩放到训练尺寸，之后每轮和之后的训练不再解码、缩放原始大图
+        train_data = data_yaml
+        if config.IMAGE_CACHE_CONFIG['enabled'] if use_image_cache is None else use_image_cache:
+            from .image_cache import image_cache
+            cache = image_cache.build(data_yaml, img_size)
+            if cache['success']:
+                train_data = cache['data_yaml']
+                training_logger.warning(
+                    f"训练和验证使用缓存图片而非源图片: {cache['cache_dir']}"
+                    f"（长边缩放至 {img_size}，{image_cache.describe()}；可通过 use_image_cache=False 关闭）"
+                )
+            else:
+                training_logger.warning(f"图片缓存不可用，直接读取原始图片: {cache['error']}")
+        
         try:
-            self.is_training = True
-            self.should_stop = False
-            
             # 记录训练开始
             log_id = None
             if user_id:
                 log_id = db_service.execute_query(
                     """INSERT INTO training_logs 
-                    (user_id, model_name, dataset_path, epochs, batch_size, status) 
-                    VALUES (%s, %s, %s, %s, %s, %s)""",
-                    (user_id, project_name, data_yaml, epochs, batch_size, 'running'),
+                    (user_id, model_name, dataset_path, epochs, batch_size, status, save_dir) 
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+                    (user_id, project_name, data_yaml, epochs, batch_size, 'running',
+                     str(config.MODELS_DIR / 'training' / project_name)),
                     fetch=False
                 )
+        except Exception as e:
+            training_logger.error(f"训练失败: {str(e)}")
+            return {'success': False, 'error': str(e)}
+        
+        training_logger.info(f"开始训练: {project_name}")
+        
+        # 执行训练，添加single_cls参数来处理类别索引问题
+        train_args = dict(
+            data=train_data,
+            epochs=epochs,
+            batch=batch_size,
+            imgsz=img_size,
+            lr0=lr,
+            project=str(config.MODELS_DIR / 'training'),
+            name=project_name,
+            device=config.SYSTEM_CONFIG['device'],
+            workers=config.TRAINING_CONFIG['workers'],
+            patience=config.TRAINING_CONFIG['patience'],
+            verbose=True,
+            # 添加以下参数来处理类别索引问题和稳定性
+            exist_ok=True,  # 允许覆盖已存在的项目
+            pretrained=True,  # 使用预训练权重
+            optimizer='SGD',  # 使用SGD优化器（更稳定）
+            close_mosaic=10,  # 最后10个epoch关闭mosaic增强
+            amp=False  # 关闭自动混合精度（避免NoneType错误）
+        )
+        train_args.update(extra_args or {})
+        return self._run_training(log_id, project_name, progress_callback, train_args)
+    
+    def resume_training(self, log_id: int, progress_callback: Callable = None) -> Dict:
+        """
+        从 last.pt 继续已停止的训练（沿用检查点中保存的原始超参数，继续写入同一条训练日志）
+        
+        Args:
+            log_id: 训练日志ID
+            progress_callback: 进度回调函数，参数为遥测事件字典（见 TrainingTelemetry）
             
-            training_logger.info(f"开始训练: {project_name}")
-            
-            # 执行训练，添加single_cls参数来处理类别索引问题
-            results = self.model.train(
-                data=data_yaml,
-                epochs=epochs,
-                batch=batch_size,
-                imgsz=img_size,
-                lr0=lr,
-                project=str(config.MODELS_DIR / 'training'),
-                name=project_name,
-                device=config.SYSTEM_CONFIG['device'],
-                workers=config.TRAINING_CONFIG['workers'],
-                patience=config.TRAINING_CONFIG['patience'],
-                verbose=True,
-                # 添加以下参数来处理类别索引问题和稳定性
-                exist_ok=True,  # 允许覆盖已存在的项目
-                pretrained=True,  # 使用预训练权重
-                optimizer='SGD',  # 使用SGD优化器（更稳定）
-                close_mosaic=10,  # 最后10个epoch关闭mosaic增强
-                amp=False  # 关闭自动混合精度（避免NoneType错误）
+        Returns:
+            Dict: 训练结果（同 start_training）
+        """
+        if self.is_training:
+            training_logger.warning("已有训练任务在进行")
+            return {'success': False, 'error': '已有训练任务在进行'}
+        
+        try:
+            rows = db_service.execute_query(
+                "SELECT id, model_name, status, save_dir FROM training_logs WHERE id = %s",
+                (log_id,)
             )
+            if not rows:
+                return {'success': False, 'error': '训练记录不存在'}
+            log = rows[0]
+            checkpoint = self.get_checkpoint(log)
+            if checkpoint is None:
+                return {'success': False, 'error': '未找到可继续训练的检查点 (last.pt)'}
+            
+            from ultralytics import YOLO
+            self.model = YOLO(checkpoint)
+            db_service.execute_query(
+                "UPDATE training_logs SET status = %s, end_time = NULL WHERE id = %s",
+                ('running', log_id),
+                fetch=False
+            )
+        except Exception as e:
+            training_logger.error(f"继续训练失败: {str(e)}")
+            return {'success': False, 'error': str(e)}
+        
+        training_logger.info(f"继续训练: {log['model_name']}, 检查点: {checkpoint}")
+        return self._run_training(log_id, log['model_name'], progress_callback, {'resume': True})
+    
+    def start_training_process(self, base_model: str, data_yaml: str, epochs: int = None,
+                               batch_size: int = None, img_size: int = None, lr: float = None,
+                               project_name: str = 'underwater_training', user_id: int = None,
+                               progress_callback: Callable = None, cpu_cores: list = None,
+                               extra_args: Dict = None) -> Dict:
+        """
+        在独立子进程中准备模型并开始训练（阻塞直到训练结束，参数同 prepare_training + start_training）
+        
+        子进程按 TRAINING_WORKER_CONFIG 绑定 CPU 核心并限制线程数，训练崩溃不影响当前进程。
+        cpu_cores 指定时改为绑定这些核心（并行训练多个模型时各自分配）。
+        
+        Returns:
+            Dict: 训练结果（同 start_training，不含 results 对象）
+        """
+        return self._run_worker('start', dict(
+            base_model=base_model,
+            data_yaml=data_yaml,
+            epochs=epochs,
+            batch_size=batch_size,
+            img_size=img_size,
+            lr=lr,
+            project_name=project_name,
+            user_id=user_id,
+            extra_args=extra_args
+        ), progress_callback, cpu_cores)
+    
+    def resume_training_process(self, log_id: int, progress_callback: Callable = None,
+                                cpu_cores: list = None) -> Dict:
+        """
+        在独立子进程中继续已停止的训练（阻塞直到训练结束）
+        
+        Args:
+            log_id: 训练日志ID
+            progress_callback: 进度回调函数，参数为遥测事件字典
+            cpu_cores: 绑定的 CPU 核心（默认见 TRAINING_WORKER_CONFIG）
+            
+        Returns:
+            Dict: 训练结果（同 resume_training，不含 results 对象）
+        """
+        return self._run_worker('resume', {'log_id': log_id}, progress_callback, cpu_cores)
+    
+    def _run_worker(self, mode: str, kwargs: Dict, progress_callback: Optional[Callable],
+                    cpu_cores: list = None) -> Dict:
+        """在 TrainingWorker 子进程中执行训练"""
+        if self.is_training:
+            training_logger.warning("已有训练任务在进行")
+            return {'success': False, 'error': '已有训练任务在进行'}
+        
+        from .training_worker import TrainingWorker
+        worker = TrainingWorker(cpu_cores=cpu_cores)
+        
+        def on_progress(event: Dict):
+            self.current_log_id = worker.current_log_id
+            if progress_callback is not None:
+                progress_callback(event)
+        
+        self.is_training = True
+        self.should_stop = False
+        self.stop_immediately = False
+        self.current_log_id = kwargs.get('log_id')
+        self.worker = worker
+        try:
+            result = worker.run(mode, kwargs, on_progress)
+            self.current_log_id = worker.current_log_id
+            return result
+        finally:
+            self.worker = None
+            self.is_training = False
+    
+    def _run_training(self, log_id: Optional[int], project_name: str,
+                      progress_callback: Optional[Callable], train_args: Dict) -> Dict:
+        """
+        执行训练并更新训练日志
+        
+        Args:
+            log_id: 训练日志ID（可为空）
+            project_name: 项目名称
+            progress_callback: 进度回调函数
+            train_args: model.train() 参数
+            
+        Returns:
+            Dict: 训练结果
+        """
+        telemetry = None
+        try:
+            self.is_training = True
+            self.should_stop = False
+            self.stop_immediately = False
+            self.current_log_id = log_id
+            
+            # 逐批进度和逐轮指标
+            telemetry = TrainingTelemetry(log_id, progress_callback)
+            telemetry.attach(self.model)
+            # 停止检查注册在遥测之后，停止前的最后一轮指标仍会记录
+            self.model.add_callback('on_train_batch_end', self._check_stop_batch)
+            self.model.add_callback('on_fit_epoch_end', self._check_stop_epoch)
+            
+            results = self.model.train(**train_args)
             
             self.is_training = False
             
@@ -272,10 +406,35 @@ class TrainingService:
             
             return {
                 'success': True,
+                'log_id': log_id,
                 'results': results,
                 'final_map': final_map,
                 'weights_path': str(results.save_dir / 'weights' / 'best.pt')
             }
+        
+        except TrainingStopped as e:
+            self.is_training = False
+            checkpoint = Path(self.model.trainer.last) if getattr(self.model, 'trainer', None) else None
+            resumable = checkpoint is not None and checkpoint.exists()
+            training_logger.info(f"训练已停止: {project_name}, 已完成 {e.epochs_done} 轮"
+                                 + (f"，检查点: {checkpoint}" if resumable else "，无可用检查点"))
+            
+            # 停止的训练可以继续，不写 end_time（结束后才计入训练统计）
+            if log_id:
+                db_service.execute_query(
+                    "UPDATE training_logs SET status = %s WHERE id = %s",
+                    ('stopped', log_id),
+                    fetch=False
+                )
+            
+            return {
+                'success': False,
+                'stopped': True,
+                'error': '训练已停止',
+                'log_id': log_id,
+                'epochs_done': e.epochs_done,
+                'checkpoint': str(checkpoint) if resumable else None
+            }
             
         except Exception as e:
             self.is_training = False
@@ -290,12 +449,58 @@ class TrainingService:
                 )
             
             return {'success': False, 'error': str(e)}
+        finally:
+            if telemetry is not None:
+                telemetry.detach(self.model)
+            for event, callback in (('on_train_batch_end', self._check_stop_batch),
+                                    ('on_fit_epoch_end', self._check_stop_epoch)):
+                if callback in self.model.callbacks.get(event, []):
+                    self.model.callbacks[event].remove(callback)
+    
+    def _check_stop_batch(self, trainer):
+        """批次结束回调：请求立即停止时中断训练（检查点为上一轮结束时保存的 last.pt）"""
+        if self.should_stop and self.stop_immediately:
+            raise TrainingStopped(trainer.epoch)
     
-    def stop_training(self):
-        """停止训练"""
+    def _check_stop_epoch(self, trainer):
+        """
+        轮次结束回调（last.pt 已保存）：请求停止时中断训练
+        
+        不让 ultralytics 正常结束，因为正常结束时会从 last.pt 中去掉优化器状态，检查点将无法继续训练。
+        """
+        if self.should_stop and trainer.epoch + 1 < trainer.epochs and not getattr(trainer, 'stop', False):
+            raise TrainingStopped(trainer.epoch + 1)
+    
+    def stop_training(self, immediate: bool = False):
+        """
+        请求停止训练
+        
+        Args:
+            immediate: True 在下一个批次结束时停止（丢弃本轮未完成的进度），
+                       False 在本轮训练和验证完成、保存检查点后停止
+        """
         if self.is_training:
             self.should_stop = True
-            training_logger.info("训练停止请求已发送")
+            self.stop_immediately = immediate
+            if self.worker is not None:
+                self.worker.stop(immediate)
+            training_logger.info(f"训练停止请求已发送（{'下一批次' if immediate else '本轮结束后'}停止）")
+    
+    @staticmethod
+    def get_checkpoint(log: Dict) -> Optional[str]:
+        """
+        获取训练日志对应的可继续训练检查点
+        
+        Args:
+            log: 训练日志（需包含 save_dir）
+            
+        Returns:
+            Optional[str]: last.pt 路径，不存在时返回 None
+        """
+        if not log.get('save_dir'):
+            return None
+        checkpoint = Path(log['save_dir']) / 'weights' / 'last.pt'
+        return str(checkpoint) if checkpoint.exists() else None
     
     def validate_model(self, model_path: str, data_yaml: str) -> Dict:
         """
@@ -309,6 +514,7 @@ class TrainingService:
             Dict: 验证结果
         """
         try:
+            from ultralytics import YOLO
             model = YOLO(model_path)
             results = model.val(data=data_yaml)
             
@@ -338,6 +544,7 @@ class TrainingService:
             Dict: 导出结果
         """
         try:
+            from ultralytics import YOLO
             model = YOLO(model_path)
             export_path = model.export(format=format)
             training_logger.info(f"模型导出成功: {export_path}")
@@ -373,6 +580,18 @@ class TrainingService:
             training_logger.error(f"获取训练日志失败: {str(e)}")
             return []
     
+    def get_training_metrics(self, log_id: int) -> list:
+        """
+        获取训练的逐轮指标
+        
+        Args:
+            log_id: 训练日志ID
+            
+        Returns:
+            list: 按 epoch 升序的指标列表
+        """
+        return get_training_metrics(log_id)
+    
     def delete_training_log(self, log_id: int) -> bool:
         """
         删除单条训练日志
@@ -384,6 +603,11 @@ class TrainingService:
             bool: 是否删除成功
         """
         try:
+            db_service.execute_query(
+                "DELETE FROM training_metrics WHERE training_log_id = %s",
+                (log_id,),
+                fetch=False
+            )
             db_service.execute_query(
                 "DELETE FROM training_logs WHERE id = %s",
                 (log_id,),
@@ -406,12 +630,16 @@ class TrainingService:
             bool: 是否清空成功
         """
         try:
-            db_service.execute_query(
-                "DELETE FROM training_logs WHERE user_id = %s",
+            # 分小批删除，避免一次性大事务长时间锁表（用户操作，批次之间不暂停）
+            from .retention_service import retention_service
+            retention_service.delete_where(
+                'training_metrics',
+                "training_log_id IN (SELECT id FROM training_logs WHERE user_id = %s)",
                 (user_id,),
-                fetch=False
+                background=False
             )
-            training_logger.info(f"已清空用户 {user_id} 的所有训练日志")
+            count = retention_service.delete_where('training_logs', "user_id = %s", (user_id,), background=False)
+            training_logger.info(f"已清空用户 {user_id} 的所有训练日志（{count} 条）")
             return True
         except Exception as e:
             training_logger.error(f"清空训练日志失败: {str(e)}")
@@ -463,4 +691,4 @@ class TrainingService:
             return False
 
 # 全局训练服务实例
-training_service = TrainingService()
+training_service = LazyProxy(TrainingService, 'training_service')
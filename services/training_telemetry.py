@@ -0,0 +1,223 @@
+"""
+训练遥测
+通过 ultralytics 训练回调采集批次进度和逐轮指标，推送给界面并批量写入 training_metrics 表
+"""
+import threading
+import time
+from typing import Optional, Dict, Callable, List
+from .batch_writer import BatchWriter
+from .database import db_service
+from utils import training_logger
+import config
+
+# training_metrics 指标列（与 on_fit_epoch_end 产生的 epoch 事件字段一致）
+METRIC_COLUMNS = [
+    'box_loss', 'cls_loss', 'dfl_loss',
+    'val_box_loss', 'val_cls_loss', 'val_dfl_loss',
+    'box_precision', 'box_recall', 'map50', 'map50_95',
+    'lr', 'epoch_time', 'images_per_sec'
+]
+
+# ultralytics trainer.metrics 键 -> 指标列
+_TRAINER_METRICS = {
+    'val/box_loss': 'val_box_loss',
+    'val/cls_loss': 'val_cls_loss',
+    'val/dfl_loss': 'val_dfl_loss',
+    'metrics/precision(B)': 'box_precision',
+    'metrics/recall(B)': 'box_recall',
+    'metrics/mAP50(B)': 'map50',
+    'metrics/mAP50-95(B)': 'map50_95'
+}
+
+_METRICS_INSERT = (
+    f"INSERT INTO training_metrics (training_log_id, epoch, {', '.join(METRIC_COLUMNS)}) "
+    f"VALUES ({', '.join(['%s'] * (len(METRIC_COLUMNS) + 2))})"
+)
+
+_writer: Optional[BatchWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_metrics_writer() -> BatchWriter:
+    """获取 training_metrics 批量写入器（首次使用时创建）"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = BatchWriter('training_metrics', _METRICS_INSERT)
+        return _writer
+
+
+def get_training_metrics(training_log_id: int) -> List[Dict]:
+    """
+    获取一次训练的逐轮指标
+
+    Args:
+        training_log_id: 训练日志ID
+
+    Returns:
+        List[Dict]: 按 epoch 升序的指标列表
+    """
+    try:
+        if _writer is not None:
+            _writer.flush()
+        rows = db_service.execute_query(
+            f"SELECT epoch, {', '.join(METRIC_COLUMNS)} FROM training_metrics "
+            "WHERE training_log_id = %s ORDER BY epoch, id",
+            (training_log_id,)
+        )
+        return rows or []
+    except Exception as e:
+        training_logger.error(f"获取训练指标失败: {str(e)}")
+        return []
+
+
+class TrainingTelemetry:
+    """
+    训练遥测采集器
+
+    注册到 YOLO 模型的训练回调上，在训练线程中运行。回调只做少量计算：
+    批次进度按 batch_interval 节流后推送，每轮结束时推送完整指标并提交给
+    批量写入器，不在训练线程上同步写库。
+
+    推送的事件为字典，type 字段区分：
+        batch: epoch, epochs, batch, batches, losses, images_per_sec, eta
+        epoch: epoch, epochs, METRIC_COLUMNS 中的指标, eta
+    """
+
+    CALLBACKS = ('on_train_start', 'on_train_epoch_start', 'on_train_batch_end', 'on_fit_epoch_end', 'on_train_end')
+
+    def __init__(self, training_log_id: int = None, progress_callback: Callable = None,
+                 batch_interval: float = None):
+        """
+        初始化采集器
+
+        Args:
+            training_log_id: 训练日志ID（为空时不写库）
+            progress_callback: 事件回调，参数为事件字典
+            batch_interval: 批次进度最短推送间隔（秒）
+        """
+        self.training_log_id = training_log_id
+        self.progress_callback = progress_callback
+        self.batch_interval = batch_interval or config.TRAINING_TELEMETRY_CONFIG['batch_interval']
+        self.writer = get_metrics_writer() if training_log_id else None
+
+        self.epochs = 0
+        self.start_epoch = 0
+        self._batch = 0
+        self._epoch_start = 0.0
+        self._epoch_times: List[float] = []
+        self._last_push = 0.0
+
+    def attach(self, model):
+        """
+        注册到 YOLO 模型
+
+        Args:
+            model: ultralytics.YOLO 实例
+        """
+        for event in self.CALLBACKS:
+            model.add_callback(event, getattr(self, event))
+
+    def detach(self, model):
+        """
+        从 YOLO 模型移除回调（保留 ultralytics 自带的回调）
+
+        Args:
+            model: ultralytics.YOLO 实例
+        """
+        for event in self.CALLBACKS:
+            callbacks = model.callbacks.get(event, [])
+            if getattr(self, event) in callbacks:
+                callbacks.remove(getattr(self, event))
+
+    def _emit(self, event: Dict):
+        if self.progress_callback is None:
+            return
+        try:
+            self.progress_callback(event)
+        except Exception as e:
+            # 界面回调出错不影响训练
+            training_logger.warning(f"训练进度回调失败: {str(e)}")
+
+    @staticmethod
+    def _losses(trainer) -> Dict[str, float]:
+        """当前轮的平均训练损失 {box_loss, cls_loss, dfl_loss}"""
+        if getattr(trainer, 'tloss', None) is None:
+            return {}
+        items = trainer.label_loss_items(trainer.tloss, prefix='train')
+        return {key.split('/', 1)[1]: round(float(value), 5) for key, value in items.items()}
+
+    def _mean_epoch_time(self) -> Optional[float]:
+        if not self._epoch_times:
+            return None
+        recent = self._epoch_times[-5:]
+        return sum(recent) / len(recent)
+
+    def on_train_start(self, trainer):
+        self.epochs = trainer.epochs
+        self.start_epoch = getattr(trainer, 'start_epoch', 0)
+        self._epoch_times = []
+
+    def on_train_epoch_start(self, trainer):
+        self._batch = 0
+        self._epoch_start = time.perf_counter()
+
+    def on_train_batch_end(self, trainer):
+        self._batch += 1
+        now = time.perf_counter()
+        batches = len(trainer.train_loader)
+        if now - self._last_push < self.batch_interval and self._batch < batches:
+            return
+        self._last_push = now
+
+        elapsed = now - self._epoch_start
+        remaining_epochs = self.epochs - trainer.epoch - 1
+        epoch_time = self._mean_epoch_time() or elapsed / self._batch * batches
+        eta = elapsed / self._batch * (batches - self._batch) + remaining_epochs * epoch_time
+        self._emit({
+            'type': 'batch',
+            'epoch': trainer.epoch + 1,
+            'epochs': self.epochs,
+            'batch': self._batch,
+            'batches': batches,
+            'losses': self._losses(trainer),
+            'images_per_sec': self._batch * trainer.batch_size / elapsed if elapsed > 0 else 0.0,
+            'eta': eta
+        })
+
+    def on_fit_epoch_end(self, trainer):
+        # 包含验证耗时
+        epoch_time = time.perf_counter() - self._epoch_start
+        self._epoch_times.append(epoch_time)
+
+        try:
+            images = len(trainer.train_loader.dataset)
+        except (AttributeError, TypeError):
+            images = self._batch * trainer.batch_size
+
+        event = {key: None for key in METRIC_COLUMNS}
+        event.update(self._losses(trainer))
+        for key, column in _TRAINER_METRICS.items():
+            if key in (trainer.metrics or {}):
+                event[column] = round(float(trainer.metrics[key]), 5)
+        lr = getattr(trainer, 'lr', None) or {}
+        if lr:
+            event['lr'] = float(next(iter(lr.values())))
+        event['epoch_time'] = round(epoch_time, 3)
+        event['images_per_sec'] = round(images / epoch_time, 2) if epoch_time > 0 else None
+
+        epoch = trainer.epoch + 1
+        if self.writer is not None:
+            self.writer.submit((self.training_log_id, epoch) + tuple(event[key] for key in METRIC_COLUMNS))
+
+        event.update({
+            'type': 'epoch',
+            'epoch': epoch,
+            'epochs': self.epochs,
+            'eta': (self.epochs - epoch) * self._mean_epoch_time()
+        })
+        self._emit(event)
+
+    def on_train_end(self, trainer):
+        if self.writer is not None:
+            self.writer.flush()
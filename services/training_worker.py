@@ -0,0 +1,387 @@
+"""
+训练工作进程
+在独立子进程中执行训练：绑定 CPU 核心并限制计算线程数，进度事件通过管道发给主进程，
+训练结果写入 JSON 文件，主进程读取后返回（训练崩溃只影响子进程）。
+主程序退出时请求训练进程本轮结束后停止，超时后强制结束
+"""
+import atexit
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+import weakref
+from pathlib import Path
+from typing import Optional, Dict, Callable, List
+from .database import db_service
+from utils import training_logger
+import config
+
+try:
+    import psutil  # ultralytics 的依赖，Windows 上设置 CPU 亲和性需要
+except ImportError:
+    psutil = None
+
+# 子进程中限制线程数的环境变量（需在导入 torch/numpy 之前设置）
+_THREAD_ENV_VARS = ['OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'NUMEXPR_NUM_THREADS']
+
+# 结果文件目录
+RESULTS_DIR = config.DATA_DIR / 'training_results'
+
+# 运行中的工作进程，主程序退出时统一停止
+_active_workers = weakref.WeakSet()
+_exit_hook_registered = False
+_exit_hook_lock = threading.Lock()
+
+
+def get_available_cores() -> List[int]:
+    """当前进程可用的 CPU 核心编号"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def default_cpu_cores() -> Optional[List[int]]:
+    """
+    训练进程默认绑定的 CPU 核心
+
+    Returns:
+        Optional[List[int]]: 核心编号列表；核心数不足以保留时返回 None（不绑定）
+    """
+    worker_config = config.TRAINING_WORKER_CONFIG
+    if worker_config['cpu_cores']:
+        return list(worker_config['cpu_cores'])
+    available = get_available_cores()
+    reserved = worker_config['reserved_cores']
+    if len(available) - reserved < 1:
+        return None
+    # 保留编号最小的核心给主进程
+    return available[reserved:]
+
+
+def split_cores(cores: Optional[List[int]], parts: int) -> List[Optional[List[int]]]:
+    """把 CPU 核心平均分成 parts 组（核心不足时不绑定）"""
+    if not cores or len(cores) < parts:
+        return [None] * parts
+    size = len(cores) // parts
+    return [cores[i * size:(i + 1) * size] for i in range(parts)]
+
+
+def _apply_resource_limits(cpu_cores: Optional[List[int]], num_threads: int):
+    """在子进程中设置 CPU 亲和性和计算线程数（导入 torch 之前调用）"""
+    for name in _THREAD_ENV_VARS:
+        os.environ[name] = str(num_threads)
+
+    if cpu_cores:
+        try:
+            if hasattr(os, 'sched_setaffinity'):
+                os.sched_setaffinity(0, cpu_cores)
+            elif psutil is not None:
+                psutil.Process().cpu_affinity(cpu_cores)
+            else:
+                training_logger.warning("未安装 psutil，无法设置训练进程的 CPU 亲和性")
+        except (OSError, ValueError) as e:
+            training_logger.warning(f"设置训练进程 CPU 亲和性失败: {str(e)}")
+
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+    except ImportError:
+        pass
+
+
+def _worker_main(mode: str, kwargs: Dict, cpu_cores: Optional[List[int]], num_threads: int,
+                 result_path: str, event_conn, command_conn):
+    """
+    子进程入口
+
+    Args:
+        mode: 'start'（prepare_training + start_training）或 'resume'（resume_training）
+        kwargs: 对应方法的参数（start 模式含 base_model）
+        cpu_cores: 绑定的 CPU 核心
+        num_threads: 计算线程数
+        result_path: 结果文件路径
+        event_conn: 发送 ('log_id', id) / ('event', 事件) / ('done', 结果文件) 的管道
+        command_conn: 接收 ('stop', immediate) 的管道
+    """
+    _apply_resource_limits(cpu_cores, num_threads)
+
+    from .db_log_handler import install_db_log_handler
+    from .query_metrics import query_metrics
+    from .training_service import TrainingService
+    install_db_log_handler()
+    # 查询统计快照不覆盖主进程的快照
+    query_metrics.snapshot_path = query_metrics.snapshot_path.with_name('query_metrics_training_worker.json')
+    service = TrainingService()
+    sent_log_id = [None]
+
+    def listen_commands():
+        while True:
+            try:
+                command, immediate = command_conn.recv()
+            except (EOFError, OSError):
+                # 主进程已退出：本轮结束后停止，保留检查点供重新排队后继续
+                service.stop_training(immediate=False)
+                return
+            if command == 'stop':
+                service.stop_training(immediate=immediate)
+
+    def send_log_id(trainer=None):
+        # 训练日志在 start_training 中创建，尽早告知主进程，子进程崩溃时由主进程更新状态
+        if service.current_log_id != sent_log_id[0]:
+            sent_log_id[0] = service.current_log_id
+            event_conn.send(('log_id', service.current_log_id))
+
+    def on_progress(event: Dict):
+        send_log_id()
+        event_conn.send(('event', event))
+
+    threading.Thread(target=listen_commands, name='TrainingWorkerCommands', daemon=True).start()
+    training_logger.info(f"训练进程已启动: pid={os.getpid()}, CPU 核心={cpu_cores or '全部'}, 线程数={num_threads}")
+
+    try:
+        if mode == 'resume':
+            result = service.resume_training(kwargs['log_id'], progress_callback=on_progress)
+        else:
+            kwargs = dict(kwargs)
+            if not service.prepare_training(kwargs.pop('base_model', None)):
+                result = {'success': False, 'error': '模型准备失败'}
+            else:
+                service.model.add_callback('on_pretrain_routine_start', send_log_id)
+                result = service.start_training(progress_callback=on_progress, **kwargs)
+    except Exception as e:
+        training_logger.error(f"训练进程执行失败: {str(e)}")
+        result = {'success': False, 'error': str(e)}
+
+    # ultralytics 的结果对象不可序列化，只写入可序列化的字段
+    result.pop('results', None)
+    if 'log_id' not in result:
+        result['log_id'] = service.current_log_id
+    tmp_path = Path(result_path).with_suffix('.tmp')
+    tmp_path.write_text(json.dumps(result, ensure_ascii=False, default=str), encoding='utf-8')
+    os.replace(tmp_path, result_path)
+    event_conn.send(('done', result_path))
+    event_conn.close()
+
+
+def _register_exit_hook():
+    """
+    注册退出处理（首次启动子进程时调用）
+
+    atexit 后注册先执行：在 multiprocessing 等待非守护子进程、数据库连接池关闭之前停止训练进程。
+    """
+    global _exit_hook_registered
+    with _exit_hook_lock:
+        if not _exit_hook_registered:
+            atexit.register(shutdown_workers)
+            _exit_hook_registered = True
+
+
+def shutdown_workers(timeout: float = None):
+    """
+    停止所有训练进程（主程序退出时调用）
+
+    先请求本轮结束后停止并关闭命令管道（子进程据此保存检查点后退出），
+    超时仍未退出的子进程强制结束，训练日志按异常退出处理。
+
+    Args:
+        timeout: 等待子进程退出的总时间（秒），默认见 TRAINING_WORKER_CONFIG['exit_timeout']
+    """
+    workers = [worker for worker in list(_active_workers) if worker.is_alive]
+    if not workers:
+        return
+    timeout = config.TRAINING_WORKER_CONFIG['exit_timeout'] if timeout is None else timeout
+    training_logger.info(f"程序退出：等待 {len(workers)} 个训练进程完成本轮并保存检查点（最多 {timeout} 秒）")
+    for worker in workers:
+        # 训练日志状态由这里更新，不再由等待结果的线程处理（数据库连接池随后关闭）
+        worker._exiting = True
+        worker.stop(immediate=False)
+        worker.close_commands()
+
+    deadline = time.monotonic() + timeout
+    for worker in workers:
+        worker.process.join(max(0.0, deadline - time.monotonic()))
+        if worker.process.is_alive():
+            training_logger.warning(f"训练进程未在 {timeout} 秒内退出，强制结束: pid={worker.process.pid}")
+            worker.process.terminate()
+            worker.process.join(5)
+            if worker.current_log_id:
+                worker._mark_crashed(worker.current_log_id)
+
+
+class TrainingWorker:
+    """
+    训练工作进程
+
+    run() 在调用线程中阻塞：启动子进程（spawn 方式，不继承主进程的 Qt/CUDA 状态），
+    转发进度事件给回调，子进程结束后读取结果文件。子进程异常退出时根据检查点把
+    训练日志标记为已停止（可继续）或失败。
+    """
+
+    def __init__(self, cpu_cores: List[int] = None, num_threads: int = None):
+        """
+        初始化工作进程
+
+        Args:
+            cpu_cores: 绑定的 CPU 核心（默认见 TRAINING_WORKER_CONFIG）
+            num_threads: 计算线程数（默认为绑定的核心数）
+        """
+        self.cpu_cores = cpu_cores or default_cpu_cores()
+        self.num_threads = num_threads or config.TRAINING_WORKER_CONFIG['num_threads'] \
+            or len(self.cpu_cores or get_available_cores())
+        self.poll_interval = config.TRAINING_WORKER_CONFIG['poll_interval']
+        self.process = None
+        self.current_log_id = None
+        self._command_conn = None
+        self._send_lock = threading.Lock()
+        self._exiting = False
+
+    @property
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def run(self, mode: str, kwargs: Dict, progress_callback: Callable = None) -> Dict:
+        """
+        在子进程中训练并等待结束
+
+        Args:
+            mode: 'start' 或 'resume'
+            kwargs: start 模式为 base_model 和 start_training 的参数，resume 模式为 log_id
+            progress_callback: 进度回调函数，参数为遥测事件字典（在调用线程中调用）
+
+        Returns:
+            Dict: 训练结果（同 TrainingService.start_training，不含 results 对象）
+        """
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        result_path = str(RESULTS_DIR / f"{uuid.uuid4().hex}.json")
+        if mode == 'resume':
+            self.current_log_id = kwargs['log_id']
+
+        ctx = multiprocessing.get_context('spawn')
+        event_recv, event_send = ctx.Pipe(duplex=False)
+        command_recv, command_send = ctx.Pipe(duplex=False)
+        # 不能设为守护进程：ultralytics 的数据加载器会再创建子进程
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(mode, kwargs, self.cpu_cores, self.num_threads, result_path, event_send, command_recv),
+            name='TrainingWorker'
+        )
+        try:
+            self.process.start()
+        except Exception as e:
+            training_logger.error(f"启动训练进程失败: {str(e)}")
+            return {'success': False, 'error': f'启动训练进程失败: {str(e)}'}
+        # 关闭本进程持有的另一端，子进程退出后 recv() 才能收到 EOF
+        event_send.close()
+        command_recv.close()
+        self._command_conn = command_send
+        _active_workers.add(self)
+        _register_exit_hook()
+
+        try:
+            self._receive(event_recv, progress_callback)
+        finally:
+            self.process.join()
+            _active_workers.discard(self)
+            event_recv.close()
+            self.close_commands()
+        return self._read_result(result_path)
+
+    def _receive(self, conn, progress_callback: Optional[Callable]):
+        """转发子进程消息直到子进程结束"""
+        while True:
+            if not conn.poll(self.poll_interval):
+                if not self.process.is_alive():
+                    return
+                continue
+            try:
+                kind, payload = conn.recv()
+            except (EOFError, OSError):
+                return
+            if kind == 'log_id':
+                self.current_log_id = payload
+            elif kind == 'event':
+                if progress_callback is not None:
+                    try:
+                        progress_callback(payload)
+                    except Exception as e:
+                        training_logger.warning(f"训练进度回调失败: {str(e)}")
+            elif kind == 'done':
+                return
+
+    def _read_result(self, result_path: str) -> Dict:
+        """读取结果文件；子进程异常退出时更新训练日志状态"""
+        path = Path(result_path)
+        if path.exists():
+            try:
+                result = json.loads(path.read_text(encoding='utf-8'))
+                self.current_log_id = result.get('log_id') or self.current_log_id
+                return result
+            except Exception as e:
+                training_logger.error(f"读取训练结果失败: {str(e)}")
+                return {'success': False, 'error': f'读取训练结果失败: {str(e)}'}
+            finally:
+                path.unlink(missing_ok=True)
+
+        error = f"训练进程异常退出 (exit code {self.process.exitcode})"
+        training_logger.error(error)
+        result = {'success': False, 'error': error, 'log_id': self.current_log_id}
+        if self.current_log_id and not self._exiting:
+            result.update(self._mark_crashed(self.current_log_id))
+        return result
+
+    @staticmethod
+    def _mark_crashed(log_id: int) -> Dict:
+        """
+        子进程崩溃后更新仍为运行中的训练日志：有检查点时标记为已停止（可继续），否则为失败
+
+        Returns:
+            Dict: 有检查点时返回 {'stopped': True, 'checkpoint': 路径}
+        """
+        from .training_service import TrainingService
+        try:
+            rows = db_service.execute_query("SELECT save_dir FROM training_logs WHERE id = %s", (log_id,))
+            checkpoint = TrainingService.get_checkpoint(rows[0]) if rows else None
+            if checkpoint:
+                db_service.execute_query(
+                    "UPDATE training_logs SET status = %s WHERE id = %s AND status = %s",
+                    ('stopped', log_id, 'running'),
+                    fetch=False
+                )
+                return {'stopped': True, 'checkpoint': checkpoint}
+            db_service.execute_query(
+                "UPDATE training_logs SET status = %s, end_time = NOW() WHERE id = %s AND status = %s",
+                ('failed', log_id, 'running'),
+                fetch=False
+            )
+        except Exception as e:
+            training_logger.error(f"更新训练日志状态失败: {str(e)}")
+        return {}
+
+    def stop(self, immediate: bool = False):
+        """
+        请求子进程停止训练
+
+        Args:
+            immediate: 同 TrainingService.stop_training
+        """
+        with self._send_lock:
+            if self._command_conn is None:
+                return
+            try:
+                self._command_conn.send(('stop', immediate))
+            except (OSError, ValueError) as e:
+                training_logger.warning(f"发送停止请求失败: {str(e)}")
+
+    def close_commands(self):
+        """关闭命令管道：子进程收到 EOF 后本轮结束时停止"""
+        with self._send_lock:
+            if self._command_conn is not None:
+                self._command_conn.close()
+                self._command_conn = None
+
+    def terminate(self):
+        """强制结束子进程（训练日志按异常退出处理）"""
+        if self.is_alive:
+            self.process.terminate()
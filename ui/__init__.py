@@ -1,10 +1,23 @@
 """
 UI模块
+各窗口在首次访问时才导入（登录窗口不必等待主窗口依赖的 cv2 等模块）
 """
-from .login import LoginWindow, RegisterDialog
-from .admin import AdminDashboard
-from .main import MainWindow
-from .training import TrainingWindow
+_LAZY_EXPORTS = {
+    'LoginWindow': '.login',
+    'RegisterDialog': '.login',
+    'AdminDashboard': '.admin',
+    'MainWindow': '.main',
+    'TrainingWindow': '.training'
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        import importlib
+        module = importlib.import_module(_LAZY_EXPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     'LoginWindow',
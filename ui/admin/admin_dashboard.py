@@ -6,17 +6,39 @@
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QTabWidget, QTableWidget, QTableWidgetItem, QPushButton,
                              QLabel, QLineEdit, QMessageBox, QHeaderView, QComboBox,
-                             QFileDialog, QTextEdit, QDialog, QDialogButtonBox)
-from PyQt6.QtCore import Qt
-from services import auth_service, model_manager, db_service, feedback_service
+                             QFileDialog, QTextEdit, QDialog, QDialogButtonBox, QTableView,
+                             QAbstractItemView)
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from services import auth_service, model_manager, db_service, feedback_service, LOG_SOURCES, rollup_service
+from services import query_metrics
+from datetime import datetime, timedelta
+from ui.admin.log_table_model import LogTableModel
 import config
 
+class RollupWorker(QThread):
+    """汇总统计工作线程（首次打开时可能需要汇总全部历史日志）"""
+    rollup_finished = pyqtSignal(dict)  # {'inference': 条数, 'training': 条数}
+
+    # 运行中的线程，窗口关闭后仍保持引用直到汇总结束
+    _running = set()
+
+    def run(self):
+        """执行汇总"""
+        self.rollup_finished.emit(rollup_service.run_once())
+
+    def start(self):
+        RollupWorker._running.add(self)
+        self.finished.connect(lambda: RollupWorker._running.discard(self))
+        super().start()
+
+
 class AdminDashboard(QMainWindow):
     """管理员仪表盘类"""
 
     def __init__(self, user_info):
         super().__init__()
         self.user_info = user_info
+        self.rollup_worker = None
         self.init_ui()
 
     def init_ui(self):
@@ -50,6 +72,14 @@ class AdminDashboard(QMainWindow):
         self.log_tab = self.create_log_management_tab()
         self.tab_widget.addTab(self.log_tab, '📋 日志管理')
 
+        # 使用统计选项卡
+        self.stats_tab = self.create_stats_tab()
+        self.tab_widget.addTab(self.stats_tab, '📊 使用统计')
+
+        # 查询性能选项卡
+        self.query_tab = self.create_query_metrics_tab()
+        self.tab_widget.addTab(self.query_tab, '🐢 查询性能')
+
         # 反馈管理选项卡
         self.feedback_tab = self.create_feedback_management_tab()
         self.tab_widget.addTab(self.feedback_tab, '🐛 反馈管理')
@@ -62,6 +92,8 @@ class AdminDashboard(QMainWindow):
         self.load_models()
         self.load_logs()
         self.load_feedbacks()
+        self.load_stats()
+        self.refresh_stats()
 
     def create_user_management_tab(self):
         """创建用户管理选项卡"""
@@ -138,10 +170,25 @@ class AdminDashboard(QMainWindow):
         log_type_layout.addWidget(QLabel('日志类型：'))
 
         self.log_type_combo = QComboBox()
-        self.log_type_combo.addItems(['登录日志', '推理日志', '训练日志', '系统日志'])
-        self.log_type_combo.currentIndexChanged.connect(self.load_logs)
+        for source, spec in LOG_SOURCES.items():
+            self.log_type_combo.addItem(spec['title'], source)
+        self.log_type_combo.currentIndexChanged.connect(self.on_log_type_changed)
         log_type_layout.addWidget(self.log_type_combo)
 
+        log_type_layout.addWidget(QLabel('状态：'))
+        self.log_status_combo = QComboBox()
+        log_type_layout.addWidget(self.log_status_combo)
+
+        self.log_search_input = QLineEdit()
+        self.log_search_input.setPlaceholderText('关键字...')
+        self.log_search_input.setMaximumWidth(200)
+        self.log_search_input.returnPressed.connect(self.load_logs)
+        log_type_layout.addWidget(self.log_search_input)
+
+        search_btn = QPushButton('🔍 查询')
+        search_btn.clicked.connect(self.load_logs)
+        log_type_layout.addWidget(search_btn)
+
         refresh_btn = QPushButton('🔄 刷新')
         refresh_btn.clicked.connect(self.load_logs)
         log_type_layout.addWidget(refresh_btn)
@@ -152,15 +199,232 @@ class AdminDashboard(QMainWindow):
 
         log_type_layout.addStretch()
 
+        self.log_count_label = QLabel()
+        log_type_layout.addWidget(self.log_count_label)
+
         layout.addLayout(log_type_layout)
 
-        # 日志表格
-        self.log_table = QTableWidget()
+        # 日志表格（按需分页加载，滚动到底部时查询下一页）
+        self.log_model = LogTableModel(self.log_type_combo.currentData(), self)
+        self.log_model.page_loaded.connect(self.on_log_page_loaded)
+        self.log_model.load_failed.connect(self.on_log_load_failed)
+
+        self.log_table = QTableView()
+        self.log_table.setModel(self.log_model)
+        self.log_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.log_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.log_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.log_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.log_table.horizontalHeader().setSortIndicator(
+            self.log_model.sort_section(), Qt.SortOrder.DescendingOrder
+        )
+        self.log_table.setSortingEnabled(True)
+        self.log_table.horizontalHeader().sortIndicatorChanged.connect(self.on_log_sort_changed)
         layout.addWidget(self.log_table)
 
+        self.update_log_status_options()
+
         widget.setLayout(layout)
         return widget
 
+    def create_stats_tab(self):
+        """创建使用统计选项卡"""
+        widget = QWidget()
+        layout = QVBoxLayout()
+
+        # 工具栏
+        toolbar = QHBoxLayout()
+        toolbar.addWidget(QLabel('时间范围：'))
+        self.stats_range_combo = QComboBox()
+        # (显示文本, 天数, 汇总粒度)
+        for text, days, period in [('最近24小时', 1, 'hour'), ('最近7天', 7, 'day'), ('最近30天', 30, 'day')]:
+            self.stats_range_combo.addItem(text, (days, period))
+        self.stats_range_combo.currentIndexChanged.connect(self.load_stats)
+        toolbar.addWidget(self.stats_range_combo)
+
+        toolbar.addWidget(QLabel('分组：'))
+        self.stats_group_combo = QComboBox()
+        for text, key in [('模型', 'model_name'), ('用户', 'user_id'), ('数据源', 'source_type'), ('时间', 'bucket_start')]:
+            self.stats_group_combo.addItem(text, key)
+        self.stats_group_combo.currentIndexChanged.connect(self.load_stats)
+        toolbar.addWidget(self.stats_group_combo)
+
+        refresh_btn = QPushButton('🔄 刷新')
+        refresh_btn.clicked.connect(self.refresh_stats)
+        toolbar.addWidget(refresh_btn)
+        toolbar.addStretch()
+
+        self.stats_status_label = QLabel()
+        self.stats_status_label.setStyleSheet('color: #7f8c8d;')
+        toolbar.addWidget(self.stats_status_label)
+        layout.addLayout(toolbar)
+
+        # 推理统计表格
+        layout.addWidget(QLabel('推理统计'))
+        self.inference_stats_table = QTableWidget()
+        self.inference_stats_table.setColumnCount(7)
+        self.inference_stats_table.setHorizontalHeaderLabels(
+            ['分组', '推理次数', '检测总数', '平均检测数', '平均耗时', 'P95耗时', '最大耗时'])
+        self.inference_stats_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.inference_stats_table)
+
+        # 训练统计表格
+        layout.addWidget(QLabel('训练统计'))
+        self.training_stats_table = QTableWidget()
+        self.training_stats_table.setColumnCount(7)
+        self.training_stats_table.setHorizontalHeaderLabels(
+            ['分组', '训练次数', '完成', '失败', '平均时长', '平均mAP', '最佳mAP'])
+        self.training_stats_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.training_stats_table)
+
+        widget.setLayout(layout)
+        return widget
+
+    def refresh_stats(self):
+        """在后台线程中增量汇总新日志，完成后重新加载统计"""
+        if self.rollup_worker is not None and self.rollup_worker.isRunning():
+            return
+        self.stats_status_label.setText('正在汇总新日志...')
+        self.rollup_worker = RollupWorker()
+        self.rollup_worker.rollup_finished.connect(self.on_rollup_finished)
+        self.rollup_worker.start()
+
+    def on_rollup_finished(self, totals):
+        """汇总完成"""
+        self.rollup_worker = None
+        self.load_stats()
+
+    def load_stats(self):
+        """加载使用统计（只读取汇总表，新日志由后台汇总线程或刷新按钮汇总）"""
+        try:
+            days, period = self.stats_range_combo.currentData()
+            group_by = self.stats_group_combo.currentData()
+            start_time = datetime.now() - timedelta(days=days)
+
+            def group_text(value):
+                if isinstance(value, datetime):
+                    return value.strftime('%Y-%m-%d %H:00' if period == 'hour' else '%Y-%m-%d')
+                return str(value) if value not in (None, '', 0) else '未知'
+
+            inference_stats = rollup_service.get_inference_summary(start_time, period=period, group_by=group_by)
+            self.inference_stats_table.setRowCount(len(inference_stats))
+            for i, row in enumerate(inference_stats):
+                p95 = row['p95_latency']
+                values = [
+                    group_text(row['group_key']),
+                    str(row['runs']),
+                    str(row['detections']),
+                    f"{row['avg_detections']:.2f}",
+                    f"{row['avg_latency']:.3f}s",
+                    f"≤{p95:.2f}s" if p95 is not None else '>5s',
+                    f"{row['max_latency']:.3f}s"
+                ]
+                for j, value in enumerate(values):
+                    self.inference_stats_table.setItem(i, j, QTableWidgetItem(value))
+
+            # 训练统计不区分数据源
+            training_group = group_by if group_by != 'source_type' else 'model_name'
+            training_stats = rollup_service.get_training_summary(start_time, period=period, group_by=training_group)
+            self.training_stats_table.setRowCount(len(training_stats))
+            for i, row in enumerate(training_stats):
+                values = [
+                    group_text(row['group_key']),
+                    str(row['runs']),
+                    str(row['completed']),
+                    str(row['failed']),
+                    f"{row['avg_duration'] / 60:.1f} 分钟",
+                    f"{row['avg_map']:.4f}" if row['avg_map'] is not None else 'N/A',
+                    f"{row['best_map']:.4f}" if row['best_map'] is not None else 'N/A'
+                ]
+                for j, value in enumerate(values):
+                    self.training_stats_table.setItem(i, j, QTableWidgetItem(value))
+
+            if self.rollup_worker is None:
+                self.stats_status_label.setText(f'汇总更新于 {datetime.now().strftime("%H:%M:%S")}')
+        except Exception as e:
+            from utils import system_logger
+            system_logger.error(f"加载使用统计失败: {str(e)}")
+            QMessageBox.warning(self, "错误", f"加载使用统计失败: {str(e)}")
+
+    def create_query_metrics_tab(self):
+        """创建查询性能选项卡"""
+        widget = QWidget()
+        layout = QVBoxLayout()
+
+        # 工具栏
+        toolbar = QHBoxLayout()
+        toolbar.addWidget(QLabel('排序：'))
+        self.query_order_combo = QComboBox()
+        for text, key in [('总耗时', 'total_time'), ('调用次数', 'count'), ('平均耗时', 'avg_time'),
+                          ('最大耗时', 'max_time'), ('行数', 'rows')]:
+            self.query_order_combo.addItem(text, key)
+        self.query_order_combo.currentIndexChanged.connect(self.load_query_metrics)
+        toolbar.addWidget(self.query_order_combo)
+
+        refresh_btn = QPushButton('🔄 刷新')
+        refresh_btn.clicked.connect(self.load_query_metrics)
+        toolbar.addWidget(refresh_btn)
+
+        reset_btn = QPushButton('🗑️ 清空统计')
+        reset_btn.clicked.connect(self.reset_query_metrics)
+        toolbar.addWidget(reset_btn)
+        toolbar.addStretch()
+
+        self.query_status_label = QLabel()
+        self.query_status_label.setStyleSheet('color: #7f8c8d;')
+        toolbar.addWidget(self.query_status_label)
+        layout.addLayout(toolbar)
+
+        # 查询指纹表格
+        self.query_metrics_table = QTableWidget()
+        self.query_metrics_table.setColumnCount(8)
+        self.query_metrics_table.setHorizontalHeaderLabels(
+            ['SQL指纹', '次数', '总耗时', '平均耗时', '最大耗时', '行数', '慢查询', '主要调用方'])
+        header = self.query_metrics_table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.query_metrics_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.query_metrics_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        layout.addWidget(self.query_metrics_table)
+
+        widget.setLayout(layout)
+        self.tab_widget.currentChanged.connect(
+            lambda index: self.load_query_metrics() if self.tab_widget.widget(index) is widget else None)
+        return widget
+
+    def load_query_metrics(self):
+        """加载本进程的查询统计"""
+        items = query_metrics.top(limit=100, order_by=self.query_order_combo.currentData())
+        self.query_metrics_table.setRowCount(len(items))
+        for i, item in enumerate(items):
+            callers = ', '.join(f"{caller} ×{count}" for caller, count in item['callers'])
+            values = [
+                item['fingerprint'],
+                str(item['count']),
+                f"{item['total_time'] * 1000:.1f} ms",
+                f"{item['avg_time'] * 1000:.2f} ms",
+                f"{item['max_time'] * 1000:.2f} ms",
+                str(item['rows']),
+                str(item['slow']),
+                callers
+            ]
+            for j, value in enumerate(values):
+                cell = QTableWidgetItem(value)
+                if j in (0, 7):
+                    cell.setToolTip(value)
+                self.query_metrics_table.setItem(i, j, cell)
+
+        pool = db_service.get_pool_metrics()
+        self.query_status_label.setText(
+            f"慢查询阈值 {query_metrics.slow_threshold * 1000:.0f} ms | "
+            f"连接池 使用中 {pool['in_use']}/{pool['max_size']} 空闲 {pool['idle']} | "
+            f"更新于 {datetime.now().strftime('%H:%M:%S')}")
+
+    def reset_query_metrics(self):
+        """清空查询统计"""
+        query_metrics.reset()
+        self.load_query_metrics()
+
     def create_feedback_management_tab(self):
         """创建反馈管理选项卡"""
         from ui.admin.feedback_management import FeedbackManagementDialog
@@ -268,76 +532,55 @@ class AdminDashboard(QMainWindow):
             system_logger.error(f"加载模型数据失败: {str(e)}")
             QMessageBox.warning(self, "错误", f"加载模型数据失败: {str(e)}")
 
-    def load_logs(self):
-        """加载日志"""
-        try:
-            log_type = self.log_type_combo.currentText()
-
-            # 清空表格
-            self.log_table.clearContents()
-            self.log_table.setRowCount(0)
-
-            if log_type == '登录日志':
-                logs = auth_service.get_login_logs()
-                self.log_table.setColumnCount(5)
-                self.log_table.setHorizontalHeaderLabels(['ID', '用户名', '登录时间', 'IP地址', '状态'])
-                self.log_table.setRowCount(len(logs))
-
-                for i, log in enumerate(logs):
-                    self.log_table.setItem(i, 0, QTableWidgetItem(str(log['id'])))
-                    self.log_table.setItem(i, 1, QTableWidgetItem(log['username']))
-                    self.log_table.setItem(i, 2, QTableWidgetItem(str(log['login_time'])))
-                    self.log_table.setItem(i, 3, QTableWidgetItem(log.get('ip_address', '')))
-                    self.log_table.setItem(i, 4, QTableWidgetItem(log['status']))
-
-            elif log_type == '推理日志':
-                logs = db_service.execute_query("SELECT * FROM inference_logs ORDER BY created_at DESC LIMIT 100")
-                self.log_table.setColumnCount(6)
-                self.log_table.setHorizontalHeaderLabels(['ID', '用户ID', '模型', '数据源', '检测数', '推理时间'])
-                self.log_table.setRowCount(len(logs))
-
-                for i, log in enumerate(logs):
-                    self.log_table.setItem(i, 0, QTableWidgetItem(str(log['id'])))
-                    self.log_table.setItem(i, 1, QTableWidgetItem(str(log['user_id'])))
-                    self.log_table.setItem(i, 2, QTableWidgetItem(log.get('model_name', '')))
-                    self.log_table.setItem(i, 3, QTableWidgetItem(log.get('source_type', '')))
-                    self.log_table.setItem(i, 4, QTableWidgetItem(str(log.get('detections', 0))))
-                    self.log_table.setItem(i, 5, QTableWidgetItem(f"{log.get('inference_time', 0):.3f}s"))
-
-            elif log_type == '训练日志':
-                logs = db_service.execute_query("SELECT * FROM training_logs ORDER BY start_time DESC LIMIT 100")
-                self.log_table.setColumnCount(7)
-                self.log_table.setHorizontalHeaderLabels(['ID', '用户ID', '模型', '数据集', '状态', '开始时间', '最终mAP'])
-                self.log_table.setRowCount(len(logs))
-
-                for i, log in enumerate(logs):
-                    self.log_table.setItem(i, 0, QTableWidgetItem(str(log['id'])))
-                    self.log_table.setItem(i, 1, QTableWidgetItem(str(log['user_id'])))
-                    self.log_table.setItem(i, 2, QTableWidgetItem(log.get('model_name', '')))
-                    self.log_table.setItem(i, 3, QTableWidgetItem(log.get('dataset_path', '')))
-                    self.log_table.setItem(i, 4, QTableWidgetItem(log.get('status', '')))
-                    self.log_table.setItem(i, 5, QTableWidgetItem(str(log['start_time'])))
-                    self.log_table.setItem(i, 6, QTableWidgetItem(str(log.get('final_map', 'N/A'))))
-
-            elif log_type == '系统日志':
-                logs = db_service.execute_query("SELECT * FROM system_logs ORDER BY created_at DESC LIMIT 100")
-                self.log_table.setColumnCount(5)
-                self.log_table.setHorizontalHeaderLabels(['ID', '级别', '模块', '消息', '时间'])
-                self.log_table.setRowCount(len(logs))
-
-                for i, log in enumerate(logs):
-                    self.log_table.setItem(i, 0, QTableWidgetItem(str(log['id'])))
-                    self.log_table.setItem(i, 1, QTableWidgetItem(log.get('level', '')))
-                    self.log_table.setItem(i, 2, QTableWidgetItem(log.get('module', '')))
-                    self.log_table.setItem(i, 3, QTableWidgetItem(log.get('message', '')))
-                    self.log_table.setItem(i, 4, QTableWidgetItem(str(log['created_at'])))
-
-            self.log_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+    def update_log_status_options(self):
+        """根据日志类型更新状态过滤选项"""
+        spec = LOG_SOURCES[self.log_type_combo.currentData()]
+        self.log_status_combo.blockSignals(True)
+        self.log_status_combo.clear()
+        self.log_status_combo.addItem('全部', None)
+        for option in spec['status_options']:
+            self.log_status_combo.addItem(option, option)
+        self.log_status_combo.blockSignals(False)
+
+    def get_log_filters(self) -> dict:
+        """获取日志过滤条件"""
+        return {
+            'keyword': self.log_search_input.text().strip(),
+            'status': self.log_status_combo.currentData()
+        }
+
+    def on_log_type_changed(self):
+        """切换日志类型"""
+        self.update_log_status_options()
+        self.log_model.set_source(self.log_type_combo.currentData(), self.get_log_filters())
+        header = self.log_table.horizontalHeader()
+        header.blockSignals(True)
+        header.setSortIndicator(self.log_model.sort_section(), Qt.SortOrder.DescendingOrder)
+        header.blockSignals(False)
+
+    def on_log_sort_changed(self, section, order):
+        """不支持排序的列恢复原来的排序标记"""
+        if section != self.log_model.sort_section():
+            header = self.log_table.horizontalHeader()
+            header.blockSignals(True)
+            header.setSortIndicator(
+                self.log_model.sort_section(),
+                Qt.SortOrder.DescendingOrder if self.log_model.descending else Qt.SortOrder.AscendingOrder
+            )
+            header.blockSignals(False)
+
+    def on_log_page_loaded(self, loaded, has_more):
+        """更新已加载行数"""
+        suffix = '（滚动加载更多）' if has_more else ''
+        self.log_count_label.setText(f'已加载 {loaded} 条{suffix}')
+
+    def on_log_load_failed(self, error):
+        """日志加载失败"""
+        QMessageBox.warning(self, "错误", f"加载日志失败: {error}")
 
-        except Exception as e:
-            from utils import system_logger
-            system_logger.error(f"加载日志失败: {str(e)}")
-            QMessageBox.warning(self, "错误", f"加载日志失败: {str(e)}")
+    def load_logs(self):
+        """按当前过滤条件重新加载日志"""
+        self.log_model.set_filters(self.get_log_filters())
 
     def add_user_dialog(self):
         """添加用户对话框"""
@@ -395,7 +638,7 @@ class AdminDashboard(QMainWindow):
                 QMessageBox.information(self, '成功', '模型删除成功')
 
     def export_logs(self):
-        """导出日志"""
-        file_path, _ = QFileDialog.getSaveFileName(self, '导出日志', '', 'CSV Files (*.csv)')
-        if file_path:
-            QMessageBox.information(self, '成功', f'日志导出到: {file_path}')
+        """导出日志（按时间范围/用户流式导出为 CSV 或 Parquet）"""
+        from ui.admin.log_export_dialog import LogExportDialog
+        dialog = LogExportDialog(self.log_type_combo.currentData(), self.get_log_filters(), self)
+        dialog.exec()
@@ -6,12 +6,14 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                           QPushButton, QTableWidget, QTableWidgetItem, 
                           QHeaderView, QMessageBox, QTextEdit, QComboBox,
-                          QDialog, QFormLayout, QSplitter)
-from PyQt6.QtCore import Qt, QDateTime
+                          QDialog, QFormLayout, QSplitter, QLineEdit)
+from collections import OrderedDict
+from PyQt6.QtCore import Qt, QDateTime, QTimer
 from PyQt6.QtGui import QFont
-from services import feedback_service
+from services import feedback_service, FEEDBACK_CATEGORIES, FEEDBACK_STATUSES
 from utils import system_logger
 from datetime import datetime
+import config
 
 class FeedbackManagementDialog(QDialog):
     """反馈管理对话框"""
@@ -19,6 +21,12 @@ class FeedbackManagementDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.current_feedback_id = None
+        # 列表分页游标
+        self._cursor = None
+        self._has_more = False
+        # 反馈详情缓存（LRU），重复点击同一条反馈不再查询数据库
+        self._detail_cache = OrderedDict()
+        self._detail_cache_size = config.FEEDBACK_CONFIG['detail_cache_size']
         self.init_ui()
         self.load_feedbacks()
 
@@ -92,10 +100,36 @@ class FeedbackManagementDialog(QDialog):
         left_widget = QWidget()
         left_layout = QVBoxLayout()
 
-        # 刷新按钮
+        # 过滤条件与刷新按钮
+        filter_layout = QHBoxLayout()
+        self.status_filter_combo = QComboBox()
+        self.status_filter_combo.addItem('全部状态', None)
+        for status, text in FEEDBACK_STATUSES.items():
+            self.status_filter_combo.addItem(text, status)
+        self.status_filter_combo.currentIndexChanged.connect(self.load_feedbacks)
+        filter_layout.addWidget(self.status_filter_combo)
+
+        self.category_filter_combo = QComboBox()
+        self.category_filter_combo.addItem('全部类型', None)
+        for category in FEEDBACK_CATEGORIES:
+            self.category_filter_combo.addItem(category, category)
+        self.category_filter_combo.currentIndexChanged.connect(self.load_feedbacks)
+        filter_layout.addWidget(self.category_filter_combo)
+
         refresh_btn = QPushButton('🔄 刷新列表')
         refresh_btn.clicked.connect(self.load_feedbacks)
-        left_layout.addWidget(refresh_btn)
+        filter_layout.addWidget(refresh_btn)
+        left_layout.addLayout(filter_layout)
+
+        # 搜索框（输入停止后按相关度搜索标题和内容）
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText('🔍 搜索反馈标题或内容...')
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(config.SEARCH_CONFIG['debounce_ms'])
+        self.search_timer.timeout.connect(self.load_feedbacks)
+        self.search_input.textChanged.connect(lambda _: self.search_timer.start())
+        left_layout.addWidget(self.search_input)
 
         # 反馈表格
         self.feedback_table = QTableWidget()
@@ -107,8 +141,21 @@ class FeedbackManagementDialog(QDialog):
         self.feedback_table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
         self.feedback_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
         self.feedback_table.itemSelectionChanged.connect(self.on_feedback_selected)
+        # 滚动到底部时自动加载下一页
+        self.feedback_table.verticalScrollBar().valueChanged.connect(self.on_table_scrolled)
         left_layout.addWidget(self.feedback_table)
 
+        # 分页信息
+        more_layout = QHBoxLayout()
+        self.count_label = QLabel()
+        self.count_label.setStyleSheet('color: #7f8c8d; font-weight: normal;')
+        more_layout.addWidget(self.count_label)
+        more_layout.addStretch()
+        self.load_more_btn = QPushButton('加载更多')
+        self.load_more_btn.clicked.connect(self.load_more_feedbacks)
+        more_layout.addWidget(self.load_more_btn)
+        left_layout.addLayout(more_layout)
+
         left_widget.setLayout(left_layout)
         splitter.addWidget(left_widget)
 
@@ -143,7 +190,7 @@ class FeedbackManagementDialog(QDialog):
 
         # 状态
         self.status_combo = QComboBox()
-        self.status_combo.addItems(['待处理', '处理中', '已解决', '已关闭'])
+        self.status_combo.addItems(list(FEEDBACK_STATUSES.values()))
         self.status_combo.currentTextChanged.connect(self.on_status_changed)
         form_layout.addRow('状态:', self.status_combo)
 
@@ -195,52 +242,142 @@ class FeedbackManagementDialog(QDialog):
         self.setLayout(layout)
 
     def load_feedbacks(self):
-        """加载反馈列表"""
-        try:
-            feedbacks = feedback_service.get_all_feedbacks()
-
-            self.feedback_table.setRowCount(0)
-
-            for row, feedback in enumerate(feedbacks):
-                self.feedback_table.insertRow(row)
-
-                # ID
-                self.feedback_table.setItem(row, 0, QTableWidgetItem(str(feedback['id'])))
-
-                # 标题
-                title = feedback['title']
-                if len(title) > 30:
-                    title = title[:30] + '...'
-                self.feedback_table.setItem(row, 1, QTableWidgetItem(title))
-
-                # 用户
-                username = feedback.get('username', '未知')
-                self.feedback_table.setItem(row, 2, QTableWidgetItem(username))
-
-                # 类型
-                category = feedback.get('category', '-')
-                self.feedback_table.setItem(row, 3, QTableWidgetItem(category))
-
-                # 状态
-                status = feedback['status']
-                status_text = {
-                    'pending': '待处理',
-                    'processing': '处理中',
-                    'resolved': '已解决',
-                    'closed': '已关闭'
-                }.get(status, status)
-                self.feedback_table.setItem(row, 4, QTableWidgetItem(status_text))
-
-                # 提交时间
-                created_time = feedback['created_at']
-                if isinstance(created_time, datetime):
-                    created_time = created_time.strftime('%Y-%m-%d %H:%M')
-                self.feedback_table.setItem(row, 5, QTableWidgetItem(created_time))
-
-            system_logger.info(f"加载了 {len(feedbacks)} 条反馈记录")
-        except Exception as e:
-            system_logger.error(f"加载反馈列表失败: {str(e)}")
-            QMessageBox.critical(self, '错误', f'加载反馈列表失败：{str(e)}')
+        """按当前过滤条件重新加载反馈列表（第一页）；有搜索关键词时显示搜索结果"""
+        self.search_timer.stop()
+        self.feedback_table.setRowCount(0)
+        self._cursor = None
+        self._has_more = True
+        self._detail_cache.clear()
+
+        keyword = self.search_input.text().strip()
+        if keyword:
+            self.search_feedbacks(keyword)
+        else:
+            self.load_more_feedbacks()
+
+    def search_feedbacks(self, keyword):
+        """
+        搜索反馈（按相关度排序，不分页）
+
+        Args:
+            keyword: 搜索关键词
+        """
+        feedbacks = feedback_service.search_feedbacks(
+            keyword,
+            status=self.status_filter_combo.currentData(),
+            category=self.category_filter_combo.currentData()
+        )
+        self._has_more = False
+
+        self.feedback_table.blockSignals(True)
+        self.feedback_table.setRowCount(len(feedbacks))
+        for row, feedback in enumerate(feedbacks):
+            self.set_feedback_row(row, feedback)
+        self.feedback_table.blockSignals(False)
+
+        self.load_more_btn.setEnabled(False)
+        self.count_label.setText(f'搜索到 {len(feedbacks)} 条')
+
+    def load_more_feedbacks(self):
+        """加载下一页反馈"""
+        if not self._has_more:
+            return
+
+        result = feedback_service.list_feedbacks(
+            status=self.status_filter_combo.currentData(),
+            category=self.category_filter_combo.currentData(),
+            cursor=self._cursor
+        )
+        if not result['success']:
+            self._has_more = False
+            QMessageBox.critical(self, '错误', f"加载反馈列表失败：{result['error']}")
+            return
+
+        self._cursor = result['cursor']
+        self._has_more = self._cursor is not None
+
+        self.feedback_table.blockSignals(True)
+        for feedback in result['feedbacks']:
+            row = self.feedback_table.rowCount()
+            self.feedback_table.insertRow(row)
+            self.set_feedback_row(row, feedback)
+        self.feedback_table.blockSignals(False)
+
+        self.load_more_btn.setEnabled(self._has_more)
+        suffix = '（滚动加载更多）' if self._has_more else ''
+        self.count_label.setText(f'已加载 {self.feedback_table.rowCount()} 条{suffix}')
+
+    def set_feedback_row(self, row, feedback):
+        """
+        填充列表中的一行
+
+        Args:
+            row: 行号
+            feedback: 反馈摘要或详情
+        """
+        # ID
+        self.feedback_table.setItem(row, 0, QTableWidgetItem(str(feedback['id'])))
+
+        # 标题
+        title = feedback['title']
+        if len(title) > 30:
+            title = title[:30] + '...'
+        self.feedback_table.setItem(row, 1, QTableWidgetItem(title))
+
+        # 用户
+        self.feedback_table.setItem(row, 2, QTableWidgetItem(feedback.get('username') or '未知'))
+
+        # 类型
+        self.feedback_table.setItem(row, 3, QTableWidgetItem(feedback.get('category') or '-'))
+
+        # 状态
+        status = feedback['status']
+        self.feedback_table.setItem(row, 4, QTableWidgetItem(FEEDBACK_STATUSES.get(status, status)))
+
+        # 提交时间
+        created_time = feedback['created_at']
+        if isinstance(created_time, datetime):
+            created_time = created_time.strftime('%Y-%m-%d %H:%M')
+        self.feedback_table.setItem(row, 5, QTableWidgetItem(str(created_time)))
+
+    def find_feedback_row(self, feedback_id) -> int:
+        """查找反馈所在行，未加载时返回 -1"""
+        for row in range(self.feedback_table.rowCount()):
+            item = self.feedback_table.item(row, 0)
+            if item and int(item.text()) == feedback_id:
+                return row
+        return -1
+
+    def on_table_scrolled(self, value):
+        """滚动到底部时加载下一页"""
+        if self._has_more and value >= self.feedback_table.verticalScrollBar().maximum():
+            self.load_more_feedbacks()
+
+    def get_feedback_detail(self, feedback_id, refresh: bool = False):
+        """
+        获取反馈详情（优先使用缓存）
+
+        Args:
+            feedback_id: 反馈ID
+            refresh: 是否忽略缓存重新查询
+
+        Returns:
+            Optional[Dict]: 反馈详情
+        """
+        if not refresh and feedback_id in self._detail_cache:
+            self._detail_cache.move_to_end(feedback_id)
+            return self._detail_cache[feedback_id]
+
+        feedback = feedback_service.get_feedback_by_id(feedback_id)
+        if feedback is None:
+            self._detail_cache.pop(feedback_id, None)
+            return None
+
+        self._detail_cache[feedback_id] = feedback
+        self._detail_cache.move_to_end(feedback_id)
+        while len(self._detail_cache) > self._detail_cache_size:
+            self._detail_cache.popitem(last=False)
+        return feedback
 
     def on_feedback_selected(self):
         """反馈选择事件"""
@@ -251,9 +388,8 @@ class FeedbackManagementDialog(QDialog):
         try:
             feedback_id = int(self.feedback_table.item(current_row, 0).text())
 
-            # 获取详细信息
-            feedbacks = feedback_service.get_all_feedbacks(limit=1000)  # 获取所有反馈
-            feedback = next((f for f in feedbacks if f['id'] == feedback_id), None)
+            # 获取详细信息（主键查询，已查看过的反馈直接使用缓存）
+            feedback = self.get_feedback_detail(feedback_id)
 
             if not feedback:
                 return
@@ -262,47 +398,48 @@ class FeedbackManagementDialog(QDialog):
 
             # 更新详情
             self.title_label.setText(feedback['title'])
-            self.user_label.setText(feedback.get('username', '未知'))
-            self.category_label.setText(feedback.get('category', '-'))
-            self.email_label.setText(feedback.get('email', '-'))
+            self.user_label.setText(feedback.get('username') or '未知')
+            self.category_label.setText(feedback.get('category') or '-')
+            self.email_label.setText(feedback.get('email') or '-')
 
-            # 状态
+            # 状态（仅显示，不触发状态更新）
             status = feedback['status']
-            status_index = {
-                'pending': 0,
-                'processing': 1,
-                'resolved': 2,
-                'closed': 3
-            }.get(status, 0)
+            status_index = list(FEEDBACK_STATUSES).index(status) if status in FEEDBACK_STATUSES else 0
+            self.status_combo.blockSignals(True)
             self.status_combo.setCurrentIndex(status_index)
+            self.status_combo.blockSignals(False)
 
             # 时间
             created_time = feedback['created_at']
             if isinstance(created_time, datetime):
                 created_time = created_time.strftime('%Y-%m-%d %H:%M:%S')
-            self.created_time_label.setText(created_time)
+            self.created_time_label.setText(str(created_time))
 
             # 内容
             self.content_text.setText(feedback['content'])
 
             # 回复
-            self.response_text.setText(feedback.get('response', ''))
+            self.response_text.setText(feedback.get('response') or '')
 
         except Exception as e:
             system_logger.error(f"加载反馈详情失败: {str(e)}")
             QMessageBox.critical(self, '错误', f'加载反馈详情失败：{str(e)}')
 
+    def refresh_feedback(self, feedback_id):
+        """反馈更新后重新查询该条详情并刷新所在行（不重新加载整个列表）"""
+        feedback = self.get_feedback_detail(feedback_id, refresh=True)
+        row = self.find_feedback_row(feedback_id)
+        if feedback and row >= 0:
+            self.feedback_table.blockSignals(True)
+            self.set_feedback_row(row, feedback)
+            self.feedback_table.blockSignals(False)
+
     def on_status_changed(self, status_text):
         """状态改变事件"""
         if not self.current_feedback_id:
             return
 
-        status_map = {
-            '待处理': 'pending',
-            '处理中': 'processing',
-            '已解决': 'resolved',
-            '已关闭': 'closed'
-        }
+        status_map = {text: status for status, text in FEEDBACK_STATUSES.items()}
 
         status = status_map.get(status_text, 'pending')
 
@@ -314,7 +451,7 @@ class FeedbackManagementDialog(QDialog):
 
             if success:
                 system_logger.info(f"反馈状态更新成功: id={self.current_feedback_id}, status={status}")
-                self.load_feedbacks()  # 刷新列表
+                self.refresh_feedback(self.current_feedback_id)
             else:
                 QMessageBox.warning(self, '警告', '状态更新失败')
         except Exception as e:
@@ -330,12 +467,7 @@ class FeedbackManagementDialog(QDialog):
         response = self.response_text.toPlainText().strip()
 
         try:
-            status_map = {
-                '待处理': 'pending',
-                '处理中': 'processing',
-                '已解决': 'resolved',
-                '已关闭': 'closed'
-            }
+            status_map = {text: status for status, text in FEEDBACK_STATUSES.items()}
 
             status = status_map.get(self.status_combo.currentText(), 'processing')
 
@@ -347,7 +479,7 @@ class FeedbackManagementDialog(QDialog):
 
             if success:
                 QMessageBox.information(self, '成功', '回复已保存')
-                self.load_feedbacks()  # 刷新列表
+                self.refresh_feedback(self.current_feedback_id)
             else:
                 QMessageBox.warning(self, '警告', '保存回复失败')
         except Exception as e:
@@ -375,7 +507,13 @@ class FeedbackManagementDialog(QDialog):
 
             if success:
                 QMessageBox.information(self, '成功', '反馈已删除')
-                self.load_feedbacks()  # 刷新列表
+                self._detail_cache.pop(self.current_feedback_id, None)
+                row = self.find_feedback_row(self.current_feedback_id)
+                if row >= 0:
+                    self.feedback_table.blockSignals(True)
+                    self.feedback_table.removeRow(row)
+                    self.feedback_table.blockSignals(False)
+                    self.count_label.setText(f'已加载 {self.feedback_table.rowCount()} 条')
 
                 # 清空详情
                 self.current_feedback_id = None
@@ -383,7 +521,9 @@ class FeedbackManagementDialog(QDialog):
                 self.user_label.setText('-')
                 self.category_label.setText('-')
                 self.email_label.setText('-')
+                self.status_combo.blockSignals(True)
                 self.status_combo.setCurrentIndex(0)
+                self.status_combo.blockSignals(False)
                 self.created_time_label.setText('-')
                 self.content_text.clear()
                 self.response_text.clear()
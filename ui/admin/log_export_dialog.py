@@ -0,0 +1,257 @@
+"""
+日志导出对话框
+选择日志类型、时间范围、用户和导出格式，在后台线程中流式导出并显示进度，可随时取消
+"""
+import threading
+from datetime import datetime, time as dt_time, timedelta
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel, QPushButton,
+                             QComboBox, QDateEdit, QCheckBox, QLineEdit, QProgressBar,
+                             QFileDialog, QMessageBox)
+from PyQt6.QtCore import QThread, QDate, pyqtSignal
+from services import auth_service, log_export_service, LOG_SOURCES, EXPORT_FORMATS, parquet_available
+
+
+class LogExportWorker(QThread):
+    """日志导出工作线程"""
+    progress = pyqtSignal(int, int)  # 已导出行数, 总行数
+    export_finished = pyqtSignal(dict)  # 导出结果
+
+    def __init__(self, source, path, fmt, filters):
+        super().__init__()
+        self.source = source
+        self.path = path
+        self.fmt = fmt
+        self.filters = filters
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        """执行导出"""
+        result = log_export_service.export(
+            self.source,
+            self.path,
+            fmt=self.fmt,
+            filters=self.filters,
+            progress_callback=self.progress.emit,
+            cancel_event=self.cancel_event
+        )
+        self.export_finished.emit(result)
+
+    def cancel(self):
+        """请求取消导出（当前批次写完后停止）"""
+        self.cancel_event.set()
+
+
+class LogExportDialog(QDialog):
+    """日志导出对话框"""
+
+    def __init__(self, source: str = 'login', filters: dict = None, parent=None):
+        """
+        初始化对话框
+
+        Args:
+            source: 默认日志类型
+            filters: 日志查看器当前的过滤条件（状态、关键字会一并应用）
+            parent: 父窗口
+        """
+        super().__init__(parent)
+        self.view_filters = {key: value for key, value in (filters or {}).items()
+                             if key in ('status', 'keyword') and value}
+        self.worker = None
+        self.init_ui(source)
+
+    def init_ui(self, source):
+        """初始化UI"""
+        self.setWindowTitle('导出日志')
+        self.setMinimumWidth(520)
+
+        layout = QVBoxLayout()
+        form = QFormLayout()
+
+        self.source_combo = QComboBox()
+        for key, spec in LOG_SOURCES.items():
+            self.source_combo.addItem(spec['title'], key)
+        self.source_combo.setCurrentIndex(max(self.source_combo.findData(source), 0))
+        self.source_combo.currentIndexChanged.connect(self.on_source_changed)
+        form.addRow('日志类型：', self.source_combo)
+
+        # 时间范围（按日期，结束日期包含当天）
+        range_layout = QHBoxLayout()
+        self.range_check = QCheckBox('限定')
+        self.range_check.setChecked(True)
+        range_layout.addWidget(self.range_check)
+        today = QDate.currentDate()
+        self.start_date_edit = QDateEdit(today.addMonths(-3))
+        self.start_date_edit.setCalendarPopup(True)
+        self.start_date_edit.setDisplayFormat('yyyy-MM-dd')
+        range_layout.addWidget(self.start_date_edit)
+        range_layout.addWidget(QLabel('至'))
+        self.end_date_edit = QDateEdit(today)
+        self.end_date_edit.setCalendarPopup(True)
+        self.end_date_edit.setDisplayFormat('yyyy-MM-dd')
+        range_layout.addWidget(self.end_date_edit)
+        self.range_check.toggled.connect(self.start_date_edit.setEnabled)
+        self.range_check.toggled.connect(self.end_date_edit.setEnabled)
+        form.addRow('时间范围：', range_layout)
+
+        self.user_combo = QComboBox()
+        self.user_combo.addItem('全部用户', None)
+        for user in auth_service.get_all_users():
+            self.user_combo.addItem(f"{user['username']} (ID {user['id']})", user['id'])
+        form.addRow('用户：', self.user_combo)
+
+        self.format_combo = QComboBox()
+        for fmt, (title, _) in EXPORT_FORMATS.items():
+            self.format_combo.addItem(title, fmt)
+        if not parquet_available():
+            index = self.format_combo.findData('parquet')
+            self.format_combo.model().item(index).setEnabled(False)
+            self.format_combo.setItemText(index, 'Parquet 文件（需安装 pyarrow）')
+        self.format_combo.currentIndexChanged.connect(self.on_format_changed)
+        form.addRow('格式：', self.format_combo)
+
+        path_layout = QHBoxLayout()
+        self.path_input = QLineEdit()
+        path_layout.addWidget(self.path_input)
+        browse_btn = QPushButton('浏览...')
+        browse_btn.clicked.connect(self.browse_path)
+        path_layout.addWidget(browse_btn)
+        form.addRow('保存到：', path_layout)
+
+        layout.addLayout(form)
+
+        if self.view_filters:
+            hint = '，'.join(f"{'状态' if key == 'status' else '关键字'}: {value}"
+                            for key, value in self.view_filters.items())
+            self.filter_label = QLabel(f'同时应用日志查看器的过滤条件（{hint}）')
+            self.filter_label.setStyleSheet('color: #7f8c8d;')
+            layout.addWidget(self.filter_label)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setValue(0)
+        layout.addWidget(self.progress_bar)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        self.export_btn = QPushButton('📥 开始导出')
+        self.export_btn.clicked.connect(self.start_export)
+        button_layout.addWidget(self.export_btn)
+        self.cancel_btn = QPushButton('取消')
+        self.cancel_btn.clicked.connect(self.cancel_or_close)
+        button_layout.addWidget(self.cancel_btn)
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+        self.update_default_path()
+
+    def on_source_changed(self):
+        """切换日志类型（查看器的过滤条件只适用于原日志类型）"""
+        self.view_filters = {}
+        if hasattr(self, 'filter_label'):
+            self.filter_label.hide()
+        self.update_default_path()
+
+    def on_format_changed(self):
+        """切换格式时同步修改文件后缀"""
+        path = self.path_input.text().strip()
+        if path:
+            suffix = EXPORT_FORMATS[self.format_combo.currentData()][1]
+            base = path.rsplit('.', 1)[0] if '.' in path.rsplit('/', 1)[-1] else path
+            self.path_input.setText(base + suffix)
+
+    def update_default_path(self):
+        """生成默认文件名"""
+        source = self.source_combo.currentData()
+        suffix = EXPORT_FORMATS[self.format_combo.currentData()][1]
+        self.path_input.setText(f"{LOG_SOURCES[source]['table']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}")
+
+    def browse_path(self):
+        """选择保存路径"""
+        fmt = self.format_combo.currentData()
+        title, suffix = EXPORT_FORMATS[fmt]
+        file_path, _ = QFileDialog.getSaveFileName(self, '导出日志', self.path_input.text(), f'{title} (*{suffix})')
+        if file_path:
+            self.path_input.setText(file_path)
+
+    def get_filters(self) -> dict:
+        """
+        获取导出过滤条件
+
+        Returns:
+            dict: {status, keyword, user_id, start_time, end_time}
+        """
+        filters = dict(self.view_filters)
+        if self.user_combo.currentData() is not None:
+            filters['user_id'] = self.user_combo.currentData()
+        if self.range_check.isChecked():
+            start_date = self.start_date_edit.date().toPyDate()
+            end_date = self.end_date_edit.date().toPyDate()
+            filters['start_time'] = datetime.combine(start_date, dt_time.min)
+            filters['end_time'] = datetime.combine(end_date + timedelta(days=1), dt_time.min)
+        return filters
+
+    def start_export(self):
+        """开始导出"""
+        path = self.path_input.text().strip()
+        if not path:
+            QMessageBox.warning(self, '提示', '请选择保存路径')
+            return
+        if self.range_check.isChecked() and self.start_date_edit.date() > self.end_date_edit.date():
+            QMessageBox.warning(self, '提示', '开始日期不能晚于结束日期')
+            return
+
+        self.worker = LogExportWorker(self.source_combo.currentData(), path,
+                                      self.format_combo.currentData(), self.get_filters())
+        self.worker.progress.connect(self.on_progress)
+        self.worker.export_finished.connect(self.on_export_finished)
+
+        self.export_btn.setEnabled(False)
+        self.cancel_btn.setText('停止导出')
+        self.progress_bar.setValue(0)
+        self.status_label.setText('正在统计记录数...')
+        self.worker.start()
+
+    def on_progress(self, exported, total):
+        """更新进度"""
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(exported)
+        self.status_label.setText(f'已导出 {exported:,} / {total:,} 条')
+
+    def on_export_finished(self, result):
+        """导出完成"""
+        self.worker = None
+        self.export_btn.setEnabled(True)
+        self.cancel_btn.setText('关闭')
+
+        if result['success']:
+            self.status_label.setText(f"导出完成，共 {result['rows']:,} 条")
+            QMessageBox.information(self, '成功', f"已导出 {result['rows']:,} 条日志到:\n{result['path']}")
+        elif result.get('cancelled'):
+            self.progress_bar.setValue(0)
+            self.status_label.setText('导出已取消')
+        else:
+            self.status_label.setText('导出失败')
+            QMessageBox.warning(self, '错误', f"导出日志失败: {result['error']}")
+
+    def cancel_or_close(self):
+        """导出中则取消导出，否则关闭对话框"""
+        if self.worker is not None:
+            self.status_label.setText('正在停止...')
+            self.worker.cancel()
+        else:
+            self.reject()
+
+    def closeEvent(self, event):
+        """关闭时停止正在进行的导出"""
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().closeEvent(event)
+
+    def reject(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().reject()
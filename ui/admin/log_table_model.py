@@ -0,0 +1,159 @@
+"""
+日志表格模型
+基于 QAbstractTableModel 的按需分页加载模型，视图滚动到底部时才查询下一页
+"""
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from services import log_query_service, LOG_SOURCES
+
+
+class LogTableModel(QAbstractTableModel):
+    """日志表格模型"""
+
+    # 已加载行数, 是否还有更多数据
+    page_loaded = pyqtSignal(int, bool)
+    # 错误信息
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, source: str = 'login', parent=None):
+        """
+        初始化模型
+
+        Args:
+            source: 日志类型（login / inference / training / system）
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.source = source
+        self.filters = {}
+        self.sort_column = LOG_SOURCES[source]['time_column']
+        self.descending = True
+
+        self._rows = []
+        self._cursor = None
+        self._has_more = True
+
+    @property
+    def columns(self):
+        return LOG_SOURCES[self.source]['columns']
+
+    @property
+    def loaded_count(self) -> int:
+        return len(self._rows)
+
+    def set_source(self, source: str, filters: dict = None):
+        """
+        切换日志类型（重置排序与过滤条件）
+
+        Args:
+            source: 日志类型
+            filters: 过滤条件
+        """
+        self.source = source
+        self.sort_column = LOG_SOURCES[source]['time_column']
+        self.descending = True
+        self.filters = filters or {}
+        self.refresh()
+
+    def set_filters(self, filters: dict):
+        """
+        设置过滤条件并重新加载
+
+        Args:
+            filters: 过滤条件 {keyword, status, user_id, start_time, end_time}
+        """
+        self.filters = filters or {}
+        self.refresh()
+
+    def refresh(self):
+        """清空已加载数据并重新加载第一页"""
+        self.beginResetModel()
+        self._rows = []
+        self._cursor = None
+        self._has_more = True
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def sort_section(self) -> int:
+        """当前排序列对应的表头序号"""
+        keys = [key for key, _ in self.columns]
+        return keys.index(self.sort_column) if self.sort_column in keys else -1
+
+    def row_data(self, row: int) -> dict:
+        """获取某一行的原始数据"""
+        return self._rows[row]
+
+    # ---- QAbstractTableModel 接口 ----
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        key = self.columns[index.column()][0]
+        value = self._rows[index.row()].get(key)
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            text = log_query_service.format_value(self.source, key, value)
+            # 长文本只显示首行，完整内容见悬停提示
+            return text.split('\n', 1)[0]
+        if role == Qt.ItemDataRole.ToolTipRole and isinstance(value, str) and len(value) > 50:
+            return value
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.columns[section][1]
+        return section + 1
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._has_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self._has_more:
+            return
+
+        result = log_query_service.fetch_page(
+            self.source,
+            filters=self.filters,
+            sort_column=self.sort_column,
+            descending=self.descending,
+            cursor=self._cursor
+        )
+        if not result['success']:
+            self._has_more = False
+            self.load_failed.emit(result['error'])
+            return
+
+        rows = result['rows']
+        self._cursor = result['cursor']
+        self._has_more = self._cursor is not None
+
+        if rows:
+            start = len(self._rows)
+            self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+            self._rows.extend(rows)
+            self.endInsertRows()
+
+        self.page_loaded.emit(len(self._rows), self._has_more)
+
+    def sort(self, column, order=Qt.SortOrder.DescendingOrder):
+        """按列排序（仅支持索引列，其余列忽略）"""
+        if column < 0 or column >= len(self.columns):
+            return
+        key = self.columns[column][0]
+        if key not in LOG_SOURCES[self.source]['sort_columns']:
+            return
+
+        descending = order == Qt.SortOrder.DescendingOrder
+        if key == self.sort_column and descending == self.descending:
+            return
+        self.sort_column = key
+        self.descending = descending
+        self.refresh()
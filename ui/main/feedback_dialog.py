@@ -7,7 +7,7 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                           QLineEdit, QTextEdit, QComboBox, QPushButton,
                           QMessageBox, QFormLayout)
 from PyQt6.QtCore import Qt
-from services import feedback_service
+from services import feedback_service, FEEDBACK_CATEGORIES
 from utils import system_logger
 import config
 
@@ -71,9 +71,7 @@ class FeedbackDialog(QDialog):
 
         # 反馈类型
         self.category_combo = QComboBox()
-        self.category_combo.addItems([
-            '功能建议', '界面问题', '功能错误', '性能问题', '其他问题'
-        ])
+        self.category_combo.addItems(FEEDBACK_CATEGORIES)
         form_layout.addRow('反馈类型:', self.category_combo)
 
         # 标题
@@ -7,12 +7,12 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QMessageBox, QGroupBox, QTextEdit, QSpinBox, QDoubleSpinBox,
                              QRadioButton, QButtonGroup, QToolBar, QFrame, QSizePolicy, QMenu,
                              QDialog, QLineEdit, QFormLayout, QDialogButtonBox, QListWidget,
-                             QTableWidget, QTableWidgetItem, QHeaderView)
+                             QTableWidget, QTableWidgetItem, QHeaderView, QCheckBox)
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QThread, QSize
 from PyQt6.QtGui import QImage, QPixmap, QAction, QIcon
 import cv2
 import numpy as np
-from services import inference_engine, model_manager
+from services import inference_engine, model_manager, auth_service
 import config
 from pathlib import Path
 
@@ -21,15 +21,24 @@ class InferenceThread(QThread):
     frame_ready = pyqtSignal(np.ndarray, list, float)
     finished = pyqtSignal()
     
-    def __init__(self, source_type, source, inference_engine, user_info=None, model_name=None):
+    def __init__(self, source_type, source, inference_engine, user_info=None, model_name=None,
+                 export_path=None):
         super().__init__()
         self.source_type = source_type
         self.source = source
         self.engine = inference_engine
         self.user_info = user_info
         self.model_name = model_name
+        self.export_path = export_path
         self.running = True
         
+        # 本次运行上下文（关联推理日志与逐目标检测记录）
+        self.run = inference_engine.new_run(
+            user_id=user_info['id'] if user_info else None,
+            model_name=model_name,
+            source_type=source_type
+        )
+        
         # 统计信息
         self.total_frames = 0
         self.total_detections = 0
@@ -41,9 +50,10 @@ class InferenceThread(QThread):
         self.start_time = time.time()
         
         if self.source_type == 'camera':
-            self.engine.predict_camera(self.source, self.callback)
+            self.engine.predict_camera(self.source, self.callback, run=self.run)
         elif self.source_type == 'video':
-            self.engine.predict_video(self.source, callback=self.callback)
+            self.engine.predict_video(self.source, callback=self.callback, export_path=self.export_path,
+                                      run=self.run)
         
         # 记录日志
         self.log_inference_result()
@@ -79,7 +89,8 @@ class InferenceThread(QThread):
                 source_type=self.source_type,
                 source_path=source_path,
                 detections=avg_detections,
-                inference_time=total_time
+                inference_time=total_time,
+                run_uid=self.run['run_uid']
             )
         except Exception as e:
             from utils import system_logger
@@ -325,6 +336,8 @@ class MainWindow(QMainWindow):
             if self.inference_thread:
                 self.stop_detection()
             
+            auth_service.logout(self.user_info.get('token'))
+            
             # 发送登出信号
             self.logout_signal.emit()
             self.close()
@@ -343,6 +356,7 @@ class MainWindow(QMainWindow):
             if self.inference_thread:
                 self.stop_detection()
             
+            auth_service.logout(self.user_info.get('token'))
             self.close()
             import sys
             sys.exit(0)
@@ -460,6 +474,11 @@ class MainWindow(QMainWindow):
         file_layout.addWidget(select_file_btn)
         source_layout.addLayout(file_layout)
         
+        # 逐帧结果导出（仅视频）
+        self.export_checkbox = QCheckBox('导出逐帧检测结果（视频）')
+        self.export_checkbox.setToolTip(f'结果保存到 {config.RESULTS_DIR}')
+        source_layout.addWidget(self.export_checkbox)
+        
         source_group.setLayout(source_layout)
         layout.addWidget(source_group)
         
@@ -650,7 +669,12 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, '警告', '请先选择图片')
                 return
             
-            result = inference_engine.predict_image(file_path)
+            run = inference_engine.new_run(
+                user_id=self.user_info['id'],
+                model_name=model_name,
+                source_type='image'
+            )
+            result = inference_engine.predict_image(file_path, run=run)
             if result['success']:
                 self.display_image_result(result)
             
@@ -661,10 +685,17 @@ class MainWindow(QMainWindow):
                 QMessageBox.warning(self, '警告', '请先选择视频')
                 return
             
+            export_path = None
+            if self.export_checkbox.isChecked():
+                from datetime import datetime
+                export_name = f'{Path(file_path).stem}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.dets'
+                export_path = str(config.RESULTS_DIR / export_name)
+            
             self.inference_thread = InferenceThread(
                 'video', file_path, inference_engine,
                 user_info=self.user_info,
-                model_name=model_name
+                model_name=model_name,
+                export_path=export_path
             )
             self.inference_thread.frame_ready.connect(self.update_frame)
             self.inference_thread.finished.connect(self.detection_finished)
@@ -749,7 +780,8 @@ class MainWindow(QMainWindow):
                 source_type='image',
                 source_path=source_path,
                 detections=len(result['detections']),
-                inference_time=result['inference_time']
+                inference_time=result['inference_time'],
+                run_uid=result.get('run_uid')
             )
         except Exception as e:
             from utils import system_logger
@@ -759,6 +791,9 @@ class MainWindow(QMainWindow):
         """检测完成"""
         self.start_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
+        
+        if self.inference_thread and self.inference_thread.export_path:
+            self.result_text.append(f'\n逐帧检测结果已导出：{self.inference_thread.export_path}')
     
     def show_stop_feedback(self):
         """显示停止检测的反馈"""
@@ -912,6 +947,10 @@ class MainWindow(QMainWindow):
     
     def open_admin_dashboard(self):
         """打开管理员仪表盘"""
+        # 按会话重新校验角色（角色被修改或账号被禁用后立即生效）
+        if not auth_service.check_permission(self.user_info.get('token'), 'admin'):
+            QMessageBox.warning(self, '权限不足', '当前会话无管理员权限，请重新登录')
+            return
         from ui.admin import AdminDashboard
         self.admin_dashboard = AdminDashboard(self.user_info)
         self.admin_dashboard.show()
@@ -1398,7 +1437,12 @@ class ModelRepositoryDialog(QDialog):
         
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText('输入模型名称、作者或描述进行搜索...')
-        self.search_input.textChanged.connect(self.search_models)
+        # 输入停止后才查询全文索引，避免每次按键都查询数据库
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(config.SEARCH_CONFIG['debounce_ms'])
+        self.search_timer.timeout.connect(lambda: self.search_models(self.search_input.text()))
+        self.search_input.textChanged.connect(lambda _: self.search_timer.start())
         self.search_input.setStyleSheet('''
             QLineEdit {
                 padding: 8px;
@@ -1486,7 +1530,10 @@ class ModelRepositoryDialog(QDialog):
         """加载模型列表"""
         try:
             self.all_models = model_manager.get_all_models()
-            self.display_models(self.all_models)
+            if self.search_input.text().strip():
+                self.search_models(self.search_input.text())
+            else:
+                self.display_models(self.all_models)
         except Exception as e:
             QMessageBox.warning(self, '错误', f'加载模型失败: {str(e)}')
     
@@ -1562,19 +1609,12 @@ class ModelRepositoryDialog(QDialog):
         self.stats_label.setText(f'📊 总计: {len(models)} 个模型')
     
     def search_models(self, keyword):
-        """搜索模型"""
+        """搜索模型（全文检索，按相关度排序）"""
         if not keyword.strip():
             self.display_models(self.all_models)
             return
         
-        keyword = keyword.lower()
-        filtered_models = [
-            model for model in self.all_models
-            if keyword in model['name'].lower() or
-               keyword in (model.get('author') or '').lower() or
-               keyword in (model.get('description') or '').lower()
-        ]
-        self.display_models(filtered_models)
+        self.display_models(model_manager.search_models(keyword))
     
     def view_model(self, model):
         """查看模型详情"""
@@ -0,0 +1,308 @@
+"""
+超参数搜索对话框
+设置搜索空间和逐次减半参数，启动/停止搜索，对比所有组合的逐级 mAP，注册最优模型
+"""
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QGroupBox, QLabel,
+                             QPushButton, QLineEdit, QSpinBox, QDoubleSpinBox, QTableWidget,
+                             QTableWidgetItem, QMessageBox, QSplitter)
+from PyQt6.QtCore import Qt, QTimer
+from services import sweep_service, SWEEP_STATUSES, TRIAL_STATUSES
+from services.sweep_service import rung_budgets
+import config
+
+
+def parse_int_list(text: str) -> list:
+    """解析逗号分隔的整数列表"""
+    return [int(part) for part in text.replace('，', ',').split(',') if part.strip()]
+
+
+class SweepDialog(QDialog):
+    """超参数搜索对话框"""
+
+    def __init__(self, user_info: dict, train_config: dict, parent=None):
+        """
+        初始化对话框
+
+        Args:
+            user_info: 当前用户信息
+            train_config: 训练窗口的当前配置（base_model, data_yaml, batch_size, img_size, lr, project_name）
+            parent: 父窗口
+        """
+        super().__init__(parent)
+        self.user_info = user_info
+        self.train_config = train_config
+        self.init_ui()
+        self.load_sweeps()
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(2000)
+
+    def init_ui(self):
+        """初始化UI"""
+        self.setWindowTitle('超参数搜索')
+        self.resize(1000, 700)
+        layout = QVBoxLayout()
+
+        sweep_config = config.SWEEP_CONFIG
+        space = sweep_config['search_space']
+
+        # 新建搜索
+        new_group = QGroupBox('新建搜索（训练轮数为逐次减半的预算，不参与搜索）')
+        form = QFormLayout()
+
+        self.name_input = QLineEdit(f"{self.train_config.get('project_name') or 'underwater'}_sweep")
+        form.addRow('搜索名称:', self.name_input)
+
+        lr_layout = QHBoxLayout()
+        self.lr_low_input = QDoubleSpinBox()
+        self.lr_high_input = QDoubleSpinBox()
+        for spin_box, value in ((self.lr_low_input, space['lr']['low']), (self.lr_high_input, space['lr']['high'])):
+            spin_box.setDecimals(5)
+            spin_box.setRange(0.00001, 1.0)
+            spin_box.setSingleStep(0.0005)
+            spin_box.setValue(value)
+            lr_layout.addWidget(spin_box)
+        lr_layout.addWidget(QLabel('（对数均匀采样）'))
+        form.addRow('学习率范围:', lr_layout)
+
+        self.batch_input = QLineEdit(', '.join(str(value) for value in space['batch_size']))
+        form.addRow('批次大小候选:', self.batch_input)
+        self.img_size_input = QLineEdit(', '.join(str(value) for value in space['img_size']))
+        form.addRow('图像大小候选:', self.img_size_input)
+
+        budget_layout = QHBoxLayout()
+        self.trials_input = self.create_spin_box(2, 200, sweep_config['num_trials'])
+        self.min_epochs_input = self.create_spin_box(2, 100, sweep_config['min_epochs'])
+        self.max_epochs_input = self.create_spin_box(1, 1000, sweep_config['max_epochs'])
+        self.factor_input = self.create_spin_box(2, 10, sweep_config['reduction_factor'])
+        self.parallel_input = self.create_spin_box(1, 16, sweep_config['parallel'])
+        for label, spin_box in (('组合数', self.trials_input), ('首级轮数', self.min_epochs_input),
+                                ('最大轮数', self.max_epochs_input), ('淘汰倍数', self.factor_input),
+                                ('并行数', self.parallel_input)):
+            budget_layout.addWidget(QLabel(label))
+            budget_layout.addWidget(spin_box)
+            spin_box.valueChanged.connect(self.update_budget_hint)
+        form.addRow('预算:', budget_layout)
+
+        self.budget_label = QLabel()
+        self.budget_label.setStyleSheet('color: #7f8c8d;')
+        form.addRow('', self.budget_label)
+        self.update_budget_hint()
+
+        start_btn = QPushButton('🔍 开始搜索')
+        start_btn.clicked.connect(self.create_sweep)
+        start_btn.setStyleSheet('background-color: #27ae60; color: white; padding: 6px; font-weight: bold;')
+        form.addRow('', start_btn)
+        new_group.setLayout(form)
+        layout.addWidget(new_group)
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+
+        # 搜索列表
+        self.sweep_table = QTableWidget()
+        self.sweep_table.setColumnCount(6)
+        self.sweep_table.setHorizontalHeaderLabels(['ID', '名称', '状态', '最优 mAP50-95', '已注册模型', '创建时间'])
+        self.sweep_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.sweep_table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.sweep_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.sweep_table.itemSelectionChanged.connect(self.load_trials)
+        splitter.addWidget(self.sweep_table)
+
+        # 组合对比
+        self.trial_table = QTableWidget()
+        self.trial_table.setColumnCount(8)
+        self.trial_table.setHorizontalHeaderLabels(
+            ['组合', '学习率', '批次', '图像大小', '状态', '已训练轮数', '逐级 mAP50-95', '当前进度'])
+        self.trial_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.trial_table.setSortingEnabled(False)
+        splitter.addWidget(self.trial_table)
+        layout.addWidget(splitter)
+
+        btn_layout = QHBoxLayout()
+        self.toggle_btn = QPushButton('▶ 继续')
+        self.toggle_btn.clicked.connect(self.toggle_sweep)
+        btn_layout.addWidget(self.toggle_btn)
+
+        register_btn = QPushButton('💾 注册最优模型')
+        register_btn.clicked.connect(self.register_best)
+        btn_layout.addWidget(register_btn)
+
+        delete_btn = QPushButton('🗑️ 删除搜索')
+        delete_btn.clicked.connect(self.delete_sweep)
+        delete_btn.setStyleSheet('background-color: #e74c3c; color: white;')
+        btn_layout.addWidget(delete_btn)
+
+        btn_layout.addStretch()
+        close_btn = QPushButton('关闭')
+        close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+
+        self.setLayout(layout)
+
+    @staticmethod
+    def create_spin_box(minimum: int, maximum: int, value: int) -> QSpinBox:
+        spin_box = QSpinBox()
+        spin_box.setRange(minimum, maximum)
+        spin_box.setValue(value)
+        return spin_box
+
+    def settings(self) -> dict:
+        """当前预算设置"""
+        return {
+            'num_trials': self.trials_input.value(),
+            'min_epochs': self.min_epochs_input.value(),
+            'max_epochs': self.max_epochs_input.value(),
+            'reduction_factor': self.factor_input.value(),
+            'parallel': self.parallel_input.value()
+        }
+
+    def update_budget_hint(self):
+        """显示各级轮数和预计总训练轮数（与全部组合训练到最大轮数对比）"""
+        settings = self.settings()
+        if settings['min_epochs'] > settings['max_epochs']:
+            self.budget_label.setText('首级轮数不能大于最大轮数')
+            return
+        budgets = rung_budgets(settings['min_epochs'], settings['max_epochs'], settings['reduction_factor'])
+        trials, total, previous = settings['num_trials'], 0, 0
+        for budget in budgets:
+            total += trials * (budget - previous)
+            previous = budget
+            trials //= settings['reduction_factor']
+            if not trials:
+                break
+        full = settings['num_trials'] * settings['max_epochs']
+        self.budget_label.setText(f"各级累计轮数 {budgets}，预计共训练约 {total} 轮"
+                                  f"（全部组合训练到 {settings['max_epochs']} 轮需 {full} 轮）")
+
+    def selected_sweep_id(self):
+        """当前选中的搜索ID"""
+        row = self.sweep_table.currentRow()
+        item = self.sweep_table.item(row, 0) if row >= 0 else None
+        return int(item.text()) if item else None
+
+    def refresh(self):
+        """定时刷新"""
+        self.load_sweeps()
+        self.load_trials()
+
+    def load_sweeps(self):
+        """加载搜索列表"""
+        selected = self.selected_sweep_id()
+        sweeps = sweep_service.get_sweeps(user_id=self.user_info['id'])
+        self.sweep_table.blockSignals(True)
+        self.sweep_table.setRowCount(len(sweeps))
+        for i, sweep in enumerate(sweeps):
+            status = SWEEP_STATUSES.get(sweep['status'], sweep['status'])
+            if sweep['status'] == 'running' and not sweep['active']:
+                status = '已中断'
+            values = [
+                str(sweep['id']),
+                sweep['name'],
+                status,
+                f"{sweep['best_map']:.4f}" if sweep['best_map'] is not None else '',
+                sweep['registered_model'] or '',
+                str(sweep['created_at'])
+            ]
+            for column, value in enumerate(values):
+                self.sweep_table.setItem(i, column, QTableWidgetItem(value))
+            if sweep['error']:
+                self.sweep_table.item(i, 2).setToolTip(sweep['error'])
+            if sweep['id'] == selected or (selected is None and i == 0):
+                self.sweep_table.selectRow(i)
+        self.sweep_table.blockSignals(False)
+
+        sweep_id = self.selected_sweep_id()
+        running = sweep_id is not None and sweep_service.is_running(sweep_id)
+        self.toggle_btn.setText('⏹ 停止' if running else '▶ 继续')
+
+    def load_trials(self):
+        """加载选中搜索的全部组合"""
+        sweep_id = self.selected_sweep_id()
+        trials = sweep_service.get_trials(sweep_id) if sweep_id else []
+        self.trial_table.setRowCount(len(trials))
+        for i, trial in enumerate(trials):
+            params = trial['params']
+            progress = trial['progress']
+            values = [
+                f"#{trial['trial_no']}",
+                str(params.get('lr', '')),
+                str(params.get('batch_size', '')),
+                str(params.get('img_size', '')),
+                TRIAL_STATUSES.get(trial['status'], trial['status']),
+                str(trial['epochs_done']),
+                ' → '.join(f'{value:.4f}' for value in trial['rung_maps']),
+                f"第 {progress['rung'] + 1} 级 {progress['epoch']}/{progress['epochs']} 轮" if progress else ''
+            ]
+            for column, value in enumerate(values):
+                self.trial_table.setItem(i, column, QTableWidgetItem(value))
+            if trial['error']:
+                self.trial_table.item(i, 4).setToolTip(trial['error'])
+
+    def create_sweep(self):
+        """按当前设置创建并启动搜索"""
+        try:
+            batch_sizes = parse_int_list(self.batch_input.text())
+            img_sizes = parse_int_list(self.img_size_input.text())
+        except ValueError:
+            QMessageBox.warning(self, '警告', '批次大小和图像大小应为逗号分隔的整数')
+            return
+
+        search_space = {'lr': {'low': self.lr_low_input.value(), 'high': self.lr_high_input.value(), 'log': True}}
+        # 候选值为空时使用训练窗口的当前值
+        search_space['batch_size'] = batch_sizes or [self.train_config['batch_size']]
+        search_space['img_size'] = img_sizes or [self.train_config['img_size']]
+
+        result = sweep_service.create_sweep(
+            self.user_info['id'],
+            self.name_input.text().strip() or 'sweep',
+            self.train_config['base_model'],
+            self.train_config['data_yaml'],
+            search_space=search_space,
+            settings=self.settings()
+        )
+        if not result['success']:
+            QMessageBox.warning(self, '错误', f"创建搜索失败: {result['error']}")
+            return
+        sweep_service.start_sweep(result['sweep_id'])
+        self.sweep_table.clearSelection()
+        self.refresh()
+
+    def toggle_sweep(self):
+        """停止运行中的搜索，或继续已停止/中断的搜索"""
+        sweep_id = self.selected_sweep_id()
+        if sweep_id is None:
+            QMessageBox.warning(self, '警告', '请先选择搜索')
+            return
+        if sweep_service.is_running(sweep_id):
+            sweep_service.stop_sweep(sweep_id)
+        else:
+            sweep_service.start_sweep(sweep_id)
+        self.refresh()
+
+    def register_best(self):
+        """注册最优组合的权重"""
+        sweep_id = self.selected_sweep_id()
+        if sweep_id is None:
+            QMessageBox.warning(self, '警告', '请先选择搜索')
+            return
+        result = sweep_service.register_best(sweep_id, author=self.user_info.get('username'))
+        if result['success']:
+            QMessageBox.information(self, '成功', f"已注册模型: {result['model_name']} v{result['version']}")
+        else:
+            QMessageBox.warning(self, '错误', f"注册失败: {result['error']}")
+        self.refresh()
+
+    def delete_sweep(self):
+        """删除选中的搜索"""
+        sweep_id = self.selected_sweep_id()
+        if sweep_id is None:
+            QMessageBox.warning(self, '警告', '请先选择搜索')
+            return
+        reply = QMessageBox.question(self, '确认删除', '确定删除该搜索及其组合记录吗？（训练日志保留）')
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        if not sweep_service.delete_sweep(sweep_id):
+            QMessageBox.warning(self, '提示', '运行中的搜索不能删除，请先停止')
+        self.refresh()
@@ -0,0 +1,155 @@
+"""
+训练指标视图
+逐轮显示损失/mAP 曲线和指标表格，训练过程中按轮增量更新
+"""
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QTabWidget, QTableWidget, QTableWidgetItem, QLabel
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QPainter
+
+try:
+    from PyQt6.QtCharts import QChart, QChartView, QLineSeries, QValueAxis
+    CHARTS_AVAILABLE = True
+except ImportError:
+    # 未安装 PyQt6-Charts 时只显示表格
+    CHARTS_AVAILABLE = False
+
+# 表格列：(字段, 标题, 格式)
+TABLE_COLUMNS = [
+    ('epoch', 'Epoch', '{}'),
+    ('box_loss', 'box_loss', '{:.4f}'),
+    ('cls_loss', 'cls_loss', '{:.4f}'),
+    ('dfl_loss', 'dfl_loss', '{:.4f}'),
+    ('box_precision', 'P', '{:.4f}'),
+    ('box_recall', 'R', '{:.4f}'),
+    ('map50', 'mAP50', '{:.4f}'),
+    ('map50_95', 'mAP50-95', '{:.4f}'),
+    ('lr', '学习率', '{:.6f}'),
+    ('epoch_time', '耗时(s)', '{:.1f}'),
+    ('images_per_sec', '图片/秒', '{:.1f}')
+]
+
+# 曲线：(字段, 名称, 是否使用右侧 mAP 坐标轴)
+CHART_SERIES = [
+    ('box_loss', 'box_loss', False),
+    ('cls_loss', 'cls_loss', False),
+    ('dfl_loss', 'dfl_loss', False),
+    ('map50', 'mAP50', True),
+    ('map50_95', 'mAP50-95', True)
+]
+
+
+class TrainingMetricsView(QWidget):
+    """训练指标视图（曲线 + 逐轮指标表）"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.max_loss = 0.0
+        self.init_ui()
+
+    def init_ui(self):
+        """初始化UI"""
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        tabs = QTabWidget()
+
+        if CHARTS_AVAILABLE:
+            tabs.addTab(self.create_chart(), '📈 曲线')
+        else:
+            hint = QLabel('安装 PyQt6-Charts 后可显示训练曲线')
+            hint.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            tabs.addTab(hint, '📈 曲线')
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(TABLE_COLUMNS))
+        self.table.setHorizontalHeaderLabels([title for _, title, _ in TABLE_COLUMNS])
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        tabs.addTab(self.table, '📋 逐轮指标')
+
+        layout.addWidget(tabs)
+        self.setLayout(layout)
+
+    def create_chart(self):
+        """创建曲线图"""
+        self.chart = QChart()
+        self.chart.legend().setAlignment(Qt.AlignmentFlag.AlignBottom)
+
+        self.epoch_axis = QValueAxis()
+        self.epoch_axis.setTitleText('Epoch')
+        self.epoch_axis.setLabelFormat('%d')
+        self.loss_axis = QValueAxis()
+        self.loss_axis.setTitleText('Loss')
+        self.map_axis = QValueAxis()
+        self.map_axis.setTitleText('mAP')
+        self.map_axis.setRange(0, 1)
+        self.chart.addAxis(self.epoch_axis, Qt.AlignmentFlag.AlignBottom)
+        self.chart.addAxis(self.loss_axis, Qt.AlignmentFlag.AlignLeft)
+        self.chart.addAxis(self.map_axis, Qt.AlignmentFlag.AlignRight)
+
+        self.series = {}
+        for key, name, on_map_axis in CHART_SERIES:
+            series = QLineSeries()
+            series.setName(name)
+            self.chart.addSeries(series)
+            series.attachAxis(self.epoch_axis)
+            series.attachAxis(self.map_axis if on_map_axis else self.loss_axis)
+            self.series[key] = series
+
+        self.reset_axes()
+        view = QChartView(self.chart)
+        view.setRenderHint(QPainter.RenderHint.Antialiasing)
+        return view
+
+    def reset_axes(self):
+        self.max_loss = 0.0
+        if CHARTS_AVAILABLE:
+            self.epoch_axis.setRange(1, 2)
+            self.loss_axis.setRange(0, 1)
+
+    def clear(self):
+        """清空曲线和表格"""
+        self.table.setRowCount(0)
+        if CHARTS_AVAILABLE:
+            for series in self.series.values():
+                series.clear()
+        self.reset_axes()
+
+    def add_epoch(self, metrics: dict):
+        """
+        追加一轮指标
+
+        Args:
+            metrics: 含 epoch 和 TABLE_COLUMNS 中指标的字典（缺失或 None 的指标留空）
+        """
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        for column, (key, _, fmt) in enumerate(TABLE_COLUMNS):
+            value = metrics.get(key)
+            item = QTableWidgetItem('' if value is None else fmt.format(value))
+            item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            self.table.setItem(row, column, item)
+        self.table.scrollToBottom()
+
+        if not CHARTS_AVAILABLE:
+            return
+        epoch = metrics['epoch']
+        for key, _, on_map_axis in CHART_SERIES:
+            value = metrics.get(key)
+            if value is None:
+                continue
+            self.series[key].append(epoch, value)
+            if not on_map_axis and value > self.max_loss:
+                self.max_loss = value
+                self.loss_axis.setRange(0, value * 1.1)
+        self.epoch_axis.setRange(1, max(epoch, 2))
+
+    def set_metrics(self, rows: list):
+        """
+        显示一次训练的全部指标
+
+        Args:
+            rows: 按 epoch 升序的指标列表
+        """
+        self.clear()
+        for row in rows:
+            self.add_epoch(row)
@@ -6,16 +6,26 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QPushButton, QLabel, QLineEdit, QSpinBox, QDoubleSpinBox,
                              QFileDialog, QMessageBox, QGroupBox, QTextEdit, QProgressBar,
                              QTableWidget, QTableWidgetItem, QComboBox, QDialog, QFormLayout, 
-                             QDialogButtonBox)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+                             QDialogButtonBox, QTabWidget)
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont
-from services import training_service, model_manager
+from services import training_service, model_manager, training_queue, JOB_STATUSES
+from .training_metrics_view import TrainingMetricsView
 import config
 from pathlib import Path
 
+
+def format_duration(seconds) -> str:
+    """把秒数格式化为 时:分:秒"""
+    if seconds is None:
+        return '--:--'
+    seconds = int(seconds)
+    return f'{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}'
+
 class TrainingThread(QThread):
     """训练线程"""
     progress = pyqtSignal(str)
+    telemetry = pyqtSignal(dict)  # 批次进度/逐轮指标事件
     finished = pyqtSignal(dict)
     
     def __init__(self, base_model, data_yaml, epochs, batch_size, img_size, lr, project_name, user_id):
@@ -30,9 +40,34 @@ class TrainingThread(QThread):
         self.user_id = user_id
     
     def run(self):
-        """执行训练"""
+        """执行训练（占用一个训练队列槽位，与队列任务分开使用 CPU 核心）"""
+        slot = training_queue.reserve_slot('训练窗口启动的训练')
+        try:
+            self.train(training_queue.get_slot_cores(slot))
+        finally:
+            training_queue.release_slot(slot)
+    
+    def train(self, cpu_cores):
         self.progress.emit('正在准备训练...')
         
+        if config.TRAINING_WORKER_CONFIG['enabled']:
+            # 在独立子进程中准备模型并训练，界面和实时检测不受影响
+            self.progress.emit('训练进程启动中...')
+            result = training_service.start_training_process(
+                base_model=self.base_model,
+                data_yaml=self.data_yaml,
+                epochs=self.epochs,
+                batch_size=self.batch_size,
+                img_size=self.img_size,
+                lr=self.lr,
+                project_name=self.project_name,
+                user_id=self.user_id,
+                progress_callback=self.telemetry.emit,
+                cpu_cores=cpu_cores
+            )
+            self.finished.emit(result)
+            return
+        
         # 准备模型
         if not training_service.prepare_training(self.base_model):
             self.finished.emit({'success': False, 'error': '模型准备失败'})
@@ -48,11 +83,36 @@ class TrainingThread(QThread):
             img_size=self.img_size,
             lr=self.lr,
             project_name=self.project_name,
-            user_id=self.user_id
+            user_id=self.user_id,
+            progress_callback=self.telemetry.emit
         )
         
         self.finished.emit(result)
 
+class ResumeTrainingThread(QThread):
+    """继续训练线程（从 last.pt 继续已停止的训练）"""
+    progress = pyqtSignal(str)
+    telemetry = pyqtSignal(dict)  # 批次进度/逐轮指标事件
+    finished = pyqtSignal(dict)
+    
+    def __init__(self, log_id):
+        super().__init__()
+        self.log_id = log_id
+    
+    def run(self):
+        """继续训练（占用一个训练队列槽位）"""
+        self.progress.emit('正在加载检查点...')
+        slot = training_queue.reserve_slot('继续训练')
+        try:
+            if config.TRAINING_WORKER_CONFIG['enabled']:
+                result = training_service.resume_training_process(self.log_id, progress_callback=self.telemetry.emit,
+                                                                  cpu_cores=training_queue.get_slot_cores(slot))
+            else:
+                result = training_service.resume_training(self.log_id, progress_callback=self.telemetry.emit)
+        finally:
+            training_queue.release_slot(slot)
+        self.finished.emit(result)
+
 class TrainingWindow(QMainWindow):
     """训练窗口类"""
     
@@ -61,11 +121,18 @@ class TrainingWindow(QMainWindow):
         self.user_info = user_info
         self.training_thread = None
         self.init_ui()
+        
+        # 排队任务由后台调度线程执行（已启动时不会重复启动）
+        if config.TRAINING_QUEUE_CONFIG['enabled']:
+            training_queue.start()
+        self.queue_timer = QTimer(self)
+        self.queue_timer.timeout.connect(self.load_training_queue)
+        self.queue_timer.start(3000)
     
     def init_ui(self):
         """初始化UI"""
         self.setWindowTitle('模型训练管理')
-        self.setGeometry(100, 100, 1000, 700)
+        self.setGeometry(100, 100, 1200, 800)
         
         # 中心部件
         central_widget = QWidget()
@@ -223,6 +290,18 @@ class TrainingWindow(QMainWindow):
         self.stop_train_btn.setStyleSheet('background-color: #e74c3c; color: white; padding: 10px; font-weight: bold;')
         control_layout.addWidget(self.stop_train_btn)
         
+        self.enqueue_btn = QPushButton('📋 加入训练队列')
+        self.enqueue_btn.setToolTip('按当前配置提交训练任务，由后台依次执行，重启应用后继续排队')
+        self.enqueue_btn.clicked.connect(self.add_to_queue)
+        self.enqueue_btn.setStyleSheet('background-color: #2980b9; color: white; padding: 10px; font-weight: bold;')
+        control_layout.addWidget(self.enqueue_btn)
+        
+        self.sweep_btn = QPushButton('🔍 超参数搜索')
+        self.sweep_btn.setToolTip('自动搜索学习率、批次大小和图像大小，较差的组合提前淘汰')
+        self.sweep_btn.clicked.connect(self.open_sweep_dialog)
+        self.sweep_btn.setStyleSheet('background-color: #8e44ad; color: white; padding: 10px; font-weight: bold;')
+        control_layout.addWidget(self.sweep_btn)
+        
         layout.addLayout(control_layout)
         
         layout.addStretch()
@@ -260,13 +339,24 @@ class TrainingWindow(QMainWindow):
         progress_group.setLayout(progress_layout)
         layout.addWidget(progress_group)
         
-        # 训练历史
-        history_group = QGroupBox('训练历史')
+        # 训练曲线和逐轮指标
+        metrics_group = QGroupBox('训练指标')
+        metrics_layout = QVBoxLayout()
+        self.metrics_view = TrainingMetricsView()
+        metrics_layout.addWidget(self.metrics_view)
+        metrics_group.setLayout(metrics_layout)
+        layout.addWidget(metrics_group, stretch=2)
+        
+        # 训练历史 / 训练队列
+        history_tabs = QTabWidget()
+        history_group = QWidget()
         history_layout = QVBoxLayout()
         
         self.history_table = QTableWidget()
         self.history_table.setColumnCount(6)
         self.history_table.setHorizontalHeaderLabels(['ID', '模型', 'Epochs', 'Batch', '状态', '开始时间'])
+        self.history_table.setToolTip('双击查看该次训练的逐轮指标')
+        self.history_table.cellDoubleClicked.connect(self.show_history_metrics)
         history_layout.addWidget(self.history_table)
         
         # 历史操作按钮
@@ -276,6 +366,11 @@ class TrainingWindow(QMainWindow):
         refresh_btn.clicked.connect(self.load_training_history)
         history_btn_layout.addWidget(refresh_btn)
         
+        self.resume_btn = QPushButton('▶ 继续训练')
+        self.resume_btn.setToolTip('从 last.pt 继续选中的已停止训练（使用原训练参数）')
+        self.resume_btn.clicked.connect(self.resume_training)
+        history_btn_layout.addWidget(self.resume_btn)
+        
         delete_btn = QPushButton('🗑️ 删除选中')
         delete_btn.clicked.connect(self.delete_training_history)
         delete_btn.setStyleSheet('background-color: #e74c3c; color: white;')
@@ -289,11 +384,153 @@ class TrainingWindow(QMainWindow):
         history_layout.addLayout(history_btn_layout)
         
         history_group.setLayout(history_layout)
-        layout.addWidget(history_group)
+        history_tabs.addTab(history_group, '训练历史')
+        history_tabs.addTab(self.create_queue_panel(), '训练队列')
+        layout.addWidget(history_tabs)
+        
+        panel.setLayout(layout)
+        return panel
+    
+    def create_queue_panel(self):
+        """创建训练队列面板"""
+        panel = QWidget()
+        layout = QVBoxLayout()
+        
+        self.queue_table = QTableWidget()
+        self.queue_table.setColumnCount(8)
+        self.queue_table.setHorizontalHeaderLabels(['ID', '名称', '状态', '排队位置', '进度', '预计开始', '剩余/预计耗时', '提交时间'])
+        self.queue_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.queue_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.queue_table.setToolTip('双击查看该任务的逐轮指标')
+        self.queue_table.cellDoubleClicked.connect(self.show_job_metrics)
+        layout.addWidget(self.queue_table)
+        
+        btn_layout = QHBoxLayout()
+        
+        cancel_btn = QPushButton('⏹ 取消/停止')
+        cancel_btn.setToolTip('取消排队中的任务；运行中的任务在本轮结束后停止并保留检查点')
+        cancel_btn.clicked.connect(self.cancel_job)
+        btn_layout.addWidget(cancel_btn)
+        
+        requeue_btn = QPushButton('🔁 重新排队')
+        requeue_btn.setToolTip('已停止的任务重新排队后从检查点继续')
+        requeue_btn.clicked.connect(self.requeue_job)
+        btn_layout.addWidget(requeue_btn)
+        
+        delete_btn = QPushButton('🗑️ 删除任务')
+        delete_btn.clicked.connect(self.delete_job)
+        delete_btn.setStyleSheet('background-color: #e74c3c; color: white;')
+        btn_layout.addWidget(delete_btn)
         
+        layout.addLayout(btn_layout)
         panel.setLayout(layout)
+        
+        self.load_training_queue()
         return panel
     
+    def load_training_queue(self):
+        """刷新训练队列"""
+        if not self.isVisible() and self.queue_table.rowCount():
+            return
+        jobs = training_queue.get_jobs(user_id=self.user_info['id'], limit=50)
+        selected = self.selected_job_id()
+        self.queue_table.setRowCount(len(jobs))
+        
+        for i, job in enumerate(jobs):
+            if job['status'] == 'running':
+                remaining = format_duration(job['eta_finish'])
+            elif job['status'] == 'queued' and job['eta_start'] is not None and job['eta_finish'] is not None:
+                remaining = format_duration(job['eta_finish'] - job['eta_start'])
+            else:
+                remaining = ''
+            values = [
+                str(job['id']),
+                job['name'],
+                JOB_STATUSES.get(job['status'], job['status']),
+                str(job['position']) if job['position'] else '',
+                f"{job['progress'] * 100:.1f}%",
+                format_duration(job['eta_start']) if job['status'] == 'queued' else '',
+                remaining,
+                str(job['created_at'])
+            ]
+            for column, value in enumerate(values):
+                self.queue_table.setItem(i, column, QTableWidgetItem(value))
+            if job.get('error'):
+                self.queue_table.item(i, 2).setToolTip(job['error'])
+            if job['id'] == selected:
+                self.queue_table.selectRow(i)
+    
+    def selected_job_id(self):
+        """当前选中的任务ID"""
+        row = self.queue_table.currentRow()
+        item = self.queue_table.item(row, 0) if row >= 0 else None
+        return int(item.text()) if item else None
+    
+    def add_to_queue(self):
+        """按当前配置提交训练任务"""
+        train_config = self.collect_training_config()
+        if train_config is None:
+            return
+        
+        name = train_config['project_name'] or 'underwater_model'
+        result = training_queue.submit_job(self.user_info['id'], name, train_config)
+        if result['success']:
+            self.log_text.append(f"[系统] 训练任务已加入队列: {name} (ID: {result['job_id']})")
+            self.load_training_queue()
+        else:
+            QMessageBox.warning(self, '错误', f"加入队列失败: {result['error']}")
+    
+    def open_sweep_dialog(self):
+        """按当前数据集和基础模型打开超参数搜索"""
+        train_config = self.collect_training_config()
+        if train_config is None:
+            return
+        
+        from .sweep_dialog import SweepDialog
+        dialog = SweepDialog(self.user_info, train_config, self)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.show()
+    
+    def cancel_job(self):
+        """取消或停止选中的任务"""
+        job_id = self.selected_job_id()
+        if job_id is None:
+            QMessageBox.warning(self, '警告', '请先选择任务')
+            return
+        if not training_queue.cancel_job(job_id):
+            QMessageBox.warning(self, '提示', '只能取消排队中的任务或本进程正在运行的任务')
+        self.load_training_queue()
+    
+    def requeue_job(self):
+        """重新排队选中的任务"""
+        job_id = self.selected_job_id()
+        if job_id is None:
+            QMessageBox.warning(self, '警告', '请先选择任务')
+            return
+        if not training_queue.requeue_job(job_id):
+            QMessageBox.warning(self, '提示', '只能重新排队已停止、失败或已取消的任务')
+        self.load_training_queue()
+    
+    def delete_job(self):
+        """删除选中的任务记录"""
+        job_id = self.selected_job_id()
+        if job_id is None:
+            QMessageBox.warning(self, '警告', '请先选择任务')
+            return
+        if not training_queue.delete_job(job_id):
+            QMessageBox.warning(self, '提示', '运行中的任务不能删除，请先停止')
+        self.load_training_queue()
+    
+    def show_job_metrics(self, row, column):
+        """显示任务的逐轮指标"""
+        if self.training_thread and self.training_thread.isRunning():
+            return
+        job_id = self.selected_job_id()
+        job = next((job for job in training_queue.get_jobs(user_id=self.user_info['id'])
+                    if job['id'] == job_id), None)
+        if job and job['training_log_id']:
+            self.metrics_view.set_metrics(training_service.get_training_metrics(job['training_log_id']))
+    
     def select_dataset(self):
         """选择数据集"""
         dir_path = QFileDialog.getExistingDirectory(self, '选择数据集目录')
@@ -336,115 +573,202 @@ class TrainingWindow(QMainWindow):
                 if hasattr(self, 'log_text'):
                     self.log_text.append(f"[系统] 已从模型 '{model_info['name']}' 加载 {len(classes)} 个类别")
     
-    def start_training(self):
-        """开始训练"""
+    def collect_training_config(self):
+        """
+        校验输入并创建数据集配置
+        
+        Returns:
+            dict: 训练配置（base_model, data_yaml, epochs, batch_size, img_size, lr, project_name），输入无效时返回 None
+        """
         # 验证输入
         dataset_path = self.dataset_path_input.text().strip()
         if not dataset_path:
             QMessageBox.warning(self, '警告', '请选择数据集路径')
-            return
+            return None
         
         # 获取选中的模型
         model_info = self.base_model_combo.currentData()
         if not model_info or not isinstance(model_info, dict):
             QMessageBox.warning(self, '警告', '请先注册模型或选择一个可用模型')
-            return
+            return None
         
         base_model = model_info.get('file_path')
         if not base_model:
             QMessageBox.warning(self, '警告', '所选模型文件路径无效')
-            return
+            return None
         
         # 创建数据集配置
         classes = [c.strip() for c in self.classes_input.text().split(',')]
         train_path = self.train_path_input.text().strip()
         val_path = self.val_path_input.text().strip()
         
-        data_yaml = training_service.create_dataset_yaml(
-            dataset_path=dataset_path,
-            class_names=classes,
-            train_path=train_path,
-            val_path=val_path
-        )
+        try:
+            data_yaml = training_service.create_dataset_yaml(
+                dataset_path=dataset_path,
+                class_names=classes,
+                train_path=train_path,
+                val_path=val_path
+            )
+        except FileNotFoundError as e:
+            QMessageBox.warning(self, '警告', str(e))
+            return None
         
         # 获取训练参数
-        epochs = self.epochs_input.value()
-        batch_size = self.batch_input.value()
-        img_size = self.img_size_input.value()
-        lr = self.lr_input.value()
-        project_name = self.project_name_input.text().strip()
+        return {
+            'base_model': base_model,
+            'data_yaml': data_yaml,
+            'epochs': self.epochs_input.value(),
+            'batch_size': self.batch_input.value(),
+            'img_size': self.img_size_input.value(),
+            'lr': self.lr_input.value(),
+            'project_name': self.project_name_input.text().strip()
+        }
+    
+    def start_training(self):
+        """开始训练"""
+        if self.training_thread and self.training_thread.isRunning():
+            QMessageBox.warning(self, '警告', '已有训练任务在进行，可以加入训练队列')
+            return
+        
+        train_config = self.collect_training_config()
+        if train_config is None:
+            return
         
         # 创建训练线程
-        self.training_thread = TrainingThread(
-            base_model=base_model,
-            data_yaml=data_yaml,
-            epochs=epochs,
-            batch_size=batch_size,
-            img_size=img_size,
-            lr=lr,
-            project_name=project_name,
-            user_id=self.user_info['id']
-        )
+        self.training_thread = TrainingThread(user_id=self.user_info['id'], **train_config)
         
+        self.log_text.clear()
+        self.log_text.append('=== 训练开始 ===')
+        self.log_text.append(f'基础模型: {self.base_model_combo.currentText()}')
+        self.log_text.append(f'数据集: {self.dataset_path_input.text().strip()}')
+        self.log_text.append(f'训练轮数: {train_config["epochs"]}')
+        self.log_text.append('')
+        
+        # 开始训练
+        self.run_training_thread()
+    
+    def run_training_thread(self):
+        """连接信号并启动训练线程"""
         self.training_thread.progress.connect(self.update_progress)
+        self.training_thread.telemetry.connect(self.on_telemetry)
         self.training_thread.finished.connect(self.training_finished)
         
         # 更新UI状态
         self.start_train_btn.setEnabled(False)
+        self.resume_btn.setEnabled(False)
         self.stop_train_btn.setEnabled(True)
+        self.metrics_view.clear()
+        self.progress_bar.setValue(0)
+        
+        self.training_thread.start()
+    
+    def resume_training(self):
+        """继续选中的已停止训练"""
+        if self.training_thread and self.training_thread.isRunning():
+            QMessageBox.warning(self, '警告', '已有训练任务在进行')
+            return
+        
+        row = self.history_table.currentRow()
+        if row < 0:
+            QMessageBox.warning(self, '警告', '请先选择要继续的训练记录')
+            return
+        status_item = self.history_table.item(row, 4)
+        if status_item is None or status_item.text() != 'stopped':
+            QMessageBox.warning(self, '警告', '只能继续已停止的训练')
+            return
+        
+        log_id = int(self.history_table.item(row, 0).text())
+        self.training_thread = ResumeTrainingThread(log_id)
+        
         self.log_text.clear()
-        self.log_text.append('=== 训练开始 ===')
-        self.log_text.append(f'基础模型: {self.base_model_combo.currentText()}')
-        self.log_text.append(f'数据集: {dataset_path}')
-        self.log_text.append(f'训练轮数: {epochs}')
+        self.log_text.append(f'=== 继续训练 (ID: {log_id}) ===')
         self.log_text.append('')
         
-        # 开始训练
-        self.training_thread.start()
+        self.run_training_thread()
+        # 先显示已完成轮次的指标，后续轮次增量追加
+        self.metrics_view.set_metrics(training_service.get_training_metrics(log_id))
     
     def stop_training(self):
-        """停止训练"""
+        """停止训练（协作式停止，保存可继续训练的检查点）"""
         if self.training_thread and self.training_thread.isRunning():
-            reply = QMessageBox.question(
-                self,
-                '确认停止',
-                '确定要停止当前训练吗？\n\n'
-                '注意：由于 YOLO 训练机制限制，\n'
-                '停止可能需要等待当前 epoch 完成。',
-                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            box = QMessageBox(self)
+            box.setWindowTitle('确认停止')
+            box.setIcon(QMessageBox.Icon.Question)
+            box.setText('确定要停止当前训练吗？')
+            box.setInformativeText(
+                '本轮结束后停止：完成当前 epoch 的训练和验证并保存检查点。\n'
+                '立即停止：在下一个批次结束时停止，当前 epoch 的进度不保留，'
+                '检查点为上一轮结束时保存的 last.pt。\n\n'
+                '停止后可在训练历史中选中该记录继续训练。'
             )
+            epoch_btn = box.addButton('本轮结束后停止', QMessageBox.ButtonRole.AcceptRole)
+            immediate_btn = box.addButton('立即停止', QMessageBox.ButtonRole.DestructiveRole)
+            box.addButton('取消', QMessageBox.ButtonRole.RejectRole)
+            box.exec()
             
-            if reply == QMessageBox.StandardButton.Yes:
-                training_service.stop_training()
-                self.log_text.append('\n[系统] 正在停止训练...')
-                self.log_text.append('[提示] 请等待当前 epoch 完成，训练将保留已训练的权重')
-                
-                # 尝试终止线程（强制停止）
-                self.training_thread.stop()
-                # 给予一些时间让线程自然结束
-                self.training_thread.wait(5000)  # 等待5秒
-                
-                if self.training_thread.isRunning():
-                    # 如果还在运行，强制终止
-                    self.training_thread.terminate()
-                    self.training_thread.wait()
-                    self.log_text.append('[警告] 已强制终止训练进程')
-                
-                self.start_train_btn.setEnabled(True)
-                self.stop_train_btn.setEnabled(False)
-                self.log_text.append('[系统] 训练已停止')
+            clicked = box.clickedButton()
+            if clicked not in (epoch_btn, immediate_btn):
+                return
+            
+            immediate = clicked is immediate_btn
+            training_service.stop_training(immediate=immediate)
+            self.stop_train_btn.setEnabled(False)
+            self.log_text.append('\n[系统] 正在停止训练...')
+            if immediate:
+                self.log_text.append('[提示] 将在下一个批次结束时停止')
+            else:
+                self.log_text.append('[提示] 将在当前 epoch 完成并保存检查点后停止')
     
     def update_progress(self, message):
         """更新进度"""
         self.log_text.append(f'[进度] {message}')
         self.progress_label.setText(message)
     
+    def on_telemetry(self, event):
+        """处理训练遥测事件"""
+        epoch, epochs = event['epoch'], event['epochs']
+        if event['type'] == 'batch':
+            done = (epoch - 1 + event['batch'] / max(event['batches'], 1)) / max(epochs, 1)
+            self.progress_bar.setValue(int(done * 100))
+            losses = ' '.join(f'{key}={value:.4f}' for key, value in event['losses'].items())
+            self.progress_label.setText(
+                f"Epoch {epoch}/{epochs} · 批次 {event['batch']}/{event['batches']} · "
+                f"{event['images_per_sec']:.1f} 张/秒 · 剩余 {format_duration(event['eta'])}  {losses}"
+            )
+        else:
+            self.progress_bar.setValue(int(epoch / max(epochs, 1) * 100))
+            self.metrics_view.add_epoch(event)
+            map50_95 = event.get('map50_95')
+            self.log_text.append(
+                f"[Epoch {epoch}/{epochs}] mAP50-95: {map50_95 if map50_95 is not None else 'N/A'}  "
+                f"耗时 {event['epoch_time']:.1f}s  剩余 {format_duration(event['eta'])}"
+            )
+    
+    def show_history_metrics(self, row, column):
+        """显示历史训练的逐轮指标"""
+        if self.training_thread and self.training_thread.isRunning():
+            return
+        id_item = self.history_table.item(row, 0)
+        if id_item:
+            self.metrics_view.set_metrics(training_service.get_training_metrics(int(id_item.text())))
+    
     def training_finished(self, result):
         """训练完成"""
         self.start_train_btn.setEnabled(True)
+        self.resume_btn.setEnabled(True)
         self.stop_train_btn.setEnabled(False)
         
-        if result['success']:
+        if result.get('stopped'):
+            self.log_text.append(f'\n=== 训练已停止 ===')
+            self.log_text.append(f'已完成轮数: {result.get("epochs_done", 0)}')
+            if result.get('checkpoint'):
+                self.log_text.append(f'检查点: {result["checkpoint"]}')
+                self.log_text.append('[提示] 在训练历史中选中该记录并点击“继续训练”可从检查点继续')
+            else:
+                self.log_text.append('[警告] 尚未完成任何 epoch，没有可继续训练的检查点')
+            self.progress_label.setText('训练已停止')
+            self.load_training_history()
+        elif result['success']:
             self.log_text.append(f'\n=== 训练完成 ===')
             self.log_text.append(f'mAP: {result.get("final_map", 0):.4f}')
             self.log_text.append(f'权重保存: {result.get("weights_path", "N/A")}')
@@ -1,12 +1,19 @@
 """
 工具模块
 """
+from .startup import StartupTimer, startup_timer
 from .logger import LogManager, system_logger, auth_logger, inference_logger, training_logger
+from .lazy import LazyProxy, lazy_import, is_loaded
 
 __all__ = [
     'LogManager',
     'system_logger',
     'auth_logger',
     'inference_logger',
-    'training_logger'
+    'training_logger',
+    'StartupTimer',
+    'startup_timer',
+    'LazyProxy',
+    'lazy_import',
+    'is_loaded'
 ]
@@ -0,0 +1,91 @@
+"""
+工具模块 - 延迟加载
+服务单例与重量级依赖（ultralytics/torch/cv2）在首次使用时才创建/导入
+"""
+import importlib
+import threading
+import time
+from typing import Any, Callable
+
+
+class LazyProxy:
+    """
+    延迟创建对象的代理
+
+    第一次访问属性时调用 factory() 创建真实对象（线程安全，只创建一次），
+    之后所有属性访问都转发给真实对象。创建失败时不缓存，下次访问会重试。
+    """
+
+    def __init__(self, factory: Callable[[], Any], name: str = None):
+        """
+        初始化代理
+
+        Args:
+            factory: 创建真实对象的函数
+            name: 名称（用于日志和启动耗时报告）
+        """
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_name', name or getattr(factory, '__name__', 'object'))
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.RLock())
+
+    def _resolve(self) -> Any:
+        """获取真实对象（必要时创建）"""
+        instance = object.__getattribute__(self, '_instance')
+        if instance is not None:
+            return instance
+
+        with object.__getattribute__(self, '_lock'):
+            instance = object.__getattribute__(self, '_instance')
+            if instance is None:
+                name = object.__getattribute__(self, '_name')
+                start_time = time.perf_counter()
+                instance = object.__getattribute__(self, '_factory')()
+                object.__setattr__(self, '_instance', instance)
+
+                from .startup import startup_timer
+                startup_timer.record(f'加载 {name}', time.perf_counter() - start_time)
+            return instance
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._resolve(), name, value)
+
+    def __delattr__(self, name: str):
+        delattr(self._resolve(), name)
+
+    def __repr__(self) -> str:
+        instance = object.__getattribute__(self, '_instance')
+        if instance is None:
+            return f"<LazyProxy {object.__getattribute__(self, '_name')} (未加载)>"
+        return repr(instance)
+
+
+def lazy_import(module_name: str) -> Any:
+    """
+    延迟导入模块，首次访问模块属性时才真正导入
+
+    Args:
+        module_name: 模块名，例如 'cv2'
+
+    Returns:
+        模块代理对象
+    """
+    return LazyProxy(lambda: importlib.import_module(module_name), module_name)
+
+
+def is_loaded(obj: Any) -> bool:
+    """
+    判断延迟对象是否已创建（非 LazyProxy 对象始终返回 True）
+
+    Args:
+        obj: 对象
+
+    Returns:
+        bool: 是否已创建
+    """
+    if isinstance(obj, LazyProxy):
+        return object.__getattribute__(obj, '_instance') is not None
+    return True
@@ -1,73 +1,241 @@
 """
 工具模块 - 日志管理
-提供统一的日志记录功能
+提供统一的日志记录功能；文件和控制台输出由后台线程完成，同一代码位置的高频日志按周期限流
 """
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+import time
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from pathlib import Path
 from datetime import datetime
 import config
 
+
+class CallSiteRateLimiter(logging.Filter):
+    """
+    按代码位置限流的过滤器
+
+    同一位置（文件 + 行号）在每个周期内最多放行 limit 条，其余丢弃并计数；
+    下一周期放行的第一条日志附带上一周期省略的条数，之后不再出现的位置由 pending() 在退出时汇总。
+    只限流 max_level 及以下级别，错误日志始终输出。用于逐帧循环中的重复日志。
+    """
+
+    def __init__(self, limit: int, interval: float, max_level: int = logging.WARNING):
+        """
+        初始化过滤器
+
+        Args:
+            limit: 每个周期最多放行的条数
+            interval: 周期（秒）
+            max_level: 限流的最高日志级别
+        """
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self.max_level = max_level
+        self.suppressed = 0
+        self._sites = {}  # (文件, 行号) -> [周期开始时间, 已放行条数, 已省略条数, 最后省略的记录]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+        key = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.interval:
+                omitted = site[2] if site else 0
+                self._sites[key] = [now, 1, 0, None]
+            elif site[1] < self.limit:
+                site[1] += 1
+                omitted = 0
+            else:
+                site[2] += 1
+                site[3] = record
+                self.suppressed += 1
+                return False
+
+        if omitted:
+            record.msg = f"{record.getMessage()}（上一周期省略 {omitted} 条同位置日志）"
+            record.args = None
+        return True
+
+    def pending(self) -> list:
+        """
+        取出尚未报告的省略条数（每个位置一条汇总记录，内容为最后一条被省略的日志）
+
+        Returns:
+            list: 汇总日志记录列表
+        """
+        records = []
+        with self._lock:
+            for site in self._sites.values():
+                if site[2]:
+                    record = logging.makeLogRecord(site[3].__dict__)
+                    record.msg = f"{site[3].getMessage()}（省略 {site[2]} 条同位置日志）"
+                    record.args = None
+                    records.append(record)
+                    site[2], site[3] = 0, None
+        return records
+
+
+class _LocalQueueHandler(QueueHandler):
+    """
+    进程内队列处理器
+
+    记录原样入队，消息格式化和异常堆栈渲染都留给后台线程。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _SinkListener(QueueListener):
+    """按日志记录器名称把记录分发给对应输出处理器的队列监听器"""
+
+    def __init__(self, log_queue: queue.SimpleQueue, sinks: dict):
+        super().__init__(log_queue)
+        self.sinks = sinks
+
+    def handle(self, record: logging.LogRecord):
+        for handler in self.sinks.get(record.name, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
 class LogManager:
     """日志管理器"""
-    
+
     _loggers = {}
-    
+    _sinks = {}  # 日志记录器名称 -> 输出处理器列表（异步模式下由后台线程调用）
+    _queue = None
+    _listener = None
+    _lock = threading.RLock()
+
+    @classmethod
+    def _start_listener(cls):
+        """启动后台输出线程（首次创建日志记录器时调用）"""
+        if cls._listener is None:
+            cls._queue = queue.SimpleQueue()
+            cls._listener = _SinkListener(cls._queue, cls._sinks)
+            cls._listener.start()
+            cls._listener._thread.name = 'LogListener'
+
     @classmethod
     def get_logger(cls, name: str) -> logging.Logger:
         """
         获取日志记录器
-        
+
         Args:
             name: 日志记录器名称
-            
+
         Returns:
             logging.Logger: 日志记录器实例
         """
         if name in cls._loggers:
             return cls._loggers[name]
-        
-        logger = logging.getLogger(name)
-        logger.setLevel(getattr(logging, config.SYSTEM_CONFIG['log_level']))
-        
-        # 避免重复添加处理器
-        if logger.handlers:
+
+        with cls._lock:
+            if name in cls._loggers:
+                return cls._loggers[name]
+
+            logger = logging.getLogger(name)
+            logger.setLevel(getattr(logging, config.SYSTEM_CONFIG['log_level']))
+
+            # 避免重复添加处理器
+            if logger.handlers:
+                return logger
+
+            # 创建日志目录
+            log_dir = config.LOGS_DIR
+            log_dir.mkdir(parents=True, exist_ok=True)
+
+            # 控制台处理器
+            console_handler = logging.StreamHandler()
+            console_handler.setLevel(logging.INFO)
+            console_formatter = logging.Formatter(
+                config.LOG_CONFIG['format'],
+                datefmt=config.LOG_CONFIG['date_format']
+            )
+            console_handler.setFormatter(console_formatter)
+
+            # 文件处理器
+            log_file = log_dir / f"{name}_{datetime.now().strftime('%Y%m%d')}.log"
+            file_handler = RotatingFileHandler(
+                log_file,
+                maxBytes=config.LOG_CONFIG['max_bytes'],
+                backupCount=config.LOG_CONFIG['backup_count'],
+                encoding='utf-8'
+            )
+            file_handler.setLevel(logging.DEBUG)
+            file_formatter = logging.Formatter(
+                config.LOG_CONFIG['format'],
+                datefmt=config.LOG_CONFIG['date_format']
+            )
+            file_handler.setFormatter(file_formatter)
+
+            # 同一代码位置的高频日志限流（只用于逐帧推理等指定的日志记录器）
+            if config.LOG_CONFIG['call_site_limit'] and name in config.LOG_CONFIG['call_site_loggers']:
+                logger.addFilter(CallSiteRateLimiter(
+                    config.LOG_CONFIG['call_site_limit'],
+                    config.LOG_CONFIG['call_site_interval'],
+                    getattr(logging, config.LOG_CONFIG['call_site_max_level'])
+                ))
+
+            # 添加处理器
+            cls._sinks[name] = [console_handler, file_handler]
+            if config.LOG_CONFIG['async']:
+                cls._start_listener()
+                logger.addHandler(_LocalQueueHandler(cls._queue))
+            else:
+                logger.addHandler(console_handler)
+                logger.addHandler(file_handler)
+
+            if not cls._loggers:
+                # 退出时输出省略条数汇总和队列中剩余的日志
+                atexit.register(cls.shutdown)
+            cls._loggers[name] = logger
             return logger
-        
-        # 创建日志目录
-        log_dir = config.LOGS_DIR
-        log_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 控制台处理器
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        console_formatter = logging.Formatter(
-            config.LOG_CONFIG['format'],
-            datefmt=config.LOG_CONFIG['date_format']
-        )
-        console_handler.setFormatter(console_formatter)
-        
-        # 文件处理器
-        log_file = log_dir / f"{name}_{datetime.now().strftime('%Y%m%d')}.log"
-        file_handler = RotatingFileHandler(
-            log_file,
-            maxBytes=config.LOG_CONFIG['max_bytes'],
-            backupCount=config.LOG_CONFIG['backup_count'],
-            encoding='utf-8'
-        )
-        file_handler.setLevel(logging.DEBUG)
-        file_formatter = logging.Formatter(
-            config.LOG_CONFIG['format'],
-            datefmt=config.LOG_CONFIG['date_format']
-        )
-        file_handler.setFormatter(file_formatter)
-        
-        # 添加处理器
-        logger.addHandler(console_handler)
-        logger.addHandler(file_handler)
-        
-        cls._loggers[name] = logger
-        return logger
+
+    @classmethod
+    def add_handler(cls, name: str, handler: logging.Handler):
+        """
+        为日志记录器增加输出处理器（异步模式下在后台输出线程中调用）
+
+        Args:
+            name: 日志记录器名称
+            handler: 输出处理器
+        """
+        logger = cls.get_logger(name)
+        with cls._lock:
+            if cls._listener is not None and name in cls._sinks:
+                # 替换列表而不是原地修改，后台线程遍历时不受影响
+                cls._sinks[name] = cls._sinks[name] + [handler]
+            else:
+                logger.addHandler(handler)
+
+    @classmethod
+    def shutdown(cls):
+        """输出限流省略的条数和队列中剩余的日志并停止后台输出线程，之后的日志改为同步输出"""
+        with cls._lock:
+            for logger in cls._loggers.values():
+                for log_filter in logger.filters:
+                    if isinstance(log_filter, CallSiteRateLimiter):
+                        for record in log_filter.pending():
+                            # 直接交给处理器，不再经过限流过滤器
+                            logger.callHandlers(record)
+            listener, cls._listener = cls._listener, None
+            if listener is None:
+                return
+            listener.stop()
+            for name, logger in cls._loggers.items():
+                for handler in [h for h in logger.handlers if isinstance(h, _LocalQueueHandler)]:
+                    logger.removeHandler(handler)
+                for handler in cls._sinks.get(name, ()):
+                    logger.addHandler(handler)
 
 # 创建默认日志记录器
 system_logger = LogManager.get_logger('system')
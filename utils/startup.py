@@ -0,0 +1,80 @@
+"""
+工具模块 - 启动耗时统计
+记录从进程启动到登录窗口显示的各阶段耗时，以及服务的首次加载耗时
+"""
+import threading
+import time
+from typing import Dict, List
+
+
+class StartupTimer:
+    """启动耗时统计"""
+
+    def __init__(self):
+        """初始化（以创建时刻作为起点）"""
+        self.start_time = time.perf_counter()
+        self._last_mark = self.start_time
+        self._phases: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def mark(self, phase: str) -> float:
+        """
+        记录一个启动阶段结束
+
+        Args:
+            phase: 阶段名称
+
+        Returns:
+            float: 该阶段耗时（秒）
+        """
+        now = time.perf_counter()
+        with self._lock:
+            elapsed = now - self._last_mark
+            self._last_mark = now
+            self._phases.append({'phase': phase, 'elapsed': elapsed, 'at': now - self.start_time})
+        return elapsed
+
+    def record(self, phase: str, elapsed: float):
+        """
+        记录一个独立计时的事件（例如服务首次加载）
+
+        Args:
+            phase: 事件名称
+            elapsed: 耗时（秒）
+        """
+        with self._lock:
+            self._phases.append({
+                'phase': phase,
+                'elapsed': elapsed,
+                'at': time.perf_counter() - self.start_time
+            })
+
+    def elapsed(self) -> float:
+        """自启动以来的总耗时（秒）"""
+        return time.perf_counter() - self.start_time
+
+    def get_phases(self) -> List[Dict]:
+        """
+        获取已记录的阶段
+
+        Returns:
+            List[Dict]: [{phase, elapsed, at}, ...]，elapsed/at 单位为秒
+        """
+        with self._lock:
+            return [dict(p) for p in self._phases]
+
+    def report(self) -> str:
+        """
+        生成启动耗时报告
+
+        Returns:
+            str: 多行文本报告
+        """
+        lines = ['启动耗时报告:']
+        for p in self.get_phases():
+            lines.append(f"  {p['phase']:<24} {p['elapsed'] * 1000:8.1f} ms  (累计 {p['at'] * 1000:8.1f} ms)")
+        return '\n'.join(lines)
+
+
+# 全局启动计时器（随 utils 首次导入开始计时）
+startup_timer = StartupTimer()